@@ -0,0 +1,317 @@
+# app_groups.py
+import time
+from pathlib import Path
+
+import constants
+import process_handler
+
+
+class GroupError(Exception):
+    pass
+
+
+def get_groups(app):
+    """{group name: [project paths]} from config 'app_groups'."""
+    return {name: list(paths) for name, paths in (app.config_data.get("app_groups") or {}).items()}
+
+
+def set_group(app, name, app_paths):
+    groups = app.config_data.setdefault("app_groups", {})
+    if app_paths:
+        groups[name] = [str(path) for path in app_paths]
+    else:
+        groups.pop(name, None)
+    app.config_manager.save_config()
+
+
+def groups_of(app, app_path):
+    return [name for name, paths in sorted(get_groups(app).items()) if str(app_path) in paths]
+
+
+def get_dependencies(app, app_path):
+    """Projects that must be ready before this one starts (config 'app_dependencies', keyed by path)."""
+    return list((app.config_data.get("app_dependencies") or {}).get(str(app_path)) or [])
+
+
+def set_dependencies(app, app_path, dependency_paths):
+    dependencies = app.config_data.setdefault("app_dependencies", {})
+    if dependency_paths:
+        dependencies[str(app_path)] = [str(path) for path in dependency_paths]
+    else:
+        dependencies.pop(str(app_path), None)
+    app.config_manager.save_config()
+
+
+def dependency_closure(app, app_paths):
+    """The projects plus everything they depend on, transitively; unknown (removed) projects are left out."""
+    closure = set()
+    pending = [str(path) for path in app_paths]
+    while pending:
+        path = pending.pop()
+        if path in closure or path not in app.apps_data:
+            continue
+        closure.add(path)
+        pending.extend(get_dependencies(app, path))
+    return closure
+
+
+def compute_waves(app, app_paths):
+    """Splits projects into start waves: each wave only depends on earlier ones. Raises GroupError on a cycle.
+
+    Dependencies outside app_paths are ignored, so pass a dependency_closure to honour all of them.
+    """
+    app_paths = set(app_paths)
+    remaining = {path: set(get_dependencies(app, path)) & app_paths for path in app_paths}
+    waves = []
+    while remaining:
+        wave = sorted((path for path, dependencies in remaining.items() if not dependencies), key=lambda p: _name(app, p).lower())
+        if not wave:
+            raise GroupError(f"dependency cycle between {', '.join(sorted(_name(app, p) for p in remaining))}")
+        waves.append(wave)
+        for path in wave:
+            del remaining[path]
+        for dependencies in remaining.values():
+            dependencies.difference_update(wave)
+    return waves
+
+
+def describe_waves(app, waves):
+    """'auth → api, worker → web'."""
+    return " → ".join(", ".join(_name(app, path) for path in wave) for wave in waves) or "(empty)"
+
+
+def _name(app, app_path):
+    app_data = app.apps_data.get(app_path)
+    return app_data["name"] if app_data else Path(app_path).name
+
+
+def _is_active(status):
+    return status in ("Running", "Starting...", "Stopping...") or status.startswith("Running Script:")
+
+
+class _GroupRun:
+    def __init__(self, name, kind, waves):
+        self.name = name
+        self.kind = kind # "start" or "stop"
+        self.waves = waves
+        self.wave_index = 0
+        self.app_states = {path: "waiting" for wave in waves for path in wave}
+        self.status_at_launch = {}
+        self.wave_started_at = None
+        self.started_at = time.monotonic()
+        self.state = "Starting..." if kind == "start" else "Stopping..."
+
+    @property
+    def paths(self):
+        return [path for wave in self.waves for path in wave]
+
+
+class GroupRunner:
+    """Starts a group in dependency order and stops it in reverse.
+
+    Each wave is started in parallel through start_app, and the next wave begins once every app of this
+    one is Running, i.e. has passed its readiness check. An app that fails (or is still not Running after
+    GROUP_START_TIMEOUT_SECONDS) takes every app depending on it out of the start. Progress is read from
+    the apps' statuses, so the same runner works against a daemon, whose statuses arrive by polling.
+    All methods run on the Tk thread.
+    """
+
+    def __init__(self, app_instance, start_app=None, stop_app=None):
+        self.app = app_instance
+        self._start_app = start_app or (lambda path: process_handler.start_app_logic(self.app, path))
+        self._stop_app = stop_app or (lambda path: process_handler.stop_app_logic(self.app, path))
+        self.runs = {}
+        self._started_by_group = {} # Group name -> paths its last start launched, dependencies included
+
+    def group_state(self, name):
+        run = self.runs.get(name)
+        return run.state if run else "Idle"
+
+    def start_group(self, name):
+        members = get_groups(self.app).get(name)
+        if not members:
+            self.app._log(f"Group '{name}' has no projects.", warning=True)
+            return
+        paths = dependency_closure(self.app, members)
+        try:
+            waves = compute_waves(self.app, paths)
+        except GroupError as e:
+            self.app._log(f"Cannot start group '{name}': {e}.", error=True)
+            self.app.update_status_bar(f"Group '{name}' not started: {e}.")
+            return
+        pulled_in = sorted(_name(self.app, path) for path in paths - set(members))
+        self.app._log(f"Starting group '{name}' in {len(waves)} wave{'s' if len(waves) != 1 else ''}: {describe_waves(self.app, waves)}"
+                      + (f" (dependencies outside the group: {', '.join(pulled_in)})" if pulled_in else "") + ".")
+        run = _GroupRun(name, "start", waves)
+        self._replace_run(run)
+        self._started_by_group[name] = set()
+        self._start_wave(run)
+
+    def stop_group(self, name):
+        """Stops the group's projects, and the dependencies its last start launched, dependents first."""
+        members = set(get_groups(self.app).get(name) or []) | self._started_by_group.pop(name, set())
+        paths = {path for path in members if path in self.app.apps_data}
+        if not paths:
+            self.app._log(f"Group '{name}' has no projects.", warning=True)
+            return
+        try:
+            waves = list(reversed(compute_waves(self.app, paths)))
+        except GroupError:
+            waves = [sorted(paths)] # Stop order cannot be worked out; stop everything at once.
+        self.app._log(f"Stopping group '{name}': {describe_waves(self.app, waves)}.")
+        run = _GroupRun(name, "stop", waves)
+        self._replace_run(run)
+        self._stop_wave(run)
+
+    def _replace_run(self, run):
+        # A stop issued while the group is still starting supersedes the start: its polling ends at the next tick.
+        previous = self.runs.get(run.name)
+        self.runs[run.name] = run
+        for path in set(run.paths) | set(previous.paths if previous else []):
+            self._publish(path)
+
+    def _is_current(self, run):
+        return self.runs.get(run.name) is run
+
+    # --- Start ---
+    def _start_wave(self, run):
+        if run.wave_index == len(run.waves):
+            self._finish(run)
+            return
+        wave = run.waves[run.wave_index]
+        run.wave_started_at = time.monotonic()
+        run.state = f"Starting wave {run.wave_index + 1}/{len(run.waves)}..."
+        self.app.update_status_bar(f"Group '{run.name}': {run.state}")
+        for path in wave:
+            app_data = self.app.apps_data.get(path)
+            failed_dependencies = [_name(self.app, dep) for dep in get_dependencies(self.app, path)
+                                   if run.app_states.get(dep) in ("failed", "skipped")]
+            if app_data is None:
+                run.app_states[path] = "failed"
+            elif failed_dependencies:
+                run.app_states[path] = "skipped"
+                self.app._log(f"Group '{run.name}': not starting '{app_data['name']}' because "
+                              f"{', '.join(failed_dependencies)} did not start.", warning=True)
+            elif app_data.get("status") == "Running":
+                run.app_states[path] = "ready"
+            elif not app_data.get("is_installed"):
+                run.app_states[path] = "failed"
+                self.app._log(f"Group '{run.name}': '{app_data['name']}' is not installed.", error=True)
+            else:
+                run.app_states[path] = "starting"
+                run.status_at_launch[path] = app_data.get("status")
+                self._started_by_group[run.name].add(path)
+                self._start_app(path)
+            self._publish(path)
+        self._poll_start(run)
+
+    def _poll_start(self, run):
+        if not self._is_current(run):
+            return
+        wave = run.waves[run.wave_index]
+        timed_out = time.monotonic() - run.wave_started_at > constants.GROUP_START_TIMEOUT_SECONDS
+        pending = False
+        for path in wave:
+            if run.app_states[path] not in ("starting", "launched"):
+                continue
+            status = self.app.apps_data.get(path, {}).get("status", "")
+            if status == "Running":
+                run.app_states[path] = "ready"
+                self.app._log(f"Group '{run.name}': '{_name(self.app, path)}' is ready "
+                              f"({time.monotonic() - run.wave_started_at:.1f}s into wave {run.wave_index + 1}).")
+            elif status.startswith("Error") or (not _is_active(status) and
+                                                (run.app_states[path] == "launched" or status != run.status_at_launch[path])):
+                run.app_states[path] = "failed"
+                self.app._log(f"Group '{run.name}': '{_name(self.app, path)}' failed to start ({status}).", error=True)
+            elif timed_out:
+                run.app_states[path] = "failed"
+                self.app._log(f"Group '{run.name}': '{_name(self.app, path)}' was not ready after "
+                              f"{constants.GROUP_START_TIMEOUT_SECONDS}s ({status}).", error=True)
+            else:
+                # 'launched' once its start shows up in the status; an inactive status after that (or any new
+                # one, should the start have been missed between two daemon polls) means it did not come up.
+                if run.app_states[path] == "starting" and status == "Starting...":
+                    run.app_states[path] = "launched"
+                pending = True
+                continue
+            self._publish(path)
+        if pending:
+            self.app.after(constants.GROUP_POLL_INTERVAL_MS, lambda: self._poll_start(run))
+            return
+        run.wave_index += 1
+        self._start_wave(run)
+
+    # --- Stop ---
+    def _stop_wave(self, run):
+        if run.wave_index == len(run.waves):
+            self._finish(run)
+            return
+        wave = run.waves[run.wave_index]
+        run.wave_started_at = time.monotonic()
+        run.state = f"Stopping wave {run.wave_index + 1}/{len(run.waves)}..."
+        self.app.update_status_bar(f"Group '{run.name}': {run.state}")
+        for path in wave:
+            if _is_active(self.app.apps_data.get(path, {}).get("status", "")):
+                run.app_states[path] = "stopping"
+                self._stop_app(path)
+            else:
+                run.app_states[path] = "stopped"
+            self._publish(path)
+        self._poll_stop(run)
+
+    def _poll_stop(self, run):
+        if not self._is_current(run):
+            return
+        wave = run.waves[run.wave_index]
+        timed_out = time.monotonic() - run.wave_started_at > constants.GROUP_STOP_TIMEOUT_SECONDS
+        pending = False
+        for path in wave:
+            if run.app_states[path] != "stopping":
+                continue
+            status = self.app.apps_data.get(path, {}).get("status", "")
+            if not _is_active(status) or timed_out:
+                run.app_states[path] = "stopped" if not _is_active(status) else "failed"
+                if timed_out and _is_active(status):
+                    self.app._log(f"Group '{run.name}': '{_name(self.app, path)}' is still {status} after "
+                                  f"{constants.GROUP_STOP_TIMEOUT_SECONDS}s; stopping the next wave anyway.", warning=True)
+                self._publish(path)
+            else:
+                pending = True
+        if pending:
+            self.app.after(constants.GROUP_POLL_INTERVAL_MS, lambda: self._poll_stop(run))
+            return
+        run.wave_index += 1
+        self._stop_wave(run)
+
+    # --- Common ---
+    def _finish(self, run):
+        states = list(run.app_states.values())
+        seconds = time.monotonic() - run.started_at
+        if run.kind == "start":
+            failed, skipped = states.count("failed"), states.count("skipped")
+            if failed or skipped:
+                run.state = f"Failed ({failed} failed, {skipped} skipped)"
+                self.app._log(f"Group '{run.name}' started with problems after {seconds:.1f}s: "
+                              f"{failed} failed, {skipped} skipped.", error=True)
+            else:
+                run.state = "Running"
+                self.app._log(f"Group '{run.name}' is up: {len(states)} app{'s' if len(states) != 1 else ''} "
+                              f"ready in {seconds:.1f}s.")
+        else:
+            run.state = "Stopped" if "failed" not in states else "Stopped (some apps did not stop)"
+            self.app._log(f"Group '{run.name}' stopped in {seconds:.1f}s.")
+        self.app.update_status_bar(f"Group '{run.name}': {run.state}")
+
+    def _publish(self, path):
+        """Shows every run the project takes part in, e.g. 'stack: starting (wave 2/3)', in its Group column."""
+        labels = []
+        for name, run in sorted(self.runs.items()):
+            state = run.app_states.get(path)
+            if state is None:
+                continue
+            if state in ("waiting", "starting", "launched", "stopping"):
+                wave_number = next(i for i, wave in enumerate(run.waves) if path in wave) + 1
+                state = f"{'starting' if state == 'launched' else state} (wave {wave_number}/{len(run.waves)})"
+            labels.append(f"{name}: {state}")
+        if path in self.app.apps_data:
+            self.app._update_app_status(path, group_state="; ".join(labels))
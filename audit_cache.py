@@ -0,0 +1,188 @@
+# audit_cache.py
+import json
+import os
+import subprocess
+import threading
+import time
+
+import constants
+import dependency_fingerprint
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+SEVERITY_ORDER = ("critical", "high", "moderate", "low", "info")
+
+
+class AuditError(Exception):
+    pass
+
+
+def _empty_counts():
+    return {severity: 0 for severity in SEVERITY_ORDER}
+
+
+def parse_audit_json(raw_output):
+    """Turns `npm audit --json` output (npm 6 or npm 7+ format) into {'counts', 'findings'}."""
+    try:
+        report = json.loads(raw_output)
+    except json.JSONDecodeError as e:
+        raise AuditError(f"npm audit did not return JSON: {e}")
+    if isinstance(report.get("error"), dict):
+        error = report["error"]
+        raise AuditError(f"{error.get('code', 'npm error')}: {error.get('summary', '').strip()}")
+
+    counts = _empty_counts()
+    for severity, count in (report.get("metadata", {}).get("vulnerabilities") or {}).items():
+        if severity in counts:
+            counts[severity] = int(count)
+
+    findings = []
+    if "vulnerabilities" in report: # npm 7+ (auditReportVersion 2)
+        for package_name, vuln in report["vulnerabilities"].items():
+            for via in vuln.get("via", []):
+                # String entries only point at another vulnerable package; the advisory itself is listed there.
+                if not isinstance(via, dict):
+                    continue
+                findings.append({
+                    "package": package_name,
+                    "severity": via.get("severity", vuln.get("severity", "info")),
+                    "advisory": str(via.get("source", via.get("url", via.get("title", "?")))),
+                    "title": via.get("title", ""),
+                    "url": via.get("url", ""),
+                    "range": via.get("range", vuln.get("range", "")),
+                    "is_direct": bool(vuln.get("isDirect")),
+                    "fix_available": bool(vuln.get("fixAvailable")),
+                })
+    else: # npm 6
+        for advisory_id, advisory in (report.get("advisories") or {}).items():
+            findings.append({
+                "package": advisory.get("module_name", "?"),
+                "severity": advisory.get("severity", "info"),
+                "advisory": str(advisory.get("id", advisory_id)),
+                "title": advisory.get("title", ""),
+                "url": advisory.get("url", ""),
+                "range": advisory.get("vulnerable_versions", ""),
+                "is_direct": False,
+                "fix_available": bool(advisory.get("patched_versions")),
+            })
+    return {"counts": counts, "findings": findings}
+
+
+def summarize_counts(counts):
+    """Short Treeview text, e.g. '7 (2 critical)'; '-' when the project has never been audited."""
+    if counts is None:
+        return "-"
+    total = sum(counts.values())
+    if total == 0:
+        return "0"
+    top_severity = next(sev for sev in SEVERITY_ORDER if counts.get(sev))
+    return f"{total} ({counts[top_severity]} {top_severity})"
+
+
+def severity_score(counts):
+    if counts is None:
+        return None
+    return sum(counts.get(sev, 0) * (1000 ** (len(SEVERITY_ORDER) - i)) for i, sev in enumerate(SEVERITY_ORDER))
+
+
+def aggregate(results):
+    """Fleet-wide rollup of {project_name: parsed_result}: totals by severity and per-advisory project lists."""
+    totals = _empty_counts()
+    advisories = {}
+    for project_name, result in results.items():
+        for severity, count in result["counts"].items():
+            totals[severity] = totals.get(severity, 0) + count
+        for finding in result["findings"]:
+            entry = advisories.setdefault(finding["advisory"], {
+                "advisory": finding["advisory"], "title": finding["title"], "severity": finding["severity"],
+                "url": finding["url"], "packages": set(), "projects": set(),
+            })
+            entry["packages"].add(finding["package"])
+            entry["projects"].add(project_name)
+    rank = {sev: i for i, sev in enumerate(SEVERITY_ORDER)}
+    advisory_list = sorted(advisories.values(), key=lambda a: (rank.get(a["severity"], len(rank)), -len(a["projects"]), a["title"]))
+    return {"by_severity": totals, "advisories": advisory_list}
+
+
+class AuditCache:
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.cache_file_path = get_app_config_dir() / constants.AUDIT_CACHE_FILE_NAME
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_json_store(self.cache_file_path, self.app, "audit cache")
+
+    def _save(self):
+        save_json_store(self.cache_file_path, self._data, self.app, "audit cache")
+
+    @staticmethod
+    def lockfile_hash(app_path):
+        lockfile_path = dependency_fingerprint.get_lockfile_path(app_path)
+        return dependency_fingerprint.file_digest(lockfile_path) if lockfile_path else None
+
+    def get_cached(self, app_path):
+        """Cached parsed result if the lockfile is unchanged since it was audited, else None."""
+        lock_hash = self.lockfile_hash(app_path)
+        if lock_hash is None:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._data.get(str(app_path))
+        if entry and entry.get("lock_hash") == lock_hash:
+            return entry["result"]
+        return None
+
+    def all_cached(self, app_paths):
+        cached_results = {}
+        for path in app_paths:
+            result = self.get_cached(path)
+            if result is not None:
+                cached_results[path] = result
+        return cached_results
+
+    def apply_cached_results(self, app_paths):
+        """Fills the Vulns column from cache in the background (hashing lockfiles can take a moment)."""
+        app_paths = list(app_paths)
+
+        def task():
+            for path, result in self.all_cached(app_paths).items():
+                self.app.after(0, lambda p=path, c=result["counts"]: \
+                               self.app._update_app_status(p, audit_counts=c) if p in self.app.apps_data else None)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def audit_project(self, app_path, force=False):
+        """Returns (parsed_result, from_cache). Raises AuditError/FileNotFoundError if npm audit cannot run."""
+        if not force:
+            cached = self.get_cached(app_path)
+            if cached is not None:
+                return cached, True
+
+        lock_hash = self.lockfile_hash(app_path)
+        if lock_hash is None:
+            raise AuditError("no package-lock.json (npm audit needs a lockfile)")
+
+        process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        # npm audit exits non-zero when vulnerabilities are found, so the exit code alone means little.
+        proc = subprocess.run(
+            [constants.NPM_CMD, "audit", "--json"], cwd=str(app_path), capture_output=True, text=True,
+            check=False, encoding='utf-8', errors='replace', creationflags=process_flags,
+            timeout=constants.AUDIT_TIMEOUT_SECONDS
+        )
+        if not proc.stdout.strip():
+            raise AuditError(proc.stderr.strip() or f"npm audit exited with code {proc.returncode} and no output")
+        result = parse_audit_json(proc.stdout)
+
+        with self._lock:
+            self._load()
+            self._data[str(app_path)] = {"lock_hash": lock_hash, "audited_at": time.time(), "result": result}
+            self._save()
+        return result, False
+
+    def remove(self, app_path):
+        with self._lock:
+            self._load()
+            if self._data.pop(str(app_path), None) is not None:
+                self._save()
@@ -0,0 +1,223 @@
+# bulk_operations.py
+import subprocess
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import constants
+import dependency_fingerprint
+import audit_cache
+
+# Each bulk operation maps to the interim/final statuses the single-project
+# actions already use, so the Treeview looks the same either way.
+BULK_OPERATIONS = {
+    "install": {"label": "Install All", "interim": "Installing...", "success": "Installed", "fail": "Error (Install)"},
+    "ci": {"label": "ci All", "interim": "Installing...", "success": "Installed", "fail": "Error (Install)"},
+    "update": {"label": "Update All", "interim": "Updating Deps...", "success": "Installed", "fail": "Error (Update)"},
+    "audit": {"label": "Audit All", "interim": "Auditing...", "success": "Installed", "fail": "Error (Audit)"},
+}
+
+
+def has_lockfile(app_path):
+    return any((Path(app_path) / name).is_file() for name in constants.LOCKFILE_NAMES)
+
+
+def build_bulk_command(operation, app_path):
+    """Returns the npm command list for an operation, or None if it cannot run for this project."""
+    lockfile = has_lockfile(app_path)
+    if operation in ("install", "ci"):
+        if operation == "ci" and not lockfile:
+            return None
+        base = [constants.NPM_CMD, "ci"] if lockfile else [constants.NPM_CMD, "install"]
+        return base + list(constants.BULK_INSTALL_EXTRA_ARGS)
+    if operation == "update":
+        return [constants.NPM_CMD, "update"] + list(constants.BULK_INSTALL_EXTRA_ARGS)
+    return None
+
+
+def get_max_workers(operation):
+    cpu_count = os.cpu_count() or 2
+    if operation == "audit":
+        # Audits are network-bound and barely touch the disk.
+        return max(1, min(constants.BULK_AUDIT_MAX_WORKERS, cpu_count * 2))
+    # Installs contend for the npm cache and the disk, so keep the fan-out modest.
+    return max(1, min(constants.BULK_INSTALL_MAX_WORKERS, cpu_count))
+
+
+def resolve_target_paths(app, selected_paths):
+    """Selected projects if more than one is selected, otherwise every known project."""
+    selected = [p for p in selected_paths if p in app.apps_data]
+    if len(selected) > 1:
+        return selected
+    return sorted(app.apps_data.keys(), key=lambda p: app.apps_data[p]["name"].lower())
+
+
+def _is_busy_or_running(app_data):
+    status = app_data.get("status", "Unknown")
+    return status == "Running" or status.startswith("Running Script:") or status.endswith("...")
+
+
+def _run_audit(app, app_path, app_name, result):
+    """Audit via the lockfile-keyed cache; only projects whose lockfile changed actually run npm audit."""
+    result["command"] = "npm audit"
+    t_start = time.perf_counter()
+    try:
+        audit_result, from_cache = app.audit_cache.audit_project(app_path)
+        result["duration"] = time.perf_counter() - t_start
+        result["ok"] = True
+        summary = audit_cache.summarize_counts(audit_result["counts"])
+        result["result"] = f"{'Cached' if from_cache else 'OK'}: {summary} vulnerabilities"
+        app.after(0, lambda p=app_path, c=audit_result["counts"]: \
+                  app._update_app_status(p, audit_counts=c) if p in app.apps_data else None)
+    except FileNotFoundError:
+        result["duration"] = time.perf_counter() - t_start
+        result["result"] = "Failed (npm not found)"
+    except (audit_cache.AuditError, subprocess.TimeoutExpired) as e:
+        result["duration"] = time.perf_counter() - t_start
+        result["result"] = f"Failed ({e})"
+        app._log(f"[{app_name}] Audit failed: {e}", error=True)
+    return result
+
+
+def new_result(app, app_path, command="-"):
+    """The per-project result run_for_each_project collects; run_one fills in result, duration and ok."""
+    app_data = app.apps_data.get(app_path)
+    app_name = app_data["name"] if app_data else Path(app_path).name
+    return {"path": app_path, "name": app_name, "command": command, "result": "", "duration": 0.0, "ok": False}
+
+
+def run_for_each_project(app, label, app_paths, run_one, workers, thread_name_prefix, on_complete=None, ok_note=None):
+    """Runs run_one(app_path), which returns a new_result() dict, for every project, workers at a time.
+
+    A coordinator thread shows progress in the status bar and logs a summary; results starting with "Failed"
+    or "Skipped" count as such, and ok_note(ok_results) may add detail to the OK count. on_complete(results,
+    summary) runs on the Tk thread with the results sorted by project name.
+    """
+    targets = [str(Path(p).resolve()) for p in app_paths]
+    total = len(targets)
+
+    results = []
+    results_lock = threading.Lock()
+    progress = {"done": 0, "failed": 0}
+
+    def report_progress():
+        msg = f"{label}: {progress['done']}/{total} done"
+        if progress["failed"]:
+            msg += f" ({progress['failed']} failed)"
+        app.after(0, lambda m=msg: app.update_status_bar(m))
+
+    def coordinator():
+        t_start = time.perf_counter()
+        app._log(f"{label}: starting across {total} project(s) with {workers} parallel worker(s)...")
+        report_progress()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+            futures = [executor.submit(run_one, p) for p in targets]
+            for future in as_completed(futures):
+                try:
+                    res = future.result()
+                except Exception as e:
+                    res = {"path": "-", "name": "?", "command": "-", "result": f"Failed ({e})", "duration": 0.0, "ok": False}
+                with results_lock:
+                    results.append(res)
+                    progress["done"] += 1
+                    if res["result"].startswith("Failed"):
+                        progress["failed"] += 1
+                report_progress()
+
+        elapsed = time.perf_counter() - t_start
+        ok_results = [r for r in results if r["ok"]]
+        skipped_count = sum(1 for r in results if r["result"].startswith("Skipped"))
+        ok_text = f"{len(ok_results)} OK" + (f" ({ok_note(ok_results)})" if ok_note else "")
+        summary = f"{label} finished in {elapsed:.1f}s: {ok_text}, {progress['failed']} failed, {skipped_count} skipped."
+        app._log(summary, warning=bool(progress["failed"]))
+        results.sort(key=lambda r: r["name"].lower())
+        app.after(0, lambda m=summary: app.update_status_bar(m))
+        app.after(0, app._update_action_buttons_state)
+        if on_complete:
+            app.after(0, lambda r=list(results), m=summary: on_complete(r, m))
+
+    threading.Thread(target=coordinator, daemon=True).start()
+
+
+def run_bulk_operation(app, operation, app_paths, max_workers=None, on_complete=None):
+    if operation not in BULK_OPERATIONS:
+        app._log(f"Unknown bulk operation '{operation}'.", error=True)
+        return
+
+    op_info = BULK_OPERATIONS[operation]
+    label = op_info["label"]
+
+    def run_one(app_path):
+        app_data = app.apps_data.get(app_path)
+        result = new_result(app, app_path)
+        app_name = result["name"]
+
+        if app_data is None:
+            result["result"] = "Skipped (removed)"
+            return result
+        if operation != "audit" and _is_busy_or_running(app_data):
+            result["result"] = f"Skipped ({app_data.get('status', 'busy')})"
+            return result
+        if operation == "update" and not app_data.get("is_installed"):
+            result["result"] = "Skipped (not installed)"
+            return result
+
+        if operation == "install" and \
+           dependency_fingerprint.get_dependency_state(app, app_path, app_data.get("package_data")) == "current":
+            result["result"] = "Skipped (up to date)"
+            return result
+
+        if operation == "audit":
+            if not has_lockfile(app_path):
+                result["result"] = "Skipped (no lockfile)"
+                return result
+            return _run_audit(app, app_path, app_name, result)
+
+        cmd = build_bulk_command(operation, app_path)
+        if cmd is None:
+            result["result"] = "Skipped (no lockfile)"
+            return result
+        result["command"] = " ".join(cmd[:2])
+
+        app.after(0, lambda p=app_path, s=op_info["interim"]: app._update_app_status(p, status=s))
+        process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        t_start = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                cmd, cwd=app_path, capture_output=True, text=True, check=False,
+                encoding='utf-8', errors='replace', creationflags=process_flags
+            )
+            result["duration"] = time.perf_counter() - t_start
+            if proc.returncode == 0:
+                result["ok"] = True
+                result["result"] = "OK"
+                app._log(f"[{app_name}] {label}: '{' '.join(cmd)}' completed in {result['duration']:.1f}s.")
+                status_kwargs = {"status": op_info["success"]}
+                if operation in ("install", "ci"):
+                    status_kwargs["is_installed"] = True
+                if operation in ("install", "ci", "update"):
+                    app.fingerprint_store.record(app_path)
+            else:
+                result["result"] = f"Failed (code {proc.returncode})"
+                stderr_tail = "\n".join(proc.stderr.strip().splitlines()[-constants.BULK_LOG_TAIL_LINES:])
+                app._log(f"[{app_name}] {label}: '{' '.join(cmd)}' failed (code {proc.returncode}). {stderr_tail}", error=True)
+                status_kwargs = {"status": op_info["fail"]}
+        except FileNotFoundError:
+            result["duration"] = time.perf_counter() - t_start
+            result["result"] = "Failed (npm not found)"
+            app._log(f"Error: Command '{cmd[0]}' not found. Is it in PATH?", error=True)
+            status_kwargs = {"status": "Error (Command)"}
+        except Exception as e:
+            result["duration"] = time.perf_counter() - t_start
+            result["result"] = f"Failed ({e})"
+            app._log(f"Exception during {label} for '{app_name}': {e}", error=True)
+            status_kwargs = {"status": "Error (Exception)"}
+
+        if app_path in app.apps_data:
+            app.after(0, lambda p=app_path, kw=status_kwargs: app._update_app_status(p, **kw))
+        return result
+
+    run_for_each_project(app, label, app_paths, run_one, max_workers or get_max_workers(operation),
+                         f"bulk-{operation}", on_complete=on_complete)
@@ -0,0 +1,358 @@
+# cli.py
+# Command-line frontend: `python cli.py status|start|stop|restart|run|logs|scan ...`.
+# Talks to the daemon when one is running (starting one for start/restart/run), or manages projects
+# in-process with --local. Never creates a Tk root, so it works on machines without a display.
+import argparse
+import fnmatch
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import constants
+import daemon_client
+from manager_core import HeadlessManager
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+SETTLE_POLL_SECONDS = 0.5
+
+
+class CliError(Exception):
+    pass
+
+
+def is_settled(app):
+    status = app.get("status") or ""
+    return not status.endswith("...")
+
+
+def select_apps(apps, selectors, select_all=False):
+    """Matches names, folder names (both accept globs) or paths; keeps the order of `apps`."""
+    if select_all:
+        return list(apps)
+    if not selectors:
+        raise CliError("no projects selected (give names/globs/paths or --all)")
+    selected = []
+    unmatched = []
+    for selector in selectors:
+        resolved_selector = str(Path(selector).expanduser().resolve()) if ("/" in selector or "\\" in selector) else None
+        matches = [app for app in apps
+                   if app["path"] == resolved_selector
+                   or fnmatch.fnmatchcase(app["name"], selector)
+                   or fnmatch.fnmatchcase(Path(app["path"]).name, selector)]
+        if not matches:
+            unmatched.append(selector)
+        selected.extend(app for app in matches if app not in selected)
+    if unmatched:
+        raise CliError(f"no project matches: {', '.join(unmatched)}")
+    return [app for app in apps if app in selected]
+
+
+# --- Backends ---
+class DaemonBackend:
+    def __init__(self, client):
+        self.client = client
+
+    def list_apps(self):
+        return self.client.list_apps()
+
+    def scan(self):
+        return self.client.scan(wait=True)
+
+    def action(self, action, paths, script=None):
+        return self.client.action(action, paths, script=script)
+
+    def logs(self, since=0):
+        return self.client.logs(since)
+
+    def follow_logs(self, since):
+        for _, line in self.client.stream_logs(since):
+            yield line
+
+    def close(self):
+        pass
+
+
+class LocalBackend:
+    """Runs a HeadlessManager inside this process; apps it starts live only as long as the command runs."""
+
+    def __init__(self, projects_folder=None):
+        self.manager = HeadlessManager(projects_folder=projects_folder)
+        self._loop_thread = threading.Thread(target=self.manager.run_forever, name="cli-manager", daemon=True)
+        self._loop_thread.start()
+        self._scanned = False
+
+    def _call(self, func, *args):
+        return self.manager.loop.call(func, *args, timeout=constants.DAEMON_REQUEST_TIMEOUT_SECONDS)
+
+    def list_apps(self):
+        if not self._scanned:
+            return self.scan()
+        return self._call(self.manager.list_apps)
+
+    def scan(self):
+        done = threading.Event()
+        self.manager.after(0, lambda: self.manager.scan_projects_folder(on_done=done.set))
+        done.wait()
+        self._scanned = True
+        return self._call(self.manager.list_apps)
+
+    def action(self, action, paths, script=None):
+        results = []
+        for path in paths:
+            try:
+                results.append({"path": path, "ok": True, "app": self._call(self.manager.perform_action, action, path, script)})
+            except ValueError as e:
+                results.append({"path": path, "ok": False, "error": str(e)})
+        return results
+
+    def logs(self, since=0):
+        lines, next_seq = self.manager.logs.since(since)
+        return [line for _, line in lines], next_seq
+
+    def follow_logs(self, since):
+        seq = since
+        while True:
+            lines, seq = self.manager.logs.since(seq, wait_seconds=1)
+            for _, line in lines:
+                yield line
+
+    def stop_all_and_wait(self):
+        stopped = threading.Event()
+        self.manager.after(0, lambda: self.manager.stop_all(on_done=stopped.set))
+        stopped.wait(constants.DAEMON_REQUEST_TIMEOUT_SECONDS)
+
+    def close(self):
+        self.manager.shutdown()
+
+
+def open_backend(args, needs_supervisor=False):
+    if args.local:
+        return LocalBackend(args.projects_folder)
+    client = daemon_client.connect()
+    if client is None and needs_supervisor:
+        # Apps must outlive this command, so something has to keep supervising them.
+        print("No daemon running; starting one...", file=sys.stderr)
+        client = daemon_client.start_daemon_process(args.projects_folder)
+    if client is None:
+        return LocalBackend(args.projects_folder)
+    return DaemonBackend(client)
+
+
+# --- Output ---
+def print_apps(apps, as_json):
+    if as_json:
+        print(json.dumps(apps, indent=2))
+        return
+    rows = [("NAME", "STATUS", "PORT", "PID", "BRANCH", "PATH")]
+    for app in apps:
+        rows.append((app["name"], app["status"], str(app.get("port") or "-"), str(app.get("pid") or "-"),
+                     str(app.get("git_branch") or "-"), app["path"]))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) + "  " + row[-1])
+
+
+def print_action_results(results, as_json):
+    if as_json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            name = result["app"]["name"] if result.get("app") else Path(result["path"]).name
+            detail = result["app"]["status"] if result["ok"] else f"FAILED: {result['error']}"
+            print(f"{name}: {detail}")
+    return EXIT_OK if all(result["ok"] for result in results) else EXIT_FAILED
+
+
+# --- Commands ---
+def wait_until_settled(backend, paths, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        by_path = {app["path"]: app for app in backend.list_apps()}
+        current = [by_path[path] for path in paths if path in by_path]
+        if all(is_settled(app) for app in current) or time.monotonic() >= deadline:
+            return current
+        time.sleep(SETTLE_POLL_SECONDS)
+
+
+def cmd_status(backend, args):
+    apps = backend.list_apps()
+    if args.selectors or args.all:
+        apps = select_apps(apps, args.selectors, args.all)
+    print_apps(apps, args.json)
+    return EXIT_OK
+
+
+def cmd_scan(backend, args):
+    print_apps(backend.scan(), args.json)
+    return EXIT_OK
+
+
+def cmd_action(backend, args):
+    action = args.command
+    targets = select_apps(backend.list_apps(), args.selectors, args.all)
+    paths = [app["path"] for app in targets]
+    _, log_seq_before = backend.logs(0)
+    results = backend.action(action, paths, script=getattr(args, "script", None))
+    ok_paths = [result["path"] for result in results if result["ok"]]
+    if args.wait and ok_paths:
+        settled = {app["path"]: app for app in wait_until_settled(backend, ok_paths, args.timeout)}
+        for result in results:
+            if result["path"] in settled:
+                result["app"] = settled[result["path"]]
+                status = settled[result["path"]]["status"]
+                if status.startswith("Error") or not is_settled(settled[result["path"]]):
+                    result["ok"] = False
+                    result["error"] = f"ended in status '{status}'"
+    exit_code = print_action_results(results, args.json)
+
+    if isinstance(backend, LocalBackend) and action in ("start", "restart", "run") and ok_paths:
+        # Nothing else supervises these processes: stay in the foreground and stream their logs.
+        exit_code = follow_local_apps(backend, ok_paths, exit_code, log_seq_before, args.json)
+    return exit_code
+
+
+def follow_local_apps(backend, paths, exit_code, since_seq, as_json):
+    # With --json, stdout carries only the JSON result, so the streamed log goes to stderr.
+    log_stream = sys.stderr if as_json else sys.stdout
+    print("Running in the foreground (--local); press Ctrl+C to stop.", file=sys.stderr)
+    seq = since_seq
+    try:
+        while True:
+            lines, seq = backend.logs(seq)
+            for line in lines:
+                print(line, file=log_stream, flush=True)
+            apps = {app["path"]: app for app in backend.list_apps()}
+            active = [path for path in paths if path in apps and
+                      (apps[path]["status"] == "Running" or apps[path]["status"].startswith("Running Script:")
+                       or not is_settled(apps[path]))]
+            if not active:
+                return exit_code
+            time.sleep(SETTLE_POLL_SECONDS)
+    except KeyboardInterrupt:
+        print("Stopping... (press Ctrl+C again to exit without waiting)", file=sys.stderr)
+        try:
+            backend.stop_all_and_wait()
+        except KeyboardInterrupt:
+            print("Exiting without waiting for the apps to stop.", file=sys.stderr)
+            return EXIT_FAILED
+        return exit_code
+
+
+def cmd_logs(backend, args):
+    names = None
+    if args.selectors or args.all:
+        names = {app["name"] for app in select_apps(backend.list_apps(), args.selectors, args.all)}
+
+    def wanted(line):
+        return names is None or any(f"[{name} " in line or f"'{name}'" in line for name in names)
+
+    lines, next_seq = backend.logs(0)
+    lines = [line for line in lines if wanted(line)]
+    for line in lines[-args.lines:] if args.lines else lines:
+        print(json.dumps({"line": line}) if args.json else line, flush=True)
+    if args.follow:
+        try:
+            for line in backend.follow_logs(next_seq):
+                if wanted(line):
+                    print(json.dumps({"line": line}) if args.json else line, flush=True)
+        except KeyboardInterrupt:
+            pass
+    return EXIT_OK
+
+
+def cmd_metrics(backend, args):
+    if not isinstance(backend, DaemonBackend):
+        raise CliError("metrics can only be toggled on a running daemon")
+    result = backend.client.set_metrics(args.state == "on", port=args.port)
+    if args.json:
+        print(json.dumps(result))
+    elif result["enabled"]:
+        print(f"Metrics endpoint: http://{constants.METRICS_HOST}:{result['port']}/metrics")
+    else:
+        print("Metrics endpoint disabled.")
+    return EXIT_OK
+
+
+def build_parser():
+    def add_global_options(target, **defaults):
+        target.add_argument("--local", action="store_true", **defaults,
+                            help="Manage projects in this process instead of through the daemon (started apps run in the foreground).")
+        target.add_argument("--projects-folder", **defaults, help="Projects folder (defaults to the configured one).")
+        target.add_argument("--json", action="store_true", **defaults, help="Machine-readable JSON output.")
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="Control the Node.js App Manager project fleet from the shell.")
+    add_global_options(parser)
+    # The same options after the command; SUPPRESS keeps a value given before the command unless repeated.
+    global_options = argparse.ArgumentParser(add_help=False)
+    add_global_options(global_options, default=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, **kwargs):
+        return subparsers.add_parser(name, parents=[global_options], **kwargs)
+
+    def add_selectors(sub, required_help):
+        sub.add_argument("selectors", nargs="*", help=f"Project names, folder names, globs (e.g. 'api-*') or paths. {required_help}")
+        sub.add_argument("--all", action="store_true", help="Select every project.")
+
+    status = add_command("status", help="List projects and their status.")
+    add_selectors(status, "Default: all.")
+    status.set_defaults(handler=cmd_status)
+
+    scan = add_command("scan", help="Rescan the projects folder and list the result.")
+    scan.set_defaults(handler=cmd_scan, selectors=[], all=False)
+
+    for command, help_text in (("start", "Start projects."), ("stop", "Stop projects."), ("restart", "Restart projects.")):
+        sub = add_command(command, help=help_text)
+        add_selectors(sub, "Required unless --all.")
+        sub.add_argument("--no-wait", dest="wait", action="store_false", help="Return without waiting for the status to settle.")
+        sub.add_argument("--timeout", type=float, default=30, help="Seconds to wait for the status to settle (default 30).")
+        sub.set_defaults(handler=cmd_action)
+
+    run = add_command("run", help="Run an npm script in projects.")
+    run.add_argument("script", help="Script name from package.json.")
+    add_selectors(run, "Required unless --all.")
+    run.add_argument("--no-wait", dest="wait", action="store_false", help="Return without waiting for short scripts to finish.")
+    run.add_argument("--timeout", type=float, default=300, help="Seconds to wait for the script (default 300).")
+    run.set_defaults(handler=cmd_action)
+
+    logs = add_command("logs", help="Print manager/app logs (needs the daemon for history).")
+    add_selectors(logs, "Default: all log lines.")
+    logs.add_argument("-f", "--follow", action="store_true", help="Keep streaming new lines.")
+    logs.add_argument("-n", "--lines", type=int, default=0, help="Only the last N matching lines.")
+    logs.set_defaults(handler=cmd_logs)
+
+    metrics_parser = add_command("metrics", help="Turn the daemon's Prometheus /metrics endpoint on or off.")
+    metrics_parser.add_argument("state", choices=("on", "off"))
+    metrics_parser.add_argument("--port", type=int, default=None, help=f"Port when turning on (default {constants.METRICS_PORT}).")
+    metrics_parser.set_defaults(handler=cmd_metrics)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    needs_supervisor = args.command in ("start", "restart", "run")
+    backend = None
+    try:
+        backend = open_backend(args, needs_supervisor=needs_supervisor)
+        return args.handler(backend, args)
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except daemon_client.DaemonUnavailable as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if backend is not None:
+            backend.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+# cluster.py
+import asyncio
+import os
+import threading
+import time
+
+import constants
+import metrics
+import process_engine
+import readiness
+from log_ingest import OutputIngestor
+
+
+def get_cluster(app, app_path):
+    """The project's cluster settings (config 'clusters', keyed by path): {'instances': N, 'mode': ...}."""
+    stored = (app.config_data.get("clusters") or {}).get(str(app_path)) or {}
+    mode = stored.get("mode") if stored.get("mode") in constants.CLUSTER_MODES else constants.CLUSTER_MODES[0]
+    try:
+        instances = int(stored.get("instances") or 1)
+    except (TypeError, ValueError):
+        instances = 1
+    return {"instances": max(1, min(constants.CLUSTER_MAX_INSTANCES, instances)), "mode": mode}
+
+
+def set_cluster(app, app_path, instances, mode):
+    clusters = app.config_data.setdefault("clusters", {})
+    if instances > 1:
+        clusters[str(app_path)] = {"instances": instances, "mode": mode}
+    else:
+        clusters.pop(str(app_path), None)
+    app.config_manager.save_config()
+
+
+def describe_cluster(cluster):
+    if cluster["instances"] <= 1:
+        return "single instance"
+    if cluster["mode"] == "reuseport":
+        return f"{cluster['instances']} instances sharing one port"
+    return f"{cluster['instances']} instances, one port each"
+
+
+def instance_iid(app_path, index):
+    """Treeview iid of an instance row (a child of the project's row)."""
+    return f"{app_path}#{index}"
+
+
+def summarize_usage(instances):
+    """(cpu_percent, rss_bytes) summed over the instances sampled so far; None before the first sample."""
+    sampled = [inst for inst in instances or [] if inst.get("rss") is not None]
+    if not sampled:
+        return None
+    return sum(inst["cpu_percent"] for inst in sampled), sum(inst["rss"] for inst in sampled)
+
+
+class _Instance:
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.handle = None
+        self.probe = None
+        self.ingestor = None
+        self.status = "Starting..."
+        self.returncode = None
+        self.ready_outcome = None
+        self.ready_seconds = None
+        self.address_in_use = False
+        self.cpu_percent = None
+        self.rss = None
+        self.done = threading.Event() # Set once the exit has been reported (output read to the end).
+
+    @property
+    def is_alive(self):
+        # The handle reports the process's own exit; `done` can lag behind while a grandchild keeps its pipes open.
+        return self.handle is not None and self.handle.returncode is None and not self.done.is_set()
+
+    def as_dict(self):
+        return {"index": self.index, "port": str(self.port), "pid": self.handle.pid if self.is_alive else None,
+                "status": self.status, "cpu_percent": self.cpu_percent, "rss": self.rss}
+
+
+class ClusterGroup:
+    """N copies of a project's start command, started, watched and stopped together.
+
+    It is stored as the app's process object: pid, poll, wait, terminate and kill act on every instance at
+    once, so the existing stop and restart paths handle a cluster in parallel. Each instance gets PORT and
+    INSTANCE_ID (0-based) in its environment; in "reuseport" mode all of them get the same PORT and the app
+    must listen with reusePort. Per-instance state is published to apps_data['instances'] as plain dicts.
+    """
+
+    def __init__(self, app, app_path, cmd_list, ports, mode, check, env=None, preexec_fn=None, cleanup_action=None):
+        self.app = app
+        self.app_path = app_path
+        self.app_name = app.apps_data[app_path]["name"]
+        self.args = cmd_list
+        self.mode = mode
+        self.check = check
+        self.env = env or {}
+        self.preexec_fn = preexec_fn
+        self.cleanup_action = cleanup_action
+        self.instances = [_Instance(index, port) for index, port in enumerate(ports)]
+        self.started_at = None
+        self._finished = False
+        self._psutil_processes = {}
+
+    # --- Popen-like interface (any thread) ---
+    @property
+    def pids(self):
+        return [inst.handle.pid for inst in self.instances if inst.is_alive and inst.handle.pid]
+
+    @property
+    def pid(self):
+        pids = self.pids
+        return pids[0] if pids else None
+
+    @property
+    def returncode(self):
+        if any(inst.is_alive for inst in self.instances) or any(inst.handle is None for inst in self.instances):
+            return None
+        return next((inst.handle.returncode for inst in self.instances if inst.handle.returncode), 0)
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for inst in self.instances:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if inst.handle is not None:
+                inst.handle.wait(remaining)
+        return self.returncode
+
+    def terminate(self):
+        for inst in self.instances:
+            if inst.handle is not None:
+                inst.handle.terminate()
+
+    def kill(self):
+        for inst in self.instances:
+            if inst.handle is not None:
+                inst.handle.kill()
+
+    def as_dicts(self):
+        return [inst.as_dict() for inst in self.instances]
+
+    # --- Starting (Tk thread) ---
+    def start(self):
+        engine = process_engine.get_engine()
+        self.started_at = time.monotonic()
+        for inst in self.instances:
+            env = dict(os.environ, **self.env, PORT=str(inst.port), INSTANCE_ID=str(inst.index),
+                       INSTANCE_COUNT=str(len(self.instances)))
+            inst.probe = readiness.ReadinessProbe(self.check, lambda port=inst.port: port, self.started_at)
+            inst.ingestor = OutputIngestor(self.app_path, self.app_name, lambda stream, text, is_notice, inst=inst: \
+                                           self._emit(inst, stream, text, is_notice))
+            inst.handle = engine.spawn(
+                self.args, self.app_path,
+                on_lines=lambda handle, stream, lines, ts, inst=inst: self._on_lines(inst, stream, lines),
+                on_exit=lambda handle, return_code, inst=inst: self._on_exit(inst, return_code),
+                on_error=lambda error, inst=inst: self._on_error(inst, error),
+                on_started=lambda handle, inst=inst: self._on_started(inst, handle),
+                env=env, preexec_fn=self.preexec_fn, metrics_kind=metrics.spawn_kind("Starting"),
+            )
+        engine.run_coroutine(self._sample_usage())
+
+    def _emit(self, inst, stream_name, text, is_notice):
+        tag = f"{self.app_name} #{inst.index}" + (" STDERR" if stream_name == "stderr" else "")
+        self.app._log(f"[{tag}] {text}", warning=(stream_name == "stderr" or is_notice))
+
+    # --- Engine callbacks (loop and events threads) ---
+    def _on_started(self, inst, handle):
+        inst.handle = handle # Normally already set by start(); the loop may get here first.
+        if self.app_path not in self.app.apps_data:
+            inst.handle.terminate()
+            return
+        self.app._log(f"Monitoring output for '{self.app_name}' #{inst.index} (PID: {inst.handle.pid}, PORT {inst.port})...")
+        self.app.after(0, self._publish)
+        process_engine.get_engine().run_coroutine(self._await_ready(inst))
+
+    async def _await_ready(self, inst):
+        outcome, seconds = await inst.probe.wait(inst.handle)
+        if outcome != "exited": # An exit is reported by _instance_exited().
+            self.app.after(0, lambda: self._instance_ready(inst, outcome, seconds))
+
+    def _on_lines(self, inst, stream_name, lines):
+        lines = [line.strip() for line in lines]
+        inst.ingestor.feed(stream_name, lines)
+        inst.probe.feed_lines(lines)
+        if not inst.address_in_use:
+            inst.address_in_use = any("EADDRINUSE" in line for line in lines)
+
+    def _on_exit(self, inst, return_code):
+        inst.ingestor.close() # Both streams have ended.
+        inst.returncode = return_code
+        inst.done.set()
+        self.app.after(0, lambda: self._instance_exited(inst, return_code))
+
+    def _on_error(self, inst, error):
+        self.app._log(f"Could not start '{self.app_name}' #{inst.index}: {error}", error=True)
+        inst.returncode = -1
+        inst.done.set()
+        self.app.after(0, lambda: self._instance_exited(inst, inst.returncode))
+
+    # --- State (Tk thread) ---
+    def _is_current(self):
+        app_data = self.app.apps_data.get(self.app_path)
+        return app_data is not None and app_data.get("process") is self
+
+    def _is_stopping(self):
+        return not self._is_current() or self.app.apps_data[self.app_path].get("status") == "Stopping..."
+
+    def _publish(self):
+        if self._is_current():
+            self.app._update_app_status(self.app_path, pid=self.pid or "-", instances=self.as_dicts())
+
+    def _instance_ready(self, inst, outcome, seconds):
+        if inst.done.is_set() or self._is_stopping():
+            return
+        inst.status = "Running"
+        inst.ready_outcome, inst.ready_seconds = outcome, seconds
+        if outcome == "timeout":
+            self.app._log(f"'{self.app_name}' #{inst.index} did not pass its readiness check "
+                          f"({readiness.describe_check(self.check, inst.port)}) within {seconds:.0f}s; marking it Running anyway.",
+                          warning=True)
+        self._settle()
+
+    def _instance_exited(self, inst, return_code):
+        stopping = self._is_stopping()
+        if stopping or return_code == 0:
+            inst.status = "Stopped"
+        else:
+            inst.status = "Error (Port Conflict)" if inst.address_in_use else \
+                          ("Error (Runtime)" if inst.ready_outcome else "Error (Start Fail)")
+        metrics.APP_EXITS.inc(app=self.app_name, outcome="stopped" if stopping else ("ok" if return_code == 0 else "error"))
+        if not stopping:
+            self.app._log(f"'{self.app_name}' #{inst.index} exited (code {return_code}).", error=bool(return_code))
+        if all(other.done.is_set() for other in self.instances):
+            self._finish()
+        else:
+            self._settle()
+
+    def _settle(self):
+        """Moves the project from Starting to Running once no instance is still starting."""
+        self._publish()
+        if not self._is_current() or self.app.apps_data[self.app_path].get("status") != "Starting...":
+            return
+        if any(inst.status == "Starting..." for inst in self.instances):
+            return
+        running = [inst for inst in self.instances if inst.status == "Running"]
+        seconds = max(inst.ready_seconds for inst in running)
+        if all(inst.ready_outcome == "ready" for inst in self.instances):
+            previous, stats = self.app.startup_history.record(self.app_path, seconds, self.check["type"])
+            metrics.APP_TIME_TO_READY_SECONDS.observe(seconds, app=self.app_name)
+            self.app._log(f"'{self.app_name}' is ready: {len(running)} instances after {seconds:.2f}s; "
+                          f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s over the last {stats['count']} starts.")
+            if previous and previous["count"] >= constants.STARTUP_REGRESSION_MIN_SAMPLES and seconds > previous["p95"]:
+                self.app._log(f"'{self.app_name}' took longer to become ready than its p95 of {previous['p95']:.2f}s.", warning=True)
+            self.app._update_app_status(self.app_path, status="Running", boot_stats=stats)
+        else:
+            self.app._log(f"'{self.app_name}' is running with {len(running)} of {len(self.instances)} instances.",
+                          warning=len(running) < len(self.instances))
+            self.app._update_app_status(self.app_path, status="Running")
+        self.app.update_status_bar(f"'{self.app_name}' is running.")
+        self.app._update_action_buttons_state()
+
+    def _finish(self):
+        self._finished = True
+        if self.cleanup_action:
+            self.cleanup_action(self.app, self.app_path)
+        if self.app_path not in self.app.apps_data:
+            return
+        if self._is_stopping():
+            self.app._log(f"'{self.app_name}' (all {len(self.instances)} instances) was stopped by manager.")
+            if self.app.apps_data[self.app_path].get("process") in (self, None): # Not yet replaced by a restart.
+                self.app._update_app_status(self.app_path, instances=[])
+        else:
+            failed = [inst for inst in self.instances if inst.returncode]
+            if not failed:
+                status = "Stopped"
+                self.app._log(f"'{self.app_name}' (all {len(self.instances)} instances) exited gracefully.")
+            else:
+                status = "Error (Port Conflict)" if any(inst.address_in_use for inst in failed) else "Error (Start Fail)"
+                self.app._log(f"'{self.app_name}': all instances have exited, {len(failed)} with an error.", error=True)
+            self.app._update_app_status(self.app_path, status=status, port="-", pid=None, process_obj=None, instances=[])
+        self.app.update_status_bar(f"'{self.app_name}' Starting finished.")
+        self.app._update_action_buttons_state()
+
+    # --- Resource sampling (engine loop, psutil calls in the default executor) ---
+    async def _sample_usage(self):
+        import psutil # Imported on first use to keep it off the startup path.
+        loop = asyncio.get_running_loop()
+        while not self._finished:
+            await asyncio.sleep(constants.CLUSTER_SAMPLE_INTERVAL_SECONDS)
+            usage = await loop.run_in_executor(None, self._read_usage, psutil)
+            self.app.after(0, lambda u=usage: self._apply_usage(u))
+
+    def _read_usage(self, psutil):
+        # Processes are kept between samples so cpu_percent() measures from the previous sample.
+        usage = {}
+        for inst in self.instances:
+            pid = inst.handle.pid if inst.handle is not None else None
+            if not pid or inst.done.is_set():
+                continue
+            try:
+                root = self._psutil_processes.get(pid) or self._psutil_processes.setdefault(pid, psutil.Process(pid))
+                members = [root] + root.children(recursive=True)
+            except psutil.Error:
+                continue
+            cpu, rss = 0.0, 0
+            for member in members:
+                member = self._psutil_processes.setdefault(member.pid, member)
+                try:
+                    cpu += member.cpu_percent(None)
+                    rss += member.memory_info().rss
+                except psutil.Error:
+                    continue
+            usage[inst.index] = (cpu, rss)
+        return usage
+
+    def _apply_usage(self, usage):
+        for inst in self.instances:
+            if inst.index in usage and not inst.done.is_set():
+                inst.cpu_percent, inst.rss = usage[inst.index]
+        if not self._finished:
+            self._publish()
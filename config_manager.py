@@ -18,6 +18,28 @@ def get_app_config_dir():
         # ~/.config/AppName
         return Path(os.getenv("XDG_CONFIG_HOME", Path.home() / ".config")) / app_name
 
+def load_json_store(file_path, app, description):
+    """Reads a JSON store; a missing or unreadable file gives {} (the latter logged as a warning)."""
+    if not file_path.exists():
+        return {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        app._log(f"Could not read {description} from {file_path}: {e}", warning=True)
+        return {}
+
+def save_json_store(file_path, data, app, description, indent=None):
+    """Writes a JSON store through a temporary file and os.replace, so readers never see it half-written."""
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        app._log(f"Could not save {description} to {file_path}: {e}", warning=True)
+
 class ConfigManager:
     def __init__(self, app_instance):
         self.app = app_instance
@@ -1,22 +1,29 @@
 # constants.py
 from pathlib import Path
+import importlib.util
 import sys
 
 # --- Performance Logging ---
 PERFORMANCE_LOGGING_ENABLED = False # Set to True to enable performance logs
 
 # --- TTKThemes ---
-TTKTHEMES_AVAILABLE = False
-try:
-    from ttkthemes import ThemedTk
-    TTKTHEMES_AVAILABLE = True
-except ImportError:
-    pass # Will be handled in main app
+# Only check that ttkthemes is installed; importing it (and loading its Tcl themes) is deferred until after first paint.
+TTKTHEMES_AVAILABLE = importlib.util.find_spec("ttkthemes") is not None
 
 # --- Paths & Config ---
 DEFAULT_PROJECTS_FOLDER_STR = "C:/node_projects" if sys.platform == "win32" else "~/node_projects"
 APP_NAME_FOR_CONFIG = "NodeAppManager" # Used for creating app-specific config folder
 CONFIG_FILE_NAME = "config.json" # General name, will be inside APP_NAME_FOR_CONFIG folder
+INSTALL_FINGERPRINTS_FILE_NAME = "install_fingerprints.json" # Per-project dependency fingerprints from the last install
+DISK_USAGE_CACHE_FILE_NAME = "disk_usage_cache.json" # node_modules sizes keyed by directory mtime fingerprint
+DEPENDENCY_INDEX_CACHE_FILE_NAME = "dependency_index_cache.json" # Parsed lockfiles keyed by lockfile mtime/size
+AUDIT_CACHE_FILE_NAME = "audit_cache.json" # Parsed `npm audit --json` results keyed by lockfile hash
+PORT_ASSIGNMENTS_FILE_NAME = "port_assignments.json" # PORT given to each project by automatic assignment
+STARTUP_HISTORY_FILE_NAME = "startup_history.json" # Time-to-ready of recent starts per project
+STATE_SNAPSHOT_FILE_NAME = "apps_snapshot.json" # Last known project list, shown immediately on the next launch
+GIT_TRACKING_FILE_NAME = "git_tracking.json" # Ahead/behind counts keyed by a fingerprint of each repo's refs
+TASK_CACHE_DIR_NAME = "task_cache" # Cached npm script outputs and logs (content-addressed objects + index)
+TASK_CACHE_INDEX_FILE_NAME = "entries.json"
 
 # --- Commands ---
 NPM_CMD = "npm.cmd" if sys.platform == "win32" else "npm"
@@ -26,14 +33,109 @@ GIT_CMD = "git.exe" if sys.platform == "win32" else "git"
 # --- Process & Project Detection ---
 NODE_EXE_NAMES = {"node", "node.exe"}
 COMMON_ENTRY_FILES = ["index.js", "app.js", "server.js", "main.js"]
+LOCKFILE_NAMES = ("package-lock.json", "npm-shrinkwrap.json")
+
+PROCESS_STREAM_LINE_LIMIT_BYTES = 1024 * 1024 # Longer unterminated output is passed on as one line
+PROCESS_READ_CHUNK_BYTES = 64 * 1024 # Pipe read size; output is split into lines per chunk
+
+# --- Port Assignment ---
+DEFAULT_APP_PORT = 3000 # Assumed when neither the start script nor .env names a port
+PORT_AUTO_ASSIGN_DEFAULT = True # Inject a free PORT on start (config: auto_assign_ports)
+PORT_RANGE_START = 3001 # Range free ports are assigned from (config: port_range)
+PORT_RANGE_END = 3999
+
+# --- Readiness Checks ---
+READINESS_DEFAULT_CHECK = "tcp" # "tcp", "http" or "log" (per project in config: readiness_checks)
+READINESS_DEFAULT_LOG_PATTERN = r"(?i)listening|ready|started" # Regex for "log" checks
+READINESS_TIMEOUT_SECONDS = 60 # After this the app is marked Running without having passed its check
+READINESS_POLL_INTERVAL_MS = 100
+READINESS_CONNECT_TIMEOUT_SECONDS = 1
+STARTUP_HISTORY_SIZE = 50 # Starts per project kept for the p50/p95 time-to-ready
+STARTUP_REGRESSION_MIN_SAMPLES = 5 # Warn about a slow start only once a project has this much history
+
+# --- Launch Policies (per project in config: launch_policies) ---
+LAUNCH_CGROUP_PREFIX = "nam-app-" # cgroup v2 groups created next to the manager's own when delegated
+LAUNCH_RLIMIT_AS_MIN_MB = 1024 # Below this an RLIMIT_AS memory cap usually keeps Node from starting
+
+# --- Cluster Mode (per project in config: clusters) ---
+CLUSTER_MAX_INSTANCES = 32
+CLUSTER_MODES = ("ports", "reuseport") # A PORT per instance, or one shared PORT the app binds with reusePort
+CLUSTER_SAMPLE_INTERVAL_SECONDS = 2 # How often per-instance CPU and memory are refreshed
+
+# --- App Groups (config: app_groups; per project: app_dependencies) ---
+GROUP_POLL_INTERVAL_MS = 200 # How often a group start/stop checks the apps of its current wave
+GROUP_START_TIMEOUT_SECONDS = READINESS_TIMEOUT_SECONDS + 30 # A wave member not Running by then counts as failed
+GROUP_STOP_TIMEOUT_SECONDS = 30 # The next stop wave begins after this even if an app is still stopping
+
+# --- Output Ingestion (app output -> log) ---
+LOG_RATE_LIMIT_LINES_PER_SECOND = 500 # Per project; excess lines are counted and dropped
+LOG_RATE_LIMIT_BURST_LINES = 2000
+LOG_FOLD_FLUSH_SECONDS = 5 # A line repeating for this long gets a "repeated N times" note even if it keeps repeating
+LOG_DROP_REPORT_INTERVAL_SECONDS = 1
+LOG_FLUSH_INTERVAL_MS = 100 # The log view is updated in batches at most this often
+LOG_MAX_LINES = 20000 # Lines kept in the log view and its history
+
+# --- Bulk Operations ---
+BULK_INSTALL_MAX_WORKERS = 4 # npm installs contend for the npm cache and disk
+BULK_AUDIT_MAX_WORKERS = 8 # audits are mostly network-bound
+BULK_INSTALL_EXTRA_ARGS = ("--no-audit", "--no-fund") # Skip per-project audit/fund round trips during fan-out
+BULK_LOG_TAIL_LINES = 5 # Lines of stderr kept in the log for a failed project
+
+# --- Workspace Scripts (npm run across a monorepo's workspaces) ---
+WORKSPACE_SCRIPT_MAX_PARALLEL = 0 # Packages run at once; 0 = one per CPU core
+
+# --- Task Cache (config: task_cache, per project and script) ---
+TASK_CACHE_DEFAULT_INPUTS = ("src/**", "package.json", "tsconfig*.json") # Suggested when caching is turned on for a script
+TASK_CACHE_DEFAULT_OUTPUTS = ("dist/**",)
+TASK_CACHE_IGNORED_DIRS = ("node_modules", ".git") # Never searched for inputs or outputs
+TASK_CACHE_HASH_WORKERS = 8 # Input files hashed in parallel (hashlib releases the GIL on large buffers)
+TASK_CACHE_MAX_BYTES = 1024 * 1024 * 1024 # Least-recently-used results are evicted past this size
+TASK_CACHE_MAX_LOG_LINES = 5000 # Output lines kept per result for replay
+
+# --- Background Reclaim (clean/delete) ---
+TOMBSTONE_PREFIX = ".nam-tombstone-" # Renamed-away folders awaiting background deletion
+RECLAIM_MAX_WORKERS = 4
+RECLAIM_THREAD_NICENESS = 19 # Linux only; niceness is per-thread there
+RECLAIM_PROGRESS_INTERVAL_SECONDS = 0.5
+RECLAIM_IDLE_EXIT_SECONDS = 5 # Reclaimer thread exits after this long with nothing queued
+
+# --- Disk Usage ---
+DISK_USAGE_MAX_WORKERS = 8 # Parallel os.scandir calls while walking node_modules
+
+# --- Dependency Index ---
+DEPENDENCY_INDEX_MAX_WORKERS = 4
+DEPENDENCY_INDEX_MAX_DUPLICATE_ROWS = 500
+
+# --- NPM Audit ---
+AUDIT_TIMEOUT_SECONDS = 120
+AUDIT_LOG_MAX_FINDINGS = 20 # Findings written to the log for a single-project audit
+
+# --- Fetch (clone / npm package setup) ---
+FETCH_MAX_PARALLEL = 3 # Concurrent clone+install jobs
+FETCH_READ_CHUNK_BYTES = 4096
+FETCH_UI_UPDATE_INTERVAL_SECONDS = 0.2 # Throttle for per-item progress updates
+FETCH_RESCAN_DEBOUNCE_MS = 1500 # Rescan once finished fetches settle
+
+# --- Fetch All (git fetch + ahead/behind) ---
+GIT_FETCH_MAX_WORKERS = 8 # Fetches are network-bound; mostly waiting on the remote
+GIT_FETCH_TIMEOUT_SECONDS = 60 # Per repository; the fetch (and its ssh/https helpers) is killed after this
+GIT_COUNT_TIMEOUT_SECONDS = 15 # Local rev-list for the ahead/behind counts
+
+# --- Git Mirror Cache ---
+GIT_MIRROR_CACHE_ENABLED = True # Clone fetched repos from a local bare mirror refreshed incrementally
+GIT_MIRROR_DIR_NAME = "git_mirrors" # Inside the config directory
+GIT_MIRROR_INDEX_FILE_NAME = "mirrors.json"
+GIT_MIRROR_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024 # Least-recently-used mirrors are evicted past this size
 
 # --- Status Visuals ---
 STATUS_VISUALS = {
     "Running": {"color": "#2ECC71", "symbol": "🟢"},
+    "Degraded": {"color": "#E67E22", "symbol": "🟡"},
     "Starting": {"color": "#F39C12", "symbol": "🟠"},
     "Stopping": {"color": "#F39C12", "symbol": "🟠"},
     "Installed": {"color": "#3498DB", "symbol": "🔵"},
     "Not Installed": {"color": "#95A5A6", "symbol": "⚪"},
+    "Deps Outdated": {"color": "#E67E22", "symbol": "⚠️"},
     "Stopped": {"color": "#E74C3C", "symbol": "🔴"},
     "Error (Install)": {"color": "#C0392B", "symbol": "❌"},
     "Error (Runtime)": {"color": "#C0392B", "symbol": "❌"},
@@ -43,6 +145,7 @@ STATUS_VISUALS = {
     "Error (Exception)": {"color": "#C0392B", "symbol": "❌"},
     "Error (package.json)": {"color": "#C0392B", "symbol": "❌"},
     "Error (No Start)": {"color": "#C0392B", "symbol": "❌"},
+    "Error (Port Conflict)": {"color": "#C0392B", "symbol": "❌"},
     "Error (Delete)": {"color": "#C0392B", "symbol": "❌"},
     "Error (Clean)": {"color": "#C0392B", "symbol": "❌"},
     "Error (Script)": {"color": "#C0392B", "symbol": "❌"},
@@ -57,6 +160,52 @@ STATUS_VISUALS = {
     "Updating Deps": {"color": "#F39C12", "symbol": "🔄"}, 
 }
 
+# --- Daemon / Control API ---
+DAEMON_STATE_FILE_NAME = "daemon.json" # Port, token and PID of the running daemon (config directory, user-only)
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 0 # 0 = any free port; clients find it through the state file
+DAEMON_TOKEN_HEADER = "X-NAM-Token"
+DAEMON_REQUEST_TIMEOUT_SECONDS = 10
+DAEMON_START_TIMEOUT_SECONDS = 15
+DAEMON_LOG_BUFFER_LINES = 5000 # Log lines kept in memory for clients that attach later
+DAEMON_LOG_STREAM_HEARTBEAT_SECONDS = 15
+DAEMON_POLL_INTERVAL_MS = 1000 # How often an attached GUI refreshes the app list
+
+STALE_ROW_COLOR = "#95A5A6" # Rows shown from the last session's snapshot until the first scan finishes
+
+# --- Metrics ---
+METRICS_ENABLED_DEFAULT = False # Runtime toggle (View > Metrics Endpoint, daemon --metrics-port); persisted in the config
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9466 # Prometheus scrape port for GET /metrics
+METRICS_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0) # Seconds
+
+# --- Local Proxy ---
+PROXY_ENABLED_DEFAULT = False # Runtime toggle (View > Local Proxy, daemon --proxy-port); persisted in the config
+PROXY_HOST = "localhost" # Both 127.0.0.1 and ::1; never reachable from other machines
+PROXY_PORT = 8090 # http://<project>.localhost:8090/ and http://localhost:8090/<project>/ (config: proxy_port)
+PROXY_HEADER_LIMIT_BYTES = 64 * 1024 # Longest request or response head accepted
+PROXY_COPY_CHUNK_BYTES = 64 * 1024
+PROXY_CONNECT_TIMEOUT_SECONDS = 5
+PROXY_CLIENT_IDLE_SECONDS = 75 # Idle browser keep-alive connections are closed after this
+PROXY_POOL_IDLE_SECONDS = 4 # Below Node's default keepAliveTimeout of 5 s, so a pooled connection is rarely stale
+PROXY_POOL_MAX_IDLE = 8 # Idle upstream connections kept per app port
+PROXY_LATENCY_SAMPLES = 500 # Recent requests per route kept for p50/p95
+PROXY_STATS_REFRESH_MS = 1000 # Routes dialog refresh
+
+# --- Profiling ---
+PROFILE_DIR_NAME = "profiles" # .pstats / .tracemalloc data plus JSON top-N summaries (config directory)
+PROFILE_TOP_N = 40 # Rows kept in each summary
+PROFILE_MAX_RESULTS = 50 # Older results are deleted
+TRACEMALLOC_WINDOW_SECONDS = 30
+TRACEMALLOC_FRAMES = 10 # Traceback depth recorded per allocation
+
+# --- UI Stall Detection ---
+STALL_DETECTOR_ENABLED_DEFAULT = True # Diagnostics > Detect UI Stalls; persisted in the config
+STALL_HEARTBEAT_INTERVAL_MS = 100 # after() heartbeat on the Tk thread
+STALL_THRESHOLD_MS = 250 # Scheduling lag that counts as a stall
+STALL_SAMPLE_INTERVAL_MS = 50 # How often the sampler checks for an overdue heartbeat
+STALL_STACK_DEPTH = 25 # Innermost frames kept per stack sample
+
 # --- Log Prefixes ---
 LOG_PREFIX_INFO = ""
 LOG_PREFIX_WARNING = "[WARN] "
@@ -0,0 +1,124 @@
+# daemon_client.py
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import constants
+from config_manager import get_app_config_dir
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+def read_state():
+    state_path = get_app_config_dir() / constants.DAEMON_STATE_FILE_NAME
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class DaemonClient:
+    def __init__(self, state):
+        self.base_url = f"http://{state['host']}:{state['port']}"
+        self.token = state["token"]
+        self.pid = state.get("pid")
+
+    def _request(self, method, path, body=None, timeout=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header(constants.DAEMON_TOKEN_HEADER, self.token)
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or constants.DAEMON_REQUEST_TIMEOUT_SECONDS) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise DaemonUnavailable(f"daemon returned {e.code}: {message}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise DaemonUnavailable(f"daemon not reachable at {self.base_url}: {e}")
+
+    def status(self):
+        return self._request("GET", "/api/status")
+
+    def list_apps(self):
+        return self._request("GET", "/api/apps")["apps"]
+
+    def action(self, action, paths, script=None):
+        return self._request("POST", "/api/actions", {"action": action, "paths": list(paths), "script": script})["results"]
+
+    def scan(self, wait=True):
+        return self._request("POST", "/api/scan", {"wait": wait}, timeout=constants.DAEMON_REQUEST_TIMEOUT_SECONDS * 7)["apps"]
+
+    def logs(self, since=0):
+        result = self._request("GET", f"/api/logs?since={since}")
+        return result["lines"], result["next"]
+
+    def stream_logs(self, since=0):
+        """Yields (seq, line) as the daemon logs them; ends when the connection closes."""
+        request = urllib.request.Request(f"{self.base_url}/api/logs/stream?since={since}")
+        request.add_header(constants.DAEMON_TOKEN_HEADER, self.token)
+        try:
+            response = urllib.request.urlopen(request, timeout=constants.DAEMON_LOG_STREAM_HEARTBEAT_SECONDS * 2)
+        except (urllib.error.URLError, OSError) as e:
+            raise DaemonUnavailable(f"daemon not reachable at {self.base_url}: {e}")
+        with response:
+            for raw_line in response:
+                if raw_line.strip():
+                    entry = json.loads(raw_line)
+                    yield entry["seq"], entry["line"]
+
+    def set_metrics(self, enabled, port=None):
+        """Turns the daemon's Prometheus endpoint on or off; returns {"enabled", "port"}."""
+        return self._request("POST", "/api/metrics", {"enabled": enabled, "port": port})
+
+    def shutdown(self, stop_apps=False):
+        return self._request("POST", "/api/shutdown", {"stop_apps": stop_apps})
+
+
+def connect():
+    """Returns a DaemonClient for the running daemon, or None if no daemon is answering."""
+    state = read_state()
+    if not state:
+        return None
+    client = DaemonClient(state)
+    try:
+        client.status()
+    except DaemonUnavailable:
+        return None
+    return client
+
+
+def start_daemon_process(projects_folder=None, wait_seconds=None):
+    """Launches manager_daemon.py detached from this process and waits for it to answer."""
+    cmd = [sys.executable, str(Path(__file__).resolve().parent / "manager_daemon.py"), "--quiet"]
+    if projects_folder:
+        cmd += ["--projects-folder", projects_folder]
+    if os.name == 'nt':
+        popen_kwargs = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        popen_kwargs = {"start_new_session": True}
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **popen_kwargs)
+
+    deadline = time.monotonic() + (wait_seconds or constants.DAEMON_START_TIMEOUT_SECONDS)
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise DaemonUnavailable(f"daemon exited during startup (code {process.returncode})")
+        state = read_state()
+        if state and state.get("pid") == process.pid:
+            client = connect()
+            if client:
+                return client
+        time.sleep(0.1)
+    raise DaemonUnavailable("daemon did not start in time")
@@ -0,0 +1,138 @@
+# dependency_fingerprint.py
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+# package.json fields that change what `npm install` puts into node_modules.
+DEPENDENCY_FIELDS = (
+    "dependencies", "devDependencies", "optionalDependencies", "peerDependencies",
+    "bundleDependencies", "bundledDependencies", "overrides", "workspaces",
+)
+
+_node_version = None
+_node_version_lock = threading.Lock()
+
+# Lockfiles can be tens of MB; keep their digests keyed by (size, mtime) so rescans stay cheap.
+_file_digest_cache = {}
+_file_digest_lock = threading.Lock()
+
+
+def get_node_version():
+    global _node_version
+    with _node_version_lock:
+        if _node_version is None:
+            process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            try:
+                proc = subprocess.run([constants.NODE_CMD, "--version"], capture_output=True, text=True,
+                                      check=False, timeout=10, creationflags=process_flags)
+                _node_version = proc.stdout.strip() if proc.returncode == 0 else "unknown"
+            except (OSError, subprocess.TimeoutExpired):
+                _node_version = "unknown"
+        return _node_version
+
+
+def file_digest(file_path):
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return "-"
+    cache_key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+    with _file_digest_lock:
+        cached = _file_digest_cache.get(str(file_path))
+        if cached and cached[0] == cache_key:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError:
+        return "-"
+    hex_digest = digest.hexdigest()
+    with _file_digest_lock:
+        _file_digest_cache[str(file_path)] = (cache_key, hex_digest)
+    return hex_digest
+
+
+def get_lockfile_path(app_path):
+    for name in constants.LOCKFILE_NAMES:
+        candidate = Path(app_path) / name
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def compute_fingerprint(app_path, package_data=None):
+    """Hash of the package.json dependency fields, the lockfile and the Node version."""
+    app_path = Path(app_path)
+    if package_data is None:
+        try:
+            with open(app_path / "package.json", 'r', encoding='utf-8') as f:
+                package_data = json.load(f)
+        except Exception:
+            return None
+
+    dep_fields = {field: package_data.get(field) for field in DEPENDENCY_FIELDS if field in package_data}
+    lockfile_path = get_lockfile_path(app_path)
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(dep_fields, sort_keys=True).encode('utf-8'))
+    digest.update(b"\0lock:")
+    digest.update(file_digest(lockfile_path).encode('ascii') if lockfile_path else b"none")
+    digest.update(b"\0node:")
+    digest.update(get_node_version().encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.file_path = get_app_config_dir() / constants.INSTALL_FINGERPRINTS_FILE_NAME
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_json_store(self.file_path, self.app, "install fingerprints")
+
+    def _save(self):
+        save_json_store(self.file_path, self._data, self.app, "install fingerprints", indent=2)
+
+    def get(self, app_path):
+        with self._lock:
+            self._load()
+            return self._data.get(str(app_path))
+
+    def record(self, app_path):
+        """Stores the current fingerprint for a project after a successful install."""
+        fingerprint = compute_fingerprint(app_path)
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._load()
+            self._data[str(app_path)] = fingerprint
+            self._save()
+
+    def remove(self, app_path):
+        with self._lock:
+            self._load()
+            if self._data.pop(str(app_path), None) is not None:
+                self._save()
+
+
+def get_dependency_state(app, app_path, package_data=None):
+    """Returns 'not_installed', 'current', 'outdated' or 'unknown' (installed but never fingerprinted)."""
+    if not (Path(app_path) / "node_modules").is_dir():
+        return "not_installed"
+    stored = app.fingerprint_store.get(app_path)
+    if stored is None:
+        return "unknown"
+    current = compute_fingerprint(app_path, package_data)
+    return "current" if current == stored else "outdated"
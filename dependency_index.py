@@ -0,0 +1,195 @@
+# dependency_index.py
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+# Matches either an object key (`"some/key": {`) or a `"version": "x"` pair. In lockfileVersion 2/3
+# "packages" entries npm always writes "version" before any nested object, so the first version seen
+# after a node_modules key belongs to that key.
+_LOCK_TOKEN_RE = re.compile(rb'"([^"\\]*)"\s*:\s*\{|"version"\s*:\s*"([^"\\]*)"')
+_LOCKFILE_VERSION_RE = re.compile(rb'"lockfileVersion"\s*:\s*(\d+)')
+_NODE_MODULES_MARKER = b"node_modules/"
+
+DIRECT_DEPENDENCY_FIELDS = ("dependencies", "devDependencies", "optionalDependencies", "peerDependencies")
+
+
+def _package_name_from_key(key):
+    # "node_modules/a/node_modules/@scope/b" -> "@scope/b"
+    return key.rsplit(_NODE_MODULES_MARKER, 1)[1].decode('utf-8', errors='replace')
+
+
+def _scan_packages_mmap(mapped):
+    """Collects {name: {version: count}} from a v2/v3 lockfile without building the JSON tree."""
+    packages = {}
+    current_name = None
+    for match in _LOCK_TOKEN_RE.finditer(mapped):
+        key, version = match.group(1), match.group(2)
+        if key is not None:
+            current_name = _package_name_from_key(key) if _NODE_MODULES_MARKER in key else None
+        elif current_name is not None:
+            versions = packages.setdefault(current_name, {})
+            version_str = version.decode('utf-8', errors='replace')
+            versions[version_str] = versions.get(version_str, 0) + 1
+            current_name = None
+    return packages
+
+
+def _walk_v1_dependencies(dependencies, packages):
+    for name, info in (dependencies or {}).items():
+        if not isinstance(info, dict):
+            continue
+        version = info.get("version")
+        if version:
+            versions = packages.setdefault(name, {})
+            versions[version] = versions.get(version, 0) + 1
+        _walk_v1_dependencies(info.get("dependencies"), packages)
+
+
+def parse_lockfile(lockfile_path):
+    """Returns {package_name: {version: install_count}} for a package-lock.json / npm-shrinkwrap.json."""
+    with open(lockfile_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            version_match = _LOCKFILE_VERSION_RE.search(mapped, 0, 4096)
+            lockfile_version = int(version_match.group(1)) if version_match else 1
+            if lockfile_version >= 2:
+                return _scan_packages_mmap(mapped)
+
+    # lockfileVersion 1 only has the nested "dependencies" tree; these files predate npm 7 and are small.
+    with open(lockfile_path, 'r', encoding='utf-8') as f:
+        lock_data = json.load(f)
+    packages = {}
+    _walk_v1_dependencies(lock_data.get("dependencies"), packages)
+    return packages
+
+
+def get_direct_dependencies(package_data):
+    direct = set()
+    for field in DIRECT_DEPENDENCY_FIELDS:
+        deps = (package_data or {}).get(field)
+        if isinstance(deps, dict):
+            direct.update(deps.keys())
+    return direct
+
+
+class DependencyIndex:
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.cache_file_path = get_app_config_dir() / constants.DEPENDENCY_INDEX_CACHE_FILE_NAME
+        self._lock = threading.Lock()
+        self._cache = None
+        # path -> {"name", "packages": {name: {version: count}}, "direct": set}
+        self.projects = {}
+        self.is_building = False
+
+    def _load_cache(self):
+        if self._cache is None:
+            self._cache = load_json_store(self.cache_file_path, self.app, "dependency index cache")
+
+    def _save_cache(self):
+        save_json_store(self.cache_file_path, self._cache, self.app, "dependency index cache")
+
+    def _index_project(self, app_path):
+        """Returns (packages, was_parsed); reuses the cached parse while the lockfile mtime/size is unchanged."""
+        lockfile_path = None
+        for name in constants.LOCKFILE_NAMES:
+            candidate = Path(app_path) / name
+            if candidate.is_file():
+                lockfile_path = candidate
+                break
+        if lockfile_path is None:
+            return {}, False
+
+        stat = lockfile_path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        with self._lock:
+            cached = self._cache.get(app_path)
+        if cached and cached.get("stamp") == stamp:
+            return cached["packages"], False
+
+        packages = parse_lockfile(lockfile_path)
+        with self._lock:
+            self._cache[app_path] = {"stamp": stamp, "packages": packages}
+        return packages, True
+
+    def build(self, apps_data, on_done=None):
+        """Indexes every project's lockfile in the background; on_done runs on the Tk thread."""
+        snapshot = {path: (data["name"], data.get("package_data")) for path, data in apps_data.items()}
+        self.is_building = True
+
+        def task():
+            t_start = time.perf_counter()
+            with self._lock:
+                self._load_cache()
+            new_projects = {}
+            parsed_count = 0
+            errors = 0
+
+            def index_one(path):
+                return path, self._index_project(path)
+
+            with ThreadPoolExecutor(max_workers=constants.DEPENDENCY_INDEX_MAX_WORKERS, thread_name_prefix="dep-index") as executor:
+                futures = [executor.submit(index_one, path) for path in snapshot]
+                for future in futures:
+                    try:
+                        path, (packages, was_parsed) = future.result()
+                    except Exception as e:
+                        errors += 1
+                        self.app._log(f"Could not index lockfile: {e}", warning=True)
+                        continue
+                    name, package_data = snapshot[path]
+                    new_projects[path] = {"name": name, "packages": packages, "direct": get_direct_dependencies(package_data)}
+                    parsed_count += int(was_parsed)
+
+            with self._lock:
+                self._cache = {path: entry for path, entry in self._cache.items() if path in snapshot}
+                if parsed_count:
+                    self._save_cache()
+            self.projects = new_projects
+            self.is_building = False
+            elapsed = time.perf_counter() - t_start
+            self.app._log(f"Dependency index built for {len(new_projects)} project(s) in {elapsed:.2f}s "
+                          f"({parsed_count} lockfile(s) parsed, the rest cached{f', {errors} error(s)' if errors else ''}).")
+            if on_done:
+                self.app.after(0, on_done)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    # --- Queries ---
+    def dependents_of(self, package_name):
+        """[(project_name, [versions], is_direct)] for every project whose lockfile contains package_name."""
+        results = []
+        for project in self.projects.values():
+            versions = project["packages"].get(package_name)
+            if versions:
+                results.append((project["name"], sorted(versions), package_name in project["direct"]))
+        return sorted(results, key=lambda r: (not r[2], r[0].lower()))
+
+    def versions_of(self, package_name):
+        """{version: [project_names]} across the fleet."""
+        by_version = {}
+        for project in self.projects.values():
+            for version in project["packages"].get(package_name, {}):
+                by_version.setdefault(version, []).append(project["name"])
+        return {version: sorted(names, key=str.lower) for version, names in by_version.items()}
+
+    def duplicates(self, limit=None):
+        """[(package_name, {version: [project_names]})] for packages installed in more than one version."""
+        fleet = {}
+        for project in self.projects.values():
+            for package_name, versions in project["packages"].items():
+                by_version = fleet.setdefault(package_name, {})
+                for version in versions:
+                    by_version.setdefault(version, []).append(project["name"])
+        dupes = [(name, by_version) for name, by_version in fleet.items() if len(by_version) > 1]
+        dupes.sort(key=lambda d: (-len(d[1]), d[0]))
+        return dupes[:limit] if limit else dupes
@@ -0,0 +1,170 @@
+# disk_usage.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+
+def format_bytes(num_bytes):
+    if num_bytes is None:
+        return "-"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _allocated_bytes(st):
+    # st_blocks reflects what is actually allocated on disk (like `du`); Windows only has st_size.
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def _scan_one_directory(dir_path):
+    size = 0
+    files = 0
+    subdirs = []
+    hardlinked = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_nlink > 1 and st.st_ino:
+                    hardlinked.append(((st.st_dev, st.st_ino), _allocated_bytes(st)))
+                else:
+                    size += _allocated_bytes(st)
+                    files += 1
+    except OSError:
+        pass
+    return size, files, subdirs, hardlinked
+
+
+def measure_directory(root_path, executor):
+    """Walks root_path with parallel os.scandir calls; returns (bytes, file_count).
+
+    Symlinks are not followed and files with several hardlinks are counted once.
+    """
+    total_bytes = 0
+    total_files = 0
+    seen_inodes = set()
+    pending = {executor.submit(_scan_one_directory, str(root_path))}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            size, files, subdirs, hardlinked = future.result()
+            total_bytes += size
+            total_files += files
+            for inode_key, allocated in hardlinked:
+                if inode_key not in seen_inodes:
+                    seen_inodes.add(inode_key)
+                    total_bytes += allocated
+                    total_files += 1
+            for subdir in subdirs:
+                pending.add(executor.submit(_scan_one_directory, subdir))
+    return total_bytes, total_files
+
+
+def get_node_modules_fingerprint(node_modules_path):
+    """Cheap change detector: mtimes of node_modules, its scope folders and npm's hidden lockfile."""
+    try:
+        parts = [str(node_modules_path.stat().st_mtime_ns)]
+        with os.scandir(node_modules_path) as it:
+            for entry in it:
+                if entry.name.startswith("@") or entry.name == ".package-lock.json":
+                    parts.append(f"{entry.name}:{entry.stat(follow_symlinks=False).st_mtime_ns}")
+    except OSError:
+        return None
+    return "|".join(sorted(parts))
+
+
+class DiskUsageTracker:
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.cache_file_path = get_app_config_dir() / constants.DISK_USAGE_CACHE_FILE_NAME
+        self._cache = None
+        self._lock = threading.Lock()
+        self._pending_paths = set()
+        self._worker = None
+
+    def _load_cache(self):
+        if self._cache is None:
+            self._cache = load_json_store(self.cache_file_path, self.app, "disk usage cache")
+
+    def _save_cache(self):
+        self._cache = {path: entry for path, entry in self._cache.items() if Path(path).exists()}
+        save_json_store(self.cache_file_path, self._cache, self.app, "disk usage cache")
+
+    def get_cached(self, app_path):
+        """Returns the cached {'bytes', 'files'} entry if node_modules has not changed since it was measured."""
+        node_modules_path = Path(app_path) / "node_modules"
+        fingerprint = get_node_modules_fingerprint(node_modules_path)
+        with self._lock:
+            self._load_cache()
+            entry = self._cache.get(str(app_path))
+        if fingerprint is not None and entry and entry.get("fingerprint") == fingerprint:
+            return entry
+        return None
+
+    def refresh(self, app_paths):
+        """Queues projects for measurement; cached results are applied without walking the tree."""
+        with self._lock:
+            self._pending_paths.update(str(p) for p in app_paths)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="disk-usage", daemon=True)
+                self._worker.start()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending_paths)
+
+    def _apply(self, app_path, usage):
+        # Runs on the Tk thread; the project may have been removed while it was being measured.
+        if app_path in self.app.apps_data:
+            self.app._update_app_status(app_path, disk_usage=usage)
+
+    def _run(self):
+        t_start = time.perf_counter()
+        measured = 0
+        with ThreadPoolExecutor(max_workers=constants.DISK_USAGE_MAX_WORKERS, thread_name_prefix="disk-usage") as executor:
+            while True:
+                with self._lock:
+                    if not self._pending_paths:
+                        self._worker = None
+                        break
+                    app_path = self._pending_paths.pop()
+
+                node_modules_path = Path(app_path) / "node_modules"
+                if not node_modules_path.is_dir():
+                    self.app.after(0, lambda p=app_path: self._apply(p, {"bytes": None, "files": None}))
+                    continue
+
+                entry = self.get_cached(app_path)
+                if entry is None:
+                    fingerprint = get_node_modules_fingerprint(node_modules_path)
+                    total_bytes, total_files = measure_directory(node_modules_path, executor)
+                    entry = {"fingerprint": fingerprint, "bytes": total_bytes, "files": total_files, "measured_at": time.time()}
+                    with self._lock:
+                        self._load_cache()
+                        self._cache[app_path] = entry
+                    measured += 1
+                usage = {"bytes": entry["bytes"], "files": entry["files"]}
+                self.app.after(0, lambda p=app_path, u=usage: self._apply(p, u))
+
+        if measured:
+            with self._lock:
+                self._save_cache()
+            if constants.PERFORMANCE_LOGGING_ENABLED:
+                self.app._log(f"Disk usage: measured {measured} node_modules folder(s) in {time.perf_counter() - t_start:.2f}s.")
+        self.app.after(0, self.app._update_disk_usage_total)
@@ -0,0 +1,328 @@
+# fetch_engine.py
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import constants
+import metrics
+from git_mirror_cache import GitMirrorCache
+
+_GIT_PROGRESS_RE = re.compile(r"^(?:remote: )?([A-Za-z ]+):\s+(\d{1,3})%")
+
+# Share of a git clone's progress bar given to each phase git reports.
+_GIT_PHASE_WEIGHTS = {
+    "Enumerating objects": (0, 2), "Counting objects": (2, 5), "Compressing objects": (5, 10),
+    "Receiving objects": (10, 85), "Resolving deltas": (85, 98), "Updating files": (98, 100),
+}
+_CLONE_SHARE = 70 # Percent of the overall item bar used by the clone; npm install gets the rest.
+
+
+def is_git_source(source):
+    return ".git" in source or source.startswith("git@") or (source.startswith("http") and ".git" in source)
+
+
+def sanitize_folder_name(raw_name):
+    return "".join(c for c in raw_name if c.isalnum() or c in ('-', '_')).strip()
+
+
+def derive_target_folder_name(source, name_override=""):
+    if name_override:
+        return sanitize_folder_name(name_override)
+    if is_git_source(source):
+        base_name = source.rstrip('/').split('/')[-1].split(':')[-1]
+        return sanitize_folder_name(base_name[:-4] if base_name.endswith('.git') else base_name)
+    # npm specs look like "name", "name@version", "@scope/name" or "@scope/name@version".
+    spec = source[1:] if source.startswith('@') else source
+    return sanitize_folder_name(spec.split('@')[0].split('/')[-1])
+
+
+def command_not_found_message(error):
+    failed_cmd_name = getattr(error, 'filename', None) or str(error)
+    command_type = "Git" if constants.GIT_CMD.lower() in str(failed_cmd_name).lower() else \
+                   "Node/NPM" if constants.NPM_CMD.lower() in str(failed_cmd_name).lower() else "Unknown"
+    return (
+        f"Command '{failed_cmd_name}' not found. "
+        f"Please ensure {command_type} is installed and its 'bin' or 'cmd' "
+        f"directory is in your system's PATH environment variable. "
+        f"Original error: {error}"
+    )
+
+
+class FetchCancelled(Exception):
+    pass
+
+
+class FetchJob:
+    def __init__(self, source, target_dir, depth=None, partial_clone=False):
+        self.source = source
+        self.target_dir = Path(target_dir)
+        self.depth = depth
+        self.partial_clone = partial_clone
+        self.state = "Queued" # Queued, Running, Done, Failed, Cancelled
+        self.phase = "Waiting"
+        self.percent = 0
+        self.message = ""
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._process = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_git(self):
+        return is_git_source(self.source)
+
+    @property
+    def is_finished(self):
+        return self.state in ("Done", "Failed", "Cancelled")
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            process = self._process
+        if process and process.poll() is None:
+            process.terminate()
+
+    def _set_process(self, process):
+        with self._lock:
+            self._process = process
+            if self._cancelled:
+                process.terminate()
+
+    def _check_cancelled(self):
+        if self._cancelled:
+            raise FetchCancelled()
+
+
+class FetchEngine:
+    """Clones/installs several sources concurrently, streaming output to the log as it arrives."""
+
+    def __init__(self, app_instance, max_parallel=None):
+        self.app = app_instance
+        self.max_parallel = max_parallel or constants.FETCH_MAX_PARALLEL
+        self._executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="fetch")
+        self.jobs = []
+        self._rescan_after_id = None
+        self.mirror_cache = GitMirrorCache(app_instance) if constants.GIT_MIRROR_CACHE_ENABLED else None
+
+    def submit(self, job, on_update):
+        """Queues a job; on_update(job) is called on the Tk thread whenever its progress changes."""
+        self.jobs.append(job)
+        self._notify(job, on_update)
+        self._executor.submit(self._run_job, job, on_update)
+        return job
+
+    def active_count(self):
+        return sum(1 for job in self.jobs if not job.is_finished)
+
+    def clear_finished(self):
+        """Forgets finished jobs (Tk thread) so a reopened fetch window does not list them again."""
+        self.jobs = [job for job in self.jobs if not job.is_finished]
+
+    def _notify(self, job, on_update):
+        if on_update:
+            self.app.after(0, lambda j=job: on_update(j))
+
+    def _schedule_rescan(self):
+        # Several jobs often finish close together; rescan once they settle rather than once per job.
+        def do_rescan():
+            self._rescan_after_id = None
+            self.app.scan_projects_folder()
+
+        def schedule():
+            if self._rescan_after_id is not None:
+                self.app.after_cancel(self._rescan_after_id)
+            self._rescan_after_id = self.app.after(constants.FETCH_RESCAN_DEBOUNCE_MS, do_rescan)
+        self.app.after(0, schedule)
+
+    def _stream_process(self, job, cmd_list, cwd, log_tag, on_line, on_update):
+        """Runs a command, feeding every output line (split on \\r and \\n) to on_line as it arrives."""
+        process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        with metrics.SUBPROCESS_SPAWN_SECONDS.time(kind="fetch"):
+            process = subprocess.Popen(
+                cmd_list, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                creationflags=process_flags
+            )
+        job._set_process(process)
+        pending = b""
+        last_notify = 0.0
+        last_completed_phase = None
+        while True:
+            chunk = process.stdout.read1(constants.FETCH_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = re.split(rb"[\r\n]", pending)
+            for raw_line in lines:
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                on_line(line)
+                # Progress lines are redrawn with \r many times a second; only log each phase's final 100% line.
+                progress_match = _GIT_PROGRESS_RE.match(line)
+                if progress_match:
+                    if progress_match.group(2) != "100" or progress_match.group(1) == last_completed_phase:
+                        continue
+                    last_completed_phase = progress_match.group(1)
+                self.app._log(f"[{job.target_dir.name} {log_tag}] {line}")
+            now = time.perf_counter()
+            if now - last_notify >= constants.FETCH_UI_UPDATE_INTERVAL_SECONDS:
+                last_notify = now
+                self._notify(job, on_update)
+        if pending.strip():
+            line = pending.decode('utf-8', errors='replace').strip()
+            on_line(line)
+            self.app._log(f"[{job.target_dir.name} {log_tag}] {line}")
+        return_code = process.wait()
+        job._check_cancelled()
+        return return_code
+
+    def _build_clone_command(self, job, clone_source=None):
+        cmd = [constants.GIT_CMD, "clone", "--progress"]
+        if job.depth:
+            cmd += ["--depth", str(job.depth)]
+        if job.partial_clone:
+            cmd += ["--filter=blob:none"]
+        return cmd + [clone_source or job.source, str(job.target_dir)]
+
+    def _run_git(self, job, cmd_list, on_update, phase_prefix=""):
+        def on_git_line(line):
+            match = _GIT_PROGRESS_RE.match(line)
+            if match and match.group(1) in _GIT_PHASE_WEIGHTS:
+                low, high = _GIT_PHASE_WEIGHTS[match.group(1)]
+                phase_percent = low + (high - low) * int(match.group(2)) / 100
+                job.percent = int(phase_percent * _CLONE_SHARE / 100)
+                job.phase = phase_prefix + match.group(1)
+            job.message = line
+
+        return_code = self._stream_process(job, cmd_list, None, "GIT", on_git_line, on_update)
+        if return_code != 0:
+            raise RuntimeError(f"'{' '.join(cmd_list[:3])} ...' failed (code {return_code}): {job.message}")
+
+    def _update_mirror(self, job, on_update):
+        """Creates or incrementally refreshes the remote's bare mirror; returns False if it could not be used."""
+        cache = self.mirror_cache
+        tmp_path = None
+        try:
+            if cache.has_mirror(job.source):
+                job.phase = "Refreshing mirror"
+                self._notify(job, on_update)
+                self.app._log(f"Refreshing cached mirror of '{job.source}'...")
+                self._run_git(job, cache.build_refresh_command(job.source), on_update, "Mirror: ")
+            else:
+                job.phase = "Creating mirror"
+                self._notify(job, on_update)
+                self.app._log(f"Creating cached mirror of '{job.source}'...")
+                tmp_path = cache.new_tmp_path(job.source)
+                self._run_git(job, cache.build_create_command(job.source, tmp_path), on_update, "Mirror: ")
+                cache.install_mirror(job.source, tmp_path)
+                tmp_path = None
+            return True
+        except FetchCancelled:
+            raise
+        except RuntimeError as e:
+            self.app._log(f"Git mirror for '{job.source}' unavailable, cloning directly instead: {e}", warning=True)
+            return False
+        finally:
+            cache.discard_tmp(tmp_path)
+
+    def _clone(self, job, on_update):
+        job.phase = "Cloning"
+        self._notify(job, on_update)
+        cache = self.mirror_cache
+        if cache is None:
+            self.app._log(f"Cloning '{job.source}' into '{job.target_dir.name}'...")
+            self._run_git(job, self._build_clone_command(job), on_update)
+            return
+
+        cache.acquire(job.source)
+        try:
+            if not self._update_mirror(job, on_update):
+                self.app._log(f"Cloning '{job.source}' into '{job.target_dir.name}'...")
+                self._run_git(job, self._build_clone_command(job), on_update)
+                return
+            # A plain local path clone hardlinks the mirror's objects; --depth/--filter need the file:// transport.
+            mirror_path = cache.mirror_path(job.source)
+            mirror_source = mirror_path.as_uri() if (job.depth or job.partial_clone) else str(mirror_path)
+            self.app._log(f"Cloning '{job.source}' into '{job.target_dir.name}' from the local mirror...")
+            job.phase = "Cloning from mirror"
+            self._notify(job, on_update)
+            self._run_git(job, self._build_clone_command(job, mirror_source), on_update)
+            self._run_git(job, [constants.GIT_CMD, "-C", str(job.target_dir), "remote", "set-url", "origin", job.source], on_update)
+            cache.record_use(job.source)
+        finally:
+            cache.release(job.source)
+
+    def _npm_install(self, job, cmd_list, on_update):
+        def on_npm_line(line):
+            job.message = line
+
+        job.phase = "npm install"
+        job.percent = max(job.percent, _CLONE_SHARE if job.is_git else 10)
+        self._notify(job, on_update)
+        return_code = self._stream_process(job, cmd_list, str(job.target_dir), "NPM", on_npm_line, on_update)
+        if return_code != 0:
+            raise RuntimeError(f"'{' '.join(cmd_list)}' failed (code {return_code}): {job.message}")
+
+    def _run_job(self, job, on_update):
+        job.state = "Running"
+        job.started_at = time.time()
+        created_dir = False
+        try:
+            job._check_cancelled()
+            if job.is_git:
+                self._clone(job, on_update)
+                self._npm_install(job, [constants.NPM_CMD, "install"], on_update)
+            else:
+                job.target_dir.mkdir(parents=True, exist_ok=False)
+                created_dir = True
+                with open(job.target_dir / "package.json", "w", encoding='utf-8') as f:
+                    json.dump({"name": job.target_dir.name, "version": "0.1.0", "description": f"Project for {job.source}", "private": True}, f, indent=2)
+                self._npm_install(job, [constants.NPM_CMD, "install", job.source, "--save"], on_update)
+
+            job.state = "Done"
+            job.phase = "Done"
+            job.percent = 100
+            job.message = f"Fetched and set up '{job.target_dir.name}'."
+            self.app.fingerprint_store.record(str(job.target_dir.resolve()))
+            self.app._log(f"Successfully fetched and set up '{job.target_dir.name}'.")
+            self._schedule_rescan()
+        except FetchCancelled:
+            job.state = "Cancelled"
+            job.phase = "Cancelled"
+            self.app._log(f"Fetch of '{job.source}' cancelled.", warning=True)
+            self._cleanup(job, created_dir, force=True)
+        except FileNotFoundError as e:
+            job.state = "Failed"
+            job.error = command_not_found_message(e)
+            self.app._log(job.error, error=True)
+            self._cleanup(job, created_dir)
+        except Exception as e:
+            job.state = "Failed"
+            job.error = str(e)
+            self.app._log(f"Error fetching '{job.source}': {e}", error=True)
+            self._cleanup(job, created_dir)
+        finally:
+            job.finished_at = time.time()
+            self._notify(job, on_update)
+
+    def _cleanup(self, job, created_dir, force=False):
+        target_dir = job.target_dir
+        if not target_dir.exists():
+            return
+        try:
+            entries = list(target_dir.iterdir())
+            is_empty_or_only_pkg_json = not entries or (len(entries) == 1 and entries[0].name == "package.json")
+            # A cancelled clone is never worth keeping; a clone whose npm install failed still is.
+            if is_empty_or_only_pkg_json or (force and (created_dir or job.is_git)):
+                shutil.rmtree(target_dir, ignore_errors=True)
+                self.app._log(f"Cleaned up partially created/failed directory: {target_dir}")
+        except Exception as clean_e:
+            self.app._log(f"Error during cleanup of {target_dir}: {clean_e}", warning=True)
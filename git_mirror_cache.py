@@ -0,0 +1,158 @@
+# git_mirror_cache.py
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import constants
+import reclaimer
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+
+def normalize_remote_url(url):
+    """Makes trivially different spellings of the same remote share one mirror."""
+    normalized = url.strip().rstrip('/')
+    if normalized.endswith('.git'):
+        normalized = normalized[:-4]
+    return normalized.lower() if normalized.startswith(("http://", "https://")) else normalized
+
+
+def mirror_dir_name(url):
+    normalized = normalize_remote_url(url)
+    readable = re.sub(r"[^A-Za-z0-9_-]", "", normalized.rsplit('/', 1)[-1].split(':')[-1])[:40] or "repo"
+    return f"{readable}-{hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]}.git"
+
+
+def directory_size(path):
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class GitMirrorCache:
+    """Bare mirrors of fetched remotes in the config directory, evicted least-recently-used past a size cap."""
+
+    def __init__(self, app_instance, max_bytes=None):
+        self.app = app_instance
+        self.root = get_app_config_dir() / constants.GIT_MIRROR_DIR_NAME
+        self.index_file_path = self.root / constants.GIT_MIRROR_INDEX_FILE_NAME
+        self.max_bytes = max_bytes if max_bytes is not None else constants.GIT_MIRROR_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._in_use = set()
+        self._index = None
+
+    def _load(self):
+        if self._index is None:
+            self._index = load_json_store(self.index_file_path, self.app, "git mirror index")
+
+    def _save(self):
+        save_json_store(self.index_file_path, self._index, self.app, "git mirror index", indent=2)
+
+    def mirror_path(self, url):
+        return self.root / mirror_dir_name(url)
+
+    def has_mirror(self, url):
+        return (self.mirror_path(url) / "HEAD").is_file()
+
+    def acquire(self, url):
+        """Locks a remote's mirror for one fetch job; eviction skips mirrors that are in use."""
+        key = normalize_remote_url(url)
+        with self._lock:
+            url_lock = self._url_locks.setdefault(key, threading.Lock())
+        url_lock.acquire()
+        with self._lock:
+            self._in_use.add(key)
+
+    def release(self, url):
+        key = normalize_remote_url(url)
+        with self._lock:
+            self._in_use.discard(key)
+            url_lock = self._url_locks.get(key)
+        if url_lock and url_lock.locked():
+            url_lock.release()
+
+    def build_create_command(self, url, tmp_path):
+        # A bare clone keeps only branches and tags; `--mirror` would also pull refs such as refs/pull/* from hosts.
+        return [constants.GIT_CMD, "clone", "--bare", "--progress", url, str(tmp_path)]
+
+    def build_refresh_command(self, url):
+        return [constants.GIT_CMD, "-C", str(self.mirror_path(url)), "fetch", "--progress", "--prune", "--tags",
+                "origin", "+refs/heads/*:refs/heads/*"]
+
+    def new_tmp_path(self, url):
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f"{mirror_dir_name(url)}.partial-{time.time_ns()}"
+
+    def install_mirror(self, url, tmp_path):
+        """Moves a freshly created bare clone into place and configures it for later refreshes/filters."""
+        target = self.mirror_path(url)
+        if target.exists():
+            shutil.rmtree(target, onerror=reclaimer.handle_rmtree_error)
+        os.rename(tmp_path, target)
+        process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        # Lets file:// clones from the mirror honour --filter for partial clones.
+        subprocess.run([constants.GIT_CMD, "-C", str(target), "config", "uploadpack.allowFilter", "true"],
+                       capture_output=True, check=False, creationflags=process_flags)
+
+    def discard_tmp(self, tmp_path):
+        if tmp_path and Path(tmp_path).exists():
+            shutil.rmtree(tmp_path, onerror=reclaimer.handle_rmtree_error)
+
+    def record_use(self, url):
+        """Updates the mirror's LRU timestamp and size, then evicts old mirrors if the cache is over its cap."""
+        size = directory_size(self.mirror_path(url))
+        with self._lock:
+            self._load()
+            self._index[normalize_remote_url(url)] = {
+                "dir": mirror_dir_name(url), "url": url, "last_used": time.time(), "bytes": size,
+            }
+            self._save()
+        self.enforce_limit()
+
+    def total_bytes(self):
+        with self._lock:
+            self._load()
+            return sum(entry.get("bytes", 0) for entry in self._index.values())
+
+    def enforce_limit(self):
+        with self._lock:
+            self._load()
+            # Drop entries whose mirror folder was removed by hand.
+            self._index = {key: entry for key, entry in self._index.items() if (self.root / entry["dir"]).is_dir()}
+            total = sum(entry.get("bytes", 0) for entry in self._index.values())
+            evicted = []
+            for key, entry in sorted(self._index.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                if key in self._in_use:
+                    continue
+                total -= entry.get("bytes", 0)
+                evicted.append((key, entry))
+            tombstones = []
+            for key, entry in evicted:
+                del self._index[key]
+                # Renamed away while the lock is held, so an acquire() that follows finds no mirror and creates a
+                # fresh one instead of using a folder that is being deleted.
+                try:
+                    tombstones.append(reclaimer.make_tombstone(self.root / entry["dir"]))
+                except OSError:
+                    pass
+            self._save()
+            # Also picks up tombstones left behind by an interrupted eviction.
+            tombstones.extend(path for path in self.root.glob(f"{constants.TOMBSTONE_PREFIX}*") if path not in tombstones)
+
+        for tombstone in tombstones:
+            # Project clones hold their own (copied or hardlinked) objects and do not depend on the mirror.
+            shutil.rmtree(tombstone, onerror=reclaimer.handle_rmtree_error)
+        for key, entry in evicted:
+            self.app._log(f"Evicted git mirror of '{entry.get('url', key)}' ({entry.get('bytes', 0) // (1024 * 1024)} MB) to stay under the cache limit.")
@@ -0,0 +1,255 @@
+# git_tracking.py
+import hashlib
+import os
+import signal
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import bulk_operations
+import constants
+import metrics
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+
+class GitError(Exception):
+    pass
+
+
+def git_dir_of(app_path):
+    """The repository's git directory (a worktree's .git file points elsewhere), or None if it is not a repo."""
+    dot_git = Path(app_path) / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        try:
+            content = dot_git.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            return git_dir if git_dir.is_absolute() else (Path(app_path) / git_dir).resolve()
+    return None
+
+
+def ref_fingerprint(app_path):
+    """Changes whenever a local or remote-tracking ref moves (commit, checkout, pull, fetch); stat calls only.
+
+    Covers HEAD, packed-refs, FETCH_HEAD and every loose ref under refs/heads and refs/remotes.
+    """
+    git_dir = git_dir_of(app_path)
+    if git_dir is None:
+        return None
+    common_dir = git_dir
+    try:
+        common_dir = (git_dir / (git_dir / "commondir").read_text(encoding='utf-8').strip()).resolve()
+    except OSError:
+        pass # Not a linked worktree.
+    entries = []
+    for base, relative in ((git_dir, "HEAD"), (git_dir, "FETCH_HEAD"), (common_dir, "packed-refs")):
+        try:
+            stat = (base / relative).stat()
+            entries.append((relative, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            pass
+    for refs_root in ("refs/heads", "refs/remotes"):
+        for dir_path, _, file_names in os.walk(common_dir / refs_root):
+            for file_name in file_names:
+                full_path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                entries.append((os.path.relpath(full_path, common_dir), stat.st_mtime_ns, stat.st_size))
+    return hashlib.sha1(repr(sorted(entries)).encode('utf-8')).hexdigest()
+
+
+def _git_env():
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0", GCM_INTERACTIVE="never")
+    # A fetch must fail rather than wait for a password or a host-key prompt nobody can see.
+    env.setdefault("GIT_SSH_COMMAND", "ssh -o BatchMode=yes")
+    return env
+
+
+def run_git(args, cwd, timeout):
+    """Runs git; returns (returncode, stdout, stderr). Raises subprocess.TimeoutExpired after killing it.
+
+    On POSIX git runs in its own process group, so a timeout also kills the ssh or https helper it started.
+    """
+    process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    with metrics.SUBPROCESS_SPAWN_SECONDS.time(kind="git"):
+        process = subprocess.Popen(
+            [constants.GIT_CMD] + list(args), cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL, text=True, encoding='utf-8', errors='replace', env=_git_env(),
+            creationflags=process_flags, start_new_session=(os.name != 'nt')
+        )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name != 'nt':
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        process.kill()
+        process.communicate()
+        raise
+    return process.returncode, stdout, stderr
+
+
+def compute_ahead_behind(app_path):
+    """{'upstream': 'origin/main', 'ahead': n, 'behind': m}, or {'upstream': None} without an upstream branch."""
+    code, stdout, _ = run_git(["rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{upstream}"],
+                              app_path, constants.GIT_COUNT_TIMEOUT_SECONDS)
+    if code != 0 or not stdout.strip():
+        return {"upstream": None} # Detached HEAD, or a branch that tracks nothing.
+    upstream = stdout.strip()
+    code, stdout, stderr = run_git(["rev-list", "--left-right", "--count", "HEAD...@{upstream}"],
+                                   app_path, constants.GIT_COUNT_TIMEOUT_SECONDS)
+    if code != 0:
+        raise GitError(stderr.strip() or f"git rev-list exited with code {code}")
+    ahead, behind = (int(count) for count in stdout.split())
+    return {"upstream": upstream, "ahead": ahead, "behind": behind}
+
+
+def format_count(git_sync, field):
+    """Treeview text for 'ahead' or 'behind': the count, or '-' when unknown or there is no upstream."""
+    if not git_sync or git_sync.get(field) is None:
+        return "-"
+    return str(git_sync[field])
+
+
+def describe_sync(git_sync):
+    if not git_sync or "error" in git_sync:
+        return (git_sync or {}).get("error", "unknown")
+    if git_sync.get("upstream") is None:
+        return "no upstream branch"
+    parts = [f"{git_sync[field]} {field}" for field in ("ahead", "behind") if git_sync[field]]
+    return f"{', '.join(parts)} ({git_sync['upstream']})" if parts else f"up to date with {git_sync['upstream']}"
+
+
+class GitTracker:
+    """Ahead/behind counts per repository, cached on disk until a ref moves.
+
+    The cache key is ref_fingerprint, so a rescan only runs `git rev-list` for repos where something was
+    committed, checked out or fetched since the counts were taken. fetch_all runs `git fetch` across many
+    repos with bounded parallelism and a per-repo timeout, then refreshes their counts.
+    """
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.cache_file_path = get_app_config_dir() / constants.GIT_TRACKING_FILE_NAME
+        self._lock = threading.Lock()
+        self._data = None
+        self._fetch_running = False
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_json_store(self.cache_file_path, self.app, "Git tracking cache")
+
+    def _save(self):
+        save_json_store(self.cache_file_path, self._data, self.app, "Git tracking cache")
+
+    @property
+    def fetch_running(self):
+        return self._fetch_running
+
+    def sync_state(self, app_path, fetched_at=None):
+        """Cached counts if no ref has moved since they were taken, else freshly computed ones (and cached).
+
+        Returns None for a folder that is not a Git repository. Runs git, so call it off the Tk thread.
+        """
+        fingerprint = ref_fingerprint(app_path)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._data.get(str(app_path))
+        if entry and entry.get("fingerprint") == fingerprint and fetched_at is None:
+            return entry["sync"]
+        try:
+            git_sync = compute_ahead_behind(app_path)
+        except (GitError, subprocess.TimeoutExpired, ValueError) as e:
+            return {"error": str(e)}
+        git_sync["fetched_at"] = fetched_at or (entry or {}).get("sync", {}).get("fetched_at")
+        with self._lock:
+            self._load()
+            # Taken again: the rev-parse/rev-list above does not move refs, but a concurrent commit might have.
+            if ref_fingerprint(app_path) == fingerprint:
+                self._data[str(app_path)] = {"fingerprint": fingerprint, "sync": git_sync}
+                self._save()
+        return git_sync
+
+    def refresh(self, app_paths):
+        """Fills the Ahead/Behind columns in the background; only repos whose refs moved run git."""
+        app_paths = list(app_paths)
+
+        def task():
+            for path in app_paths:
+                try:
+                    git_sync = self.sync_state(path)
+                except FileNotFoundError:
+                    return # git is not installed; the scan already logged that.
+                if git_sync is not None:
+                    self.app.after(0, lambda p=path, s=git_sync: \
+                                   self.app._update_app_status(p, git_sync=s) if p in self.app.apps_data else None)
+
+        threading.Thread(target=task, name="git-tracking", daemon=True).start()
+
+    def remove(self, app_path):
+        with self._lock:
+            self._load()
+            if self._data.pop(str(app_path), None) is not None:
+                self._save()
+
+    def fetch_all(self, app_paths, max_workers=None, on_complete=None):
+        """Runs `git fetch --prune` in every repo among app_paths, at most max_workers at a time.
+
+        on_complete(results, summary) runs on the Tk thread with one bulk-operation style result per project.
+        """
+        if self._fetch_running:
+            self.app._log("Fetch All is already running.", warning=True)
+            return
+        self._fetch_running = True
+
+        def fetch_one(app_path):
+            result = bulk_operations.new_result(self.app, app_path, command="git fetch")
+            app_name = result["name"]
+            if git_dir_of(app_path) is None:
+                result["result"] = "Skipped (not a Git repository)"
+                return result
+            t_start = time.perf_counter()
+            try:
+                code, _, stderr = run_git(["fetch", "--prune", "--quiet"], app_path, constants.GIT_FETCH_TIMEOUT_SECONDS)
+            except FileNotFoundError:
+                result["result"] = "Failed (git not found)"
+                return result
+            except subprocess.TimeoutExpired:
+                result["duration"] = time.perf_counter() - t_start
+                result["result"] = f"Failed (timed out after {constants.GIT_FETCH_TIMEOUT_SECONDS}s)"
+                self.app._log(f"[{app_name}] git fetch timed out after {constants.GIT_FETCH_TIMEOUT_SECONDS}s.", error=True)
+                return result
+            result["duration"] = time.perf_counter() - t_start
+            if code != 0:
+                # git's first line is the cause ("fatal: ..."); the rest are hints.
+                first_line = (stderr.strip().splitlines() or [f"exit code {code}"])[0]
+                result["result"] = f"Failed ({first_line})"
+                self.app._log(f"[{app_name}] git fetch failed: {stderr.strip()}", error=True)
+                return result
+            git_sync = self.sync_state(app_path, fetched_at=time.time())
+            result["ok"] = "error" not in git_sync
+            result["result"] = ("OK: " if result["ok"] else "Failed (") + describe_sync(git_sync) + ("" if result["ok"] else ")")
+            self.app.after(0, lambda p=app_path, s=git_sync: \
+                           self.app._update_app_status(p, git_sync=s) if p in self.app.apps_data else None)
+            return result
+
+        def finished(results, summary):
+            self._fetch_running = False
+            if on_complete:
+                on_complete(results, summary)
+
+        bulk_operations.run_for_each_project(
+            self.app, "Fetch All", app_paths, fetch_one, max(1, max_workers or constants.GIT_FETCH_MAX_WORKERS),
+            "git-fetch", on_complete=finished,
+            ok_note=lambda ok_results: f"{sum(1 for r in ok_results if ' behind' in r['result'])} behind upstream")
@@ -0,0 +1,232 @@
+# launch_policy.py
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import constants
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+POLICY_FIELDS = ("memory_mb", "cpus", "nice", "nofile")
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def get_policy(app, app_path):
+    """The project's launch policy (config 'launch_policies', keyed by path); unset fields are None."""
+    stored = (app.config_data.get("launch_policies") or {}).get(str(app_path)) or {}
+    return {field: stored.get(field) for field in POLICY_FIELDS}
+
+
+def set_policy(app, app_path, policy):
+    policies = app.config_data.setdefault("launch_policies", {})
+    cleaned = {field: policy[field] for field in POLICY_FIELDS if policy.get(field) not in (None, "")}
+    if cleaned:
+        policies[str(app_path)] = cleaned
+    else:
+        policies.pop(str(app_path), None)
+    app.config_manager.save_config()
+
+
+def parse_cpu_list(text):
+    """'0-3,6' -> {0, 1, 2, 3, 6}. Raises ValueError on malformed input."""
+    cpus = set()
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(bound) for bound in part.split("-", 1))
+            if first > last:
+                raise ValueError(f"bad CPU range '{part}'")
+            cpus.update(range(first, last + 1))
+        else:
+            cpus.add(int(part))
+    if not cpus:
+        raise ValueError("no CPUs given")
+    return cpus
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+def describe_policy(policy):
+    parts = []
+    if policy.get("memory_mb"):
+        parts.append(f"memory {policy['memory_mb']} MB")
+    if policy.get("cpus") not in (None, ""):
+        parts.append(f"CPUs {policy['cpus']}")
+    if policy.get("nice") is not None:
+        parts.append(f"nice {policy['nice']}")
+    if policy.get("nofile"):
+        parts.append(f"open files {policy['nofile']}")
+    return ", ".join(parts) or "none"
+
+
+def _delegated_cgroup_parent():
+    # cgroup v2 only lets a process create child groups where it has been delegated one (e.g. a systemd
+    # user session). Our own group already holds processes, so app groups are created next to it.
+    if not (_CGROUP_ROOT / "cgroup.controllers").exists():
+        return None
+    try:
+        own_line = next(line for line in Path("/proc/self/cgroup").read_text().splitlines() if line.startswith("0::"))
+        parent = (_CGROUP_ROOT / own_line[3:].lstrip("/")).parent
+        if "memory" not in (parent / "cgroup.subtree_control").read_text().split():
+            return None
+    except (OSError, StopIteration):
+        return None
+    return parent if os.access(parent, os.W_OK) else None
+
+
+class PreparedLaunch:
+    """What one start applies: preexec_fn runs in the child between fork and exec, so every process the app
+    starts inherits the limits. Settings that cannot be applied are dropped with a warning beforehand,
+    because an exception in preexec_fn would only surface as a failed spawn.
+
+    The manager is threaded, so the child only makes plain system calls before exec; joining the cgroup
+    means writing a file, which the shell added by wrap_command() does instead.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.warnings = []
+        self.applied = []
+        self.cgroup_dir = None
+        self._rlimits = []
+        self._cpus = None
+        self._nice = None
+        self._cgroup_procs = None
+
+    @property
+    def preexec_fn(self):
+        if not (self._rlimits or self._cpus or self._nice is not None):
+            return None
+        return self._apply_in_child
+
+    def _apply_in_child(self):
+        for limit, values in self._rlimits:
+            resource.setrlimit(limit, values)
+        if self._cpus:
+            os.sched_setaffinity(0, self._cpus)
+        if self._nice is not None:
+            os.nice(self._nice - os.nice(0))
+
+    def wrap_command(self, cmd_list):
+        """cmd_list, run through sh so the process joins the app's cgroup itself and then execs the command.
+
+        Joining before exec means nothing the app starts can escape the memory cap; the shell's echo keeps
+        the file write out of preexec_fn. The cgroup.procs path is passed as $0, so it needs no quoting.
+        """
+        if not self._cgroup_procs:
+            return cmd_list
+        return ["sh", "-c", 'echo $$ > "$0" && exec "$@"', self._cgroup_procs] + list(cmd_list)
+
+    def cleanup(self, app, app_name):
+        """Reports a memory-cap kill and removes the app's cgroup once its processes are gone."""
+        if self.cgroup_dir is None:
+            return
+        try:
+            events = dict(line.split() for line in (self.cgroup_dir / "memory.events").read_text().splitlines())
+            if int(events.get("oom_kill", 0)):
+                app._log(f"'{app_name}' was killed for exceeding its memory cap of {self.policy['memory_mb']} MB.", error=True)
+            self.cgroup_dir.rmdir()
+        except (OSError, ValueError):
+            pass # Still populated (a leftover child) or already gone; the next start reuses it.
+
+
+def _positive_int(launch, policy, field, label):
+    # Checked here too, because setrlimit() with a bad value would fail inside preexec_fn on every start.
+    value = policy.get(field)
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value) if not isinstance(value, float) or value.is_integer() else None
+    except (TypeError, ValueError):
+        number = None
+    if number is None or number <= 0:
+        launch.warnings.append(f"ignoring {label} '{value}': it must be a positive whole number")
+        return None
+    return number
+
+
+def prepare(policy, app_path, dry_run=False):
+    """Validates a policy against this platform and session and returns a PreparedLaunch.
+
+    dry_run only collects the warnings (no cgroup is created), for checking a policy when it is saved.
+    """
+    launch = PreparedLaunch(policy)
+    if os.name == 'nt':
+        if any(policy.get(field) not in (None, "") for field in POLICY_FIELDS):
+            launch.warnings.append("launch policies are only applied on Linux and macOS")
+        return launch
+
+    memory_mb = _positive_int(launch, policy, "memory_mb", "memory cap")
+    if memory_mb:
+        memory_bytes = memory_mb * 1024 * 1024
+        cgroup_parent = _delegated_cgroup_parent()
+        cgroup_dir = None
+        if cgroup_parent is not None and dry_run:
+            cgroup_dir = cgroup_parent
+        elif cgroup_parent is not None:
+            cgroup_dir = cgroup_parent / f"{constants.LAUNCH_CGROUP_PREFIX}{hashlib.sha1(str(app_path).encode()).hexdigest()[:12]}"
+            try:
+                cgroup_dir.mkdir(exist_ok=True)
+                (cgroup_dir / "memory.max").write_text(str(memory_bytes))
+                if (cgroup_dir / "memory.swap.max").exists():
+                    (cgroup_dir / "memory.swap.max").write_text("0") # The cap is meant to stop swapping, not move it.
+            except OSError as e:
+                launch.warnings.append(f"could not set up cgroup {cgroup_dir} ({e}); using RLIMIT_AS instead")
+                cgroup_dir = None
+        if cgroup_dir is not None:
+            launch.cgroup_dir = cgroup_dir
+            launch._cgroup_procs = str(cgroup_dir / "cgroup.procs")
+            launch.applied.append(f"memory {memory_mb} MB (cgroup)")
+        else:
+            # RLIMIT_AS caps address space, not resident memory; V8 alone reserves close to 1 GB of it.
+            launch._rlimits.append((resource.RLIMIT_AS, (memory_bytes, memory_bytes)))
+            launch.applied.append(f"memory {memory_mb} MB (RLIMIT_AS)")
+            if memory_mb < constants.LAUNCH_RLIMIT_AS_MIN_MB:
+                launch.warnings.append(f"RLIMIT_AS of {memory_mb} MB limits virtual memory; Node usually needs "
+                                       f"at least {constants.LAUNCH_RLIMIT_AS_MIN_MB} MB of it just to start")
+
+    if policy.get("cpus") not in (None, ""):
+        try:
+            requested_cpus = parse_cpu_list(policy["cpus"])
+        except ValueError as e:
+            launch.warnings.append(f"ignoring CPU set '{policy['cpus']}': {e}")
+        else:
+            usable_cpus = requested_cpus & available_cpus()
+            if not hasattr(os, "sched_setaffinity"):
+                launch.warnings.append(f"CPU affinity is not supported on {sys.platform}")
+            elif not usable_cpus:
+                launch.warnings.append(f"ignoring CPU set '{policy['cpus']}': none of those CPUs are available "
+                                       f"(available: {','.join(map(str, sorted(available_cpus())))})")
+            else:
+                if usable_cpus != requested_cpus:
+                    launch.warnings.append(f"CPUs {','.join(map(str, sorted(requested_cpus - usable_cpus)))} are not available")
+                launch._cpus = usable_cpus
+                launch.applied.append(f"CPUs {','.join(map(str, sorted(usable_cpus)))}")
+
+    if policy.get("nice") is not None:
+        nice = max(-20, min(19, int(policy["nice"])))
+        if nice < os.nice(0) and os.geteuid() != 0:
+            launch.warnings.append(f"nice {nice} is below the manager's own ({os.nice(0)}); only root may raise priority")
+        else:
+            launch._nice = nice
+            launch.applied.append(f"nice {nice}")
+
+    requested = _positive_int(launch, policy, "nofile", "open-file limit")
+    if requested:
+        _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard != resource.RLIM_INFINITY and requested > hard and os.geteuid() != 0:
+            launch.warnings.append(f"open-file limit {requested} is above the hard limit {hard}; using {hard}")
+            requested = hard
+        # Node raises its soft limit to the hard one at startup, so both are set.
+        launch._rlimits.append((resource.RLIMIT_NOFILE, (requested, requested)))
+        launch.applied.append(f"open files {requested}")
+    return launch
@@ -0,0 +1,469 @@
+# local_proxy.py
+import asyncio
+import collections
+import html
+import re
+import threading
+import time
+
+import constants
+import metrics
+from readiness import percentile
+
+# Headers that describe one connection and are not forwarded. Transfer-Encoding is kept: bodies are relayed
+# with their framing unchanged.
+_HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "te", "trailer", "upgrade",
+                       "proxy-authenticate", "proxy-authorization"}
+_PATH_ROUTE_RE = re.compile(r"^/([^/?#]+)(.*)$")
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_name(app_name):
+    """The project's name as a host label: 'My App_2' -> 'my-app-2'."""
+    return re.sub(r"[^a-z0-9]+", "-", app_name.lower()).strip("-") or "app"
+
+
+def running_routes(app):
+    """{route: (app_path, ports)} of running projects whose port is known. Safe to call from any thread.
+
+    A cluster routes to its running instances in turn; a single app to its detected port, else the port
+    leased to it on start.
+    """
+    routes = {}
+    for path, data in sorted(list(app.apps_data.items())):
+        if data.get("status") != "Running":
+            continue
+        ports = sorted({int(inst["port"]) for inst in data.get("instances") or []
+                        if inst["status"] == "Running" and str(inst["port"]).isdigit()})
+        if not ports:
+            port = str(data.get("port", ""))
+            port = int(port) if port.isdigit() else app.port_registry.leased_port(path)
+            ports = [port] if port else []
+        if ports:
+            routes.setdefault(route_name(data["name"]), (path, ports))
+    return routes
+
+
+def _parse_head(data):
+    lines = data.decode('latin-1').split("\r\n")
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"malformed header line {line!r}")
+        headers.append((name.strip(), value.strip()))
+    return lines[0], headers
+
+
+def _header(headers, name):
+    values = [value for header_name, value in headers if header_name.lower() == name]
+    return values[-1] if values else None
+
+
+def _tokens(headers, name):
+    return {token.strip().lower() for value in (v for n, v in headers if n.lower() == name) for token in value.split(",")}
+
+
+def _body_framing(headers):
+    """('chunked', None), ('length', n) or (None, None) for a message without a body."""
+    if "chunked" in _tokens(headers, "transfer-encoding"):
+        return "chunked", None
+    length = _header(headers, "content-length")
+    if length is not None:
+        if not length.isdigit():
+            raise ValueError(f"bad Content-Length {length!r}")
+        return ("length", int(length)) if int(length) else (None, None)
+    return None, None
+
+
+def _format_head(start_line, headers):
+    return (start_line + "\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers) + "\r\n").encode('latin-1')
+
+
+async def _copy_exact(reader, writer, length):
+    remaining = length
+    while remaining:
+        chunk = await reader.read(min(remaining, constants.PROXY_COPY_CHUNK_BYTES))
+        if not chunk:
+            raise asyncio.IncompleteReadError(b"", remaining)
+        writer.write(chunk)
+        remaining -= len(chunk)
+        await writer.drain()
+
+
+async def _copy_chunked(reader, writer):
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        writer.write(size_line)
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            while True: # Trailers, up to the empty line.
+                line = await reader.readuntil(b"\r\n")
+                writer.write(line)
+                if line == b"\r\n":
+                    break
+            await writer.drain()
+            return
+        await _copy_exact(reader, writer, size + 2) # Chunk data and its CRLF.
+
+
+async def _copy_until_eof(reader, writer):
+    while True:
+        chunk = await reader.read(constants.PROXY_COPY_CHUNK_BYTES)
+        if not chunk:
+            return
+        writer.write(chunk)
+        await writer.drain()
+
+
+async def _copy_body(reader, writer, framing, length):
+    if framing == "chunked":
+        await _copy_chunked(reader, writer)
+    elif framing == "length":
+        await _copy_exact(reader, writer, length)
+
+
+class _Upstream:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = None
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.websockets = 0
+        self.total_seconds = 0.0
+        self.last_status = None
+        self.latencies = collections.deque(maxlen=constants.PROXY_LATENCY_SAMPLES)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests, "errors": self.errors, "websockets": self.websockets,
+            "last_status": self.last_status,
+            "avg": self.total_seconds / self.requests if self.requests else None,
+            "p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+        }
+
+
+class LocalProxy:
+    """Reverse proxy on one local port for every running project: http://<route>.localhost:<port>/ by host,
+    or http://localhost:<port>/<route>/ by path (the prefix is stripped and sent as X-Forwarded-Prefix).
+
+    It runs its own asyncio loop thread. Idle upstream connections are pooled per app port, and WebSocket
+    (Upgrade) requests are piped through untouched once the app has answered 101.
+    """
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._port = None
+        self._client_writers = set()
+        self._pool = {}
+        self._preferred_hosts = {}
+        self._next_instance = collections.Counter()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def port(self):
+        """The bound port while running, else None."""
+        return self._port if self._server is not None else None
+
+    def url_for(self, app_name):
+        return f"http://{route_name(app_name)}.localhost:{self.port}/"
+
+    def start(self, port=None):
+        """Starts listening on PROXY_HOST; returns the bound port. Raises OSError if the port is taken."""
+        if self._server is not None:
+            return self._port
+        bound = threading.Event()
+        result = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                server = loop.run_until_complete(asyncio.start_server(
+                    self._handle_client, constants.PROXY_HOST, constants.PROXY_PORT if port is None else port,
+                    limit=constants.PROXY_HEADER_LIMIT_BYTES))
+            except OSError as e:
+                result["error"] = e
+                loop.close()
+                bound.set()
+                return
+            self._loop, self._server = loop, server
+            self._port = server.sockets[0].getsockname()[1]
+            bound.set()
+            loop.run_forever()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-proxy", daemon=True)
+        self._thread.start()
+        bound.wait()
+        if "error" in result:
+            self._thread = None
+            raise result["error"]
+        return self._port
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(timeout=5)
+        self._loop = self._server = self._thread = None
+
+    def _shutdown(self):
+        self._server.close()
+        for writer in list(self._client_writers):
+            writer.close()
+        for idle in self._pool.values():
+            for upstream in idle:
+                upstream.writer.close()
+        self._pool.clear()
+        self._loop.stop()
+
+    def route_stats(self):
+        """Rows for the routes dialog: every running route, plus routes that have had traffic."""
+        routes = running_routes(self.app)
+        with self._stats_lock:
+            stats = {route: route_stats.snapshot() for route, route_stats in self._stats.items()}
+        rows = []
+        for route in sorted(set(routes) | set(stats)):
+            path, ports = routes.get(route, (None, []))
+            rows.append(dict(stats.get(route) or RouteStats().snapshot(), route=route, path=path, ports=ports))
+        return rows
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    def _record(self, route, status_code, seconds, websocket=False):
+        with self._stats_lock:
+            route_stats = self._stats.setdefault(route, RouteStats())
+            route_stats.requests += 1
+            route_stats.websockets += websocket
+            route_stats.errors += status_code >= 500
+            route_stats.last_status = status_code
+            route_stats.total_seconds += seconds
+            route_stats.latencies.append(seconds)
+        metrics.PROXY_REQUESTS.inc(route=route, code=f"{status_code // 100}xx")
+        metrics.PROXY_REQUEST_SECONDS.observe(seconds, route=route)
+
+    # --- Client side ---
+    async def _handle_client(self, reader, writer):
+        self._client_writers.add(writer)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), constants.PROXY_CLIENT_IDLE_SECONDS)
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, "Request Header Fields Too Large", "Request head too large.")
+                    return
+                keep_alive = await self._handle_request(head, reader, writer)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            pass # Client went away, idled out or sent something that is not HTTP/1.x.
+        except asyncio.CancelledError:
+            pass # The proxy is stopping; the stream callback reports a cancelled handler as an error.
+        finally:
+            self._client_writers.discard(writer)
+            writer.close()
+
+    def _resolve(self, headers, target):
+        """(route, prefix, upstream_target); route is None for the proxy's own index page."""
+        host = (_header(headers, "host") or "").lower()
+        host = host.rsplit(":", 1)[0] if not host.endswith("]") else host
+        if host.endswith(".localhost"):
+            return host[:-len(".localhost")].rsplit(".", 1)[-1], "", target
+        match = _PATH_ROUTE_RE.match(target)
+        if match is None:
+            return None, "", target
+        return match.group(1), f"/{match.group(1)}", match.group(2)
+
+    async def _handle_request(self, head, reader, writer):
+        """Relays one request; returns whether the client connection can take another one."""
+        started = time.perf_counter()
+        start_line, headers = _parse_head(head)
+        method, target, version = start_line.split(" ", 2)
+        connection_tokens = _tokens(headers, "connection")
+        client_keep_alive = ("close" not in connection_tokens) if version == "HTTP/1.1" else ("keep-alive" in connection_tokens)
+        framing, length = _body_framing(headers)
+        route, prefix, upstream_target = self._resolve(headers, target)
+        routes = running_routes(self.app)
+
+        if route not in routes:
+            if route is None or prefix and target == "/":
+                await self._respond(writer, 200, "OK", self._index_page(routes), keep_alive=client_keep_alive and framing is None)
+            else:
+                await self._respond(writer, 404, "Not Found", f"No running project is routed as '{html.escape(route)}'."
+                                    + self._index_page(routes), keep_alive=client_keep_alive and framing is None)
+            return client_keep_alive and framing is None
+        if prefix and not upstream_target.startswith("/"):
+            # /<route> -> /<route>/, so the app's relative links resolve below the prefix.
+            await self._respond(writer, 308, "Permanent Redirect", "", keep_alive=client_keep_alive and framing is None,
+                                extra_headers=[("Location", f"{prefix}/{upstream_target}")])
+            return client_keep_alive and framing is None
+
+        _, ports = routes[route]
+        port = ports[self._next_instance[route] % len(ports)]
+        self._next_instance[route] += 1
+        is_upgrade = "upgrade" in connection_tokens and _header(headers, "upgrade") is not None
+
+        peer = writer.get_extra_info("peername")
+        forwarded_for = ", ".join(filter(None, [_header(headers, "x-forwarded-for"), peer[0] if peer else None]))
+        upstream_headers = [(name, value) for name, value in headers
+                            if name.lower() not in _HOP_BY_HOP_HEADERS and name.lower() not in ("host", "x-forwarded-for")]
+        if framing == "chunked":
+            upstream_headers = [(name, value) for name, value in upstream_headers if name.lower() != "content-length"]
+        upstream_headers += [("Host", f"localhost:{port}"), ("X-Forwarded-For", forwarded_for),
+                             ("X-Forwarded-Host", _header(headers, "host") or ""), ("X-Forwarded-Proto", "http")]
+        if prefix:
+            upstream_headers.append(("X-Forwarded-Prefix", prefix))
+        if is_upgrade:
+            upstream_headers += [("Connection", "Upgrade"), ("Upgrade", _header(headers, "upgrade"))]
+        else:
+            upstream_headers.append(("Connection", "keep-alive"))
+        request_head = _format_head(f"{method} {upstream_target} HTTP/1.1", upstream_headers)
+
+        # A pooled connection the app has just closed fails on first use; only requests that are safe to repeat
+        # (no body, idempotent method) are retried on a fresh connection.
+        can_retry = method in _IDEMPOTENT_METHODS and framing is None
+        for attempt in range(2):
+            try:
+                upstream, reused = await self._acquire(port, fresh=is_upgrade)
+            except OSError as e:
+                await self._respond(writer, 502, "Bad Gateway", f"'{html.escape(route)}' is not accepting connections "
+                                    f"on port {port}: {html.escape(str(e))}", keep_alive=False)
+                self._record(route, 502, time.perf_counter() - started)
+                return False
+            try:
+                upstream.writer.write(request_head)
+                await _copy_body(reader, upstream.writer, framing, length)
+                await upstream.writer.drain()
+                response_head = await upstream.reader.readuntil(b"\r\n\r\n")
+                break
+            except (OSError, asyncio.IncompleteReadError) as e:
+                upstream.writer.close()
+                if reused and can_retry and attempt == 0:
+                    continue
+                await self._respond(writer, 502, "Bad Gateway", f"'{html.escape(route)}' closed the connection: "
+                                    f"{html.escape(str(e) or type(e).__name__)}", keep_alive=False)
+                self._record(route, 502, time.perf_counter() - started)
+                return False
+
+        try:
+            status_line, response_headers = _parse_head(response_head)
+            status_code = int(status_line.split(" ", 2)[1])
+            while 100 <= status_code < 200 and status_code != 101: # e.g. 100 Continue; the final answer follows.
+                writer.write(response_head)
+                response_head = await upstream.reader.readuntil(b"\r\n\r\n")
+                status_line, response_headers = _parse_head(response_head)
+                status_code = int(status_line.split(" ", 2)[1])
+
+            if status_code == 101 and is_upgrade:
+                writer.write(response_head)
+                await writer.drain()
+                self._record(route, status_code, time.perf_counter() - started, websocket=True)
+                await asyncio.gather(self._pipe(reader, upstream.writer), self._pipe(upstream.reader, writer))
+                upstream.writer.close()
+                return False
+
+            if method == "HEAD" or status_code in (204, 304) or 100 <= status_code < 200:
+                response_framing, response_length = None, None
+            else:
+                response_framing, response_length = _body_framing(response_headers)
+                if response_framing is None and _header(response_headers, "content-length") is None:
+                    response_framing = "eof" # Delimited by the app closing the connection.
+            upstream_reusable = response_framing != "eof" and "close" not in _tokens(response_headers, "connection") \
+                and status_line.startswith("HTTP/1.1") and not is_upgrade
+            keep_alive = client_keep_alive and response_framing != "eof"
+
+            client_headers = [(name, value) for name, value in response_headers if name.lower() not in _HOP_BY_HOP_HEADERS]
+            if prefix:
+                client_headers = [(name, f"{prefix}{value}" if name.lower() == "location" and value.startswith("/")
+                                   and not value.startswith("//") else value) for name, value in client_headers]
+            client_headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+            writer.write(_format_head(status_line, client_headers))
+            if response_framing == "eof":
+                await _copy_until_eof(upstream.reader, writer)
+            else:
+                await _copy_body(upstream.reader, writer, response_framing, response_length)
+            await writer.drain()
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            upstream.writer.close()
+            self._record(route, 502, time.perf_counter() - started)
+            return False
+
+        self._record(route, status_code, time.perf_counter() - started)
+        if upstream_reusable:
+            self._release(port, upstream)
+        else:
+            upstream.writer.close()
+        return keep_alive
+
+    async def _pipe(self, reader, writer):
+        try:
+            await _copy_until_eof(reader, writer)
+            if writer.can_write_eof():
+                writer.write_eof()
+        except OSError:
+            writer.close()
+
+    async def _respond(self, writer, status_code, reason, body, keep_alive=False, extra_headers=()):
+        payload = body.encode('utf-8')
+        headers = [("Content-Type", "text/html; charset=utf-8"), ("Content-Length", str(len(payload))),
+                   ("Connection", "keep-alive" if keep_alive else "close"), *extra_headers]
+        writer.write(_format_head(f"HTTP/1.1 {status_code} {reason}", headers) + payload)
+        await writer.drain()
+
+    def _index_page(self, routes):
+        items = "".join(
+            f'<li><a href="http://{route}.localhost:{self._port}/">{route}.localhost</a> or '
+            f'<a href="/{route}/">/{route}/</a> &rarr; port {", ".join(map(str, ports))}</li>'
+            for route, (_, ports) in sorted(routes.items()))
+        return f"<h1>Running projects</h1><ul>{items or '<li>None</li>'}</ul>"
+
+    # --- Upstream side ---
+    async def _acquire(self, port, fresh=False):
+        """(upstream, reused): an idle pooled connection to the port if one is still usable, else a new one."""
+        idle = self._pool.get(port) or []
+        while idle and not fresh:
+            upstream = idle.pop()
+            if time.monotonic() - upstream.idle_since < constants.PROXY_POOL_IDLE_SECONDS and \
+               not upstream.reader.at_eof() and not upstream.writer.is_closing():
+                return upstream, True
+            upstream.writer.close()
+        # Servers bound to "localhost" may only listen on ::1 (Node 17+ prefers IPv6); the working host is remembered.
+        hosts = ("127.0.0.1", "::1") if self._preferred_hosts.get(port) != "::1" else ("::1", "127.0.0.1")
+        last_error = None
+        for host in hosts:
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port, limit=constants.PROXY_HEADER_LIMIT_BYTES),
+                    constants.PROXY_CONNECT_TIMEOUT_SECONDS)
+            except (OSError, asyncio.TimeoutError) as e:
+                last_error = e
+                continue
+            self._preferred_hosts[port] = host
+            return _Upstream(reader, writer), False
+        raise last_error if isinstance(last_error, OSError) else OSError(f"connect timed out: {last_error}")
+
+    def _release(self, port, upstream):
+        idle = self._pool.setdefault(port, [])
+        if len(idle) >= constants.PROXY_POOL_MAX_IDLE:
+            upstream.writer.close()
+            return
+        upstream.idle_since = time.monotonic()
+        idle.append(upstream)
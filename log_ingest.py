@@ -0,0 +1,128 @@
+# log_ingest.py
+import threading
+import time
+
+import constants
+import metrics
+
+
+class TokenBucket:
+    """Allows `rate` items per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, wanted):
+        """Returns how many of `wanted` items may pass now (0..wanted)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            granted = min(wanted, int(self._tokens))
+            self._tokens -= granted
+            return granted
+
+
+# One bucket per project, shared by everything it runs (server, scripts, installs).
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(app_key):
+    with _buckets_lock:
+        bucket = _buckets.get(app_key)
+        if bucket is None:
+            bucket = _buckets[app_key] = TokenBucket(constants.LOG_RATE_LIMIT_LINES_PER_SECOND, constants.LOG_RATE_LIMIT_BURST_LINES)
+        return bucket
+
+
+class _FoldState:
+    __slots__ = ("line", "repeats", "since")
+
+    def __init__(self):
+        self.line = None
+        self.repeats = 0
+        self.since = 0.0
+
+
+class OutputIngestor:
+    """Folds repeated lines and rate-limits one process's output before it reaches the log.
+
+    emit(stream_name, text, notice) writes one line; notices (repeat counts, dropped-line reports) bypass the
+    rate limit so the log always says what was left out. feed() runs on the process engine loop thread,
+    close() after the process's streams have ended.
+    """
+
+    def __init__(self, app_key, app_name, emit):
+        self.app_name = app_name
+        self.emit = emit
+        self.bucket = get_bucket(app_key)
+        self.dropped_total = 0
+        self._dropped_unreported = 0
+        self._last_drop_report = time.monotonic()
+        self._folds = {}
+
+    def feed(self, stream_name, lines):
+        metrics.APP_LOG_LINES.inc(len(lines), app=self.app_name)
+        fold = self._folds.get(stream_name)
+        if fold is None:
+            fold = self._folds[stream_name] = _FoldState()
+        now = time.monotonic()
+        entries = [] # (text, is_notice)
+        folded = 0
+        for line in lines:
+            if line == fold.line:
+                fold.repeats += 1
+                folded += 1
+                continue
+            if fold.repeats:
+                entries.append((self._repeat_notice(fold.repeats), True))
+            fold.line = line
+            fold.repeats = 0
+            fold.since = now
+            entries.append((line, False))
+        if fold.repeats and now - fold.since >= constants.LOG_FOLD_FLUSH_SECONDS:
+            # A line that repeats forever (a heartbeat) still shows up periodically.
+            entries.append((self._repeat_notice(fold.repeats), True))
+            fold.repeats = 0
+            fold.since = now
+        if folded:
+            metrics.APP_LOG_LINES_FOLDED.inc(folded, app=self.app_name)
+
+        allowance = self.bucket.take(sum(1 for _, is_notice in entries if not is_notice))
+        dropped = 0
+        for text, is_notice in entries:
+            if not is_notice:
+                if allowance <= 0:
+                    dropped += 1
+                    continue
+                allowance -= 1
+            self.emit(stream_name, text, is_notice)
+        if dropped:
+            self.dropped_total += dropped
+            self._dropped_unreported += dropped
+            metrics.APP_LOG_LINES_DROPPED.inc(dropped, app=self.app_name)
+        if self._dropped_unreported and now - self._last_drop_report >= constants.LOG_DROP_REPORT_INTERVAL_SECONDS:
+            self._report_dropped(stream_name, now)
+
+    def close(self):
+        for stream_name, fold in self._folds.items():
+            if fold.repeats:
+                self.emit(stream_name, self._repeat_notice(fold.repeats), True)
+                fold.repeats = 0
+        if self._dropped_unreported:
+            self._report_dropped("stdout", time.monotonic())
+
+    @staticmethod
+    def _repeat_notice(repeats):
+        return f"^ repeated {repeats} more time{'s' if repeats != 1 else ''}"
+
+    def _report_dropped(self, stream_name, now):
+        self.emit(stream_name, f"... {self._dropped_unreported} line(s) dropped (output above "
+                               f"{constants.LOG_RATE_LIMIT_LINES_PER_SECOND} lines/s; {self.dropped_total} in total)", True)
+        self._dropped_unreported = 0
+        self._last_drop_report = now
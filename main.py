@@ -1,11 +1,14 @@
 # main.py
+import time
+_STARTUP_T0 = time.perf_counter() # Taken before the imports below so the startup breakdown includes them.
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox, Menu, simpledialog
 import os
 import json
+import http.client
 import subprocess
 import threading
-import time
+from collections import deque
 from pathlib import Path
 import sys
 import webbrowser
@@ -13,10 +16,31 @@ import webbrowser
 # --- Local Imports ---
 import constants
 from config_manager import ConfigManager
+from dependency_fingerprint import FingerprintStore
+from reclaimer import Reclaimer
+from disk_usage import DiskUsageTracker, format_bytes
+from dependency_index import DependencyIndex
+from audit_cache import AuditCache, summarize_counts, severity_score
+from task_cache import TaskCache
+from git_tracking import GitTracker, format_count, describe_sync
+from port_registry import PortRegistry
+from local_proxy import LocalProxy, running_routes, route_name
+from readiness import StartupHistory, format_boot_stats
+import cluster
+import app_groups
+import workspace_runner
+from fetch_engine import FetchEngine
+import state_snapshot
+import metrics
+from profiler import OperationProfiler, PROFILABLE_OPERATIONS
+from stall_detector import StallDetector
+import manager_core
+import daemon_client
 from tooltip import ToolTip
 import project_scanner
 import process_handler
 import ui_dialogs
+import bulk_operations
 
 
 # --- DPI Awareness (primarily for Windows) ---
@@ -36,36 +60,60 @@ if sys.platform == "win32":
 
 
 # --- Main Application Class ---
-class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk.Tk):
+class NodeAppManager(tk.Tk):
     def __init__(self):
-        if constants.TTKTHEMES_AVAILABLE:
-            super().__init__(theme="arc")
-        else:
-            super().__init__()
-            if constants.PERFORMANCE_LOGGING_ENABLED: print("ttkthemes not found. Falling back to standard Tk. For better themes, run: pip install ttkthemes")
+        self._startup_marks = [("imports", time.perf_counter())]
+        super().__init__()
+        if not constants.TTKTHEMES_AVAILABLE and constants.PERFORMANCE_LOGGING_ENABLED:
+            print("ttkthemes not found. Falling back to standard Tk. For better themes, run: pip install ttkthemes")
+        self._themed_style = None
+        self._startup_marks.append(("tk", time.perf_counter()))
 
         self.title(f"Node.js App Manager v5.4.1 ({'PerfLog' if constants.PERFORMANCE_LOGGING_ENABLED else 'NoPerfLog'})") # Version Updated
         self.geometry("1200x850")
 
-        self.all_log_messages = []
+        self.all_log_messages = deque(maxlen=constants.LOG_MAX_LINES)
         self._log_ui_ready = False
+        self._pending_log_lines = []
+        self._log_flush_scheduled = False
+        self._log_lock = threading.Lock()
 
         self.config_manager = ConfigManager(self)
         self.config_data = self.config_manager.load_config()
+        self._startup_marks.append(("config", time.perf_counter()))
+        self.fingerprint_store = FingerprintStore(self)
+        self.reclaimer = Reclaimer(self)
+        self.disk_usage_tracker = DiskUsageTracker(self)
+        self.dependency_index = DependencyIndex(self)
+        self.audit_cache = AuditCache(self)
+        self.git_tracker = GitTracker(self)
+        self.task_cache = TaskCache(self)
+        self.port_registry = PortRegistry(self)
+        self.local_proxy = LocalProxy(self)
+        self.group_runner = app_groups.GroupRunner(self, start_app=lambda p: self._start_app(app_path_override=p),
+                                                   stop_app=lambda p: self._stop_app(app_path_override=p))
+        self.startup_history = StartupHistory(self)
+        self.fetch_engine = FetchEngine(self)
+        self.operation_profiler = OperationProfiler(self)
+        self.stall_detector = StallDetector(self)
+        metrics.register_app(self, {
+            "fetch": self.fetch_engine.active_count, "disk_usage": self.disk_usage_tracker.pending_count,
+            "reclaim": self.reclaimer.pending_count,
+        })
 
         self.projects_folder = tk.StringVar(value=self.config_data.get("projects_folder"))
-
-        if constants.TTKTHEMES_AVAILABLE and "theme" in self.config_data:
-            try:
-                self.set_theme(self.config_data["theme"])
-            except tk.TclError:
-                self._log(f"Failed to set saved theme '{self.config_data['theme']}'. Using default.", warning=True)
-                if hasattr(self, 'set_theme'): self.set_theme("arc")
-            except Exception as e:
-                self._log(f"Error applying saved theme: {e}", warning=True)
+        self._startup_marks.append(("services", time.perf_counter()))
 
         self.apps_data = {}
+        self._scan_in_progress = False
+        self._rescan_requested = False
+        self._startup_timing_logged = False
+        self.daemon_client = None
+        self._daemon_poll_after_id = None
+        self._daemon_log_seq = 0
         self.selected_app_path = None
+        self.tree_sort_column = "Name"
+        self.tree_sort_reverse = False
         self.messagebox = messagebox
 
         self.ACTIVITY_PREFIX_MAP = {
@@ -81,7 +129,83 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         self._setup_style()
         self._setup_menu()
         self._setup_ui()
+        self._startup_marks.append(("ui", time.perf_counter()))
+
+        # Show the last session's project list straight away; the background scan below replaces it.
+        self.apps_data = state_snapshot.load_snapshot(self, self.projects_folder.get())
+        if self.apps_data:
+            self._update_apps_list_display()
+            self._update_disk_usage_total()
+            self.update_status_bar(f"Showing {len(self.apps_data)} projects from last session; rescanning...")
+        self._startup_marks.append(("snapshot", time.perf_counter()))
+
         self.scan_projects_folder()
+        self.reclaimer.resume_pending(self.projects_folder.get())
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        self._startup_marks.append(("first_paint", time.perf_counter()))
+        threading.Thread(target=self._find_running_daemon, daemon=True).start()
+        if self.config_data.get("metrics_enabled", constants.METRICS_ENABLED_DEFAULT):
+            self._set_metrics_enabled(True, persist=False)
+        if self.config_data.get("stall_detector_enabled", constants.STALL_DETECTOR_ENABLED_DEFAULT):
+            self._set_stall_detector_enabled(True, persist=False)
+        if self.config_data.get("proxy_enabled", constants.PROXY_ENABLED_DEFAULT):
+            self._set_proxy_enabled(True, persist=False)
+        # ttkthemes is only imported now, so loading its Tcl themes does not delay the first window.
+        if constants.TTKTHEMES_AVAILABLE:
+            self._apply_saved_theme()
+            self._startup_marks.append(("theme", time.perf_counter()))
+
+    def _log_startup_timing(self, scan_done_at):
+        if not constants.PERFORMANCE_LOGGING_ENABLED:
+            return
+        parts = []
+        previous = _STARTUP_T0
+        for label, mark in self._startup_marks:
+            parts.append(f"{label}={mark - previous:.3f}s")
+            previous = mark
+        first_paint = dict(self._startup_marks).get("first_paint", previous)
+        self._log(f"Startup timing: {', '.join(parts)}; first paint at {first_paint - _STARTUP_T0:.3f}s, "
+                  f"initial scan reconciled at {scan_done_at - _STARTUP_T0:.3f}s.")
+
+    # --- Themes (ttkthemes is optional and imported lazily) ---
+    def _load_themed_style(self):
+        if self._themed_style is None and constants.TTKTHEMES_AVAILABLE:
+            try:
+                from ttkthemes import ThemedStyle
+                self._themed_style = ThemedStyle(self)
+            except Exception as e:
+                self._log(f"Could not load ttkthemes: {e}", warning=True)
+        return self._themed_style
+
+    def set_theme(self, theme_name):
+        themed_style = self._load_themed_style()
+        if themed_style is None:
+            raise tk.TclError("ttkthemes is not available")
+        themed_style.set_theme(theme_name)
+
+    def get_theme(self):
+        return self._themed_style.theme_use() if self._themed_style is not None else None
+
+    def get_themes(self):
+        themed_style = self._load_themed_style()
+        return themed_style.get_themes() if themed_style is not None else []
+
+    def _apply_saved_theme(self):
+        theme_name = self.config_data.get("theme", "arc")
+        try:
+            self.set_theme(theme_name)
+        except tk.TclError:
+            self._log(f"Failed to set saved theme '{theme_name}'. Using default.", warning=True)
+            try:
+                self.set_theme("arc")
+            except tk.TclError:
+                return
+        except Exception as e:
+            self._log(f"Error applying saved theme: {e}", warning=True)
+            return
+        self._setup_style()
 
     def _setup_style(self):
         self.style = ttk.Style(self)
@@ -101,21 +225,148 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         file_menu.add_command(label="Change Projects Folder...", command=self._browse_folder_and_save)
         file_menu.add_separator()
         file_menu.add_command(label="Stop All Running Apps", command=self._stop_all_running_apps)
+        self.auto_assign_ports_var = tk.BooleanVar(value=self.port_registry.auto_assign)
+        file_menu.add_checkbutton(label="Assign Free Ports on Start", variable=self.auto_assign_ports_var,
+                                  command=self._toggle_auto_assign_ports)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
 
-        if constants.TTKTHEMES_AVAILABLE and hasattr(self, 'get_themes'):
-            view_menu = Menu(menubar, tearoff=0)
-            menubar.add_cascade(label="View", menu=view_menu)
+        bulk_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Bulk", menu=bulk_menu)
+        for operation in ("install", "ci", "update", "audit"):
+            bulk_menu.add_command(label=f"{bulk_operations.BULK_OPERATIONS[operation]['label']}...",
+                                  command=lambda op=operation: self._run_bulk_operation(op))
+        bulk_menu.add_command(label="Fetch All (git)...", command=self._fetch_all)
+        bulk_menu.add_separator()
+        bulk_menu.add_command(label="Fleet Audit Summary...", command=self._show_audit_summary)
+
+        groups_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Groups", menu=groups_menu)
+        # Rebuilt each time it opens, so it lists the groups as currently configured.
+        groups_menu.config(postcommand=lambda m=groups_menu: self._populate_groups_menu(m))
+
+        daemon_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Daemon", menu=daemon_menu)
+        daemon_menu.add_command(label="Start Daemon and Attach", command=self._start_daemon_and_attach)
+        daemon_menu.add_command(label="Attach to Running Daemon", command=self._attach_to_running_daemon)
+        daemon_menu.add_command(label="Detach (Apps Keep Running)", command=self._detach_from_daemon)
+        daemon_menu.add_separator()
+        daemon_menu.add_command(label="Stop Daemon and Its Apps", command=self._stop_daemon)
+
+        diagnostics_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Diagnostics", menu=diagnostics_menu)
+        profile_menu = Menu(diagnostics_menu, tearoff=0)
+        for label in PROFILABLE_OPERATIONS:
+            profile_menu.add_command(label=label, command=lambda l=label: self.operation_profiler.arm(l))
+        diagnostics_menu.add_cascade(label="Profile Next Operation", menu=profile_menu)
+        diagnostics_menu.add_command(label=f"Record Allocations ({constants.TRACEMALLOC_WINDOW_SECONDS}s)",
+                                     command=self._record_allocations)
+        diagnostics_menu.add_command(label="Profiling Results...", command=lambda: ui_dialogs.show_profile_results_dialog(self))
+        diagnostics_menu.add_separator()
+        self.stall_detector_var = tk.BooleanVar(value=False)
+        diagnostics_menu.add_checkbutton(label="Detect UI Stalls", variable=self.stall_detector_var,
+                                         command=lambda: self._set_stall_detector_enabled(self.stall_detector_var.get()))
+
+        view_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        if constants.TTKTHEMES_AVAILABLE:
             theme_menu = Menu(view_menu, tearoff=0)
+            # Filled the first time it is opened, so building the menu does not import ttkthemes.
+            theme_menu.config(postcommand=lambda m=theme_menu: self._populate_theme_menu(m))
             view_menu.add_cascade(label="Themes", menu=theme_menu)
+            view_menu.add_separator()
+        self.metrics_enabled_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Metrics Endpoint (Prometheus)", variable=self.metrics_enabled_var,
+                                  command=lambda: self._set_metrics_enabled(self.metrics_enabled_var.get()))
+        self.proxy_enabled_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Local Proxy", variable=self.proxy_enabled_var,
+                                  command=lambda: self._set_proxy_enabled(self.proxy_enabled_var.get()))
+        view_menu.add_command(label="Proxy Routes...", command=lambda: ui_dialogs.show_proxy_routes_dialog(self))
+
+    def _set_metrics_enabled(self, enabled, persist=True):
+        port = self.config_data.get("metrics_port", constants.METRICS_PORT)
+        if enabled:
             try:
-                available_themes = sorted(self.get_themes())
-                for theme_name in available_themes:
-                    theme_menu.add_command(label=theme_name, command=lambda t=theme_name: self._change_theme(t))
-            except Exception as e:
-                self._log(f"Could not populate themes menu: {e}", warning=True)
-                theme_menu.add_command(label="Error loading themes", state=tk.DISABLED)
+                bound_port = metrics.start_server(port)
+            except OSError as e:
+                self._log(f"Could not start metrics endpoint on {constants.METRICS_HOST}:{port}: {e}", error=True)
+                messagebox.showerror("Metrics", f"Could not listen on {constants.METRICS_HOST}:{port}:\n{e}", parent=self)
+                enabled = False
+            else:
+                self._log(f"Metrics endpoint enabled: http://{constants.METRICS_HOST}:{bound_port}/metrics")
+        else:
+            metrics.stop_server()
+            self._log("Metrics endpoint disabled.")
+        self.metrics_enabled_var.set(enabled)
+        if persist:
+            self.config_data["metrics_enabled"] = enabled
+            self.config_manager.save_config()
+
+    def _set_proxy_enabled(self, enabled, persist=True):
+        port = self.config_data.get("proxy_port", constants.PROXY_PORT)
+        if enabled:
+            try:
+                bound_port = self.local_proxy.start(port)
+            except OSError as e:
+                self._log(f"Could not start local proxy on {constants.PROXY_HOST}:{port}: {e}", error=True)
+                messagebox.showerror("Local Proxy", f"Could not listen on {constants.PROXY_HOST}:{port}:\n{e}", parent=self)
+                enabled = False
+            else:
+                self._log(f"Local proxy enabled: http://<project>.localhost:{bound_port}/ or "
+                          f"http://localhost:{bound_port}/<project>/")
+        else:
+            self.local_proxy.stop()
+            self._log("Local proxy disabled.")
+        self.proxy_enabled_var.set(enabled)
+        self._update_action_buttons_state()
+        if persist:
+            self.config_data["proxy_enabled"] = enabled
+            self.config_manager.save_config()
+
+    def _toggle_auto_assign_ports(self):
+        enabled = self.auto_assign_ports_var.get()
+        self.config_data["auto_assign_ports"] = enabled
+        self.config_manager.save_config()
+        range_start, range_end = self.port_registry.port_range()
+        self._log(f"Automatic port assignment {'enabled' if enabled else 'disabled'}"
+                  + (f" (PORT from {range_start}-{range_end} when the project's own port is taken)." if enabled else "."))
+
+    def _set_stall_detector_enabled(self, enabled, persist=True):
+        if enabled:
+            self.stall_detector.start()
+        else:
+            self.stall_detector.stop()
+        self.stall_detector_var.set(enabled)
+        if persist:
+            self.config_data["stall_detector_enabled"] = enabled
+            self.config_manager.save_config()
+
+    def _record_allocations(self):
+        if not self.operation_profiler.start_memory_window(on_done=lambda: self.update_status_bar("Allocation snapshot saved.")):
+            messagebox.showinfo("Profiling", "An allocation recording is already running.", parent=self)
+            return
+        self.update_status_bar(f"Recording allocations for {constants.TRACEMALLOC_WINDOW_SECONDS}s...")
+
+    def _populate_groups_menu(self, groups_menu):
+        groups_menu.delete(0, tk.END)
+        groups_menu.add_command(label="Manage Groups...", command=lambda: ui_dialogs.show_groups_dialog(self))
+        groups = app_groups.get_groups(self)
+        if groups:
+            groups_menu.add_separator()
+        for name in sorted(groups):
+            groups_menu.add_command(label=f"Start '{name}'", command=lambda n=name: self.group_runner.start_group(n))
+            groups_menu.add_command(label=f"Stop '{name}'", command=lambda n=name: self.group_runner.stop_group(n))
+
+    def _populate_theme_menu(self, theme_menu):
+        if theme_menu.index(tk.END) is not None:
+            return
+        try:
+            available_themes = sorted(self.get_themes())
+            for theme_name in available_themes:
+                theme_menu.add_command(label=theme_name, command=lambda t=theme_name: self._change_theme(t))
+        except Exception as e:
+            self._log(f"Could not populate themes menu: {e}", warning=True)
+            theme_menu.add_command(label="Error loading themes", state=tk.DISABLED)
 
     def _setup_ui(self):
         # Overall padding for the root window can sometimes help
@@ -131,20 +382,22 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         ToolTip(scan_button, "Refresh the list of projects from the filesystem and update process statuses.")
         fetch_button = ttk.Button(top_frame, text="Fetch New App...", command=self._fetch_online_app_dialog)
         fetch_button.pack(side=tk.LEFT)
-        ToolTip(fetch_button, "Clone a Git repository or setup an NPM package as a new project.")
+        ToolTip(fetch_button, "Clone Git repositories or set up NPM packages as new projects (several at once, with live progress).")
 
         main_pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         main_pane.pack(fill=tk.BOTH, expand=True, padx=10, pady=10) # Increased pady for main_pane
 
         apps_frame = ttk.LabelFrame(main_pane, text="Node Apps", padding="10")
         main_pane.add(apps_frame, weight=1)
-        self.apps_tree = ttk.Treeview(apps_frame, columns=("Name", "Status", "Port", "PID", "Branch", "Changes"), show="headings", style="Treeview")
-        self.apps_tree.heading("Name", text="Project Name")
-        self.apps_tree.heading("Status", text="Status")
-        self.apps_tree.heading("Port", text="Port")
-        self.apps_tree.heading("PID", text="PID")
-        self.apps_tree.heading("Branch", text="Git Branch")
-        self.apps_tree.heading("Changes", text="Git Changes")
+        self.apps_tree = ttk.Treeview(apps_frame, columns=("Name", "Status", "Port", "PID", "Branch", "Changes", "Size", "Vulns", "Boot", "Usage", "Ahead", "Behind", "Group"), show="headings", style="Treeview")
+        self.TREE_HEADINGS = {
+            "Name": "Project Name", "Status": "Status", "Port": "Port", "PID": "PID",
+            "Branch": "Git Branch", "Changes": "Git Changes", "Size": "node_modules", "Vulns": "Vulns",
+            "Boot": "Boot p50/p95", "Usage": "CPU / RSS",
+            "Ahead": "Ahead", "Behind": "Behind", "Group": "Group"
+        }
+        for column_id, heading_text in self.TREE_HEADINGS.items():
+            self.apps_tree.heading(column_id, text=heading_text, command=lambda c=column_id: self._sort_apps_tree_by(c))
 
         self.apps_tree.column("Name", width=170, minwidth=150, anchor=tk.W, stretch=tk.YES)
         self.apps_tree.column("Status", width=140, minwidth=120, anchor=tk.W, stretch=tk.YES)
@@ -152,13 +405,21 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         self.apps_tree.column("PID", width=60, minwidth=50, anchor=tk.CENTER, stretch=tk.NO)
         self.apps_tree.column("Branch", width=120, minwidth=100, anchor=tk.W, stretch=tk.YES) # Increased width for "Git Branch"
         self.apps_tree.column("Changes", width=80, minwidth=70, anchor=tk.CENTER, stretch=tk.NO)
+        self.apps_tree.column("Size", width=90, minwidth=70, anchor=tk.E, stretch=tk.NO)
+        self.apps_tree.column("Vulns", width=110, minwidth=60, anchor=tk.W, stretch=tk.NO)
+        self.apps_tree.column("Boot", width=100, minwidth=70, anchor=tk.E, stretch=tk.NO)
+        self.apps_tree.column("Usage", width=110, minwidth=70, anchor=tk.E, stretch=tk.NO)
+        self.apps_tree.column("Ahead", width=60, minwidth=50, anchor=tk.CENTER, stretch=tk.NO)
+        self.apps_tree.column("Behind", width=60, minwidth=50, anchor=tk.CENTER, stretch=tk.NO)
+        self.apps_tree.column("Group", width=150, minwidth=80, anchor=tk.W, stretch=tk.YES)
 
         for status_key in constants.STATUS_VISUALS:
              _, tag_name, color_val = self._get_status_display_and_tag(status_key)
              self.apps_tree.tag_configure(tag_name, foreground=color_val)
 
         self.apps_tree.pack(fill=tk.BOTH, expand=True)
-        self.apps_tree.bind("<<TreeviewSelect>>", self._on_app_select)
+        # Looked up per event so the profiler can wrap _on_app_select.
+        self.apps_tree.bind("<<TreeviewSelect>>", lambda e: self._on_app_select(e))
         self.apps_tree.bind("<Double-1>", self._on_app_double_click)
 
         right_pane_container = ttk.Frame(main_pane, padding=(5,0,0,0)) # Added a little left padding
@@ -180,7 +441,20 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         ToolTip(self.restart_button, "Restart the selected application.")
         self.view_browser_button = ttk.Button(actions_frame, text="View in Browser", command=self._view_in_browser, state=tk.DISABLED)
         self.view_browser_button.grid(row=0, column=3, padx=2, pady=2, sticky="ew")
-        ToolTip(self.view_browser_button, "Open http://localhost:<port> if the app is running and port is detected.")
+        ToolTip(self.view_browser_button, "Open http://localhost:<port> if the app is running and port is detected,\n"
+                                           "or http://<project>.localhost:<proxy port>/ while the local proxy is on.")
+        self.readiness_button = ttk.Button(actions_frame, text="Readiness...", command=self._show_readiness_dialog, state=tk.DISABLED)
+        self.readiness_button.grid(row=1, column=0, padx=2, pady=2, sticky="ew")
+        ToolTip(self.readiness_button, "Choose how to tell that the app is ready (TCP, HTTP or log line) and see its startup times.")
+        self.limits_button = ttk.Button(actions_frame, text="Limits...", command=self._show_launch_policy_dialog, state=tk.DISABLED)
+        self.limits_button.grid(row=1, column=1, padx=2, pady=2, sticky="ew")
+        ToolTip(self.limits_button, "Memory cap, CPU cores, nice level and open-file limit applied when the app is started.")
+        self.instances_button = ttk.Button(actions_frame, text="Instances...", command=self._show_cluster_dialog, state=tk.DISABLED)
+        self.instances_button.grid(row=1, column=2, padx=2, pady=2, sticky="ew")
+        ToolTip(self.instances_button, "Run several copies of the app (cluster mode), each with its own PORT or sharing one.")
+        self.dependencies_button = ttk.Button(actions_frame, text="Depends On...", command=self._show_dependencies_dialog, state=tk.DISABLED)
+        self.dependencies_button.grid(row=1, column=3, padx=2, pady=2, sticky="ew")
+        ToolTip(self.dependencies_button, "Projects that must be ready before this one when a group is started (Groups menu).")
         actions_frame.columnconfigure((0,1,2,3), weight=1)
 
         scripts_frame = ttk.Frame(actions_outer_frame)
@@ -195,6 +469,16 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         self.run_script_button = ttk.Button(scripts_frame, text="Run Script", command=self._run_npm_script, state=tk.DISABLED)
         self.run_script_button.grid(row=0, column=2, padx=2, pady=2, sticky="ew")
         ToolTip(self.run_script_button, "Execute the selected NPM script.")
+        self.task_cache_button = ttk.Button(scripts_frame, text="Cache...", command=self._show_task_cache_dialog, state=tk.DISABLED)
+        self.task_cache_button.grid(row=0, column=4, padx=2, pady=2, sticky="ew")
+        ToolTip(self.task_cache_button, "Cache the selected script's outputs and log, keyed by a hash of its input files,\n"
+                                        "and restore them instead of running it again while the inputs are unchanged.")
+        self.workspaces_var = tk.BooleanVar(value=False)
+        self.workspaces_check = ttk.Checkbutton(scripts_frame, text="All workspaces", variable=self.workspaces_var,
+                                                command=lambda: self._populate_npm_scripts_combo(self.selected_app_path), state=tk.DISABLED)
+        self.workspaces_check.grid(row=0, column=3, padx=2, pady=2, sticky="w")
+        ToolTip(self.workspaces_check, "Run the script in every package listed under 'workspaces' in package.json,\n"
+                                       "dependencies first and independent packages in parallel; stops at the first failure.")
         scripts_frame.columnconfigure(1, weight=1)
 
         utils_outer_frame = ttk.LabelFrame(right_pane_container, text="Project Utilities", padding="10")
@@ -204,7 +488,7 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
 
         self.install_button = ttk.Button(utils_frame, text="Install Deps", command=self._install_deps, state=tk.DISABLED)
         self.install_button.grid(row=0, column=0, padx=2, pady=2, sticky="ew")
-        ToolTip(self.install_button, "Run 'npm install' in the project directory.")
+        ToolTip(self.install_button, "Run 'npm install' in the project directory (skipped if the lockfile fingerprint matches the last install).")
 
         self.update_deps_button = ttk.Button(utils_frame, text="Update Deps", command=self._update_deps, state=tk.DISABLED)
         self.update_deps_button.grid(row=0, column=1, padx=2, pady=2, sticky="ew")
@@ -212,7 +496,7 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
 
         self.audit_button = ttk.Button(utils_frame, text="NPM Audit", command=self._npm_audit, state=tk.DISABLED)
         self.audit_button.grid(row=0, column=2, padx=2, pady=2, sticky="ew")
-        ToolTip(self.audit_button, "Run 'npm audit' to check for vulnerabilities.")
+        ToolTip(self.audit_button, "Run 'npm audit --json' to check for vulnerabilities; results are cached until the lockfile changes.")
 
         self.clean_deps_button = ttk.Button(utils_frame, text="Clean Deps", command=self._clean_dependencies, state=tk.DISABLED)
         self.clean_deps_button.grid(row=1, column=0, padx=2, pady=2, sticky="ew")
@@ -227,9 +511,13 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         ToolTip(self.view_pkg_button, "Display the content of package.json in a new window.")
 
         self.edit_pkg_button = ttk.Button(utils_frame, text="Edit package.json", command=self._edit_package_json, state=tk.DISABLED)
-        self.edit_pkg_button.grid(row=2, column=0, columnspan=2, padx=2, pady=2, sticky="ew")
+        self.edit_pkg_button.grid(row=2, column=0, padx=2, pady=2, sticky="ew")
         ToolTip(self.edit_pkg_button, "Open package.json in the system's default text editor.")
 
+        self.dep_index_button = ttk.Button(utils_frame, text="Dependency Index", command=self._show_dependency_index)
+        self.dep_index_button.grid(row=2, column=1, padx=2, pady=2, sticky="ew")
+        ToolTip(self.dep_index_button, "Query all projects' lockfiles: who depends on a package, which versions are installed, and duplicates.")
+
         self.delete_project_button = ttk.Button(utils_frame, text="Delete Project", command=self._delete_project, state=tk.DISABLED)
         self.delete_project_button.grid(row=2, column=2, padx=2, pady=2, sticky="ew")
         ToolTip(self.delete_project_button, "Permanently delete the entire project folder (with confirmation).")
@@ -270,8 +558,13 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         ToolTip(clear_log_button, "Clear all messages from the log view.")
         # --- End Log Filter Controls ---
 
-        self.status_bar = ttk.Label(self, text="Initializing...", relief=tk.SUNKEN, anchor=tk.W, padding=3) # Increased status bar padding
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        status_frame = ttk.Frame(self)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.disk_usage_label = ttk.Label(status_frame, text="node_modules: -", relief=tk.SUNKEN, anchor=tk.E, padding=3)
+        self.disk_usage_label.pack(side=tk.RIGHT)
+        ToolTip(self.disk_usage_label, "Total disk space used by node_modules across all projects (hardlinked files counted once per project).")
+        self.status_bar = ttk.Label(status_frame, text="Initializing...", relief=tk.SUNKEN, anchor=tk.W, padding=3) # Increased status bar padding
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
         self._log_ui_ready = True
         self._display_filtered_logs(flush_early_logs=True)
@@ -282,53 +575,65 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         prefix = constants.LOG_PREFIX_ERROR if error else constants.LOG_PREFIX_WARNING if warning else constants.LOG_PREFIX_INFO
 
         full_message = f"[{timestamp}] {prefix}{message}"
-        self.all_log_messages.append(full_message)
-
-        if self._log_ui_ready:
-            self._display_filtered_logs(new_message_added=True, last_message=full_message)
+        self._append_log_line(full_message)
 
         if error or warning:
             if constants.PERFORMANCE_LOGGING_ENABLED or error:
                 print(full_message)
 
 
-    def _display_filtered_logs(self, new_message_added=False, last_message=None, flush_early_logs=False):
+    def _append_log_line(self, full_message):
+        # Called from any thread. Lines are batched and written to the view at most every
+        # LOG_FLUSH_INTERVAL_MS, so a flood of app output costs one Text insert per batch, not per line.
+        with self._log_lock:
+            self._pending_log_lines.append(full_message)
+            if self._log_flush_scheduled:
+                return
+            self._log_flush_scheduled = True
+        try:
+            self.after(constants.LOG_FLUSH_INTERVAL_MS, self._flush_pending_logs)
+        except (tk.TclError, RuntimeError):
+            pass # Window already destroyed.
+
+    def _flush_pending_logs(self):
+        with self._log_lock:
+            lines, self._pending_log_lines = self._pending_log_lines, []
+            self._log_flush_scheduled = False
+        self.all_log_messages.extend(lines)
+        if self._log_ui_ready:
+            self._display_filtered_logs(new_lines=lines)
+
+    def _display_filtered_logs(self, new_lines=None, flush_early_logs=False):
+        """Appends new_lines (those matching the filter) to the view; without them, rebuilds it from history."""
         if not hasattr(self, 'log_text') or not self.log_text or not self._log_ui_ready:
             return
 
-        self.log_text.config(state=tk.NORMAL)
-        filter_term = self.log_filter_var.get().strip()
-
-        rebuild_all = flush_early_logs or (filter_term != "" and new_message_added) or \
-                      (not filter_term and not new_message_added) or \
-                      (not filter_term and len(self.all_log_messages) == 1 and new_message_added)
-
+        filter_term_lower = self.log_filter_var.get().strip().lower()
+        rebuild_all = flush_early_logs or new_lines is None
+        messages = self.all_log_messages if rebuild_all else new_lines
+        if filter_term_lower:
+            messages = [msg for msg in messages if filter_term_lower in msg.lower()]
+        if not rebuild_all and not messages:
+            return
 
+        self.log_text.config(state=tk.NORMAL)
         if rebuild_all:
             self.log_text.delete(1.0, tk.END)
-            display_messages = []
-            if filter_term:
-                filter_term_lower = filter_term.lower()
-                display_messages = [msg for msg in self.all_log_messages if filter_term_lower in msg.lower()]
-            else:
-                display_messages = self.all_log_messages
-
-            for msg in display_messages:
-                self.log_text.insert(tk.END, msg + "\n")
-        elif new_message_added and last_message and not filter_term:
-            self.log_text.insert(tk.END, last_message + "\n")
-
+        if messages:
+            self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+        # Keep the widget as bounded as the history behind it (the Text always ends with one empty line).
+        excess_lines = int(self.log_text.index(tk.END).split(".")[0]) - 2 - constants.LOG_MAX_LINES
+        if excess_lines > 0:
+            self.log_text.delete(1.0, f"{excess_lines + 1}.0")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
-        if hasattr(self, 'update_idletasks'):
-            self.update_idletasks()
 
     def _apply_log_filter(self):
-        self._display_filtered_logs(new_message_added=False)
+        self._display_filtered_logs()
 
     def _clear_log_filter(self):
         self.log_filter_var.set("")
-        self._display_filtered_logs(new_message_added=False)
+        self._display_filtered_logs()
 
     def _clear_all_logs(self):
         self.all_log_messages.clear()
@@ -340,12 +645,16 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
         original_folder = self.projects_folder.get()
         folder_selected = filedialog.askdirectory(initialdir=original_folder, parent=self)
         if folder_selected and folder_selected != original_folder:
+            if self.daemon_client:
+                self._log("The daemon keeps managing its own projects folder; detaching to browse the new one locally.", warning=True)
+                self._detach_from_daemon(rescan=False)
             self.projects_folder.set(folder_selected)
             self.config_manager.save_config()
             self.scan_projects_folder()
+            self.reclaimer.resume_pending(folder_selected)
 
     def _change_theme(self, theme_name):
-        if not (constants.TTKTHEMES_AVAILABLE and hasattr(self, 'set_theme')): return
+        if not constants.TTKTHEMES_AVAILABLE: return
         try:
             self.set_theme(theme_name)
             self._setup_style()
@@ -389,57 +698,71 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
 
     # --- Project Scanning & Listing ---
     def scan_projects_folder(self):
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_total_scan_start = time.perf_counter()
+        if self.daemon_client:
+            self.update_status_bar("Daemon is rescanning projects...")
+            self._daemon_request(lambda client: client.scan(wait=True), on_result=self._apply_daemon_apps)
+            return
+        # Disk and process scans run in the background; a request made mid-scan queues one follow-up scan.
+        if self._scan_in_progress:
+            self._rescan_requested = True
+            return
+        self._scan_in_progress = True
+        self._rescan_requested = False
         self._log("Scanning for projects...")
         self.update_status_bar("Scanning projects...")
+        projects_folder = self.projects_folder.get()
+        threading.Thread(target=self._scan_projects_worker, args=(projects_folder,), name="project-scan", daemon=True).start()
 
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_disk_scan_start = time.perf_counter()
-        discovered_apps_on_disk = project_scanner.scan_projects_folder_for_app_data(self)
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_disk_scan_done = time.perf_counter()
-
-        new_apps_data = {}
-        for path_str, existing_app_data in self.apps_data.items():
-            resolved_path_str = str(Path(path_str).resolve())
-            if existing_app_data.get("process") is not None or \
-               existing_app_data.get("status", "").startswith("Running") or \
-               existing_app_data.get("status", "").endswith("..."):
-                new_apps_data[resolved_path_str] = existing_app_data
-                if resolved_path_str in discovered_apps_on_disk:
-                    disk_data = discovered_apps_on_disk[resolved_path_str]
-                    new_apps_data[resolved_path_str].update({
-                        "is_installed": disk_data["is_installed"],
-                        "package_data": disk_data["package_data"],
-                        "name": disk_data["name"],
-                        "git_branch": disk_data.get("git_branch", "-"),
-                        "git_has_changes": disk_data.get("git_has_changes", "N/A")
-                    })
-            # else: project folder might have been removed or app was idle
-
-        for path_str, disk_app_data in discovered_apps_on_disk.items():
-            resolved_path_str = str(Path(path_str).resolve())
-            if resolved_path_str not in new_apps_data:
-                new_apps_data[resolved_path_str] = disk_app_data
-
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_external_scan_start = time.perf_counter()
-        project_scanner.scan_for_external_processes(self, new_apps_data)
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_external_scan_done = time.perf_counter()
+    def _scan_projects_worker(self, projects_folder):
+        timings = {"start": time.perf_counter()}
+        discovered_apps_on_disk = {}
+        try:
+            discovered_apps_on_disk = project_scanner.scan_projects_folder_for_app_data(self, projects_folder)
+            timings["disk_done"] = time.perf_counter()
+            project_scanner.scan_for_external_processes(self, discovered_apps_on_disk)
+        except Exception as e:
+            self._log(f"Error scanning projects folder: {e}", error=True)
+        timings["external_done"] = time.perf_counter()
+        self.after(0, lambda: self._apply_scan_results(projects_folder, discovered_apps_on_disk, timings))
+
+    def _apply_scan_results(self, projects_folder, discovered_apps_on_disk, timings):
+        self._scan_in_progress = False
+        if projects_folder != self.projects_folder.get():
+            # The folder changed while scanning; the queued rescan covers the new one.
+            self.scan_projects_folder()
+            return
 
+        new_apps_data = project_scanner.merge_scan_results(self.apps_data, discovered_apps_on_disk)
         self.apps_data = new_apps_data
 
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_ui_update_start = time.perf_counter()
+        t_ui_update_start = time.perf_counter()
         self._update_apps_list_display()
-        if constants.PERFORMANCE_LOGGING_ENABLED: t_ui_update_done = time.perf_counter()
+        t_ui_update_done = time.perf_counter()
 
+        disk_done = timings.get('disk_done', timings['external_done'])
+        metrics.SCAN_PHASE_SECONDS.observe(disk_done - timings['start'], phase="disk")
+        metrics.SCAN_PHASE_SECONDS.observe(timings['external_done'] - disk_done, phase="external_processes")
+        metrics.SCAN_PHASE_SECONDS.observe(t_ui_update_done - t_ui_update_start, phase="ui_update")
+        metrics.SCAN_PHASE_SECONDS.observe(t_ui_update_done - timings['start'], phase="total")
         if constants.PERFORMANCE_LOGGING_ENABLED:
-            t_total_scan_end = time.perf_counter()
             self._log(
-                f"Scan timing: Total={t_total_scan_end - t_total_scan_start:.4f}s, "
-                f"DiskScan={t_disk_scan_done - t_disk_scan_start:.4f}s, "
-                f"ExternalScan={t_external_scan_done - t_external_scan_start:.4f}s, "
+                f"Scan timing: Total={t_ui_update_done - timings['start']:.4f}s, "
+                f"DiskScan={timings.get('disk_done', timings['external_done']) - timings['start']:.4f}s, "
+                f"ExternalScan={timings['external_done'] - timings.get('disk_done', timings['external_done']):.4f}s, "
                 f"UIUpdate={t_ui_update_done - t_ui_update_start:.4f}s"
             )
+        if not self._startup_timing_logged:
+            self._startup_timing_logged = True
+            self._log_startup_timing(t_ui_update_done)
+        self.disk_usage_tracker.refresh(self.apps_data.keys())
+        self.audit_cache.apply_cached_results(self.apps_data.keys())
+        self.git_tracker.refresh(list(self.apps_data))
+        self.startup_history.apply_stats(list(self.apps_data))
+        self._update_disk_usage_total()
         self._log(f"Scan complete. Found {len(self.apps_data)} potential Node projects.")
         self.update_status_bar(f"Scan complete. Found {len(self.apps_data)} projects.")
+        if self._rescan_requested:
+            self.scan_projects_folder()
 
         current_selection = self.apps_tree.selection()
         if not current_selection and self.apps_tree.get_children():
@@ -464,40 +787,18 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
 
         self.apps_tree.delete(*self.apps_tree.get_children())
 
-        sorted_app_items = sorted(self.apps_data.items(), key=lambda item: (item[1]["name"].lower(), item[0]))
+        sorted_app_items = sorted(self.apps_data.items(), key=self._get_tree_sort_key(self.tree_sort_column),
+                                  reverse=self.tree_sort_reverse)
 
         for path, data in sorted_app_items:
-            current_status = data.get("status", "Unknown")
-            display_name_original = data["name"]
-
-            activity_prefix = ""
-            base_status_for_prefix = current_status
-            if current_status.startswith("Running Script:"):
-                 base_status_for_prefix = "Running Script"
-            elif current_status.endswith("..."):
-                base_status_for_prefix = current_status[:-3]
-
-            if base_status_for_prefix in self.ACTIVITY_PREFIX_MAP:
-                activity_prefix = self.ACTIVITY_PREFIX_MAP[base_status_for_prefix]
-
-            display_name_with_prefix = f"{activity_prefix}{display_name_original}"
-
-            status_display, status_tag, color = self._get_status_display_and_tag(current_status)
-            self.apps_tree.tag_configure(status_tag, foreground=color)
+            tree_values, status_tag = self._get_tree_values_and_tag(data)
 
             try:
-                self.apps_tree.insert("", tk.END, iid=path,
-                                    values=(
-                                        display_name_with_prefix,
-                                        status_display,
-                                        data.get("port", "-"),
-                                        data.get("pid", "-"),
-                                        data.get("git_branch", "-"),
-                                        data.get("git_has_changes", "N/A")
-                                    ),
-                                    tags=(status_tag,))
+                self.apps_tree.insert("", tk.END, iid=path, values=tree_values, tags=(status_tag,), open=True)
             except tk.TclError as e:
                 self._log(f"Error inserting item into Treeview for {data['name']} (Path: {path}): {e}. Tag: {status_tag}", error=True)
+                continue
+            self._update_instance_rows(path, data)
 
         if selected_iid and self.apps_tree.exists(selected_iid):
             self.apps_tree.selection_set(selected_iid)
@@ -506,17 +807,155 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             self.apps_tree.focus(focused_iid)
 
 
+    def _get_tree_values_and_tag(self, data):
+        current_status = data.get("status", "Unknown")
+
+        activity_prefix = ""
+        base_status_for_prefix = current_status
+        if current_status.startswith("Running Script:"):
+             base_status_for_prefix = "Running Script"
+        elif current_status.endswith("..."):
+            base_status_for_prefix = current_status[:-3]
+
+        if base_status_for_prefix in self.ACTIVITY_PREFIX_MAP:
+            activity_prefix = self.ACTIVITY_PREFIX_MAP[base_status_for_prefix]
+
+        display_name_with_prefix = f"{activity_prefix}{data['name']}"
+
+        status_display, status_tag, color = self._get_status_display_and_tag(current_status)
+        instances = data.get("instances")
+        if instances:
+            running_count = sum(1 for inst in instances if inst["status"] == "Running")
+            if current_status == "Running" and running_count < len(instances):
+                status_display, status_tag, color = self._get_status_display_and_tag("Degraded")
+            status_display = f"{status_display} ({running_count}/{len(instances)})"
+        if data.get("stale"):
+            # Restored from the last session and not yet confirmed by a scan.
+            status_display = f"{status_display} (last session)"
+            status_tag, color = "Tag_Stale", constants.STALE_ROW_COLOR
+        self.apps_tree.tag_configure(status_tag, foreground=color)
+
+        disk_usage = data.get("disk_usage") or {}
+        return (
+            display_name_with_prefix,
+            status_display,
+            data.get("port", "-"),
+            data.get("pid", "-"),
+            data.get("git_branch", "-"),
+            data.get("git_has_changes", "N/A"),
+            format_bytes(disk_usage.get("bytes")),
+            summarize_counts(data.get("audit_counts")),
+            format_boot_stats(data.get("boot_stats")),
+            self._format_usage(cluster.summarize_usage(data.get("instances"))),
+            format_count(data.get("git_sync"), "ahead"),
+            format_count(data.get("git_sync"), "behind"),
+            self._format_group(data)
+        ), status_tag
+
+    def _format_group(self, data):
+        # The state of a group start/stop the app takes part in, else just the groups it belongs to.
+        return data.get("group_state") or ", ".join(app_groups.groups_of(self, data.get("path", ""))) or "-"
+
+    @staticmethod
+    def _format_usage(usage):
+        if usage is None:
+            return "-"
+        cpu_percent, rss = usage
+        return f"{cpu_percent:.0f}% / {format_bytes(rss)}"
+
+    def _update_instance_rows(self, path, data):
+        """Child rows of a cluster, one per instance; removed once it has stopped."""
+        instances = data.get("instances") or []
+        wanted_iids = []
+        for inst in instances:
+            iid = cluster.instance_iid(path, inst["index"])
+            wanted_iids.append(iid)
+            status_display, status_tag, color = self._get_status_display_and_tag(inst["status"])
+            self.apps_tree.tag_configure(status_tag, foreground=color)
+            usage = (inst["cpu_percent"], inst["rss"]) if inst.get("rss") is not None else None
+            values = (f"    └ #{inst['index']}", status_display, inst["port"], inst["pid"] or "-", "", "", "", "", "",
+                      self._format_usage(usage), "", "", "")
+            if self.apps_tree.exists(iid):
+                self.apps_tree.item(iid, values=values, tags=(status_tag,))
+            else:
+                self.apps_tree.insert(path, tk.END, iid=iid, values=values, tags=(status_tag,))
+        stale_iids = [iid for iid in self.apps_tree.get_children(path) if iid not in wanted_iids]
+        if stale_iids:
+            self.apps_tree.delete(*stale_iids)
+
+    def _get_tree_sort_key(self, column_id):
+        def numeric_or_none(value):
+            return int(value) if str(value).isdigit() else None
+
+        value_getters = {
+            "Name": lambda data: data["name"].lower(),
+            "Status": lambda data: data.get("status", "Unknown"),
+            "Port": lambda data: numeric_or_none(data.get("port")),
+            "PID": lambda data: numeric_or_none(data.get("pid")),
+            "Branch": lambda data: str(data.get("git_branch", "-")).lower(),
+            "Changes": lambda data: str(data.get("git_has_changes", "N/A")),
+            "Size": lambda data: (data.get("disk_usage") or {}).get("bytes"),
+            "Vulns": lambda data: severity_score(data.get("audit_counts")),
+            "Boot": lambda data: (data.get("boot_stats") or {}).get("p95"),
+            "Usage": lambda data: (cluster.summarize_usage(data.get("instances")) or (None, None))[1],
+            "Ahead": lambda data: (data.get("git_sync") or {}).get("ahead"),
+            "Behind": lambda data: (data.get("git_sync") or {}).get("behind"),
+            "Group": lambda data: self._format_group(data).lower() if self._format_group(data) != "-" else None,
+        }
+        getter = value_getters.get(column_id, value_getters["Name"])
+        reverse = self.tree_sort_reverse
+
+        def sort_key(item):
+            path, data = item
+            value = getter(data)
+            # Rows without a value (e.g. no port, not measured yet) always sort after rows that have one;
+            # the flag is flipped for a descending sort, which reverses the whole key.
+            return ((value is None) != reverse, value if value is not None else 0, data["name"].lower(), path)
+        return sort_key
+
+    def _sort_apps_tree_by(self, column_id):
+        if self.tree_sort_column == column_id:
+            self.tree_sort_reverse = not self.tree_sort_reverse
+        else:
+            self.tree_sort_column = column_id
+            # Sizes and vulnerabilities are most useful biggest-first; everything else starts ascending.
+            self.tree_sort_reverse = column_id in ("Size", "Vulns", "Boot", "Usage", "Ahead", "Behind")
+
+        for col, heading_text in self.TREE_HEADINGS.items():
+            arrow = (" ▼" if self.tree_sort_reverse else " ▲") if col == column_id else ""
+            self.apps_tree.heading(col, text=f"{heading_text}{arrow}")
+        self._reorder_apps_tree()
+
+    def _update_disk_usage_total(self):
+        measured = [d["disk_usage"] for d in self.apps_data.values() if (d.get("disk_usage") or {}).get("bytes") is not None]
+        total_bytes = sum(u["bytes"] for u in measured)
+        total_files = sum(u["files"] for u in measured)
+        self.disk_usage_label.config(
+            text=f"node_modules: {format_bytes(total_bytes)} in {total_files:,} files ({len(measured)} projects)")
+        if self.tree_sort_column == "Size":
+            self._reorder_apps_tree()
+
+    def _reorder_apps_tree(self):
+        # Moving existing rows is much cheaper than rebuilding the whole Treeview.
+        sorted_paths = [path for path, _ in sorted(self.apps_data.items(), key=self._get_tree_sort_key(self.tree_sort_column),
+                                                   reverse=self.tree_sort_reverse)]
+        for index, path in enumerate(sorted_paths):
+            if self.apps_tree.exists(path):
+                self.apps_tree.move(path, "", index)
+
     def _on_app_select(self, event=None):
         if constants.PERFORMANCE_LOGGING_ENABLED: t_start = time.perf_counter()
         selected_items = self.apps_tree.selection()
         app_name_for_log = "None"
 
         if selected_items:
-            new_selected_path = selected_items[0]
+            # An instance row stands for its project.
+            new_selected_path = self.apps_tree.parent(selected_items[0]) or selected_items[0]
             if new_selected_path in self.apps_data:
                 self.selected_app_path = new_selected_path
                 app_name_for_log = self.apps_data[self.selected_app_path]["name"]
-                self.update_status_bar(f"Selected: {app_name_for_log}")
+                git_sync = self.apps_data[self.selected_app_path].get("git_sync")
+                self.update_status_bar(f"Selected: {app_name_for_log}" + (f" (Git: {describe_sync(git_sync)})" if git_sync else ""))
                 self._populate_npm_scripts_combo(self.selected_app_path)
             else:
                 self.selected_app_path = None
@@ -562,6 +1001,11 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
                 self._log(f"Warning: 'scripts' field in package.json for '{app_data['name']}' is not a dictionary. Treating as empty.", warning=True)
 
             script_names = list(scripts.keys())
+            if self._use_workspaces(app_path):
+                try:
+                    script_names = workspace_runner.script_names(workspace_runner.find_workspace_packages(app_path, pkg_data))
+                except workspace_runner.WorkspaceError as e:
+                    self._log(f"Cannot read the workspaces of '{app_data['name']}': {e}", warning=True)
 
             if script_names:
                 self.npm_script_combo['values'] = script_names
@@ -582,6 +1026,10 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             self._clear_npm_scripts_combo()
         self._update_action_buttons_state()
 
+    def _use_workspaces(self, app_path):
+        app_data = self.apps_data.get(app_path) if app_path else None
+        return bool(app_data and self.workspaces_var.get() and workspace_runner.has_workspaces(app_data.get("package_data")))
+
     def _clear_npm_scripts_combo(self):
         self.npm_script_combo['values'] = []
         self.npm_script_combo.set("")
@@ -605,12 +1053,19 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             is_actually_running_process = status == "Running" or status.startswith("Running Script:")
 
             is_startable = is_installed and not is_actually_running_process and not is_busy
-            is_stoppable = is_actually_running_process and not is_busy_interim
+            # A start waiting for its readiness check can be stopped once its process exists.
+            is_waiting_for_ready = status == "Starting..." and str(app_data.get("pid", "")).isdigit()
+            is_stoppable = (is_actually_running_process and not is_busy_interim) or is_waiting_for_ready
 
             self.start_button.config(state=tk.NORMAL if is_startable else tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL if is_stoppable else tk.DISABLED)
             self.restart_button.config(state=tk.NORMAL if (is_stoppable or is_startable) and not is_busy else tk.DISABLED)
-            self.view_browser_button.config(state=tk.NORMAL if status == "Running" and has_port and not is_busy else tk.DISABLED)
+            can_view = has_port or self.local_proxy.port is not None
+            self.view_browser_button.config(state=tk.NORMAL if status == "Running" and can_view and not is_busy else tk.DISABLED)
+            self.readiness_button.config(state=tk.NORMAL)
+            self.limits_button.config(state=tk.NORMAL)
+            self.instances_button.config(state=tk.NORMAL)
+            self.dependencies_button.config(state=tk.NORMAL)
 
             self.install_button.config(state=tk.NORMAL if not is_busy else tk.DISABLED)
             self.update_deps_button.config(state=tk.NORMAL if is_installed and not is_busy else tk.DISABLED)
@@ -623,6 +1078,8 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             self.clean_deps_button.config(state=tk.NORMAL if path_exists and is_installed and not is_busy else tk.DISABLED)
             self.delete_project_button.config(state=tk.NORMAL if path_exists and not is_busy else tk.DISABLED)
 
+            self.task_cache_button.config(state=tk.NORMAL if self.npm_script_combo.cget('values') and not self._use_workspaces(self.selected_app_path) else tk.DISABLED)
+            self.workspaces_check.config(state=tk.NORMAL if workspace_runner.has_workspaces(app_data.get("package_data")) and not is_busy else tk.DISABLED)
             if self.npm_script_combo.cget('values') and not is_busy:
                 self.run_script_button.config(state=tk.NORMAL)
                 self.npm_script_combo.config(state="readonly")
@@ -633,83 +1090,38 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
                 elif is_busy :
                      self.npm_script_combo.config(state="readonly")
         else:
-            for btn in [self.start_button, self.stop_button, self.restart_button, self.view_browser_button,
+            for btn in [self.start_button, self.stop_button, self.restart_button, self.view_browser_button, self.readiness_button, self.limits_button, self.instances_button, self.dependencies_button,
                         self.install_button, self.update_deps_button, self.audit_button,
                         self.open_folder_button, self.view_pkg_button,
                         self.edit_pkg_button, self.clean_deps_button, self.delete_project_button,
-                        self.run_script_button]:
+                        self.run_script_button, self.workspaces_check, self.task_cache_button]:
                 btn.config(state=tk.DISABLED)
             self.npm_script_combo.config(state="disabled")
 
 
     def _update_app_status(self, app_path, status=None, port=None, pid=None,
-                           is_installed=None, process_obj=None, package_data=None, name=None,
-                           git_branch=None, git_has_changes=None):
+                           is_installed=None, process_obj=Ellipsis, package_data=None, name=None,
+                           git_branch=None, git_has_changes=None, disk_usage=None, audit_counts=None, boot_stats=None, instances=None,
+                           group_state=None, git_sync=None):
         resolved_app_path = str(Path(app_path).resolve())
         if resolved_app_path not in self.apps_data:
             self._log(f"Warning: Attempted to update status for app path '{resolved_app_path}' not in current data.", warning=True)
             return
 
         app_data_entry = self.apps_data[resolved_app_path]
-        changed = False
-
-        if status is not None and app_data_entry.get("status") != status:
-            app_data_entry["status"] = status
-            changed = True
-        if port is not None and app_data_entry.get("port") != port:
-            app_data_entry["port"] = port
-            changed = True
-        if pid is not None and app_data_entry.get("pid") != pid:
-            app_data_entry["pid"] = pid
-            changed = True
-        if is_installed is not None and app_data_entry.get("is_installed") != is_installed:
-            app_data_entry["is_installed"] = is_installed
-            changed = True
-        if process_obj is not Ellipsis:
-            if app_data_entry.get("process") != process_obj:
-                app_data_entry["process"] = process_obj
-                changed = True
-        if package_data is not None and app_data_entry.get("package_data") != package_data:
-            app_data_entry["package_data"] = package_data
-            changed = True
-        if name is not None and app_data_entry.get("name") != name:
-            app_data_entry["name"] = name
-            changed = True
-        if git_branch is not None and app_data_entry.get("git_branch") != git_branch:
-            app_data_entry["git_branch"] = git_branch
-            changed = True
-        if git_has_changes is not None and app_data_entry.get("git_has_changes") != git_has_changes:
-            app_data_entry["git_has_changes"] = git_has_changes
-            changed = True
-
+        changed, is_installed_changed = manager_core.apply_status_fields(
+            app_data_entry, status=status, port=port, pid=pid, is_installed=is_installed, process_obj=process_obj,
+            package_data=package_data, name=name, git_branch=git_branch, git_has_changes=git_has_changes,
+            disk_usage=disk_usage, audit_counts=audit_counts, boot_stats=boot_stats, instances=instances,
+            group_state=group_state, git_sync=git_sync)
+        if is_installed_changed:
+            self.disk_usage_tracker.refresh([resolved_app_path])
 
         if changed and self.apps_tree.exists(resolved_app_path):
-            current_status_key = app_data_entry["status"]
-            display_name_original = app_data_entry["name"]
-
-            activity_prefix = ""
-            base_status_for_prefix = current_status_key
-            if current_status_key.startswith("Running Script:"):
-                 base_status_for_prefix = "Running Script"
-            elif current_status_key.endswith("..."):
-                base_status_for_prefix = current_status_key[:-3]
-
-            if base_status_for_prefix in self.ACTIVITY_PREFIX_MAP:
-                activity_prefix = self.ACTIVITY_PREFIX_MAP[base_status_for_prefix]
-
-            display_name_with_prefix = f"{activity_prefix}{display_name_original}"
-
-            status_display, status_tag, color = self._get_status_display_and_tag(current_status_key)
-            self.apps_tree.tag_configure(status_tag, foreground=color)
-
-            self.apps_tree.item(resolved_app_path, values=(
-                display_name_with_prefix,
-                status_display,
-                app_data_entry.get("port", "-"),
-                app_data_entry.get("pid", "-"),
-                app_data_entry.get("git_branch", "-"),
-                app_data_entry.get("git_has_changes", "N/A")
-            ), tags=(status_tag,))
+            tree_values, status_tag = self._get_tree_values_and_tag(app_data_entry)
+            self.apps_tree.item(resolved_app_path, values=tree_values, tags=(status_tag,))
+            if instances is not None:
+                self._update_instance_rows(resolved_app_path, app_data_entry)
 
         if self.selected_app_path == resolved_app_path:
             self._update_action_buttons_state()
@@ -720,60 +1132,35 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
     # --- App Actions & Utilities (delegated or direct) ---
     def _install_deps(self):
         if self.selected_app_path:
+            if self.daemon_client: return self._send_daemon_action("install", self.selected_app_path)
             process_handler.install_dependencies_logic(self, self.selected_app_path)
 
     def _update_deps(self):
         if self.selected_app_path:
+            if self.daemon_client: return self._send_daemon_action("update", self.selected_app_path)
             process_handler.npm_update_dependencies_logic(self, self.selected_app_path)
 
     def _npm_audit(self):
         if self.selected_app_path:
+            if self.daemon_client: return self._send_daemon_action("audit", self.selected_app_path)
             process_handler.npm_audit_logic(self, self.selected_app_path)
 
     def _start_app(self, app_path_override=None):
         app_to_start = app_path_override or self.selected_app_path
         if app_to_start:
+            if self.daemon_client: return self._send_daemon_action("start", app_to_start)
             process_handler.start_app_logic(self, app_to_start)
 
     def _stop_app(self, app_path_override=None, callback=None):
         app_to_stop = app_path_override or self.selected_app_path
         if app_to_stop:
+            if self.daemon_client: return self._send_daemon_action("stop", app_to_stop, callback=callback)
             process_handler.stop_app_logic(self, app_to_stop, callback=callback)
 
     def _restart_app(self):
         if not self.selected_app_path or self.selected_app_path not in self.apps_data: return
-
-        app_path = self.selected_app_path
-        app_data = self.apps_data[app_path]
-        app_name = app_data["name"]
-        self.update_status_bar(f"Restarting {app_name}...")
-
-        current_status = app_data.get("status")
-        is_running_type = current_status == "Running" or current_status.startswith("Running Script:")
-        can_be_stopped_for_restart = is_running_type or current_status == "Starting..."
-
-
-        if can_be_stopped_for_restart:
-            self._log(f"Restart: Stopping '{app_name}' (status: {current_status}) first...")
-            def after_stop_for_restart():
-                if app_path in self.apps_data and self.apps_data[app_path]["status"] == "Stopped":
-                    self._log(f"Restart: '{app_name}' stopped. Now starting...")
-                    self._start_app(app_path_override=app_path)
-                else:
-                    current_state_after_stop_attempt = "Unknown or Removed"
-                    if app_path in self.apps_data:
-                        current_state_after_stop_attempt = self.apps_data[app_path].get("status", "Error/Removed")
-                    self._log(f"Restart: Failed to stop '{app_name}' cleanly or app state changed. Current state: {current_state_after_stop_attempt}. Aborting restart.", error=True)
-                    self.update_status_bar(f"Restart failed for {app_name}.")
-                    if app_path in self.apps_data:
-                         self._update_app_status(app_path, status=current_state_after_stop_attempt)
-            self._stop_app(app_path_override=app_path, callback=after_stop_for_restart)
-        elif app_data.get("is_installed"):
-            self._log(f"Restart: '{app_name}' is not running (Status: {current_status}). Starting directly...")
-            self._start_app(app_path_override=app_path)
-        else:
-             self._log(f"Restart: '{app_name}' cannot be restarted (Status: {current_status}, Installed: {app_data.get('is_installed')}). Try installing first.", warning=True)
-             self.update_status_bar(f"Cannot restart {app_name}. Check status/installation.")
+        if self.daemon_client: return self._send_daemon_action("restart", self.selected_app_path)
+        process_handler.restart_app_logic(self, self.selected_app_path)
 
 
     def _run_npm_script(self):
@@ -783,16 +1170,30 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             messagebox.showwarning("No Script Selected", "Please select an NPM script from the dropdown.", parent=self)
             return
 
+        if self._use_workspaces(self.selected_app_path):
+            if self.daemon_client: return self._send_daemon_action("run-workspaces", self.selected_app_path, script=script_name)
+            return process_handler.run_workspace_script_logic(self, self.selected_app_path, script_name)
+        if self.daemon_client: return self._send_daemon_action("run", self.selected_app_path, script=script_name)
         process_handler.run_npm_script_logic(self, self.selected_app_path, script_name)
 
+    def _show_task_cache_dialog(self):
+        if not self.selected_app_path or self.selected_app_path not in self.apps_data: return
+        script_name = self.npm_script_var.get()
+        if not script_name:
+            messagebox.showwarning("No Script Selected", "Please select an NPM script from the dropdown.", parent=self)
+            return
+        ui_dialogs.show_task_cache_dialog(self, self.selected_app_path, script_name)
+
     def _view_in_browser(self):
         if not self.selected_app_path or self.selected_app_path not in self.apps_data: return
         app_data = self.apps_data[self.selected_app_path]
         app_name = app_data["name"]
         port = app_data.get("port")
+        # Through the proxy when it is on: the URL stays the same across restarts and port changes.
+        proxied = self.local_proxy.port is not None and route_name(app_name) in running_routes(self)
 
-        if app_data.get("status") == "Running" and port and port != "-":
-            url = f"http://localhost:{port}"
+        if app_data.get("status") == "Running" and (proxied or port and port != "-"):
+            url = self.local_proxy.url_for(app_name) if proxied else f"http://localhost:{port}"
             self._log(f"Opening '{app_name}' in browser: {url}")
             self.update_status_bar(f"Opening {url}...")
             try:
@@ -879,6 +1280,28 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
 
         ui_dialogs.show_package_json_viewer(self, self.apps_data[app_path_str].copy(), app_name)
 
+    def _show_dependency_index(self):
+        ui_dialogs.show_dependency_index_panel(self)
+
+    def _show_audit_summary(self):
+        ui_dialogs.show_audit_summary_dialog(self)
+
+    def _show_readiness_dialog(self):
+        if self.selected_app_path and self.selected_app_path in self.apps_data:
+            ui_dialogs.show_readiness_dialog(self, self.selected_app_path)
+
+    def _show_launch_policy_dialog(self):
+        if self.selected_app_path and self.selected_app_path in self.apps_data:
+            ui_dialogs.show_launch_policy_dialog(self, self.selected_app_path)
+
+    def _show_cluster_dialog(self):
+        if self.selected_app_path and self.selected_app_path in self.apps_data:
+            ui_dialogs.show_cluster_dialog(self, self.selected_app_path)
+
+    def _show_dependencies_dialog(self):
+        if self.selected_app_path and self.selected_app_path in self.apps_data:
+            ui_dialogs.show_dependencies_dialog(self, self.selected_app_path)
+
 
     def _edit_package_json(self):
         if not self.selected_app_path or self.selected_app_path not in self.apps_data: return
@@ -1029,11 +1452,230 @@ class NodeAppManager(constants.ThemedTk if constants.TTKTHEMES_AVAILABLE else tk
             self.after(1000, lambda n=num_running, s_val=plural_s: self.update_status_bar(f"Stop command issued for {n} app{s_val}."))
 
 
+    def _run_bulk_operation(self, operation):
+        target_paths = bulk_operations.resolve_target_paths(self, self.apps_tree.selection())
+        if not target_paths:
+            messagebox.showinfo("No Projects", "There are no projects to run this operation on.", parent=self)
+            return
+
+        label = bulk_operations.BULK_OPERATIONS[operation]["label"]
+        scope = "selected" if len(self.apps_tree.selection()) > 1 else "all"
+        num_targets = len(target_paths)
+        if not messagebox.askyesno(f"Confirm {label}",
+                                   f"Run '{label}' on {scope} {num_targets} project{'s' if num_targets > 1 else ''}?\n"
+                                   f"Up to {bulk_operations.get_max_workers(operation)} will run in parallel.",
+                                   parent=self):
+            return
+
+        bulk_operations.run_bulk_operation(
+            self, operation, target_paths,
+            on_complete=lambda results, summary, l=label: ui_dialogs.show_bulk_summary_dialog(self, f"{l} Summary", results, summary)
+        )
+
+    def _fetch_all(self):
+        target_paths = [path for path in bulk_operations.resolve_target_paths(self, self.apps_tree.selection())
+                        if (Path(path) / ".git").exists()]
+        if not target_paths:
+            messagebox.showinfo("No Repositories", "None of these projects is a Git repository.", parent=self)
+            return
+        if self.git_tracker.fetch_running:
+            messagebox.showinfo("Fetch All", "Fetch All is already running.", parent=self)
+            return
+        scope = "selected" if len(self.apps_tree.selection()) > 1 else "all"
+        num_targets = len(target_paths)
+        if not messagebox.askyesno("Confirm Fetch All",
+                                   f"Run 'git fetch --prune' in {scope} {num_targets} repositor{'ies' if num_targets > 1 else 'y'}?\n"
+                                   f"Up to {constants.GIT_FETCH_MAX_WORKERS} run in parallel, each limited to "
+                                   f"{constants.GIT_FETCH_TIMEOUT_SECONDS}s. Working trees are not touched.",
+                                   parent=self):
+            return
+
+        def on_complete(results, summary):
+            ui_dialogs.show_bulk_summary_dialog(self, "Fetch All Summary", results, summary)
+            if self.daemon_client:
+                self.scan_projects_folder() # The daemon recounts the repos whose refs the fetch moved.
+
+        self.git_tracker.fetch_all(target_paths, on_complete=on_complete)
+
+
+    # --- Daemon (thin client mode) ---
+    def _find_running_daemon(self):
+        client = daemon_client.connect()
+        if client:
+            self.after(0, lambda: self._attach_daemon(client))
+
+    def _attach_to_running_daemon(self):
+        def task():
+            client = daemon_client.connect()
+            if client:
+                self.after(0, lambda: self._attach_daemon(client))
+            else:
+                self.after(0, lambda: messagebox.showinfo("Daemon", "No running daemon was found.", parent=self))
+        threading.Thread(target=task, daemon=True).start()
+
+    def _locally_managed_apps(self):
+        return [data["name"] for data in self.apps_data.values() if data.get("process") is not None]
+
+    def _start_daemon_and_attach(self):
+        if self.daemon_client:
+            self._log("Already attached to a daemon.")
+            return
+        if self._locally_managed_apps():
+            messagebox.showwarning("Daemon", "Stop the apps started by this window before starting the daemon:\n"
+                                   + ", ".join(self._locally_managed_apps()), parent=self)
+            return
+        self.update_status_bar("Starting daemon...")
+
+        def task():
+            try:
+                client = daemon_client.connect() or daemon_client.start_daemon_process(self.projects_folder.get())
+            except daemon_client.DaemonUnavailable as e:
+                self._log(f"Could not start daemon: {e}", error=True)
+                self.after(0, lambda: self.update_status_bar("Daemon failed to start."))
+                return
+            self.after(0, lambda: self._attach_daemon(client))
+        threading.Thread(target=task, daemon=True).start()
+
+    def _attach_daemon(self, client):
+        if self.daemon_client:
+            return
+        # The daemon's project list replaces this window's, so handles to apps started here would be lost.
+        locally_managed = self._locally_managed_apps()
+        if locally_managed:
+            self._log(f"Not attaching to the daemon at {client.base_url}: stop the apps started by this window first "
+                      f"({', '.join(locally_managed)}).", warning=True)
+            self.update_status_bar("Daemon not attached: apps started by this window are still running.")
+            return
+        self.daemon_client = client
+        self.title(f"{self.title().split(' [')[0]} [attached to daemon PID {client.pid}]")
+        self._log(f"Attached to daemon at {client.base_url} (PID {client.pid}). Apps now run in the daemon.")
+        _, self._daemon_log_seq = self._safe_daemon_call(lambda c: c.logs(0)) or ([], 0)
+        threading.Thread(target=self._stream_daemon_logs, args=(client,), daemon=True).start()
+        self._poll_daemon()
+
+    def _detach_from_daemon(self, rescan=True):
+        if not self.daemon_client:
+            return
+        self._log("Detached from daemon; its apps keep running.")
+        self.daemon_client = None
+        if self._daemon_poll_after_id is not None:
+            self.after_cancel(self._daemon_poll_after_id)
+            self._daemon_poll_after_id = None
+        self.title(self.title().split(' [')[0])
+        if rescan:
+            self.scan_projects_folder()
+
+    def _stop_daemon(self):
+        if not self.daemon_client:
+            messagebox.showinfo("Daemon", "Not attached to a daemon.", parent=self)
+            return
+        if not messagebox.askyesno("Stop Daemon", "Stop the daemon and every app it is running?", icon='warning', parent=self):
+            return
+        client = self.daemon_client
+        self._detach_from_daemon(rescan=False)
+        self._daemon_request(lambda c: c.shutdown(stop_apps=True), client=client,
+                             on_result=lambda _: self.after(2000, self.scan_projects_folder))
+
+    def _safe_daemon_call(self, func):
+        try:
+            return func(self.daemon_client)
+        except daemon_client.DaemonUnavailable as e:
+            self._log(f"Daemon request failed: {e}", warning=True)
+            return None
+
+    def _daemon_request(self, func, on_result=None, client=None):
+        """Runs a daemon call off the Tk thread; on_result gets its return value on the Tk thread."""
+        client = client or self.daemon_client
+
+        def task():
+            try:
+                result = func(client)
+            except daemon_client.DaemonUnavailable as e:
+                self._log(f"Daemon request failed: {e}", error=True)
+                return
+            if on_result:
+                self.after(0, lambda: on_result(result))
+        threading.Thread(target=task, daemon=True).start()
+
+    def _send_daemon_action(self, action, app_path, script=None, callback=None):
+        def on_result(results):
+            for result in results:
+                if not result["ok"]:
+                    self._log(f"Daemon could not {action} '{Path(result['path']).name}': {result['error']}", error=True)
+            if callback:
+                callback()
+            self._poll_daemon()
+        self._daemon_request(lambda client: client.action(action, [app_path], script=script), on_result=on_result)
+
+    def _poll_daemon(self):
+        if self._daemon_poll_after_id is not None:
+            self.after_cancel(self._daemon_poll_after_id)
+            self._daemon_poll_after_id = None
+        client = self.daemon_client
+        if not client:
+            return
+
+        def task():
+            try:
+                apps = client.list_apps()
+            except daemon_client.DaemonUnavailable as e:
+                self.after(0, lambda error=e: self._on_daemon_lost(client, error))
+                return
+            self.after(0, lambda: self._apply_daemon_apps(apps))
+        threading.Thread(target=task, daemon=True).start()
+        self._daemon_poll_after_id = self.after(constants.DAEMON_POLL_INTERVAL_MS, self._poll_daemon)
+
+    def _on_daemon_lost(self, client, error):
+        if self.daemon_client is client:
+            self._log(f"Lost connection to daemon ({error}).", error=True)
+            self._detach_from_daemon()
+
+    def _apply_daemon_apps(self, apps):
+        if not self.daemon_client:
+            return
+        remote_apps = {app["path"]: app for app in apps}
+        if set(remote_apps) != set(self.apps_data):
+            self.apps_data = {path: dict(app, process=None) for path, app in remote_apps.items()}
+            self._update_apps_list_display()
+            self._update_disk_usage_total()
+            self.update_status_bar(f"Daemon: {len(self.apps_data)} projects.")
+            return
+        for path, app in remote_apps.items():
+            self._update_app_status(
+                path, status=app["status"], port=app["port"], pid=app["pid"] if app["pid"] is not None else "-",
+                is_installed=app["is_installed"], process_obj=Ellipsis, package_data=app["package_data"],
+                name=app["name"], git_branch=app["git_branch"], git_has_changes=app["git_has_changes"],
+                disk_usage=app["disk_usage"], audit_counts=app["audit_counts"], boot_stats=app.get("boot_stats"),
+                instances=app.get("instances"), git_sync=app.get("git_sync"))
+
+    def _stream_daemon_logs(self, client):
+        while self.daemon_client is client:
+            try:
+                for seq, line in client.stream_logs(self._daemon_log_seq):
+                    if self.daemon_client is not client:
+                        return
+                    self._daemon_log_seq = seq + 1
+                    self._append_log_line(f"[daemon] {line}")
+            except (daemon_client.DaemonUnavailable, OSError, ValueError, http.client.HTTPException):
+                # A stream cut mid-line ends in a partial JSON line or an IncompleteRead; it just reconnects.
+                # Polling notices a dead daemon.
+                time.sleep(1)
+
+
     # --- Application Closing ---
     def on_closing(self):
         self.config_manager.save_config()
+        state_snapshot.save_snapshot(self)
+        self.local_proxy.stop()
         self.update_status_bar("Application closing...")
 
+        if self.daemon_client:
+            # The daemon owns the running apps; closing the window only detaches from it.
+            self._log("Detaching from daemon; its apps keep running.")
+            self.daemon_client = None
+            self.destroy()
+            return
+
         active_apps_paths = [
             path for path, data in self.apps_data.items()
             if data.get("status") == "Running" or data.get("status", "").startswith("Running Script:") or data.get("status") == "Starting..."
@@ -0,0 +1,376 @@
+# manager_core.py
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import constants
+import metrics
+import project_scanner
+import process_handler
+import workspace_runner
+from config_manager import ConfigManager
+from dependency_fingerprint import FingerprintStore
+from reclaimer import Reclaimer
+from disk_usage import DiskUsageTracker
+from audit_cache import AuditCache
+from task_cache import TaskCache
+from git_tracking import GitTracker
+from port_registry import PortRegistry
+from local_proxy import LocalProxy
+from app_groups import GroupRunner
+from readiness import StartupHistory
+
+# apps_data fields a client can see; the live Popen object stays in the process that owns it.
+PUBLIC_APP_FIELDS = (
+    "name", "path", "status", "port", "pid", "is_installed", "package_data",
+    "git_branch", "git_has_changes", "disk_usage", "audit_counts", "boot_stats",
+    "instances", "git_sync",
+)
+
+
+def apply_status_fields(app_data_entry, status=None, port=None, pid=None, is_installed=None,
+                        process_obj=Ellipsis, package_data=None, name=None, git_branch=None,
+                        git_has_changes=None, disk_usage=None, audit_counts=None, boot_stats=None,
+                        instances=None, group_state=None, git_sync=None):
+    """Updates an apps_data entry in place; returns (changed, is_installed_changed).
+
+    None leaves a field untouched; process_obj uses Ellipsis for that since None clears it.
+    """
+    changed = False
+    is_installed_changed = False
+    for field, value in (("status", status), ("port", port), ("pid", pid), ("package_data", package_data),
+                         ("name", name), ("git_branch", git_branch), ("git_has_changes", git_has_changes),
+                         ("disk_usage", disk_usage), ("audit_counts", audit_counts), ("boot_stats", boot_stats),
+                         ("instances", instances), ("group_state", group_state),
+                         ("git_sync", git_sync)):
+        if value is not None and app_data_entry.get(field) != value:
+            app_data_entry[field] = value
+            changed = True
+    if is_installed is not None and app_data_entry.get("is_installed") != is_installed:
+        app_data_entry["is_installed"] = is_installed
+        changed = True
+        is_installed_changed = True
+    if process_obj is not Ellipsis and app_data_entry.get("process") != process_obj:
+        app_data_entry["process"] = process_obj
+        changed = True
+    if app_data_entry.get("stale") and (status is not None or process_obj is not Ellipsis):
+        # Acted on since it was restored from the snapshot, so the next scan must not replace it blindly.
+        del app_data_entry["stale"]
+        changed = True
+    return changed, is_installed_changed
+
+
+def serialize_app(path, app_data):
+    entry = {field: app_data.get(field) for field in PUBLIC_APP_FIELDS}
+    entry["path"] = path
+    entry["managed"] = app_data.get("process") is not None
+    return entry
+
+
+class SimpleVar:
+    """Stand-in for tk.StringVar where no Tk root exists."""
+
+    def __init__(self, value=""):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class HeadlessMessagebox:
+    """Dialogs cannot be shown without a display: errors are logged and confirmations are declined."""
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+
+    def showerror(self, title, message, **kwargs):
+        self.app._log(f"{title}: {message}", error=True)
+
+    def showwarning(self, title, message, **kwargs):
+        self.app._log(f"{title}: {message}", warning=True)
+
+    def showinfo(self, title, message, **kwargs):
+        self.app._log(f"{title}: {message}")
+
+    def askyesno(self, title, message, **kwargs):
+        self.app._log(f"{title}: {message} (declined: no interactive confirmation available)", warning=True)
+        return False
+
+
+class CallbackLoop:
+    """Runs after()-scheduled callbacks on one thread, the way the Tk mainloop does for the GUI."""
+
+    def __init__(self):
+        self._queue = []
+        self._ids = itertools.count(1)
+        self._cancelled = set()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.thread = None
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            return None
+        after_id = next(self._ids)
+        with self._cond:
+            heapq.heappush(self._queue, (time.monotonic() + ms / 1000, after_id, func, args))
+            self._cond.notify()
+        return after_id
+
+    def after_cancel(self, after_id):
+        with self._cond:
+            self._cancelled.add(after_id)
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._queue)
+
+    def call(self, func, *args, timeout=None):
+        """Runs func on the loop thread and returns its result (for callers on other threads)."""
+        if threading.current_thread() is self.thread:
+            return func(*args)
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = func(*args)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        self.after(0, run)
+        if not done.wait(timeout):
+            raise TimeoutError("manager did not respond in time")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def run_forever(self, on_error):
+        self.thread = threading.current_thread()
+        while True:
+            with self._cond:
+                while not self._stopping and (not self._queue or self._queue[0][0] > time.monotonic()):
+                    self._cond.wait(self._queue[0][0] - time.monotonic() if self._queue else None)
+                if self._stopping:
+                    return
+                _, after_id, func, args = heapq.heappop(self._queue)
+                if after_id in self._cancelled:
+                    self._cancelled.discard(after_id)
+                    continue
+            try:
+                func(*args)
+            except Exception as e:
+                on_error(e)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+
+class LogBuffer:
+    """Bounded, sequence-numbered log lines that clients can page through or wait on."""
+
+    def __init__(self, max_lines):
+        self._lines = deque(maxlen=max_lines)
+        self._next_seq = 0
+        self._cond = threading.Condition()
+
+    def append(self, line):
+        with self._cond:
+            self._lines.append((self._next_seq, line))
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def since(self, seq, wait_seconds=0):
+        """Returns ([(seq, line)], next_seq); blocks up to wait_seconds when nothing newer exists yet."""
+        with self._cond:
+            if wait_seconds and self._next_seq <= seq:
+                self._cond.wait(wait_seconds)
+            lines = [entry for entry in self._lines if entry[0] >= seq]
+            return lines, self._next_seq
+
+
+class HeadlessManager:
+    """Owns projects, managed processes and logs without a Tk root.
+
+    It offers the same surface process_handler and project_scanner use on the GUI (apps_data, after,
+    _log, _update_app_status, ...), so those modules run unchanged in the daemon and the CLI.
+    """
+
+    def __init__(self, projects_folder=None, echo_logs=False):
+        self.loop = CallbackLoop()
+        self.logs = LogBuffer(constants.DAEMON_LOG_BUFFER_LINES)
+        self.echo_logs = echo_logs
+        self.messagebox = HeadlessMessagebox(self)
+        self.status_text = ""
+        self.apps_data = {}
+        self.selected_app_path = None
+
+        self.config_manager = ConfigManager(self)
+        self.config_data = self.config_manager.load_config()
+        self.projects_folder = SimpleVar(projects_folder or self.config_data.get("projects_folder"))
+        self.fingerprint_store = FingerprintStore(self)
+        self.reclaimer = Reclaimer(self)
+        self.disk_usage_tracker = DiskUsageTracker(self)
+        self.audit_cache = AuditCache(self)
+        self.git_tracker = GitTracker(self)
+        self.task_cache = TaskCache(self)
+        self.port_registry = PortRegistry(self)
+        self.local_proxy = LocalProxy(self)
+        self.group_runner = GroupRunner(self)
+        self.startup_history = StartupHistory(self)
+        metrics.register_app(self, {
+            "callbacks": self.loop.pending_count, "disk_usage": self.disk_usage_tracker.pending_count,
+            "reclaim": self.reclaimer.pending_count,
+        })
+
+        self._scan_in_progress = False
+        self._rescan_requested = False
+        self._scan_waiters = []
+
+    # --- The app surface used by the shared modules ---
+    def after(self, ms, func=None, *args):
+        return self.loop.after(ms, func, *args)
+
+    def after_cancel(self, after_id):
+        self.loop.after_cancel(after_id)
+
+    def _log(self, message, error=False, warning=False):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        prefix = constants.LOG_PREFIX_ERROR if error else constants.LOG_PREFIX_WARNING if warning else constants.LOG_PREFIX_INFO
+        full_message = f"[{timestamp}] {prefix}{message}"
+        self.logs.append(full_message)
+        if self.echo_logs:
+            print(full_message, flush=True)
+
+    def update_status_bar(self, message):
+        self.status_text = message
+
+    def _update_action_buttons_state(self):
+        pass
+
+    def _update_disk_usage_total(self):
+        pass
+
+    def _remove_app_from_gui(self, app_path_str):
+        self.apps_data.pop(str(Path(app_path_str).resolve()), None)
+
+    def _update_app_status(self, app_path, **fields):
+        resolved_app_path = str(Path(app_path).resolve())
+        if resolved_app_path not in self.apps_data:
+            self._log(f"Warning: Attempted to update status for app path '{resolved_app_path}' not in current data.", warning=True)
+            return
+        _, is_installed_changed = apply_status_fields(self.apps_data[resolved_app_path], **fields)
+        if is_installed_changed:
+            self.disk_usage_tracker.refresh([resolved_app_path])
+
+    # --- Scanning ---
+    def scan_projects_folder(self, on_done=None):
+        if on_done:
+            self._scan_waiters.append(on_done)
+        if self._scan_in_progress:
+            self._rescan_requested = True
+            return
+        self._scan_in_progress = True
+        self._rescan_requested = False
+        self._log("Scanning for projects...")
+        projects_folder = self.projects_folder.get()
+
+        def worker():
+            discovered_apps_on_disk = {}
+            t_start = time.perf_counter()
+            try:
+                with metrics.SCAN_PHASE_SECONDS.time(phase="disk"):
+                    discovered_apps_on_disk = project_scanner.scan_projects_folder_for_app_data(self, projects_folder)
+                with metrics.SCAN_PHASE_SECONDS.time(phase="external_processes"):
+                    project_scanner.scan_for_external_processes(self, discovered_apps_on_disk)
+            except Exception as e:
+                self._log(f"Error scanning projects folder: {e}", error=True)
+            self.after(0, lambda: self._apply_scan_results(discovered_apps_on_disk, t_start))
+
+        threading.Thread(target=worker, name="project-scan", daemon=True).start()
+
+    def _apply_scan_results(self, discovered_apps_on_disk, t_start):
+        self._scan_in_progress = False
+        self.apps_data = project_scanner.merge_scan_results(self.apps_data, discovered_apps_on_disk)
+        metrics.SCAN_PHASE_SECONDS.observe(time.perf_counter() - t_start, phase="total")
+        self.disk_usage_tracker.refresh(self.apps_data.keys())
+        self.audit_cache.apply_cached_results(self.apps_data.keys())
+        self.git_tracker.refresh(list(self.apps_data))
+        self.startup_history.apply_stats(list(self.apps_data))
+        self._log(f"Scan complete. Found {len(self.apps_data)} potential Node projects.")
+        if self._rescan_requested:
+            self.scan_projects_folder()
+            return
+        waiters, self._scan_waiters = self._scan_waiters, []
+        for on_done in waiters:
+            on_done()
+
+    # --- Actions (run on the loop thread) ---
+    def list_apps(self):
+        return [serialize_app(path, data) for path, data in sorted(self.apps_data.items(), key=lambda item: item[1]["name"].lower())]
+
+    def perform_action(self, action, app_path, script=None):
+        """Dispatches one lifecycle action to process_handler; raises ValueError for bad requests."""
+        resolved_app_path = str(Path(app_path).resolve())
+        if resolved_app_path not in self.apps_data:
+            raise ValueError(f"Unknown project: {app_path}")
+        if action == "start":
+            process_handler.start_app_logic(self, resolved_app_path)
+        elif action == "stop":
+            process_handler.stop_app_logic(self, resolved_app_path)
+        elif action == "restart":
+            process_handler.restart_app_logic(self, resolved_app_path)
+        elif action == "run":
+            scripts = (self.apps_data[resolved_app_path].get("package_data") or {}).get("scripts", {})
+            if not script or script not in scripts:
+                raise ValueError(f"Script '{script}' not found in package.json of {self.apps_data[resolved_app_path]['name']}")
+            process_handler.run_npm_script_logic(self, resolved_app_path, script)
+        elif action == "run-workspaces":
+            if not workspace_runner.has_workspaces(self.apps_data[resolved_app_path].get("package_data")):
+                raise ValueError(f"{self.apps_data[resolved_app_path]['name']} has no 'workspaces' in package.json")
+            if not script:
+                raise ValueError("No script given")
+            process_handler.run_workspace_script_logic(self, resolved_app_path, script)
+        elif action == "install":
+            process_handler.install_dependencies_logic(self, resolved_app_path)
+        elif action == "update":
+            process_handler.npm_update_dependencies_logic(self, resolved_app_path)
+        elif action == "audit":
+            process_handler.npm_audit_logic(self, resolved_app_path)
+        else:
+            raise ValueError(f"Unsupported action: {action}")
+        return serialize_app(resolved_app_path, self.apps_data[resolved_app_path])
+
+    def stop_all(self, on_done=None):
+        """Stops every running app; on_done runs on the loop thread once all stop attempts finished."""
+        running_paths = [path for path, data in self.apps_data.items()
+                         if data.get("status") == "Running" or data.get("status", "").startswith("Running Script:")
+                         or data.get("status") == "Starting..."]
+        remaining = {"count": len(running_paths)}
+
+        def one_stopped():
+            remaining["count"] -= 1
+            if remaining["count"] == 0 and on_done:
+                on_done()
+
+        if not running_paths and on_done:
+            self.after(0, on_done)
+        for path in running_paths:
+            process_handler.stop_app_logic(self, path, callback=one_stopped)
+        return len(running_paths)
+
+    def run_forever(self):
+        self.loop.run_forever(lambda e: self._log(f"Unhandled error in manager loop: {e}", error=True))
+
+    def shutdown(self):
+        self.loop.stop()
@@ -0,0 +1,248 @@
+# manager_daemon.py
+# Headless Node.js App Manager: owns managed processes and serves a local HTTP control API.
+# Run with `python manager_daemon.py [--projects-folder PATH] [--port N]`. The GUI attaches to it through
+# daemon_client and can detach again without affecting the apps the daemon is running.
+import argparse
+import json
+import os
+import secrets
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import constants
+import metrics
+from config_manager import get_app_config_dir
+from manager_core import HeadlessManager
+
+
+def get_state_file_path():
+    return get_app_config_dir() / constants.DAEMON_STATE_FILE_NAME
+
+
+def write_state_file(port, token):
+    state_path = get_state_file_path()
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    # The token grants control over local processes, so the file is private to the user.
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"host": constants.DAEMON_HOST, "port": port, "token": token, "pid": os.getpid(),
+                   "started_at": time.time()}, f)
+    os.replace(tmp_path, state_path)
+
+
+def remove_state_file():
+    state_path = get_state_file_path()
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get("pid") != os.getpid():
+                return # Another daemon has taken over since.
+        state_path.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    server_version = "NodeAppManagerDaemon/1"
+    protocol_version = "HTTP/1.0"
+
+    @property
+    def manager(self):
+        return self.server.manager
+
+    def log_message(self, format, *args):
+        pass # Requests are frequent (GUI polling); errors are reported through the manager log instead.
+
+    def _send_json(self, status_code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        if secrets.compare_digest(self.headers.get(constants.DAEMON_TOKEN_HEADER, ""), self.server.token):
+            return True
+        self._send_json(401, {"error": "missing or invalid token"})
+        return False
+
+    def _read_json_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def _call(self, func, *args):
+        return self.manager.loop.call(func, *args, timeout=constants.DAEMON_REQUEST_TIMEOUT_SECONDS)
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/api/status":
+                self._send_json(200, self._call(lambda: {
+                    "pid": os.getpid(), "projects_folder": self.manager.projects_folder.get(),
+                    "apps": len(self.manager.apps_data), "status_text": self.manager.status_text,
+                    "uptime_seconds": time.time() - self.server.started_at,
+                    "metrics_port": metrics.server_port(), "proxy_port": self.manager.local_proxy.port,
+                }))
+            elif url.path == "/api/apps":
+                self._send_json(200, {"apps": self._call(self.manager.list_apps)})
+            elif url.path == "/api/logs":
+                since = int(query.get("since", ["0"])[0])
+                lines, next_seq = self.manager.logs.since(since)
+                self._send_json(200, {"lines": [line for _, line in lines], "next": next_seq})
+            elif url.path == "/api/logs/stream":
+                self._stream_logs(int(query.get("since", ["0"])[0]))
+            else:
+                self._send_json(404, {"error": f"unknown endpoint {url.path}"})
+        except (TimeoutError, ValueError) as e:
+            self._send_json(503 if isinstance(e, TimeoutError) else 400, {"error": str(e)})
+
+    def _stream_logs(self, since):
+        # One JSON object per line until the client disconnects; empty lines are heartbeats.
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        seq = since
+        try:
+            while not self.server.stopping.is_set():
+                lines, seq = self.manager.logs.since(seq, wait_seconds=constants.DAEMON_LOG_STREAM_HEARTBEAT_SECONDS)
+                if lines:
+                    self.wfile.write("".join(json.dumps({"seq": s, "line": line}) + "\n" for s, line in lines).encode('utf-8'))
+                else:
+                    self.wfile.write(b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        url = urlparse(self.path)
+        try:
+            body = self._read_json_body()
+            if url.path == "/api/actions":
+                action = body.get("action")
+                results = []
+                for app_path in body.get("paths", []):
+                    try:
+                        results.append({"path": app_path, "ok": True,
+                                        "app": self._call(self.manager.perform_action, action, app_path, body.get("script"))})
+                    except ValueError as e:
+                        results.append({"path": app_path, "ok": False, "error": str(e)})
+                    except Exception as e:
+                        self.manager._log(f"Control API action '{action}' failed for {app_path}: {e}", error=True)
+                        results.append({"path": app_path, "ok": False, "error": f"{type(e).__name__}: {e}"})
+                self._send_json(200, {"results": results})
+            elif url.path == "/api/scan":
+                done = threading.Event()
+                self.manager.after(0, lambda: self.manager.scan_projects_folder(on_done=done.set))
+                if body.get("wait", True):
+                    done.wait(constants.DAEMON_REQUEST_TIMEOUT_SECONDS * 6)
+                self._send_json(200, {"apps": self._call(self.manager.list_apps)})
+            elif url.path == "/api/metrics":
+                if body.get("enabled", True):
+                    try:
+                        port = metrics.start_server(body.get("port"))
+                    except OSError as e:
+                        self._send_json(409, {"error": f"could not start metrics endpoint: {e}"})
+                        return
+                    self.manager._log(f"Metrics endpoint enabled: http://{constants.METRICS_HOST}:{port}/metrics")
+                else:
+                    metrics.stop_server()
+                    self.manager._log("Metrics endpoint disabled.")
+                self._send_json(200, {"enabled": metrics.is_enabled(), "port": metrics.server_port()})
+            elif url.path == "/api/shutdown":
+                stop_apps = bool(body.get("stop_apps", False))
+                self._send_json(200, {"stopping": True, "stop_apps": stop_apps})
+                threading.Thread(target=self.server.request_shutdown, args=(stop_apps,), daemon=True).start()
+            else:
+                self._send_json(404, {"error": f"unknown endpoint {url.path}"})
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": f"invalid JSON body: {e}"})
+        except TimeoutError as e:
+            self._send_json(503, {"error": str(e)})
+
+
+class ControlServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, manager, port):
+        super().__init__((constants.DAEMON_HOST, port), ControlRequestHandler)
+        self.manager = manager
+        self.token = secrets.token_urlsafe(24)
+        self.started_at = time.time()
+        self.stopping = threading.Event()
+
+    def request_shutdown(self, stop_apps=False):
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        if stop_apps:
+            stopped = threading.Event()
+            self.manager.after(0, lambda: self.manager.stop_all(on_done=stopped.set))
+            stopped.wait(constants.DAEMON_REQUEST_TIMEOUT_SECONDS)
+        self.shutdown()
+        self.manager.shutdown()
+
+
+def run_daemon(projects_folder=None, port=None, echo_logs=True, metrics_port=None, proxy_port=None):
+    manager = HeadlessManager(projects_folder=projects_folder, echo_logs=echo_logs)
+    if metrics_port is not None:
+        bound_metrics_port = metrics.start_server(metrics_port)
+        manager._log(f"Metrics endpoint: http://{constants.METRICS_HOST}:{bound_metrics_port}/metrics")
+    if proxy_port is not None:
+        bound_proxy_port = manager.local_proxy.start(proxy_port)
+        manager._log(f"Local proxy: http://<project>.localhost:{bound_proxy_port}/ or "
+                     f"http://localhost:{bound_proxy_port}/<project>/")
+    server = ControlServer(manager, constants.DAEMON_PORT if port is None else port)
+    bound_port = server.server_address[1]
+    write_state_file(bound_port, server.token)
+    manager._log(f"Daemon listening on http://{constants.DAEMON_HOST}:{bound_port} (PID {os.getpid()}), "
+                 f"projects folder: {manager.projects_folder.get()}")
+
+    def handle_signal(signum, frame):
+        threading.Thread(target=server.request_shutdown, args=(True,), daemon=True).start()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    threading.Thread(target=server.serve_forever, name="control-api", daemon=True).start()
+    manager.after(0, manager.scan_projects_folder)
+    manager.after(0, lambda: manager.reclaimer.resume_pending(manager.projects_folder.get()))
+    try:
+        manager.run_forever()
+    finally:
+        remove_state_file()
+        server.server_close()
+        manager.local_proxy.stop()
+        manager._log("Daemon stopped.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Node.js App Manager daemon with a local control API.")
+    parser.add_argument("--projects-folder", help="Projects folder to manage (defaults to the GUI's configured folder).")
+    parser.add_argument("--port", type=int, default=None, help="Port on 127.0.0.1 (default: any free port).")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo log lines to stdout.")
+    parser.add_argument("--metrics-port", type=int, nargs="?", const=constants.METRICS_PORT, default=None,
+                        help=f"Serve Prometheus metrics on 127.0.0.1 (default port {constants.METRICS_PORT}); "
+                             "can also be toggled later through the control API.")
+    parser.add_argument("--proxy-port", type=int, nargs="?", const=constants.PROXY_PORT, default=None,
+                        help=f"Run the local reverse proxy (default port {constants.PROXY_PORT}): "
+                             "http://<project>.localhost:<port>/ or http://localhost:<port>/<project>/.")
+    args = parser.parse_args(argv)
+    run_daemon(projects_folder=args.projects_folder, port=args.port, echo_logs=not args.quiet,
+               metrics_port=args.metrics_port, proxy_port=args.proxy_port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
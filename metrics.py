@@ -0,0 +1,346 @@
+# metrics.py
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import constants
+
+# Recording is a no-op until enabled (GUI menu, `manager_daemon.py --metrics-port`, or the daemon API).
+_enabled = False
+_server = None
+_server_lock = threading.Lock()
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect_lines(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.extend(self._sample_lines(labelvalues, value))
+        return lines
+
+    def _sample_lines(self, labelvalues, value):
+        return [f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks = {}
+
+    def set(self, value, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func, **labels):
+        """func() is evaluated at scrape time (e.g. a queue's current length)."""
+        with self._lock:
+            self._callbacks[self._key(labels)] = func
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def collect_lines(self):
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        for key, func in callbacks:
+            try:
+                value = func()
+            except Exception:
+                continue
+            with self._lock:
+                self._values[key] = value
+        return super().collect_lines()
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets or constants.METRICS_DEFAULT_BUCKETS) + (math.inf,)
+
+    def observe(self, value, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def time(self, **labels):
+        return _HistogramTimer(self, labels)
+
+    def _sample_lines(self, labelvalues, state):
+        lines = []
+        for upper_bound, count in zip(self.buckets, state["counts"]):
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, [('le', _format_value(float(upper_bound)))])} {count}")
+        labels_text = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels_text} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels_text} {state['count']}")
+        return lines
+
+
+class _HistogramTimer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect_lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Manager metrics ---
+SCAN_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "nam_scan_phase_seconds", "Duration of project scan phases.", ["phase"]))
+SUBPROCESS_SPAWN_SECONDS = REGISTRY.register(Histogram(
+    "nam_subprocess_spawn_seconds", "Time for Popen to return a child process.", ["kind"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+APP_LOG_LINES = REGISTRY.register(Counter(
+    "nam_app_log_lines_total", "Output lines read from managed processes (use rate() for lines per second).", ["app"]))
+APP_LOG_LINES_DROPPED = REGISTRY.register(Counter(
+    "nam_app_log_lines_dropped_total", "Output lines dropped by the per-app log rate limit.", ["app"]))
+APP_LOG_LINES_FOLDED = REGISTRY.register(Counter(
+    "nam_app_log_lines_folded_total", "Output lines folded into a 'repeated N times' note.", ["app"]))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "nam_queue_depth", "Items waiting in the manager's background queues.", ["queue"]))
+APP_STARTS = REGISTRY.register(Counter(
+    "nam_app_starts_total", "App start attempts.", ["app"]))
+APP_RESTARTS = REGISTRY.register(Counter(
+    "nam_app_restarts_total", "App restarts requested.", ["app"]))
+APP_TIME_TO_READY_SECONDS = REGISTRY.register(Histogram(
+    "nam_app_time_to_ready_seconds", "Time from start request until the app passed its readiness check.", ["app"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)))
+APP_EXITS = REGISTRY.register(Counter(
+    "nam_app_exits_total", "Managed app exits by outcome.", ["app", "outcome"]))
+APP_CPU_PERCENT = REGISTRY.register(Gauge(
+    "nam_app_cpu_percent", "CPU usage of running apps (process and children) since the previous scrape.", ["app"]))
+APP_MEMORY_BYTES = REGISTRY.register(Gauge(
+    "nam_app_memory_rss_bytes", "Resident memory of running apps (process and children).", ["app"]))
+APPS_BY_STATUS = REGISTRY.register(Gauge(
+    "nam_apps", "Projects known to the manager by status.", ["status"]))
+PROXY_REQUESTS = REGISTRY.register(Counter(
+    "nam_proxy_requests_total", "Requests through the local proxy by route and status class.", ["route", "code"]))
+PROXY_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "nam_proxy_request_seconds", "Local proxy request duration, until the response was fully relayed.", ["route"]))
+TASK_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "nam_task_cache_lookups_total", "npm script task cache lookups by outcome (hit, miss).", ["outcome"]))
+TK_LOOP_LAG_SECONDS = REGISTRY.register(Histogram(
+    "nam_tk_loop_lag_seconds", "How late after() heartbeats ran on the Tk thread.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+TK_STALL_SECONDS = REGISTRY.register(Histogram(
+    "nam_tk_stall_seconds", "Tk event loop stalls above the detection threshold.",
+    buckets=(0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)))
+
+
+def spawn_kind(action_name):
+    # Keeps label cardinality bounded: every script shares one series.
+    if action_name.startswith("Running script"):
+        return "script"
+    return action_name.rstrip(".").lower().replace(" ", "_")
+
+
+class _AppResourceSampler:
+    """Refreshes per-app gauges at scrape time; keeps psutil.Process objects so cpu_percent has a baseline."""
+
+    def __init__(self, app):
+        self.app = app
+        self._processes = {}
+
+    def sample(self):
+        import psutil
+        apps = list(self.app.apps_data.values())
+        APP_CPU_PERCENT.clear()
+        APP_MEMORY_BYTES.clear()
+        by_status = {}
+        live_pids = set()
+        for data in apps:
+            by_status[data.get("status", "Unknown")] = by_status.get(data.get("status", "Unknown"), 0) + 1
+            # A cluster is summed over its instances.
+            pids = [inst["pid"] for inst in data.get("instances") or [] if inst.get("pid")] or [data.get("pid")]
+            pids = [int(pid) for pid in pids if str(pid).isdigit()]
+            if not pids:
+                continue
+            cpu = 0.0
+            rss = 0
+            sampled = False
+            for pid in pids:
+                live_pids.add(pid)
+                try:
+                    process = self._processes.get(pid)
+                    if process is None:
+                        process = self._processes[pid] = psutil.Process(pid)
+                    tree = [process] + process.children(recursive=True)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    self._processes.pop(pid, None)
+                    continue
+                sampled = True
+                for member in tree:
+                    try:
+                        cpu += member.cpu_percent(None)
+                        rss += member.memory_info().rss
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        continue
+            if sampled:
+                APP_CPU_PERCENT.set(cpu, app=data["name"])
+                APP_MEMORY_BYTES.set(rss, app=data["name"])
+        for pid in list(self._processes):
+            if pid not in live_pids:
+                del self._processes[pid]
+        APPS_BY_STATUS.clear()
+        for status, count in by_status.items():
+            APPS_BY_STATUS.set(count, status=status)
+
+
+def register_app(app, queues=None):
+    """Hooks an app (GUI or headless manager) into scrape-time gauges. queues maps names to length callables."""
+    for queue_name, length_func in (queues or {}).items():
+        QUEUE_DEPTH.set_function(length_func, queue=queue_name)
+    REGISTRY.resource_sampler = _AppResourceSampler(app)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        sampler = getattr(REGISTRY, "resource_sampler", None)
+        if sampler is not None and _enabled:
+            try:
+                sampler.sample()
+            except Exception:
+                pass
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(port=None):
+    """Enables recording and serves /metrics on 127.0.0.1; returns the bound port."""
+    global _server
+    with _server_lock:
+        set_enabled(True)
+        if _server is None:
+            _server = ThreadingHTTPServer((constants.METRICS_HOST, constants.METRICS_PORT if port is None else port), _MetricsRequestHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server.server_address[1]
+
+
+def stop_server():
+    """Stops the endpoint and recording; collected values are kept for the next time it is enabled."""
+    global _server
+    with _server_lock:
+        set_enabled(False)
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
+
+def server_port():
+    return _server.server_address[1] if _server is not None else None
@@ -0,0 +1,221 @@
+# port_registry.py
+import os
+import re
+import socket
+import threading
+from pathlib import Path
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+# Where a project states its port: `PORT=4000 node server.js`, `next dev -p 4000`, `vite --port=4000`.
+_SCRIPT_PORT_PATTERNS = (
+    re.compile(r"\bPORT\s*=\s*(\d{2,5})\b"),
+    re.compile(r"(?:--port|\s-p)(?:\s+|=)(\d{2,5})\b"),
+)
+_DOTENV_PORT_PATTERN = re.compile(r"^\s*(?:export\s+)?PORT\s*=\s*['\"]?(\d{2,5})['\"]?\s*(?:#.*)?$", re.MULTILINE)
+
+
+class PortConflict(Exception):
+    pass
+
+
+def declared_port(app_path, package_data):
+    """(port, source) the project listens on when no PORT is injected; DEFAULT_APP_PORT when it does not say."""
+    start_script = ((package_data or {}).get("scripts") or {}).get("start") or ""
+    for pattern in _SCRIPT_PORT_PATTERNS:
+        match = pattern.search(start_script)
+        if match:
+            return int(match.group(1)), "start script"
+    try:
+        dotenv_text = (Path(app_path) / ".env").read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        dotenv_text = ""
+    match = _DOTENV_PORT_PATTERN.search(dotenv_text)
+    if match:
+        return int(match.group(1)), ".env"
+    return constants.DEFAULT_APP_PORT, "default"
+
+
+def listening_ports():
+    """{port: pid or None} from the system socket table; None if the OS does not let us read it (macOS non-root)."""
+    import psutil # Imported on first use to keep it off the startup path.
+    try:
+        connections = psutil.net_connections(kind="inet")
+    except (psutil.AccessDenied, OSError):
+        return None
+    return {conn.laddr.port: conn.pid for conn in connections if conn.status == psutil.CONN_LISTEN and conn.laddr}
+
+
+def can_bind(port):
+    # Catches listeners the socket table hides (other users' processes). SO_REUSEADDR matches what Node
+    # does, so a port that only has TIME_WAIT connections left still counts as free.
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        if os.name != 'nt':
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind(("", port))
+        except OSError:
+            return False
+    return True
+
+
+def describe_pid(pid):
+    if pid is None:
+        return "another process"
+    import psutil
+    try:
+        return f"PID {pid} ({psutil.Process(pid).name()})"
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return f"PID {pid}"
+
+
+class PortLease:
+    """A port handed to one start of a project; held until that process exits.
+
+    A clustered start holds one port per instance in `ports`; `port` is the first of them.
+    """
+
+    def __init__(self, app_path, port, source, env=None, ports=None):
+        self.app_path = app_path
+        self.port = port
+        self.source = source
+        self.env = env
+        self.ports = ports or [port]
+
+
+class PortRegistry:
+    """Knows which ports are taken (socket table, bind probe, ports leased to apps being started or running)
+    and, when auto-assignment is on, gives each project a free PORT from the configured range.
+
+    Assignments are remembered per project, so a project gets the same port on every start while it is free.
+    """
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.file_path = get_app_config_dir() / constants.PORT_ASSIGNMENTS_FILE_NAME
+        self._lock = threading.Lock()
+        self._data = None
+        self._leases = {}
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_json_store(self.file_path, self.app, "port assignments")
+
+    def _save(self):
+        save_json_store(self.file_path, self._data, self.app, "port assignments", indent=2)
+
+    @property
+    def auto_assign(self):
+        return self.app.config_data.get("auto_assign_ports", constants.PORT_AUTO_ASSIGN_DEFAULT)
+
+    def port_range(self):
+        start, end = self.app.config_data.get("port_range") or (constants.PORT_RANGE_START, constants.PORT_RANGE_END)
+        return int(start), int(end)
+
+    def get(self, app_path):
+        with self._lock:
+            self._load()
+            return self._data.get(str(app_path))
+
+    def remove(self, app_path):
+        with self._lock:
+            self._load()
+            if self._data.pop(str(app_path), None) is not None:
+                self._save()
+
+    def _managed_owners(self, exclude_path):
+        owners = {}
+        for path, lease in self._leases.items():
+            if path != exclude_path:
+                name = self.app.apps_data.get(path, {}).get("name", Path(path).name)
+                owners.update((port, f"app '{name}'") for port in lease.ports)
+        for path, data in list(self.app.apps_data.items()):
+            port = str(data.get("port", ""))
+            is_live = data.get("process") is not None or str(data.get("pid", "")).isdigit()
+            if path != exclude_path and port.isdigit() and is_live:
+                owners.setdefault(int(port), f"app '{data.get('name', Path(path).name)}'")
+        return owners
+
+    def owner_of(self, port, listening, managed_owners):
+        """Who holds `port`, or None if it is free."""
+        if port in managed_owners:
+            return managed_owners[port]
+        if listening is not None and port in listening:
+            return describe_pid(listening[port])
+        if not can_bind(port):
+            return "another process"
+        return None
+
+    def preflight(self, app_path, package_data, count=1):
+        """Leases a port for starting the project; raises PortConflict when it cannot be started without a clash.
+
+        With auto-assignment the lease carries env={'PORT': ...}: the project's remembered port if it is still
+        free, else its declared port if free, else the first free port in the range no other project has. A port
+        set in the start script is used as is, as without auto-assignment.
+        count > 1 leases that many ports for a cluster: the extra ones follow the first (without auto-assignment)
+        or come from the range. That is refused for a port set in the start script, since it overrides PORT.
+        """
+        app_path = str(app_path)
+        port, source = declared_port(app_path, package_data)
+        if count > 1 and source == "start script":
+            raise PortConflict(f"the start script sets port {port}, which overrides each instance's PORT, so all "
+                               f"{count} instances would bind it; use one shared PORT (reusePort) or take the port "
+                               f"out of the start script")
+        listening = listening_ports()
+        with self._lock:
+            self._load()
+            managed_owners = self._managed_owners(app_path)
+            # A port in the start script (PORT=4000, -p, --port) overrides the PORT env var, so it cannot be reassigned.
+            if not self.auto_assign or source == "start script":
+                owner = self.owner_of(port, listening, managed_owners)
+                if owner:
+                    fixed_note = "; the start script sets it, so no other port can be assigned" if self.auto_assign else ""
+                    raise PortConflict(f"port {port} ({source}) is already in use by {owner}{fixed_note}")
+                extra_ports = [port + offset for offset in range(1, count)]
+                for extra_port in extra_ports:
+                    owner = self.owner_of(extra_port, listening, managed_owners)
+                    if owner:
+                        raise PortConflict(f"port {extra_port} (instance #{extra_port - port}) is already in use by {owner}")
+                lease = self._leases[app_path] = PortLease(app_path, port, source, ports=[port] + extra_ports)
+                return lease
+
+            assigned_elsewhere = {p for path, p in self._data.items() if path != app_path}
+            candidates = []
+            if self._data.get(app_path):
+                candidates.append((self._data[app_path], "assigned"))
+            if port not in assigned_elsewhere:
+                candidates.append((port, source))
+            range_start, range_end = self.port_range()
+            candidates.extend((p, "range") for p in range(range_start, range_end + 1) if p not in assigned_elsewhere)
+            for candidate, candidate_source in candidates:
+                if self.owner_of(candidate, listening, managed_owners) is None:
+                    break
+            else:
+                raise PortConflict(f"no free port left in {range_start}-{range_end}")
+            ports = [candidate]
+            for extra_port in range(range_start, range_end + 1):
+                if len(ports) == count:
+                    break
+                if extra_port not in ports and extra_port not in assigned_elsewhere and \
+                   self.owner_of(extra_port, listening, managed_owners) is None:
+                    ports.append(extra_port)
+            else:
+                if len(ports) < count:
+                    raise PortConflict(f"only {len(ports)} of {count} ports are free in {range_start}-{range_end}")
+            if self._data.get(app_path) != candidate:
+                self._data[app_path] = candidate
+                self._save()
+            lease = self._leases[app_path] = PortLease(app_path, candidate, candidate_source, env={"PORT": str(candidate)},
+                                                       ports=ports)
+            return lease
+
+    def leased_port(self, app_path):
+        """Port leased to a running start of the project, or None."""
+        lease = self._leases.get(str(app_path))
+        return lease.port if lease is not None else None
+
+    def release(self, lease):
+        with self._lock:
+            if self._leases.get(lease.app_path) is lease:
+                del self._leases[lease.app_path]
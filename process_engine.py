@@ -0,0 +1,224 @@
+# process_engine.py
+import asyncio
+import codecs
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import constants
+import metrics
+
+_LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+
+
+class ProcessHandle:
+    """Popen-like view of a child owned by the engine loop (pid, returncode, poll, wait, terminate, kill).
+
+    Safe to use from any thread; signals are delivered on the loop thread.
+    """
+
+    def __init__(self, engine, cmd_list):
+        self._engine = engine
+        self.args = cmd_list
+        self.pid = None
+        self.returncode = None
+        self._process = None
+        self._exited = threading.Event()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig):
+        self._engine.call_in_loop(self._signal, lambda process: process.send_signal(sig))
+
+    def terminate(self):
+        self._engine.call_in_loop(self._signal, lambda process: process.terminate())
+
+    def kill(self):
+        self._engine.call_in_loop(self._signal, lambda process: process.kill())
+
+    def _signal(self, deliver):
+        if self._process is None or self.returncode is not None:
+            return
+        try:
+            deliver(self._process)
+        except ProcessLookupError:
+            pass # Exited between the check and the signal; the exit event follows.
+
+    def _set_exited(self, returncode):
+        if self._exited.is_set():
+            return
+        self.returncode = returncode
+        self._exited.set()
+
+
+class _ExitAwareStreamProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    # Process.wait() only resolves once the pipes are closed too, which a grandchild that inherited them can
+    # delay indefinitely; the handle must report the exit of the process itself, as Popen.wait() does.
+    def __init__(self, limit, loop, on_process_exited):
+        super().__init__(limit=limit, loop=loop)
+        self._on_process_exited = on_process_exited
+
+    def process_exited(self):
+        self._on_process_exited(self._transport.get_returncode())
+        super().process_exited()
+
+
+def _use_pidfd_child_watcher(loop):
+    # Before Python 3.12 the default child watcher parks one thread in waitpid() per child. A pidfd watcher
+    # reaps children on the loop thread instead, so the thread count stays flat however many apps run.
+    # 3.12+ does this by itself; without pidfd support (old kernels, macOS) the default watcher is kept.
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.set_child_watcher(watcher)
+
+
+class ProcessEngine:
+    """One asyncio loop thread that owns every child process started through run_command_in_thread.
+
+    stdout and stderr are read concurrently in chunks (a chatty stderr can no longer fill its pipe and block
+    the child) and delivered as batches of lines with the time they were read. Exit/spawn-error callbacks run
+    on a single events thread so they may do blocking work (fingerprinting, app.after) without stalling output.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._events = ThreadPoolExecutor(max_workers=1, thread_name_prefix="process-events")
+        self._handles = set()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, name="process-engine", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _use_pidfd_child_watcher(loop)
+        self._loop = loop
+        self._ready.set()
+        loop.run_forever()
+
+    def call_in_loop(self, func, *args):
+        self._ensure_started()
+        if threading.current_thread() is self._thread:
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def run_coroutine(self, coro):
+        """Schedules coro on the loop (from any thread, the loop thread included); returns a concurrent Future."""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def active_count(self):
+        return len(self._handles)
+
+    def spawn(self, cmd_list, cwd, on_lines, on_exit, on_error, on_started=None, env=None, metrics_kind="command",
+              preexec_fn=None):
+        """Starts cmd_list without blocking and returns its ProcessHandle (pid is set once it has started).
+
+        on_started(handle) and on_lines(handle, stream_name, lines, timestamp) run on the loop thread and must be
+        quick; on_exit(handle, returncode) and on_error(exception) run on the events thread.
+        """
+        self._ensure_started()
+        handle = ProcessHandle(self, cmd_list)
+        asyncio.run_coroutine_threadsafe(
+            self._supervise(handle, cwd, env, on_lines, on_exit, on_error, on_started, metrics_kind, preexec_fn), self._loop)
+        return handle
+
+    async def _supervise(self, handle, cwd, env, on_lines, on_exit, on_error, on_started, metrics_kind, preexec_fn):
+        process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        extra_kwargs = {"preexec_fn": preexec_fn} if preexec_fn else {}
+        t_spawn = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            transport, protocol = await loop.subprocess_exec(
+                lambda: _ExitAwareStreamProtocol(constants.PROCESS_READ_CHUNK_BYTES * 4, loop, handle._set_exited),
+                *handle.args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=process_flags, **extra_kwargs,
+            )
+        except Exception as e:
+            handle._set_exited(None)
+            self._events.submit(self._invoke, on_error, e)
+            return
+        metrics.SUBPROCESS_SPAWN_SECONDS.observe(time.perf_counter() - t_spawn, kind=metrics_kind)
+        process = asyncio.subprocess.Process(transport, protocol, loop)
+        handle._process = process
+        handle.pid = process.pid
+        self._handles.add(handle)
+        if on_started:
+            self._invoke(on_started, handle)
+
+        await asyncio.gather(self._pump(handle, process.stdout, "stdout", on_lines),
+                             self._pump(handle, process.stderr, "stderr", on_lines))
+        returncode = await process.wait()
+        self._handles.discard(handle)
+        self._events.submit(self._invoke, on_exit, handle, returncode)
+
+    async def _pump(self, handle, stream, stream_name, on_lines):
+        # Whole chunks are decoded incrementally (a multi-byte character may span two reads) and split
+        # into lines here, so a flood of output costs one callback per chunk rather than one per line.
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        while True:
+            chunk = await stream.read(constants.PROCESS_READ_CHUNK_BYTES)
+            pending += decoder.decode(chunk, final=not chunk)
+            held = ""
+            if chunk and pending.endswith("\r"):
+                held, pending = "\r", pending[:-1] # May be the first half of a \r\n split across reads.
+            *lines, pending = _LINE_BREAK_RE.split(pending)
+            if len(pending) > constants.PROCESS_STREAM_LINE_LIMIT_BYTES:
+                lines.append(pending)
+                pending = ""
+            pending += held
+            if not chunk and pending:
+                lines.append(pending)
+            if lines:
+                self._invoke(on_lines, handle, stream_name, lines, time.time())
+            if not chunk:
+                return
+
+    @staticmethod
+    def _invoke(callback, *args):
+        # A failing callback must not stop the pumps or lose the exit event of other processes.
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ProcessEngine()
+        return _engine
@@ -1,166 +1,216 @@
 # process_handler.py
-import subprocess
 import os
+import subprocess
 import re
 import threading
 import time
 from pathlib import Path
-import psutil
 import shutil
 
 import constants
+import dependency_fingerprint
+import reclaimer
+import audit_cache
+import metrics
+import process_engine
+import readiness
+import launch_policy
+import cluster
+import workspace_runner
+import task_cache
+from log_ingest import OutputIngestor
+from port_registry import PortConflict, declared_port
+
+_PORT_PATTERN = re.compile(r"(?:port|listening on|on port|url:|local:.*?)\s*[:\- ]\s*(\d{4,5})", re.IGNORECASE)
 
 def run_command_in_thread(app, cmd_list, cwd, app_path, action_name,
                           on_success_status, on_fail_status,
-                          is_long_running=False, post_success_action=None):
-
+                          is_long_running=False, post_success_action=None, extra_env=None, cleanup_action=None,
+                          readiness_probe=None, preexec_fn=None, output_capture=None):
+    """Runs a command through the shared process engine; returns immediately.
+
+    extra_env is added to the inherited environment; preexec_fn runs in the child before exec (POSIX only,
+    see launch_policy). output_capture, a list, receives the first TASK_CACHE_MAX_LOG_LINES output lines as
+    (stream name, line) pairs, before folding and rate limiting. cleanup_action(app, app_path) runs on the Tk thread
+    once the command has ended, however it ended. With a readiness_probe, a long-running command keeps its
+    interim status until the probe passes, and its time-to-ready is added to the startup history.
+
+    No thread is dedicated to the command: its output arrives in batches of lines (stdout and stderr read
+    concurrently), is folded and rate-limited by an OutputIngestor, and its exit is reported on the engine's
+    events thread.
+    """
     resolved_app_path = str(Path(app_path).resolve())
 
-    def task():
-        if resolved_app_path not in app.apps_data:
-            app._log(f"App at path '{resolved_app_path}' removed before '{action_name}' task started.")
-            app.update_status_bar(f"Action for removed app aborted.")
-            app.after(0, app._update_action_buttons_state)
-            return
-
-        app_name = app.apps_data[resolved_app_path].get("name", "Unknown App")
+    if resolved_app_path not in app.apps_data:
+        app._log(f"App at path '{resolved_app_path}' removed before '{action_name}' task started.")
+        app.update_status_bar(f"Action for removed app aborted.")
+        app.after(0, app._update_action_buttons_state)
+        return
 
-        log_message_start = f"{action_name} '{app_name}'..."
-        app._log(log_message_start)
-        app.update_status_bar(log_message_start)
+    app_name = app.apps_data[resolved_app_path].get("name", "Unknown App")
 
-        interim_status_key_for_treeview = action_name
-        if not interim_status_key_for_treeview.endswith("..."):
-            interim_status_key_for_treeview += "..."
+    log_message_start = f"{action_name} '{app_name}'..."
+    app._log(log_message_start)
+    app.update_status_bar(log_message_start)
 
-        app.after(0, lambda p=resolved_app_path, s=interim_status_key_for_treeview: app._update_app_status(p, status=s))
+    interim_status_key_for_treeview = action_name
+    if not interim_status_key_for_treeview.endswith("..."):
+        interim_status_key_for_treeview += "..."
 
-        process = None
-        try:
-            process_flags = 0
-            if os.name == 'nt': process_flags = subprocess.CREATE_NO_WINDOW
+    app.after(0, lambda p=resolved_app_path, s=interim_status_key_for_treeview: app._update_app_status(p, status=s))
 
-            process = subprocess.Popen(
-                cmd_list, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                text=True, bufsize=1, universal_newlines=True, encoding='utf-8', errors='replace',
-                creationflags=process_flags
-            )
+    log_action_prefix = action_name.split(':')[0] if ':' in action_name else action_name
+    if log_action_prefix.endswith("..."): log_action_prefix = log_action_prefix[:-3]
+    output_state = {"halted": False, "port_detected": False, "address_in_use": False}
 
-            if resolved_app_path not in app.apps_data:
-                if process and process.poll() is None: process.terminate()
-                app._log(f"App '{app_name}' removed during Popen setup for '{action_name}'.")
-                app.after(0, app._update_action_buttons_state)
-                return
+    def emit(stream_name, text, is_notice):
+        if is_long_running:
+            tag = f"{app_name} - {log_action_prefix}" + (" STDERR" if stream_name == "stderr" else "")
+        else:
+            tag = f"{app_name} {stream_name.upper()}"
+        app._log(f"[{tag}] {text}", warning=(stream_name == "stderr" or is_notice))
 
-            current_pid = process.pid
-            current_process_obj = process if is_long_running else None
-            app.after(0, lambda p=resolved_app_path, pid=current_pid, proc_obj=current_process_obj: \
-                      app._update_app_status(p, pid=pid, process_obj=proc_obj if proc_obj is not None else Ellipsis))
+    ingestor = OutputIngestor(resolved_app_path, app_name, emit)
 
+    def on_started(handle):
+        if resolved_app_path not in app.apps_data:
+            handle.terminate()
+            app._log(f"App '{app_name}' removed during Popen setup for '{action_name}'.")
+            app.after(0, app._update_action_buttons_state)
+            return
+        if is_long_running:
+            status = on_success_status if readiness_probe is None else interim_status_key_for_treeview
+            app.after(0, lambda p=resolved_app_path, s=status, pid=handle.pid: \
+                      app._update_app_status(p, status=s, pid=pid, process_obj=handle))
+            app._log(f"Monitoring output for '{app_name}' ({log_action_prefix}, PID: {handle.pid})...")
+            if readiness_probe is not None:
+                process_engine.get_engine().run_coroutine(await_ready(handle))
+        else:
+            app.after(0, lambda p=resolved_app_path, pid=handle.pid: app._update_app_status(p, pid=pid))
+
+    async def await_ready(handle):
+        outcome, seconds = await readiness_probe.wait(handle)
+        if outcome != "exited": # An exit is reported by finish().
+            app.after(0, lambda: mark_ready(handle, outcome, seconds))
+
+    def mark_ready(handle, outcome, seconds):
+        app_data = app.apps_data.get(resolved_app_path)
+        if app_data is None or app_data.get("process") is not handle or app_data.get("status") != interim_status_key_for_treeview:
+            return # Stopped, restarted or removed while the probe was running.
+        check_text = readiness.describe_check(readiness_probe.check, app_data.get("port"))
+        if outcome == "ready":
+            previous, stats = app.startup_history.record(resolved_app_path, seconds, readiness_probe.check["type"])
+            metrics.APP_TIME_TO_READY_SECONDS.observe(seconds, app=app_name)
+            app._log(f"'{app_name}' is ready after {seconds:.2f}s ({check_text}); "
+                     f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s over the last {stats['count']} starts.")
+            if previous and previous["count"] >= constants.STARTUP_REGRESSION_MIN_SAMPLES and seconds > previous["p95"]:
+                app._log(f"'{app_name}' took longer to become ready than its p95 of {previous['p95']:.2f}s.", warning=True)
+            app._update_app_status(resolved_app_path, status=on_success_status, boot_stats=stats)
+        else:
+            app._log(f"'{app_name}' did not pass its readiness check ({check_text}) within {seconds:.0f}s; "
+                     f"marking it Running anyway.", warning=True)
+            app._update_app_status(resolved_app_path, status=on_success_status)
+        app.update_status_bar(f"'{app_name}' is running.")
+        app._update_action_buttons_state()
+
+    def on_lines(handle, stream_name, lines, timestamp):
+        if output_state["halted"]:
+            return
+        if resolved_app_path not in app.apps_data or \
+           (is_long_running and app.apps_data[resolved_app_path].get("status") == "Stopping..."):
+            output_state["halted"] = True
+            app._log(f"Process for '{app_name}' ({log_action_prefix}) stop signal/removed. Halting output.")
+            if resolved_app_path not in app.apps_data:
+                handle.terminate()
+            return
 
+        lines = [line.strip() for line in lines]
+        ingestor.feed(stream_name, lines)
+        if output_capture is not None and len(output_capture) < constants.TASK_CACHE_MAX_LOG_LINES:
+            output_capture.extend((stream_name, line) for line in lines[:constants.TASK_CACHE_MAX_LOG_LINES - len(output_capture)])
+        if readiness_probe is not None:
+            readiness_probe.feed_lines(lines)
+
+        if action_name == "Starting" and not output_state["address_in_use"]:
+            output_state["address_in_use"] = any("EADDRINUSE" in line for line in lines)
+        # Every line is checked (dropped ones too) until the server has announced its port.
+        if action_name == "Starting" and not output_state["port_detected"]:
+            for line in lines:
+                match = _PORT_PATTERN.search(line)
+                if match:
+                    output_state["port_detected"] = True
+                    port = match.group(1)
+                    app.after(0, lambda p=resolved_app_path, pt=port: app._update_app_status(p, port=pt))
+                    app._log(f"Detected port {port} for '{app_name}'")
+                    break
+
+    def on_exit(handle, return_code):
+        if not output_state["halted"]:
+            ingestor.close() # Both streams have ended, so nothing else is feeding it.
+        final_status_update = {}
+        if not is_long_running:
+            if return_code == 0:
+                app._log(f"'{app_name}' {action_name} completed successfully.")
+                final_status_update["status"] = on_success_status
+                if post_success_action:
+                    # post_success_action might modify final_status_update (e.g., add is_installed=True)
+                    post_success_action(app, resolved_app_path, final_status_update)
+            else:
+                app._log(f"'{app_name}' {action_name} failed (code {return_code}).", error=True)
+                final_status_update["status"] = on_fail_status
+        app.after(0, lambda kw=final_status_update: finish(handle, return_code, kw))
+
+    def finish(handle, return_code, final_status_update):
+        # Runs on the Tk thread, so apps_data is read and written consistently.
+        if cleanup_action:
+            cleanup_action(app, resolved_app_path)
+        if resolved_app_path in app.apps_data:
+            app_data = app.apps_data[resolved_app_path]
             if is_long_running:
-                if process.poll() is None:
-                    app.after(0, lambda p=resolved_app_path, s=on_success_status, pid_val=process.pid: \
-                              app._update_app_status(p, status=s, pid=pid_val))
-                else:
-                    stderr_on_fail = ""
-                    if process.stderr:
-                        try: stderr_on_fail = process.stderr.read()
-                        except: pass
-                    app._log(f"Process for '{app_name}' ({action_name}) exited immediately (code {process.returncode}). {stderr_on_fail.strip()}", error=True)
-                    app.after(0, lambda p=resolved_app_path, s=on_fail_status, pid_val=process.pid: \
-                              app._update_app_status(p, status=s, pid=pid_val, process_obj=None))
-                    app.update_status_bar(f"'{app_name}' ({action_name}) failed to start/run properly.")
-                    app.after(0, app._update_action_buttons_state)
-                    return
-
-            if is_long_running and process.poll() is None:
-                log_action_prefix = action_name.split(':')[0] if ':' in action_name else action_name
-                if log_action_prefix.endswith("..."): log_action_prefix = log_action_prefix[:-3]
-
-                app._log(f"Monitoring output for '{app_name}' ({log_action_prefix}, PID: {process.pid})...")
-                for line in iter(process.stdout.readline, ''):
-                    if resolved_app_path not in app.apps_data or \
-                       app.apps_data[resolved_app_path].get("status") == "Stopping...":
-                        app._log(f"Process for '{app_name}' ({log_action_prefix}) stop signal/removed. Halting output.")
-                        if process.poll() is None: process.terminate()
-                        break
-
-                    app._log(f"[{app_name} - {log_action_prefix}] {line.strip()}")
-
-                    if action_name == "Starting":
-                        match = re.search(r"(?:port|listening on|on port|url:|local:.*?)\s*[:\- ]\s*(\d{4,5})", line, re.IGNORECASE)
-                        if match:
-                            port = match.group(1)
-                            if resolved_app_path in app.apps_data:
-                                app.after(0, lambda p=resolved_app_path, pt=port: app._update_app_status(p, port=pt))
-                            app._log(f"Detected port {port} for '{app_name}'")
-
-                process.stdout.close()
-                stderr_output = process.stderr.read()
-                process.stderr.close()
-                return_code = process.wait()
-
-                if stderr_output: app._log(f"[{app_name} - {log_action_prefix} STDERR] {stderr_output.strip()}", warning=True)
-
-                if resolved_app_path in app.apps_data:
-                    current_app_status = app.apps_data[resolved_app_path]["status"]
-                    if current_app_status == "Stopping...":
-                        app._log(f"'{app_name}' ({log_action_prefix}) was stopped by manager.")
-                    elif current_app_status == on_success_status:
-                         if return_code == 0:
-                             app._log(f"'{app_name}' ({log_action_prefix}) finished/exited gracefully (code 0).")
-                             app.after(0, lambda p=resolved_app_path: app._update_app_status(p, status="Stopped", port="-", pid=None, process_obj=None))
-                         else:
-                             app._log(f"'{app_name}' ({log_action_prefix}) exited with error (code {return_code}).", error=True)
-                             app.after(0, lambda p=resolved_app_path, s=on_fail_status: app._update_app_status(p, status=s, port="-", pid=None, process_obj=None))
-
-            elif not is_long_running:
-                stdout, stderr = process.communicate()
-                if stdout: app._log(f"[{app_name} STDOUT] {stdout.strip()}")
-                if stderr: app._log(f"[{app_name} STDERR] {stderr.strip()}", warning=(process.returncode == 0), error=(process.returncode != 0))
-
-                final_status_update = {} # This will store kwargs for _update_app_status
-                if process.returncode == 0:
-                    app._log(f"'{app_name}' {action_name} completed successfully.")
-                    final_status_update["status"] = on_success_status
-                    if post_success_action:
-                        # post_success_action might modify final_status_update (e.g., add is_installed=True)
-                        post_success_action(app, resolved_app_path, final_status_update)
-                else:
-                    app._log(f"'{app_name}' {action_name} failed (code {process.returncode}).", error=True)
-                    final_status_update["status"] = on_fail_status
-
-                if resolved_app_path in app.apps_data:
-                    # Use lambda to correctly pass keyword arguments from final_status_update
-                    app.after(0, lambda p=resolved_app_path, kw=final_status_update.copy(): app._update_app_status(p, **kw))
-
-        except FileNotFoundError:
+                current_app_status = app_data["status"]
+                # Once stopped (or restarted), the entry belongs to the manager or a newer process, not to this exit.
+                is_current_process = app_data.get("process") is handle
+                # Still interim when it died before its readiness probe passed.
+                is_unexpected_exit = is_current_process and current_app_status in (on_success_status, interim_status_key_for_treeview)
+                metrics.APP_EXITS.inc(app=app_name, outcome=("ok" if return_code == 0 else "error") if is_unexpected_exit else "stopped")
+                if not is_current_process or current_app_status == "Stopping...":
+                    app._log(f"'{app_name}' ({log_action_prefix}) was stopped by manager.")
+                elif is_unexpected_exit:
+                    if return_code == 0:
+                        app._log(f"'{app_name}' ({log_action_prefix}) finished/exited gracefully (code 0).")
+                        final_status_update = {"status": "Stopped", "port": "-", "pid": None, "process_obj": None}
+                    else:
+                        app._log(f"'{app_name}' ({log_action_prefix}) exited with error (code {return_code}).", error=True)
+                        fail_status = "Error (Port Conflict)" if output_state["address_in_use"] else on_fail_status
+                        final_status_update = {"status": fail_status, "port": "-", "pid": None, "process_obj": None}
+            if final_status_update:
+                app._update_app_status(resolved_app_path, **final_status_update)
+            if handle is not None and app_data.get("process") is handle:
+                app._update_app_status(resolved_app_path, process_obj=None)
+                current_status_final = app_data.get("status")
+                if (current_status_final == "Stopped" or "Error" in current_status_final) and app_data.get("pid") == handle.pid:
+                    app._update_app_status(resolved_app_path, pid=None)
+        app.update_status_bar(f"'{app_name}' {action_name} finished.")
+        app._update_action_buttons_state()
+
+    def on_error(error):
+        if isinstance(error, FileNotFoundError):
             app._log(f"Error: Command '{cmd_list[0]}' not found. Is it in PATH?", error=True)
-            if resolved_app_path in app.apps_data:
-                app.after(0, lambda p=resolved_app_path: app._update_app_status(p, status="Error (Command)", process_obj=None))
-        except Exception as e:
-            app._log(f"Exception during '{action_name}' for '{app_name}': {e}", error=True)
-            if resolved_app_path in app.apps_data:
-                app.after(0, lambda p=resolved_app_path: app._update_app_status(p, status="Error (Exception)", process_obj=None))
-        finally:
-            if resolved_app_path in app.apps_data and app.apps_data[resolved_app_path].get("process") and \
-               hasattr(app.apps_data[resolved_app_path]["process"], 'poll') and \
-               app.apps_data[resolved_app_path]["process"].poll() is not None:
-                app.after(0, lambda p=resolved_app_path: app._update_app_status(p, process_obj=None))
-
-                current_status_final = app.apps_data[resolved_app_path].get("status")
-                if (current_status_final == "Stopped" or "Error" in current_status_final) and \
-                    app.apps_data[resolved_app_path]["pid"] == (process.pid if process else None):
-                        app.after(0, lambda p=resolved_app_path: app._update_app_status(p, pid=None))
-
-            app.update_status_bar(f"'{app_name}' {action_name} finished.")
-            app.after(0, app._update_action_buttons_state)
-
-    threading.Thread(target=task, daemon=True).start()
+            status = "Error (Command)"
+        else:
+            app._log(f"Exception during '{action_name}' for '{app_name}': {error}", error=True)
+            status = "Error (Exception)"
+        app.after(0, lambda: finish(None, None, {"status": status, "process_obj": None}))
+
+    process_engine.get_engine().spawn(
+        cmd_list, cwd, on_lines=on_lines, on_exit=on_exit, on_error=on_error, on_started=on_started,
+        env=dict(os.environ, **extra_env) if extra_env else None, preexec_fn=preexec_fn,
+        metrics_kind=metrics.spawn_kind(action_name),
+    )
 
 
 def start_app_logic(app, app_path_to_start):
+    import psutil # Imported on first use to keep it off the startup path.
     resolved_app_path = str(Path(app_path_to_start).resolve())
     if not resolved_app_path or resolved_app_path not in app.apps_data: return
 
@@ -210,13 +260,68 @@ def start_app_logic(app, app_path_to_start):
             app._update_app_status(resolved_app_path, status="Error (No Start)")
             return
 
+    cluster_settings = cluster.get_cluster(app, resolved_app_path)
+    instance_count = cluster_settings["instances"]
+    try:
+        port_lease = app.port_registry.preflight(resolved_app_path, app_data["package_data"],
+                                                 count=instance_count if cluster_settings["mode"] == "ports" else 1)
+    except PortConflict as e:
+        fixed_by_script = declared_port(resolved_app_path, app_data["package_data"])[1] == "start script"
+        hint = "" if app.port_registry.auto_assign or fixed_by_script else " Turn on automatic port assignment to give it a free PORT."
+        app._log(f"Cannot start '{app_name}': {e}.{hint}", error=True)
+        app.update_status_bar(f"'{app_name}' not started: port conflict.")
+        app._update_app_status(resolved_app_path, status="Error (Port Conflict)")
+        return
+    if port_lease.env and instance_count == 1:
+        app._log(f"Starting '{app_name}' with PORT={port_lease.port} ({port_lease.source}).")
+    if port_lease.env or port_lease.source != "default" or instance_count > 1:
+        app._update_app_status(resolved_app_path, port=str(port_lease.port))
+
+    check = readiness.get_check(app, resolved_app_path)
+    try:
+        probe = readiness.ReadinessProbe(check, lambda: _current_port(app, resolved_app_path, port_lease.port), time.monotonic())
+    except re.error as e:
+        app._log(f"Invalid readiness log pattern for '{app_name}' ({e}); waiting for a TCP connection instead.", warning=True)
+        check = dict(check, type="tcp")
+        probe = readiness.ReadinessProbe(check, lambda: _current_port(app, resolved_app_path, port_lease.port), time.monotonic())
+
+    launch = launch_policy.prepare(launch_policy.get_policy(app, resolved_app_path), resolved_app_path)
+    for warning in launch.warnings:
+        app._log(f"Launch policy for '{app_name}': {warning}.", warning=True)
+    if launch.applied:
+        app._log(f"Launch policy for '{app_name}': {', '.join(launch.applied)}.")
+    cmd = launch.wrap_command(cmd)
+
+    def cleanup(a, p):
+        a.port_registry.release(port_lease)
+        launch.cleanup(a, app_name)
+
+    metrics.APP_STARTS.inc(app=app_name)
+    if instance_count > 1:
+        ports = port_lease.ports if cluster_settings["mode"] == "ports" else [port_lease.port] * instance_count
+        group = cluster.ClusterGroup(app, resolved_app_path, cmd, ports, cluster_settings["mode"], check,
+                                     preexec_fn=launch.preexec_fn, cleanup_action=cleanup)
+        app._log(f"Starting '{app_name}' as {cluster.describe_cluster(cluster_settings)} "
+                 f"(PORT {', '.join(map(str, sorted(set(ports))))})...")
+        app.update_status_bar(f"Starting '{app_name}' ({instance_count} instances)...")
+        app._update_app_status(resolved_app_path, status="Starting...", process_obj=group, instances=group.as_dicts())
+        group.start()
+        return
     run_command_in_thread(
         app, cmd, cwd=resolved_app_path, app_path=resolved_app_path,
         action_name="Starting", on_success_status="Running",
-        on_fail_status="Error (Start Fail)", is_long_running=True
+        on_fail_status="Error (Start Fail)", is_long_running=True,
+        extra_env=port_lease.env, cleanup_action=cleanup, readiness_probe=probe, preexec_fn=launch.preexec_fn,
     )
 
+
+def _current_port(app, app_path, fallback_port):
+    # The port announced in the output wins over the one the preflight expected.
+    port = str(app.apps_data.get(app_path, {}).get("port", ""))
+    return port if port.isdigit() else fallback_port
+
 def stop_app_logic(app, app_path_to_stop, callback=None):
+    import psutil
     resolved_app_path = str(Path(app_path_to_stop).resolve())
 
     if not resolved_app_path or resolved_app_path not in app.apps_data:
@@ -272,13 +377,33 @@ def stop_app_logic(app, app_path_to_stop, callback=None):
             if process_to_use and hasattr(process_to_use, 'poll') and process_to_use.poll() is None:
                 app._log(f"Stopping '{app_name}' ({action_being_stopped}) using managed Popen object (PID {process_to_use.pid}).")
                 pid_to_use = process_to_use.pid
+                children = []
+                # `npm start` runs the server as a grandchild; stopping only npm would orphan it with its port.
+                # A cluster group lists every instance, and terminate() signals them all at once.
+                for parent_pid in getattr(process_to_use, "pids", None) or [process_to_use.pid]:
+                    if parent_pid is None:
+                        continue # Between two processes of a group; psutil.Process(None) would be the manager itself.
+                    try:
+                        children.extend(psutil.Process(parent_pid).children(recursive=True))
+                    except psutil.Error:
+                        pass
                 process_to_use.terminate()
                 try:
                     process_to_use.wait(timeout=5)
                 except subprocess.TimeoutExpired:
                     app._log(f"'{app_name}' (Popen for {action_being_stopped}) did not terminate, killing...", warning=True)
                     process_to_use.kill()
-                    process_to_use.wait(timeout=3)
+                    try:
+                        process_to_use.wait(timeout=3)
+                    except subprocess.TimeoutExpired:
+                        pass
+                for child in children:
+                    try: child.terminate()
+                    except psutil.Error: pass
+                _, still_alive = psutil.wait_procs(children, timeout=2)
+                for child in still_alive:
+                    try: child.kill()
+                    except psutil.Error: pass
                 stopped_successfully = (process_to_use.poll() is not None)
                 if stopped_successfully:
                      app._log(f"'{app_name}' (Popen for {action_being_stopped}) stopped. Return code: {process_to_use.returncode}")
@@ -343,18 +468,69 @@ def stop_app_logic(app, app_path_to_stop, callback=None):
 
     threading.Thread(target=stop_task, daemon=True).start()
 
-def install_dependencies_logic(app, app_path):
+def restart_app_logic(app, app_path):
     resolved_app_path = str(Path(app_path).resolve())
     if not resolved_app_path or resolved_app_path not in app.apps_data: return
 
-    def post_install_action(app_ref, path, status_update_dict):
-        status_update_dict["is_installed"] = True
+    app_data = app.apps_data[resolved_app_path]
+    app_name = app_data["name"]
+    app.update_status_bar(f"Restarting {app_name}...")
+    metrics.APP_RESTARTS.inc(app=app_name)
+
+    current_status = app_data.get("status")
+    is_running_type = current_status == "Running" or current_status.startswith("Running Script:")
+    can_be_stopped_for_restart = is_running_type or current_status == "Starting..."
+
+    if can_be_stopped_for_restart:
+        app._log(f"Restart: Stopping '{app_name}' (status: {current_status}) first...")
+        def after_stop_for_restart():
+            if resolved_app_path in app.apps_data and app.apps_data[resolved_app_path]["status"] == "Stopped":
+                app._log(f"Restart: '{app_name}' stopped. Now starting...")
+                start_app_logic(app, resolved_app_path)
+            else:
+                current_state_after_stop_attempt = "Unknown or Removed"
+                if resolved_app_path in app.apps_data:
+                    current_state_after_stop_attempt = app.apps_data[resolved_app_path].get("status", "Error/Removed")
+                app._log(f"Restart: Failed to stop '{app_name}' cleanly or app state changed. Current state: {current_state_after_stop_attempt}. Aborting restart.", error=True)
+                app.update_status_bar(f"Restart failed for {app_name}.")
+                if resolved_app_path in app.apps_data:
+                     app._update_app_status(resolved_app_path, status=current_state_after_stop_attempt)
+        stop_app_logic(app, resolved_app_path, callback=after_stop_for_restart)
+    elif app_data.get("is_installed"):
+        app._log(f"Restart: '{app_name}' is not running (Status: {current_status}). Starting directly...")
+        start_app_logic(app, resolved_app_path)
+    else:
+         app._log(f"Restart: '{app_name}' cannot be restarted (Status: {current_status}, Installed: {app_data.get('is_installed')}). Try installing first.", warning=True)
+         app.update_status_bar(f"Cannot restart {app_name}. Check status/installation.")
 
-    run_command_in_thread(
-        app, [constants.NPM_CMD, "install"], cwd=resolved_app_path, app_path=resolved_app_path,
-        action_name="Installing", on_success_status="Installed",
-        on_fail_status="Error (Install)", post_success_action=post_install_action
-    )
+def record_install_fingerprint(app_ref, path, status_update_dict):
+    status_update_dict["is_installed"] = True
+    app_ref.fingerprint_store.record(path)
+
+def install_dependencies_logic(app, app_path, force=False):
+    resolved_app_path = str(Path(app_path).resolve())
+    if not resolved_app_path or resolved_app_path not in app.apps_data: return
+
+    package_data = app.apps_data[resolved_app_path].get("package_data")
+    app_name = app.apps_data[resolved_app_path]["name"]
+
+    def check_and_install():
+        # Hashing a large lockfile can take a moment, so the fingerprint check stays off the Tk thread.
+        if not force and dependency_fingerprint.get_dependency_state(app, resolved_app_path, package_data) == "current":
+            app._log(f"Dependencies for '{app_name}' match the last install (lockfile fingerprint unchanged). Skipping npm install.")
+            if resolved_app_path in app.apps_data:
+                app.after(0, lambda p=resolved_app_path: app._update_app_status(p, status="Installed", is_installed=True))
+            app.update_status_bar(f"'{app_name}' dependencies already up to date.")
+            app.after(0, app._update_action_buttons_state)
+            return
+
+        run_command_in_thread(
+            app, [constants.NPM_CMD, "install"], cwd=resolved_app_path, app_path=resolved_app_path,
+            action_name="Installing", on_success_status="Installed",
+            on_fail_status="Error (Install)", post_success_action=record_install_fingerprint
+        )
+
+    threading.Thread(target=check_and_install, daemon=True).start()
 
 def clean_dependencies_logic(app, app_path_str):
     resolved_app_path_str = str(Path(app_path_str).resolve())
@@ -383,8 +559,16 @@ def clean_dependencies_logic(app, app_path_str):
         is_now_installed = app.apps_data[resolved_app_path_str].get("is_installed", False)
         try:
             if node_modules_path.exists() and node_modules_path.is_dir():
-                shutil.rmtree(node_modules_path)
-                app._log(f"'node_modules' for '{app_name}' deleted successfully.")
+                try:
+                    tombstone_path = reclaimer.make_tombstone(node_modules_path)
+                    app.reclaimer.enqueue(tombstone_path, f"'node_modules' of '{app_name}'")
+                    app._log(f"'node_modules' for '{app_name}' moved aside; deleting it in the background.")
+                except OSError as e_rename:
+                    # e.g. a locked file on Windows; fall back to deleting in place.
+                    app._log(f"Could not move 'node_modules' aside for '{app_name}' ({e_rename}). Deleting in place...", warning=True)
+                    shutil.rmtree(node_modules_path, onerror=reclaimer.handle_rmtree_error)
+                    app._log(f"'node_modules' for '{app_name}' deleted successfully.")
+                app.fingerprint_store.remove(resolved_app_path_str)
                 final_status_key = "Not Installed"
                 is_now_installed = False
             else:
@@ -427,7 +611,18 @@ def delete_project_logic(app, app_path_str):
         app._log(f"Deleting project '{app_name}' at {resolved_app_path_str}...")
         app.after(0, lambda p=resolved_app_path_str: app._update_app_status(p, status="Deleting..."))
         try:
-            shutil.rmtree(resolved_app_path_str)
+            try:
+                tombstone_path = reclaimer.make_tombstone(resolved_app_path_str)
+                app.reclaimer.enqueue(tombstone_path, f"project '{app_name}'")
+            except OSError as e_rename:
+                app._log(f"Could not move project '{app_name}' aside ({e_rename}). Deleting in place...", warning=True)
+                shutil.rmtree(resolved_app_path_str, onerror=reclaimer.handle_rmtree_error)
+            app.fingerprint_store.remove(resolved_app_path_str)
+            app.audit_cache.remove(resolved_app_path_str)
+            app.port_registry.remove(resolved_app_path_str)
+            app.startup_history.remove(resolved_app_path_str)
+            app.git_tracker.remove(resolved_app_path_str)
+            app.task_cache.remove(resolved_app_path_str)
             app._log(f"Project '{app_name}' deleted successfully.")
             app.after(0, lambda p=resolved_app_path_str: app._remove_app_from_gui(p))
             app.after(0, lambda: app.update_status_bar(f"Project '{app_name}' deleted."))
@@ -476,6 +671,10 @@ def run_npm_script_logic(app, app_path, script_name):
 
     on_success_status_for_script = action_name_for_run if is_potentially_long_running else "Installed"
 
+    settings = task_cache.get_task_settings(app, resolved_app_path, script_name)
+    if settings and not is_potentially_long_running:
+        return _run_cached_npm_script(app, resolved_app_path, script_name, cmd, action_name_for_run, settings)
+
     run_command_in_thread(
         app, cmd, cwd=resolved_app_path, app_path=resolved_app_path,
         action_name=action_name_for_run,
@@ -484,20 +683,158 @@ def run_npm_script_logic(app, app_path, script_name):
         is_long_running=is_potentially_long_running
     )
 
-def npm_audit_logic(app, app_path):
+def _run_cached_npm_script(app, resolved_app_path, script_name, cmd, action_name, settings):
+    """Restores the outputs and replays the log of a cached result when the script's inputs are unchanged;
+    otherwise runs the script and caches its result if it succeeds (see task_cache)."""
+    app_data = app.apps_data[resolved_app_path]
+    app_name = app_data["name"]
+    package_data = app_data.get("package_data")
+    app.update_status_bar(f"Checking the task cache for '{app_name}' {script_name}...")
+    app.after(0, lambda p=resolved_app_path: app._update_app_status(p, status=f"{action_name}..."))
+
+    def run(key):
+        capture = []
+        t_start = time.monotonic()
+
+        def store_result(_app, _app_path, _final_status_update):
+            # Runs on the engine's events thread; copying the outputs can take a while.
+            threading.Thread(target=store_task, args=(time.monotonic() - t_start,), daemon=True).start()
+
+        def store_task(duration):
+            try:
+                current_key, _ = app.task_cache.compute_key(resolved_app_path, script_name, package_data, settings)
+                if current_key != key:
+                    app._log(f"Inputs of '{app_name}' {script_name} changed while it ran; its result was not cached.", warning=True)
+                    return
+                stored = app.task_cache.store(resolved_app_path, script_name, key, settings["outputs"], capture, duration)
+                app._log(f"Cached the '{script_name}' result of '{app_name}' ({stored} output file(s), {len(capture)} log line(s)).")
+            except (task_cache.TaskCacheError, OSError) as e:
+                app._log(f"Could not cache the '{script_name}' result of '{app_name}': {e}", warning=True)
+
+        run_command_in_thread(
+            app, cmd, cwd=resolved_app_path, app_path=resolved_app_path, action_name=action_name,
+            on_success_status="Installed", on_fail_status="Error (Script)",
+            post_success_action=store_result if key else None, output_capture=capture if key else None,
+        )
+
+    def finish_hit():
+        if resolved_app_path in app.apps_data:
+            app._update_app_status(resolved_app_path, status="Installed")
+        app.update_status_bar(f"'{app_name}' {action_name} restored from the task cache.")
+        app._update_action_buttons_state()
+
+    def task():
+        t_lookup = time.perf_counter()
+        try:
+            key, input_count = app.task_cache.compute_key(resolved_app_path, script_name, package_data, settings)
+        except (task_cache.TaskCacheError, OSError) as e:
+            app._log(f"Task cache skipped for '{app_name}' {script_name}: {e}", warning=True)
+            app.after(0, lambda: run(None))
+            return
+        entry = app.task_cache.lookup(resolved_app_path, script_name, key)
+        if entry is None:
+            app._log(f"'{app_name}' {script_name}: no cached result for its current inputs ({input_count} file(s)); running it.")
+            app.after(0, lambda: run(key))
+            return
+        try:
+            log_lines = app.task_cache.read_log(entry)
+            restored = app.task_cache.restore(resolved_app_path, entry, settings["outputs"])
+        except (OSError, ValueError) as e:
+            app._log(f"Could not restore the cached '{script_name}' result of '{app_name}' ({e}); running it instead.", warning=True)
+            app.after(0, lambda: run(key))
+            return
+        app._log(f"'{app_name}' {script_name}: inputs unchanged ({input_count} file(s)); restored {restored} output file(s) "
+                 f"from the task cache in {time.perf_counter() - t_lookup:.2f}s instead of running it "
+                 f"({task_cache.format_seconds(entry['duration'])}). Replaying its log:")
+        for stream_name, text in log_lines:
+            app._log(f"[{app_name} {stream_name.upper()}] {text}", warning=(stream_name == "stderr"))
+        app.after(0, finish_hit)
+
+    threading.Thread(target=task, daemon=True).start()
+
+def run_workspace_script_logic(app, app_path, script_name):
+    """Runs script_name in every workspace package of a monorepo root, dependencies first (see workspace_runner)."""
+    resolved_app_path = str(Path(app_path).resolve())
+    if not resolved_app_path or resolved_app_path not in app.apps_data: return
+
+    app_data = app.apps_data[resolved_app_path]
+    app_name = app_data["name"]
+    package_data = app_data.get("package_data")
+    app.update_status_bar(f"Reading the workspaces of '{app_name}'...")
+
+    def task():
+        # Globbing the workspace folders reads the disk, so it stays off the Tk thread.
+        try:
+            packages, error = workspace_runner.find_workspace_packages(resolved_app_path, package_data), None
+        except workspace_runner.WorkspaceError as e:
+            packages, error = None, e
+        app.after(0, lambda: start(packages, error))
+
+    def start(packages, error):
+        if resolved_app_path not in app.apps_data: return
+        status = app.apps_data[resolved_app_path].get("status", "")
+        if status.startswith("Running Script:") or status.endswith("..."):
+            app._log(f"'{app_name}' is busy ({status}); workspace run of '{script_name}' not started.", warning=True)
+            return
+        run = None
+        if error is None:
+            try:
+                run = workspace_runner.WorkspaceRun(app, resolved_app_path, script_name, packages)
+            except workspace_runner.WorkspaceError as e:
+                error = e
+        if error is not None:
+            app._log(f"Cannot run '{script_name}' across the workspaces of '{app_name}': {error}", error=True)
+            app.update_status_bar(f"Workspace run for '{app_name}' not started.")
+            return
+        run.start()
+
+    threading.Thread(target=task, daemon=True).start()
+
+def npm_audit_logic(app, app_path, force=True):
     resolved_app_path = str(Path(app_path).resolve())
     if not resolved_app_path or resolved_app_path not in app.apps_data: return
 
-    action_name = "Auditing"
-    cmd = [constants.NPM_CMD, "audit"]
+    app_data = app.apps_data[resolved_app_path]
+    app_name = app_data["name"]
+    status_before_audit = app_data.get("status", "Installed")
+    # Auditing only reads the lockfile, so a running app keeps its status instead of flipping to "Auditing...".
+    keep_status = status_before_audit == "Running" or status_before_audit.startswith("Running Script:")
+
+    app._log(f"Auditing '{app_name}'...")
+    app.update_status_bar(f"Auditing '{app_name}'...")
+    if not keep_status:
+        app._update_app_status(resolved_app_path, status="Auditing...")
 
-    run_command_in_thread(
-        app, cmd, cwd=resolved_app_path, app_path=resolved_app_path,
-        action_name=action_name,
-        on_success_status="Installed",
-        on_fail_status="Error (Audit)",
-        is_long_running=False
-    )
+    def task():
+        final_status = status_before_audit
+        try:
+            result, from_cache = app.audit_cache.audit_project(resolved_app_path, force=force)
+            counts = result["counts"]
+            counts_text = ", ".join(f"{counts[sev]} {sev}" for sev in audit_cache.SEVERITY_ORDER if counts.get(sev))
+            app._log(f"'{app_name}' audit{' (cached)' if from_cache else ''}: {counts_text or 'no vulnerabilities'}",
+                     warning=bool(counts.get("critical") or counts.get("high")))
+            for finding in result["findings"][:constants.AUDIT_LOG_MAX_FINDINGS]:
+                app._log(f"  [{finding['severity']}] {finding['package']} {finding['range']}: {finding['title']} {finding['url']}".rstrip())
+            if len(result["findings"]) > constants.AUDIT_LOG_MAX_FINDINGS:
+                app._log(f"  ... {len(result['findings']) - constants.AUDIT_LOG_MAX_FINDINGS} more finding(s). See Bulk > Fleet Audit Summary.")
+            if resolved_app_path in app.apps_data:
+                app.after(0, lambda p=resolved_app_path, c=counts: app._update_app_status(p, audit_counts=c))
+        except FileNotFoundError:
+            app._log(f"Error: Command '{constants.NPM_CMD}' not found. Is it in PATH?", error=True)
+            final_status = "Error (Command)"
+        except (audit_cache.AuditError, subprocess.TimeoutExpired) as e:
+            app._log(f"Audit failed for '{app_name}': {e}", error=True)
+            final_status = "Error (Audit)"
+        except Exception as e:
+            app._log(f"Exception during audit for '{app_name}': {e}", error=True)
+            final_status = "Error (Exception)"
+        finally:
+            if resolved_app_path in app.apps_data and (not keep_status or final_status.startswith("Error")):
+                app.after(0, lambda p=resolved_app_path, s=final_status: app._update_app_status(p, status=s))
+            app.update_status_bar(f"'{app_name}' audit finished.")
+            app.after(0, app._update_action_buttons_state)
+
+    threading.Thread(target=task, daemon=True).start()
 
 def npm_update_dependencies_logic(app, app_path):
     resolved_app_path = str(Path(app_path).resolve())
@@ -511,5 +848,5 @@ def npm_update_dependencies_logic(app, app_path):
         action_name=action_name,
         on_success_status="Installed",
         on_fail_status="Error (Update)",
-        is_long_running=False
+        is_long_running=False, post_success_action=record_install_fingerprint
     )
\ No newline at end of file
@@ -0,0 +1,231 @@
+# profiler.py
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import constants
+from config_manager import get_app_config_dir
+
+# Operations that can be armed from the GUI: label -> app methods that make up the operation.
+# A scan runs in a worker thread and then on the Tk thread, so both halves are profiled and merged.
+PROFILABLE_OPERATIONS = {
+    "Project Scan": ("_scan_projects_worker", "_apply_scan_results"),
+    "App List Refresh": ("_update_apps_list_display",),
+    "App Selection": ("_on_app_select",),
+}
+
+
+def get_profile_dir():
+    return get_app_config_dir() / constants.PROFILE_DIR_NAME
+
+
+def _result_stem(kind, label):
+    safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_").lower()
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{safe_label}"
+
+
+def _write_summary(stem, summary):
+    profile_dir = get_profile_dir()
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    summary_path = profile_dir / f"{stem}.json"
+    tmp_path = summary_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, summary_path)
+    _prune_old_results(profile_dir)
+    return summary_path
+
+
+def _prune_old_results(profile_dir):
+    summaries = sorted(profile_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old_summary in summaries[constants.PROFILE_MAX_RESULTS:]:
+        for path in (old_summary, old_summary.with_suffix(".pstats"), old_summary.with_suffix(".tracemalloc")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def function_label(func_key):
+    filename, line, name = func_key
+    if filename == "~":
+        return name # Built-ins such as <method 'poll' ...>
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def summarize_stats(stats, top_n):
+    """Top functions by cumulative and by own time, as plain rows for the summary file and the viewer."""
+    rows = []
+    for func_key, (primitive_calls, total_calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": function_label(func_key), "path": func_key[0],
+            "calls": total_calls, "primitive_calls": primitive_calls,
+            "tottime": tottime, "cumtime": cumtime,
+        })
+    return {
+        "by_cumtime": sorted(rows, key=lambda r: r["cumtime"], reverse=True)[:top_n],
+        "by_tottime": sorted(rows, key=lambda r: r["tottime"], reverse=True)[:top_n],
+    }
+
+
+def list_results():
+    """Saved summaries, newest first."""
+    profile_dir = get_profile_dir()
+    if not profile_dir.is_dir():
+        return []
+    results = []
+    for summary_path in sorted(profile_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            with open(summary_path, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary["summary_path"] = str(summary_path)
+        results.append(summary)
+    return results
+
+
+class _ProfileSession:
+    def __init__(self, label, method_names):
+        self.label = label
+        self.remaining = set(method_names)
+        self.profiles = []
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+class OperationProfiler:
+    """Wraps the next call of an app operation in cProfile, and records tracemalloc windows."""
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._session = None
+        self._tracemalloc_baseline = None
+        self._tracemalloc_was_tracing = False
+
+    @property
+    def is_armed(self):
+        return self._session is not None
+
+    @property
+    def is_tracing_memory(self):
+        return self._tracemalloc_baseline is not None
+
+    def arm(self, label):
+        """Profiles the next run of the operation; the result is saved once each of its methods has run once."""
+        if self._session is not None:
+            self.disarm()
+        method_names = PROFILABLE_OPERATIONS[label]
+        session = _ProfileSession(label, method_names)
+        self._session = session
+        for method_name in method_names:
+            original = getattr(self.app, method_name)
+            # An instance attribute shadows the class method for exactly one call.
+            setattr(self.app, method_name, self._make_wrapper(session, method_name, original))
+        self.app._log(f"Profiler armed: the next '{label}' will be profiled.")
+
+    def disarm(self):
+        session, self._session = self._session, None
+        if session is None:
+            return
+        for method_name in PROFILABLE_OPERATIONS[session.label]:
+            self.app.__dict__.pop(method_name, None)
+
+    def _make_wrapper(self, session, method_name, original):
+        def wrapper(*args, **kwargs):
+            self.app.__dict__.pop(method_name, None)
+            profile = cProfile.Profile()
+            t_start = time.perf_counter()
+            profile.enable()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                profile.disable()
+                with session.lock:
+                    session.wall_seconds += time.perf_counter() - t_start
+                    session.profiles.append(profile)
+                    session.remaining.discard(method_name)
+                    finished = not session.remaining
+                if finished and self._session is session:
+                    self._session = None
+                    self._save_profile(session)
+        return wrapper
+
+    def _save_profile(self, session):
+        try:
+            stats = pstats.Stats(session.profiles[0], stream=io.StringIO())
+            for profile in session.profiles[1:]:
+                stats.add(profile)
+            stem = _result_stem("cpu", session.label)
+            get_profile_dir().mkdir(parents=True, exist_ok=True)
+            pstats_path = get_profile_dir() / f"{stem}.pstats"
+            stats.dump_stats(str(pstats_path))
+            summary = {
+                "kind": "cpu", "label": session.label, "started_at": session.started_at,
+                "wall_seconds": session.wall_seconds, "total_calls": stats.total_calls,
+                "data_file": str(pstats_path),
+            }
+            summary.update(summarize_stats(stats, constants.PROFILE_TOP_N))
+            _write_summary(stem, summary)
+            self.app._log(f"Profile of '{session.label}' saved ({session.wall_seconds:.3f}s, {stats.total_calls} calls): {pstats_path}")
+        except Exception as e:
+            self.app._log(f"Could not save profile of '{session.label}': {e}", error=True)
+
+    def start_memory_window(self, seconds=None, on_done=None):
+        """Traces allocations for `seconds`, then saves the top allocation sites grown during the window."""
+        if self._tracemalloc_baseline is not None:
+            return False
+        seconds = seconds or constants.TRACEMALLOC_WINDOW_SECONDS
+        self._tracemalloc_was_tracing = tracemalloc.is_tracing()
+        if not self._tracemalloc_was_tracing:
+            tracemalloc.start(constants.TRACEMALLOC_FRAMES)
+        self._tracemalloc_baseline = (tracemalloc.take_snapshot(), time.time(), seconds)
+        self.app._log(f"Recording allocations for {seconds}s...")
+        self.app.after(int(seconds * 1000), lambda: self._finish_memory_window(on_done))
+        return True
+
+    def _finish_memory_window(self, on_done=None):
+        baseline, started_at, seconds = self._tracemalloc_baseline
+        snapshot = tracemalloc.take_snapshot()
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        if not self._tracemalloc_was_tracing:
+            tracemalloc.stop()
+        self._tracemalloc_baseline = None
+        # Filtering and writing the snapshot can take a moment for big heaps; keep it off the Tk thread.
+        threading.Thread(target=self._save_memory_window,
+                         args=(baseline, snapshot, started_at, seconds, traced_current, traced_peak, on_done),
+                         name="tracemalloc-save", daemon=True).start()
+
+    def _save_memory_window(self, baseline, snapshot, started_at, seconds, traced_current, traced_peak, on_done):
+        try:
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+            baseline = baseline.filter_traces(ignore)
+            snapshot = snapshot.filter_traces(ignore)
+            stem = _result_stem("memory", f"{seconds}s")
+            get_profile_dir().mkdir(parents=True, exist_ok=True)
+            snapshot_path = get_profile_dir() / f"{stem}.tracemalloc"
+            snapshot.dump(str(snapshot_path))
+            sites = []
+            for stat in snapshot.compare_to(baseline, "lineno")[:constants.PROFILE_TOP_N]:
+                frame = stat.traceback[0]
+                sites.append({
+                    "location": f"{os.path.basename(frame.filename)}:{frame.lineno}", "path": frame.filename,
+                    "size_diff": stat.size_diff, "count_diff": stat.count_diff, "size": stat.size, "count": stat.count,
+                })
+            summary = {
+                "kind": "memory", "label": f"Allocations over {seconds}s", "started_at": started_at,
+                "wall_seconds": seconds, "traced_current_bytes": traced_current, "traced_peak_bytes": traced_peak,
+                "data_file": str(snapshot_path), "top_sites": sites,
+            }
+            _write_summary(stem, summary)
+            self.app._log(f"Allocation snapshot saved: {snapshot_path}")
+        except Exception as e:
+            self.app._log(f"Could not save allocation snapshot: {e}", error=True)
+        if on_done:
+            self.app.after(0, on_done)
@@ -1,12 +1,14 @@
 # project_scanner.py
 import json
-import psutil
 from pathlib import Path
 import subprocess # Added for Git commands
 import os # Added for subprocess flags
 import constants
+import dependency_fingerprint
+import reclaimer
 
 def scan_for_external_processes(app, projects_map):
+    import psutil # Deferred: not needed to paint the window, and the first scan runs in the background.
     app._log("Scanning for externally running Node processes...")
     externally_running_paths = set()
     try:
@@ -56,18 +58,19 @@ def scan_for_external_processes(app, projects_map):
         app._log(f"Error during external process scan: {e_outer}", error=True)
     return externally_running_paths
 
-def scan_projects_folder_for_app_data(app):
-    folder_path = Path(app.projects_folder.get())
+def scan_projects_folder_for_app_data(app, projects_folder=None):
+    # projects_folder is passed in when scanning off the Tk thread, where the StringVar must not be read.
+    folder_path = Path(projects_folder if projects_folder is not None else app.projects_folder.get())
     discovered_apps = {}
     if not folder_path.is_dir():
         app._log(f"Error: Projects folder '{folder_path}' not found or is not a directory.", error=True)
-        app.update_status_bar(f"Error: Projects folder '{folder_path}' not found.")
+        app.after(0, lambda: app.update_status_bar(f"Error: Projects folder '{folder_path}' not found."))
         return discovered_apps # Return empty dict
 
     process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
 
     for item in folder_path.iterdir():
-        if item.is_dir():
+        if item.is_dir() and not reclaimer.is_tombstone(item):
             package_json_path = item / "package.json"
             project_name = item.name
             app_path_str = str(item.resolve()) # Use resolved path as key
@@ -86,6 +89,9 @@ def scan_projects_folder_for_app_data(app):
                     app_entry["name"] = app_entry["package_data"].get("name", project_name)
                     app_entry["is_installed"] = (item / "node_modules").exists()
                     app_entry["status"] = "Installed" if app_entry["is_installed"] else "Not Installed"
+                    if app_entry["is_installed"] and \
+                       dependency_fingerprint.get_dependency_state(app, app_path_str, app_entry["package_data"]) == "outdated":
+                        app_entry["status"] = "Deps Outdated"
                 except Exception as e:
                     app._log(f"Error processing package.json for {project_name}: {e}", error=True)
                     app_entry["status"] = "Error (package.json)"
@@ -147,4 +153,40 @@ def scan_projects_folder_for_app_data(app):
                 discovered_apps[app_path_str] = app_entry
             else:
                 app._log(f"Skipping '{project_name}': no package.json found.")
-    return discovered_apps
\ No newline at end of file
+    return discovered_apps
+
+
+def merge_scan_results(current_apps_data, discovered_apps_on_disk):
+    """Combines a fresh disk scan with the live apps_data, keeping entries that are running or busy."""
+    new_apps_data = {}
+    for path_str, existing_app_data in current_apps_data.items():
+        resolved_path_str = str(Path(path_str).resolve())
+        is_live = existing_app_data.get("process") is not None or \
+           existing_app_data.get("status", "").startswith("Running") or \
+           existing_app_data.get("status", "").endswith("...")
+        # A snapshot row is only a placeholder, unless something was started from it before this scan finished.
+        if existing_app_data.get("stale") and existing_app_data.get("process") is None:
+            continue
+        if is_live:
+            new_apps_data[resolved_path_str] = existing_app_data
+            if resolved_path_str in discovered_apps_on_disk:
+                disk_data = discovered_apps_on_disk[resolved_path_str]
+                new_apps_data[resolved_path_str].update({
+                    "is_installed": disk_data["is_installed"],
+                    "package_data": disk_data["package_data"],
+                    "name": disk_data["name"],
+                    "git_branch": disk_data.get("git_branch", "-"),
+                    "git_has_changes": disk_data.get("git_has_changes", "N/A")
+                })
+        # else: project folder might have been removed or app was idle
+
+    for path_str, disk_app_data in discovered_apps_on_disk.items():
+        resolved_path_str = str(Path(path_str).resolve())
+        if resolved_path_str not in new_apps_data:
+            previous = current_apps_data.get(resolved_path_str) or {}
+            # Keep last known size/vulns until the background refreshes replace them.
+            for carried_field in ("disk_usage", "audit_counts", "boot_stats", "git_sync"):
+                if previous.get(carried_field) is not None and carried_field not in disk_app_data:
+                    disk_app_data[carried_field] = previous[carried_field]
+            new_apps_data[resolved_path_str] = disk_app_data
+    return new_apps_data
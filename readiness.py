@@ -0,0 +1,168 @@
+# readiness.py
+import asyncio
+import math
+import re
+import threading
+import time
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+READINESS_CHECK_TYPES = ("tcp", "http", "log")
+
+
+def get_check(app, app_path):
+    """The project's readiness check (config 'readiness_checks', keyed by path), filled in with defaults."""
+    check = {
+        "type": constants.READINESS_DEFAULT_CHECK, "path": "/", "pattern": constants.READINESS_DEFAULT_LOG_PATTERN,
+        "timeout": constants.READINESS_TIMEOUT_SECONDS,
+    }
+    check.update((app.config_data.get("readiness_checks") or {}).get(str(app_path)) or {})
+    return check
+
+
+def set_check(app, app_path, check):
+    checks = app.config_data.setdefault("readiness_checks", {})
+    checks[str(app_path)] = check
+    app.config_manager.save_config()
+
+
+def describe_check(check, port=None):
+    if check["type"] == "http":
+        return f"HTTP GET :{port or '?'}{check['path']}"
+    if check["type"] == "log":
+        return f"log line /{check['pattern']}/"
+    return f"TCP :{port or '?'}"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def summarize(samples):
+    seconds = sorted(sample["seconds"] for sample in samples)
+    if not seconds:
+        return None
+    return {"p50": percentile(seconds, 0.5), "p95": percentile(seconds, 0.95), "count": len(seconds),
+            "last": samples[-1]["seconds"]}
+
+
+def format_boot_stats(stats):
+    """Treeview text, e.g. '1.2s / 3.4s' (p50 / p95); '-' before the first ready start."""
+    if not stats:
+        return "-"
+    return f"{stats['p50']:.1f}s / {stats['p95']:.1f}s"
+
+
+class StartupHistory:
+    """Time-to-ready of each project's recent starts (the last STARTUP_HISTORY_SIZE), stored as JSON."""
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self.file_path = get_app_config_dir() / constants.STARTUP_HISTORY_FILE_NAME
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_json_store(self.file_path, self.app, "startup history")
+
+    def _save(self):
+        save_json_store(self.file_path, self._data, self.app, "startup history")
+
+    def samples(self, app_path):
+        with self._lock:
+            self._load()
+            return list(self._data.get(str(app_path), []))
+
+    def stats(self, app_path):
+        return summarize(self.samples(app_path))
+
+    def record(self, app_path, seconds, check_type):
+        """Adds a sample; returns (stats before it, stats after it)."""
+        with self._lock:
+            self._load()
+            samples = self._data.setdefault(str(app_path), [])
+            previous = summarize(samples)
+            samples.append({"at": time.time(), "seconds": round(seconds, 3), "check": check_type})
+            del samples[:-constants.STARTUP_HISTORY_SIZE]
+            self._save()
+            return previous, summarize(samples)
+
+    def remove(self, app_path):
+        with self._lock:
+            self._load()
+            if self._data.pop(str(app_path), None) is not None:
+                self._save()
+
+    def apply_stats(self, app_paths):
+        """Fills the Boot column of the given projects."""
+        for path in app_paths:
+            stats = self.stats(path)
+            if stats and path in self.app.apps_data:
+                self.app._update_app_status(path, boot_stats=stats)
+
+
+class ReadinessProbe:
+    """Polls one starting process until its check passes. Runs on the process engine loop.
+
+    get_port() is asked on every attempt, since the port may only be detected from the output after start.
+    """
+
+    def __init__(self, check, get_port, started_at):
+        self.check = check
+        self.get_port = get_port
+        self.started_at = started_at
+        self._pattern = re.compile(check["pattern"]) if check["type"] == "log" else None
+        self._log_matched = False
+
+    def feed_lines(self, lines):
+        if self._pattern is not None and not self._log_matched:
+            self._log_matched = any(self._pattern.search(line) for line in lines)
+
+    async def wait(self, handle):
+        """Returns ('ready', seconds), ('timeout', seconds) or ('exited', seconds)."""
+        deadline = self.started_at + float(self.check["timeout"])
+        while True:
+            if handle.returncode is not None:
+                return "exited", time.monotonic() - self.started_at
+            if await self._check_once():
+                return "ready", time.monotonic() - self.started_at
+            if time.monotonic() >= deadline:
+                return "timeout", time.monotonic() - self.started_at
+            await asyncio.sleep(constants.READINESS_POLL_INTERVAL_MS / 1000)
+
+    async def _check_once(self):
+        if self.check["type"] == "log":
+            return self._log_matched
+        port = str(self.get_port() or "")
+        if not port.isdigit():
+            return False
+        # Servers bound to "localhost" may only listen on ::1 (Node 17+ prefers IPv6).
+        for host in ("127.0.0.1", "::1"):
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)),
+                                                        constants.READINESS_CONNECT_TIMEOUT_SECONDS)
+            except (OSError, asyncio.TimeoutError):
+                continue
+            try:
+                if self.check["type"] == "tcp":
+                    return True
+                return await self._http_ok(reader, writer, port)
+            finally:
+                writer.close()
+        return False
+
+    async def _http_ok(self, reader, writer, port):
+        writer.write(f"GET {self.check['path']} HTTP/1.0\r\nHost: localhost:{port}\r\nConnection: close\r\n\r\n".encode('ascii'))
+        try:
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), constants.READINESS_CONNECT_TIMEOUT_SECONDS)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        parts = status_line.split()
+        # Any answer below 400 counts: a redirect to a login page still means the server is up.
+        return len(parts) >= 2 and parts[1].isdigit() and int(parts[1]) < 400
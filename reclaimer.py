@@ -0,0 +1,178 @@
+# reclaimer.py
+import os
+import queue
+import shutil
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import constants
+
+
+def is_tombstone(path):
+    return Path(path).name.startswith(constants.TOMBSTONE_PREFIX)
+
+
+def original_name(tombstone_path):
+    return Path(tombstone_path).name[len(constants.TOMBSTONE_PREFIX):].rsplit("-", 1)[0]
+
+
+def make_tombstone(target_path):
+    """Renames target_path to a hidden tombstone next to it and returns the new path.
+
+    The rename stays on the same filesystem, so it is atomic and near-instant
+    regardless of how many files the directory holds.
+    """
+    target_path = Path(target_path)
+    tombstone_path = target_path.parent / f"{constants.TOMBSTONE_PREFIX}{target_path.name}-{time.time_ns()}"
+    os.rename(target_path, tombstone_path)
+    return tombstone_path
+
+
+def handle_rmtree_error(func, path, exc_info):
+    # Read-only files (common in node_modules on Windows) need their write bit set before removal.
+    try:
+        os.chmod(path, stat.S_IWRITE)
+        func(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_entry(entry_path):
+    if entry_path.is_dir() and not entry_path.is_symlink():
+        shutil.rmtree(entry_path, onerror=handle_rmtree_error)
+    else:
+        try:
+            entry_path.unlink()
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            os.chmod(entry_path, stat.S_IWRITE)
+            entry_path.unlink()
+
+
+def _lower_thread_priority():
+    # On Linux niceness is per-thread, so this only affects the reclaimer's own workers.
+    if sys.platform.startswith("linux") and hasattr(os, "setpriority") and hasattr(threading, "get_native_id"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), constants.RECLAIM_THREAD_NICENESS)
+        except OSError:
+            pass
+
+
+class Reclaimer:
+    """Deletes tombstone directories in the background at low priority."""
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._queue = queue.Queue()
+        self._known = set()
+        self._known_lock = threading.Lock()
+        self._worker = None
+
+    def enqueue(self, tombstone_path, label):
+        tombstone_path = Path(tombstone_path)
+        with self._known_lock:
+            if str(tombstone_path) in self._known:
+                return
+            self._known.add(str(tombstone_path))
+            self._queue.put((tombstone_path, label))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="reclaimer", daemon=True)
+                self._worker.start()
+
+    def pending_count(self):
+        with self._known_lock:
+            return len(self._known)
+
+    def resume_pending(self, projects_folder):
+        """Re-queues tombstones left behind by a previous session (project-level and node_modules-level)."""
+        folder_path = Path(projects_folder)
+        if not folder_path.is_dir():
+            return
+        found = 0
+        try:
+            for item in folder_path.iterdir():
+                if not item.is_dir():
+                    continue
+                if is_tombstone(item):
+                    self.enqueue(item, f"leftover project '{original_name(item)}'")
+                    found += 1
+                    continue
+                for child in item.iterdir():
+                    if child.is_dir() and is_tombstone(child):
+                        self.enqueue(child, f"leftover '{original_name(child)}' of '{item.name}'")
+                        found += 1
+        except OSError as e:
+            self.app._log(f"Error looking for leftover tombstones in {folder_path}: {e}", warning=True)
+        if found:
+            self.app._log(f"Resuming background deletion of {found} leftover tombstone folder(s).")
+
+    def _report(self, message):
+        self.app.after(0, lambda m=message: self.app.update_status_bar(m))
+
+    def _run(self):
+        _lower_thread_priority()
+        while True:
+            try:
+                tombstone_path, label = self._queue.get(timeout=constants.RECLAIM_IDLE_EXIT_SECONDS)
+            except queue.Empty:
+                with self._known_lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+            try:
+                self._reclaim(tombstone_path, label)
+            finally:
+                with self._known_lock:
+                    self._known.discard(str(tombstone_path))
+                self._queue.task_done()
+
+    def _reclaim(self, tombstone_path, label):
+        if not tombstone_path.exists():
+            return
+        t_start = time.perf_counter()
+        try:
+            entries = list(tombstone_path.iterdir())
+        except OSError as e:
+            self.app._log(f"Could not list tombstone {tombstone_path}: {e}", error=True)
+            return
+
+        total = len(entries)
+        done = 0
+        last_report = 0.0
+        errors = []
+        # Each top-level entry (usually one package under node_modules) is an independent subtree.
+        with ThreadPoolExecutor(max_workers=constants.RECLAIM_MAX_WORKERS, thread_name_prefix="reclaimer",
+                                initializer=_lower_thread_priority) as executor:
+            futures = {executor.submit(_remove_entry, entry): entry for entry in entries}
+            for future, entry in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"{entry.name}: {e}")
+                done += 1
+                now = time.perf_counter()
+                if now - last_report >= constants.RECLAIM_PROGRESS_INTERVAL_SECONDS or done == total:
+                    last_report = now
+                    self._report(f"Reclaiming disk space ({label}): {done}/{total} entries...")
+
+        try:
+            shutil.rmtree(tombstone_path, onerror=handle_rmtree_error)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errors.append(str(e))
+
+        elapsed = time.perf_counter() - t_start
+        if errors:
+            self.app._log(f"Background deletion of {label} left {len(errors)} error(s) after {elapsed:.1f}s; "
+                          f"it will be retried on next start. First error: {errors[0]}", warning=True)
+        else:
+            self.app._log(f"Background deletion of {label} finished in {elapsed:.1f}s.")
+        remaining = self.pending_count() - 1
+        self._report(f"Reclaimed {label}." + (f" {remaining} more pending." if remaining > 0 else ""))
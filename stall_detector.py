@@ -0,0 +1,95 @@
+# stall_detector.py
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+import constants
+import metrics
+
+
+class StallDetector:
+    """Measures after() scheduling lag on the Tk thread and captures its stack while the event loop is blocked.
+
+    A heartbeat is scheduled with after() every STALL_HEARTBEAT_INTERVAL_MS. A sampler thread watches for a
+    heartbeat that is overdue by more than the threshold and snapshots the Tk thread's stack through
+    sys._current_frames(); when the heartbeat finally runs, the stall is logged with its most common stack.
+    Must be created on the Tk thread.
+    """
+
+    def __init__(self, app_instance):
+        self.app = app_instance
+        self._tk_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._running = False
+        self._after_id = None
+        self._expected_at = None
+        self._samples = []
+        self.stall_count = 0
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        with self._lock:
+            self._samples = []
+            self._expected_at = time.perf_counter() + constants.STALL_HEARTBEAT_INTERVAL_MS / 1000
+        self._after_id = self.app.after(constants.STALL_HEARTBEAT_INTERVAL_MS, self._heartbeat)
+        threading.Thread(target=self._sample_loop, name="stall-sampler", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            self.app.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _heartbeat(self):
+        self._after_id = None
+        if not self._running:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            lag = max(0.0, now - self._expected_at)
+            samples, self._samples = self._samples, []
+            self._expected_at = now + constants.STALL_HEARTBEAT_INTERVAL_MS / 1000
+        metrics.TK_LOOP_LAG_SECONDS.observe(lag)
+        if lag * 1000 >= constants.STALL_THRESHOLD_MS:
+            self._report_stall(lag, samples)
+        self._after_id = self.app.after(constants.STALL_HEARTBEAT_INTERVAL_MS, self._heartbeat)
+
+    def _sample_loop(self):
+        interval = constants.STALL_SAMPLE_INTERVAL_MS / 1000
+        threshold = constants.STALL_THRESHOLD_MS / 1000
+        while self._running:
+            time.sleep(interval)
+            with self._lock:
+                overdue = time.perf_counter() - self._expected_at
+            if overdue < threshold:
+                continue
+            frame = sys._current_frames().get(self._tk_thread_id)
+            if frame is None:
+                continue
+            stack = tuple((entry.filename, entry.lineno, entry.name, entry.line)
+                          for entry in traceback.extract_stack(frame, limit=constants.STALL_STACK_DEPTH))
+            del frame
+            with self._lock:
+                self._samples.append(stack)
+
+    def _report_stall(self, lag, samples):
+        self.stall_count += 1
+        metrics.TK_STALL_SECONDS.observe(lag)
+        message = f"UI stall: Tk event loop was blocked for {lag * 1000:.0f} ms"
+        if not samples:
+            self.app._log(f"{message} (ended before a stack sample was taken).", warning=True)
+            return
+        # The stack seen most often while blocked is the likeliest culprit; the innermost frame names it.
+        stack, hits = Counter(samples).most_common(1)[0]
+        filename, lineno, function_name, _ = stack[-1]
+        formatted_stack = "".join(traceback.format_list(list(stack))).rstrip()
+        self.app._log(f"{message} in {function_name} ({filename}:{lineno}); "
+                      f"seen in {hits}/{len(samples)} samples. Tk thread stack:\n{formatted_stack}", warning=True)
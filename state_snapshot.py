@@ -0,0 +1,54 @@
+# state_snapshot.py
+import time
+
+import constants
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+
+# Fields of an apps_data entry worth showing before the first scan finishes. Live process handles are not persisted.
+SNAPSHOT_FIELDS = (
+    "name", "path", "status", "package_data", "is_installed", "git_branch", "git_has_changes",
+    "disk_usage", "audit_counts", "boot_stats", "git_sync",
+)
+SNAPSHOT_VERSION = 1
+
+
+def _snapshot_file_path():
+    return get_app_config_dir() / constants.STATE_SNAPSHOT_FILE_NAME
+
+
+def _restored_status(status):
+    # Nothing is known to be running or busy until the rescan checks; a stale PID must never be offered to Stop.
+    if status == "Running" or status.startswith("Running Script:") or status.endswith("..."):
+        return "Unknown"
+    return status
+
+
+def save_snapshot(app):
+    entries = {
+        path: {field: data.get(field) for field in SNAPSHOT_FIELDS if field in data}
+        for path, data in app.apps_data.items()
+    }
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "projects_folder": app.projects_folder.get(),
+        "apps": entries,
+    }
+    save_json_store(_snapshot_file_path(), snapshot, app, "state snapshot")
+
+
+def load_snapshot(app, projects_folder):
+    """Returns apps_data from the last session, every entry marked stale, or {} if there is none for this folder."""
+    snapshot = load_json_store(_snapshot_file_path(), app, "state snapshot")
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("projects_folder") != projects_folder:
+        return {}
+
+    apps_data = {}
+    for path, entry in snapshot.get("apps", {}).items():
+        if "name" not in entry:
+            continue
+        apps_data[path] = dict(
+            entry, status=_restored_status(entry.get("status", "Unknown")),
+            process=None, pid="-", port="-", stale=True,
+        )
+    return apps_data
@@ -0,0 +1,344 @@
+# task_cache.py
+import concurrent.futures
+import copy
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import constants
+import metrics
+from config_manager import get_app_config_dir, load_json_store, save_json_store
+from dependency_fingerprint import file_digest, get_lockfile_path, get_node_version
+from disk_usage import format_bytes
+
+_KEY_VERSION = 1 # Bump when the key recipe changes so old results are never matched
+
+
+class TaskCacheError(Exception):
+    pass
+
+
+def get_task_settings(app, app_path, script_name):
+    """The script's cache settings (config 'task_cache', keyed by path, then script): {'inputs', 'outputs'}; None if off."""
+    stored = ((app.config_data.get("task_cache") or {}).get(str(app_path)) or {}).get(script_name)
+    if not stored or not stored.get("inputs"):
+        return None
+    return {"inputs": list(stored["inputs"]), "outputs": list(stored.get("outputs") or [])}
+
+
+def set_task_settings(app, app_path, script_name, inputs, outputs):
+    """Turns caching on for a script with the given globs; empty inputs turn it off."""
+    projects = app.config_data.setdefault("task_cache", {})
+    scripts = projects.setdefault(str(app_path), {})
+    if inputs:
+        scripts[script_name] = {"inputs": list(inputs), "outputs": list(outputs)}
+    else:
+        scripts.pop(script_name, None)
+        if not scripts:
+            projects.pop(str(app_path), None)
+    app.config_manager.save_config()
+
+
+def _normalize_pattern(pattern):
+    pattern = pattern.strip().replace("\\", "/").rstrip("/")
+    while pattern.startswith("./"):
+        pattern = pattern[2:]
+    if not pattern or pattern.startswith("/") or ".." in pattern.split("/") or re.match(r"^[A-Za-z]:", pattern):
+        raise TaskCacheError(f"'{pattern}' is not a path inside the project")
+    return pattern
+
+
+def _glob_regex(pattern):
+    # '**' spans folders, '*' and '?' stay within one; a pattern naming a folder takes everything under it.
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts) + "(?:/.*)?")
+
+
+def validate_globs(patterns):
+    """Raises TaskCacheError for a glob that reaches outside the project."""
+    for pattern in patterns:
+        _normalize_pattern(pattern.lstrip("!"))
+
+
+def expand_globs(root, patterns):
+    """Sorted project-relative paths (with '/') of the files matched by the globs; '!' excludes.
+
+    node_modules and .git are never searched.
+    """
+    includes, excludes = [], []
+    for pattern in patterns:
+        target = excludes if pattern.startswith("!") else includes
+        target.append(_glob_regex(_normalize_pattern(pattern.lstrip("!"))))
+    if not includes:
+        return []
+    files = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [name for name in dir_names if name not in constants.TASK_CACHE_IGNORED_DIRS]
+        rel_dir = os.path.relpath(dir_path, root).replace(os.sep, "/")
+        for file_name in file_names:
+            rel_path = file_name if rel_dir == "." else f"{rel_dir}/{file_name}"
+            if any(regex.fullmatch(rel_path) for regex in includes) and not any(regex.fullmatch(rel_path) for regex in excludes):
+                files.append(rel_path)
+    files.sort()
+    return files
+
+
+def hash_file(path):
+    """sha256 of a file read through a memory map, so large files are hashed without copying them into Python."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    return digest.hexdigest()
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class TaskCache:
+    """Results of cacheable npm scripts in a content-addressed store in the config directory.
+
+    A result is keyed by a hash of the script text, the lockfile, the Node version and the contents of the
+    declared input files. It holds the declared output files and the captured log. File contents live
+    once in objects/ under their sha256 and are shared between results. Results are evicted
+    least-recently-used past a size cap.
+    """
+
+    def __init__(self, app_instance, max_bytes=None):
+        self.app = app_instance
+        self.root = get_app_config_dir() / constants.TASK_CACHE_DIR_NAME
+        self.objects_dir = self.root / "objects"
+        self.index_file_path = self.root / constants.TASK_CACHE_INDEX_FILE_NAME
+        self.max_bytes = max_bytes if max_bytes is not None else constants.TASK_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._index = None # {"entries": {key: entry}, "stats": {app path: {script: counters}}}
+        self._digests = {} # Absolute path -> (size, mtime_ns, sha256) so unchanged inputs are not re-read
+        self._digest_lock = threading.Lock()
+
+    def _load(self):
+        if self._index is None:
+            loaded = load_json_store(self.index_file_path, self.app, "task cache index")
+            self._index = {"entries": loaded.get("entries") or {}, "stats": loaded.get("stats") or {}}
+
+    def _save(self):
+        save_json_store(self.index_file_path, self._index, self.app, "task cache index", indent=2)
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    # --- Keys ---
+    def _hash_files(self, app_path, rel_paths):
+        def digest_of(rel_path):
+            path = os.path.join(app_path, rel_path)
+            stat = os.stat(path)
+            with self._digest_lock:
+                cached = self._digests.get(path)
+            if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                return cached[2]
+            digest = hash_file(path)
+            with self._digest_lock:
+                self._digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            return digest
+
+        if len(rel_paths) < 2:
+            return [digest_of(rel_path) for rel_path in rel_paths]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(constants.TASK_CACHE_HASH_WORKERS, len(rel_paths)),
+                                                   thread_name_prefix="task-hash") as executor:
+            return list(executor.map(digest_of, rel_paths))
+
+    def compute_key(self, app_path, script_name, package_data, settings):
+        """(key, number of input files) for the script's current inputs; raises TaskCacheError or OSError."""
+        scripts = (package_data or {}).get("scripts") or {}
+        if script_name not in scripts:
+            raise TaskCacheError(f"no '{script_name}' script in package.json")
+        rel_paths = expand_globs(app_path, settings["inputs"])
+        lockfile_path = get_lockfile_path(app_path)
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "version": _KEY_VERSION, "script": script_name, "command": scripts[script_name],
+            "inputs": settings["inputs"], "outputs": settings["outputs"], "node": get_node_version(),
+            "node_env": os.environ.get("NODE_ENV", ""), "lockfile": file_digest(lockfile_path) if lockfile_path else "none",
+        }, sort_keys=True).encode('utf-8'))
+        for rel_path, file_hash in zip(rel_paths, self._hash_files(app_path, rel_paths)):
+            digest.update(f"\0{rel_path}\0{file_hash}".encode('utf-8'))
+        return digest.hexdigest(), len(rel_paths)
+
+    # --- Lookup and restore ---
+    def lookup(self, app_path, script_name, key):
+        """The stored result for key (marked as used), or None; counts the hit or miss."""
+        with self._lock:
+            self._load()
+            entry = self._index["entries"].get(key)
+            if entry is not None and not all(self._object_path(digest).is_file() for digest in _entry_objects(entry)):
+                del self._index["entries"][key] # Objects removed by hand.
+                entry = None
+            stats = self._stats_for(app_path, script_name)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                stats["hits"] += 1
+                stats["saved_seconds"] += entry.get("duration", 0)
+            else:
+                stats["misses"] += 1
+            self._save()
+            entry = copy.deepcopy(entry)
+        metrics.TASK_CACHE_LOOKUPS.inc(outcome="hit" if entry is not None else "miss")
+        return entry
+
+    def _stats_for(self, app_path, script_name):
+        scripts = self._index["stats"].setdefault(str(app_path), {})
+        return scripts.setdefault(script_name, {"hits": 0, "misses": 0, "saved_seconds": 0.0})
+
+    def restore(self, app_path, entry, output_patterns):
+        """Replaces the files matched by the output globs with the stored ones; returns how many were written."""
+        for rel_path in expand_globs(app_path, output_patterns):
+            os.remove(os.path.join(app_path, rel_path))
+        for rel_path, digest, mode in entry["files"]:
+            target = Path(app_path) / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{target.name}.nam-restore")
+            shutil.copyfile(self._object_path(digest), tmp_path)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, target)
+        return len(entry["files"])
+
+    def read_log(self, entry):
+        """[(stream name, line), ...] captured when the result was stored."""
+        with open(self._object_path(entry["log"]), 'r', encoding='utf-8') as f:
+            return [tuple(line) for line in json.load(f)]
+
+    # --- Storing ---
+    def _put_object(self, source_path=None, data=None):
+        digest = hash_file(source_path) if source_path is not None else hashlib.sha256(data).hexdigest()
+        target = self._object_path(digest)
+        if not target.is_file(): # Content-addressed: an existing object already holds these bytes.
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f"{target.name}.tmp-{threading.get_ident()}")
+            if source_path is not None:
+                shutil.copyfile(source_path, tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+            os.replace(tmp_path, target)
+        return digest, target.stat().st_size
+
+    def store(self, app_path, script_name, key, output_patterns, log_lines, duration):
+        """Copies the script's outputs and log into the store under key; returns the number of files stored."""
+        files = []
+        total_bytes = 0
+        for rel_path in expand_globs(app_path, output_patterns):
+            source_path = os.path.join(app_path, rel_path)
+            digest, size = self._put_object(source_path=source_path)
+            files.append([rel_path, digest, os.stat(source_path).st_mode & 0o777])
+            total_bytes += size
+        log_digest, log_size = self._put_object(data=json.dumps(log_lines).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._index["entries"][key] = {
+                "app": str(app_path), "script": script_name, "files": files, "log": log_digest,
+                "duration": round(duration, 3), "bytes": total_bytes + log_size, "created": now, "last_used": now,
+            }
+            self._save()
+        self.enforce_limit()
+        return len(files)
+
+    def enforce_limit(self):
+        with self._lock:
+            self._load()
+            entries = self._index["entries"]
+            total = sum(entry.get("bytes", 0) for entry in entries.values())
+            evicted = []
+            for key, entry in sorted(entries.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                total -= entry.get("bytes", 0)
+                evicted.append(entry)
+                del entries[key]
+            if evicted:
+                self._save()
+                self._collect_garbage()
+        for entry in evicted:
+            self.app._log(f"Evicted cached '{entry['script']}' result of {Path(entry['app']).name} "
+                          f"({format_bytes(entry.get('bytes', 0))}) to stay under the task cache limit.")
+
+    def _collect_garbage(self):
+        # Called with the lock held: objects no longer referenced by any result are deleted. An object stored
+        # for a result not yet in the index may go too; lookup() then finds it missing and drops that result.
+        referenced = {digest for entry in self._index["entries"].values() for digest in _entry_objects(entry)}
+        if not self.objects_dir.is_dir():
+            return
+        for shard in self.objects_dir.iterdir():
+            for object_path in shard.iterdir() if shard.is_dir() else ():
+                if ".tmp-" not in object_path.name and shard.name + object_path.name not in referenced:
+                    try:
+                        object_path.unlink()
+                    except OSError:
+                        pass
+
+    # --- Maintenance and stats ---
+    def clear(self, app_path=None, script_name=None):
+        """Drops the results (and stats) of one script, one project, or everything; returns how many were dropped."""
+        with self._lock:
+            self._load()
+            entries = self._index["entries"]
+            dropped = [key for key, entry in entries.items()
+                       if (app_path is None or entry["app"] == str(app_path)) and (script_name is None or entry["script"] == script_name)]
+            for key in dropped:
+                del entries[key]
+            if app_path is None:
+                self._index["stats"] = {}
+            elif script_name is None:
+                self._index["stats"].pop(str(app_path), None)
+            else:
+                (self._index["stats"].get(str(app_path)) or {}).pop(script_name, None)
+            self._save()
+            self._collect_garbage()
+        return len(dropped)
+
+    def remove(self, app_path):
+        self.clear(app_path)
+
+    def stats(self, app_path, script_name):
+        """{'hits', 'misses', 'saved_seconds', 'results', 'bytes'} for one script."""
+        with self._lock:
+            self._load()
+            stats = dict((self._index["stats"].get(str(app_path)) or {}).get(script_name) or {"hits": 0, "misses": 0, "saved_seconds": 0.0})
+            entries = [entry for entry in self._index["entries"].values() if entry["app"] == str(app_path) and entry["script"] == script_name]
+        stats["results"] = len(entries)
+        stats["bytes"] = sum(entry.get("bytes", 0) for entry in entries)
+        return stats
+
+    def total_bytes(self):
+        with self._lock:
+            self._load()
+            return sum(entry.get("bytes", 0) for entry in self._index["entries"].values())
+
+
+def _entry_objects(entry):
+    return [digest for _, digest, _ in entry["files"]] + [entry["log"]]
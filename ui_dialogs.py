@@ -1,14 +1,24 @@
 # ui_dialogs.py
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
-import os
+import sys
 import json
-import subprocess
+import re
 import threading
+import time
 from pathlib import Path
-import shutil # For fetch app cleanup
 
 import constants # constants.py
+import audit_cache
+import fetch_engine
+import profiler
+import readiness
+import launch_policy
+import cluster
+import port_registry
+import app_groups
+import task_cache
+from disk_usage import format_bytes
 
 def show_package_json_viewer(app, app_data_copy, app_name):
     pkg_window = tk.Toplevel(app)
@@ -40,167 +50,873 @@ def show_package_json_viewer(app, app_data_copy, app_name):
 
 
 def show_fetch_online_app_dialog(app):
+    # Non-modal: fetches keep running (and more can be queued) while the rest of the app stays usable.
+    if getattr(app, "_fetch_dialog", None) is not None and app._fetch_dialog.winfo_exists():
+        app._fetch_dialog.deiconify()
+        app._fetch_dialog.lift()
+        return
+
     dialog = tk.Toplevel(app)
-    dialog.title("Fetch Online Node App")
-    dialog.geometry("450x300") # Slightly taller for potentially longer error messages
+    app._fetch_dialog = dialog
+    dialog.title("Fetch Online Node Apps")
+    dialog.geometry("760x520")
     try:
         dialog.transient(app)
-        dialog.grab_set()
     except tk.TclError:
-        app._log("Could not make fetch dialog transient or grab_set.", warning=True)
-
+        app._log("Could not make fetch dialog transient.", warning=True)
 
-    ttk.Label(dialog, text="NPM Package Name or Git URL:").pack(pady=(10,0), padx=10, anchor="w")
-    source_entry = ttk.Entry(dialog, width=60)
-    source_entry.pack(pady=2, padx=10, fill=tk.X)
-    source_entry.focus() 
+    ttk.Label(dialog, text="NPM Package Names or Git URLs (one per line):").pack(pady=(10,0), padx=10, anchor="w")
+    sources_text = tk.Text(dialog, height=5, width=80, wrap=tk.NONE)
+    sources_text.pack(pady=2, padx=10, fill=tk.X)
+    sources_text.focus()
 
-    ttk.Label(dialog, text="Local Folder Name (optional, derived if empty):").pack(pady=(5,0), padx=10, anchor="w")
+    ttk.Label(dialog, text="Local Folder Name (optional, only used for a single source; derived if empty):").pack(pady=(5,0), padx=10, anchor="w")
     name_entry = ttk.Entry(dialog, width=60)
     name_entry.pack(pady=2, padx=10, fill=tk.X)
 
-    status_label = ttk.Label(dialog, text="", wraplength=400) # Wraplength for longer messages
-    status_label.pack(pady=5, padx=10, fill=tk.X)
+    options_frame = ttk.Frame(dialog)
+    options_frame.pack(pady=5, padx=10, fill=tk.X)
+    ttk.Label(options_frame, text="Git clone depth (empty = full history):").pack(side=tk.LEFT)
+    depth_entry = ttk.Entry(options_frame, width=6)
+    depth_entry.pack(side=tk.LEFT, padx=(5, 15))
+    partial_clone_var = tk.BooleanVar(value=False)
+    partial_check = ttk.Checkbutton(options_frame, text="Partial clone (--filter=blob:none)", variable=partial_clone_var)
+    partial_check.pack(side=tk.LEFT)
+
+    queue_frame = ttk.LabelFrame(dialog, text="Fetch Queue", padding=5)
+    queue_frame.pack(pady=5, padx=10, fill=tk.BOTH, expand=True)
+    columns = ("Source", "Folder", "Phase", "Progress", "Message")
+    queue_tree = ttk.Treeview(queue_frame, columns=columns, show="headings", height=8)
+    for col, width, stretch in (("Source", 200, True), ("Folder", 110, False), ("Phase", 120, False),
+                                ("Progress", 70, False), ("Message", 220, True)):
+        queue_tree.heading(col, text=col)
+        queue_tree.column(col, width=width, anchor=tk.W, stretch=stretch)
+    queue_tree.pack(fill=tk.BOTH, expand=True)
+    queue_tree.tag_configure("Done", foreground=constants.STATUS_VISUALS["Running"]["color"])
+    queue_tree.tag_configure("Failed", foreground=constants.STATUS_VISUALS["Error (Command)"]["color"])
+    queue_tree.tag_configure("Cancelled", foreground=constants.STATUS_VISUALS["Unknown"]["color"])
 
-    progress_bar = ttk.Progressbar(dialog, mode='indeterminate')
-    # progress_bar is packed when fetch starts
+    jobs_by_iid = {}
+
+    def on_job_update(job):
+        if not dialog.winfo_exists():
+            return
+        iid = str(id(job))
+        values = (job.source, job.target_dir.name, job.state if job.is_finished else job.phase,
+                  f"{job.percent}%", job.error or job.message)
+        if queue_tree.exists(iid):
+            queue_tree.item(iid, values=values, tags=(job.state,))
+        else:
+            queue_tree.insert("", tk.END, iid=iid, values=values, tags=(job.state,))
+            jobs_by_iid[iid] = job
+        active = app.fetch_engine.active_count()
+        app.update_status_bar(f"Fetching: {active} active." if active else "All fetches finished.")
 
     def do_fetch():
-        source = source_entry.get().strip()
+        sources = [line.strip() for line in sources_text.get("1.0", tk.END).splitlines() if line.strip()]
         local_name_override = name_entry.get().strip()
-        if not source:
-            messagebox.showerror("Input Error", "Package name or Git URL is required.", parent=dialog)
+        if not sources:
+            messagebox.showerror("Input Error", "At least one package name or Git URL is required.", parent=dialog)
+            return
+        if local_name_override and len(sources) > 1:
+            messagebox.showerror("Input Error", "A local folder name can only be given when fetching a single source.", parent=dialog)
             return
 
-        if local_name_override:
-            target_folder_name = "".join(c for c in local_name_override if c.isalnum() or c in ('-', '_')).strip()
+        depth_text = depth_entry.get().strip()
+        depth = None
+        if depth_text:
+            if not depth_text.isdigit() or int(depth_text) < 1:
+                messagebox.showerror("Input Error", "Clone depth must be a positive whole number.", parent=dialog)
+                return
+            depth = int(depth_text)
+
+        projects_root = Path(app.projects_folder.get())
+        queued_targets = {str(job.target_dir) for job in app.fetch_engine.jobs if not job.is_finished}
+        new_jobs = []
+        for source in sources:
+            target_folder_name = fetch_engine.derive_target_folder_name(source, local_name_override)
             if not target_folder_name:
-                messagebox.showerror("Input Error", "Local folder name is invalid after sanitization.", parent=dialog)
+                messagebox.showerror("Input Error", f"Could not derive a valid local folder name for '{source}'.", parent=dialog)
                 return
-        elif ".git" in source or source.startswith("git@") or (source.startswith("http") and ".git" in source):
-            base_name = source.split('/')[-1]
-            raw_folder_name = base_name.removesuffix('.git') if hasattr(str, 'removesuffix') else base_name[:-4] if base_name.endswith('.git') else base_name
-            target_folder_name = "".join(c for c in raw_folder_name if c.isalnum() or c in ('-', '_')).strip()
-        else: 
-            raw_folder_name = source.split('@')[0].split('/')[-1] 
-            target_folder_name = "".join(c for c in raw_folder_name if c.isalnum() or c in ('-', '_')).strip()
-        
-        if not target_folder_name:
-             messagebox.showerror("Input Error", "Could not derive a valid local folder name.", parent=dialog)
-             return
-
-        target_dir = Path(app.projects_folder.get()) / target_folder_name
-        if target_dir.exists():
-            messagebox.showerror("Error", f"Folder '{target_dir.name}' already exists in projects directory.", parent=dialog)
-            return
+            target_dir = projects_root / target_folder_name
+            if target_dir.exists() or str(target_dir) in queued_targets:
+                messagebox.showerror("Error", f"Folder '{target_dir.name}' already exists or is already being fetched.", parent=dialog)
+                return
+            queued_targets.add(str(target_dir))
+            new_jobs.append(fetch_engine.FetchJob(source, target_dir, depth=depth, partial_clone=partial_clone_var.get()))
 
-        fetch_button.config(state=tk.DISABLED)
-        cancel_button.config(state=tk.DISABLED) 
-        status_label.config(text=f"Preparing to fetch '{source}'...")
-        progress_bar.pack(pady=5, padx=10, fill=tk.X)
-        progress_bar.start(10) 
-        dialog.update_idletasks()
-
-        def fetch_task():
-            cmd_list_git = None
-            cmd_list_npm_install_after_clone = None
-            cmd_list_npm_pkg_install = None
-            try:
-                target_dir.mkdir(parents=True, exist_ok=True) 
-                process_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                
-                is_git_clone = ".git" in source or source.startswith("git@") or \
-                               (source.startswith("http") and ".git" in source)
-
-                if is_git_clone:
-                    app.after(0, lambda s=f"Cloning '{source}'...": [app._log(s), status_label.config(text=s)])
-                    cmd_list_git = [constants.GIT_CMD, "clone", source, str(target_dir)]
-                    proc_git = subprocess.Popen(cmd_list_git, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', creationflags=process_flags)
-                    stdout_git, stderr_git = proc_git.communicate()
-                    if stdout_git: app.after(0, lambda log=f"[{target_dir.name} GIT STDOUT] {stdout_git.strip()}": app._log(log))
-                    if stderr_git: app.after(0, lambda log=f"[{target_dir.name} GIT STDERR] {stderr_git.strip()}": app._log(log, warning=(proc_git.returncode==0), error=(proc_git.returncode!=0)))
-                    if proc_git.returncode != 0: raise Exception(f"Git clone failed.") 
-                    
-                    app.after(0, lambda s=f"'{target_dir.name}' cloned. Running npm install...": [app._log(s), status_label.config(text=s)])
-                    cmd_list_npm_install_after_clone = [constants.NPM_CMD, "install"]
-                    install_proc = subprocess.Popen(cmd_list_npm_install_after_clone, cwd=target_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', creationflags=process_flags)
-                    inst_stdout, inst_stderr = install_proc.communicate()
-                    if inst_stdout: app.after(0, lambda log=f"[{target_dir.name} NPM STDOUT] {inst_stdout.strip()}": app._log(log))
-                    if inst_stderr: app.after(0, lambda log=f"[{target_dir.name} NPM STDERR] {inst_stderr.strip()}": app._log(log, warning=(install_proc.returncode==0), error=(install_proc.returncode!=0)))
-                    if install_proc.returncode != 0: raise Exception(f"npm install after clone failed.")
-                else: # NPM package install
-                    app.after(0, lambda s=f"Setting up '{target_dir.name}' for NPM package '{source}'...": [app._log(s), status_label.config(text=s)])
-                    temp_pkg_json = target_dir / "package.json"
-                    with open(temp_pkg_json, "w", encoding='utf-8') as f:
-                        json.dump({"name": target_dir.name, "version": "0.1.0", "description": f"Project for {source}", "private": True}, f, indent=2)
-                    
-                    app.after(0, lambda s=f"Installing '{source}' into '{target_dir.name}'...": [app._log(s), status_label.config(text=s)])
-                    cmd_list_npm_pkg_install = [constants.NPM_CMD, "install", source, "--save"] 
-                    proc_npm_pkg = subprocess.Popen(cmd_list_npm_pkg_install, cwd=target_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', creationflags=process_flags)
-                    stdout_npm, stderr_npm = proc_npm_pkg.communicate()
-                    if stdout_npm: app.after(0, lambda log=f"[{target_dir.name} NPM STDOUT] {stdout_npm.strip()}": app._log(log))
-                    if stderr_npm: app.after(0, lambda log=f"[{target_dir.name} NPM STDERR] {stderr_npm.strip()}": app._log(log, warning=(proc_npm_pkg.returncode==0), error=(proc_npm_pkg.returncode!=0)))
-                    if proc_npm_pkg.returncode != 0: raise Exception(f"npm install {source} failed.")
-
-                success_msg = f"Successfully fetched and set up '{target_dir.name}'."
-                app.after(0, lambda: [
-                    status_label.config(text=success_msg), app._log(success_msg), app.scan_projects_folder(),
-                    messagebox.showinfo("Success", success_msg, parent=dialog), dialog.destroy()
-                ])
-
-            except Exception as e:
-                final_err_msg = f"Error fetching app: {e}" # Default error message
-                if isinstance(e, FileNotFoundError):
-                    failed_cmd_name = "Unknown command"
-                    # Attempt to identify which command failed using e.filename (Python 3.10+)
-                    # or by checking which cmd_list was last defined.
-                    # Note: e.filename might not always be just the executable name.
-                    if hasattr(e, 'filename') and e.filename:
-                        failed_cmd_name = e.filename
-                    elif cmd_list_git and constants.GIT_CMD in str(e): # Check if error string contains git command
-                        failed_cmd_name = constants.GIT_CMD
-                    elif (cmd_list_npm_install_after_clone or cmd_list_npm_pkg_install) and constants.NPM_CMD in str(e):
-                        failed_cmd_name = constants.NPM_CMD
-                    
-                    command_type = "Unknown"
-                    if constants.GIT_CMD.lower() in failed_cmd_name.lower():
-                        command_type = "Git"
-                    elif constants.NPM_CMD.lower() in failed_cmd_name.lower():
-                        command_type = "Node/NPM"
-
-                    final_err_msg = (
-                        f"Command '{failed_cmd_name}' not found. "
-                        f"Please ensure {command_type} is installed and its 'bin' or 'cmd' "
-                        f"directory is in your system's PATH environment variable. "
-                        f"Original error: {e}"
-                    )
-                
-                app.after(0, lambda msg=final_err_msg: [ # Capture final_err_msg in lambda
-                    app._log(msg, error=True), 
-                    status_label.config(text="Fetch failed. See main log for details."), # Keep status label concise
-                    messagebox.showerror("Fetch Error", msg, parent=dialog)
-                ])
-                # Cleanup partially created directory if it's mostly empty
-                if target_dir.exists():
-                    try:
-                        is_empty_or_only_pkg_json = not any(f for f in target_dir.iterdir() if f.name != "package.json") or \
-                                                    (len(list(target_dir.iterdir())) == 1 and (target_dir / "package.json").exists())
-                        if is_empty_or_only_pkg_json :
-                            shutil.rmtree(target_dir)
-                            app._log(f"Cleaned up partially created/failed directory: {target_dir}")
-                    except Exception as clean_e:
-                        app._log(f"Error during cleanup of {target_dir}: {clean_e}", warning=True)
-            finally:
-                app.after(0, lambda: [progress_bar.stop(), progress_bar.pack_forget(), 
-                                      fetch_button.config(state=tk.NORMAL), cancel_button.config(state=tk.NORMAL)])
-        
-        threading.Thread(target=fetch_task, daemon=True).start()
+        for job in new_jobs:
+            app.fetch_engine.submit(job, on_job_update)
+        sources_text.delete("1.0", tk.END)
+        name_entry.delete(0, tk.END)
+        app._log(f"Queued {len(new_jobs)} fetch(es); up to {app.fetch_engine.max_parallel} run in parallel.")
+
+    def cancel_selected():
+        for iid in queue_tree.selection():
+            job = jobs_by_iid.get(iid)
+            if job and not job.is_finished:
+                job.cancel()
+
+    def clear_finished():
+        app.fetch_engine.clear_finished()
+        for iid, job in list(jobs_by_iid.items()):
+            if job.is_finished:
+                queue_tree.delete(iid)
+                del jobs_by_iid[iid]
+
+    # Jobs from an earlier window are still tracked by the engine; show them again.
+    for existing_job in app.fetch_engine.jobs:
+        on_job_update(existing_job)
 
     button_frame = ttk.Frame(dialog)
     button_frame.pack(pady=10, padx=10, fill=tk.X)
 
-    fetch_button = ttk.Button(button_frame, text="Fetch and Setup Project", command=do_fetch)
+    fetch_button = ttk.Button(button_frame, text="Fetch and Setup", command=do_fetch)
     fetch_button.pack(side=tk.LEFT, expand=True, padx=(0,5))
-    
-    cancel_button = ttk.Button(button_frame, text="Cancel", command=dialog.destroy)
-    cancel_button.pack(side=tk.LEFT, expand=True, padx=(5,0))
\ No newline at end of file
+    cancel_job_button = ttk.Button(button_frame, text="Cancel Selected", command=cancel_selected)
+    cancel_job_button.pack(side=tk.LEFT, expand=True, padx=5)
+    clear_button = ttk.Button(button_frame, text="Clear Finished", command=clear_finished)
+    clear_button.pack(side=tk.LEFT, expand=True, padx=5)
+    close_button = ttk.Button(button_frame, text="Close", command=dialog.destroy)
+    close_button.pack(side=tk.LEFT, expand=True, padx=(5,0))
+
+
+def show_bulk_summary_dialog(app, title, results, summary_text):
+    summary_window = tk.Toplevel(app)
+    summary_window.title(title)
+    summary_window.geometry("700x400")
+    try:
+        summary_window.transient(app)
+    except tk.TclError:
+        app._log("Could not make bulk summary window transient.", warning=True)
+
+    ttk.Label(summary_window, text=summary_text, wraplength=660).pack(pady=(10, 5), padx=10, anchor="w")
+
+    tree_frame = ttk.Frame(summary_window)
+    tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    columns = ("Project", "Command", "Result", "Duration")
+    summary_tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+    for col, width, anchor in (("Project", 200, tk.W), ("Command", 110, tk.W), ("Result", 250, tk.W), ("Duration", 80, tk.E)):
+        summary_tree.heading(col, text=col)
+        summary_tree.column(col, width=width, anchor=anchor, stretch=(col == "Result"))
+    scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=summary_tree.yview)
+    summary_tree.configure(yscrollcommand=scrollbar.set)
+    summary_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    summary_tree.tag_configure("ok", foreground=constants.STATUS_VISUALS["Running"]["color"])
+    summary_tree.tag_configure("failed", foreground=constants.STATUS_VISUALS["Error (Command)"]["color"])
+    summary_tree.tag_configure("skipped", foreground=constants.STATUS_VISUALS["Unknown"]["color"])
+
+    for res in results:
+        tag = "ok" if res["ok"] else "skipped" if res["result"].startswith("Skipped") else "failed"
+        duration = f"{res['duration']:.1f}s" if res["duration"] else "-"
+        summary_tree.insert("", tk.END, values=(res["name"], res["command"], res["result"], duration), tags=(tag,))
+
+    ttk.Button(summary_window, text="Close", command=summary_window.destroy).pack(pady=(0, 10))
+    summary_window.focus_set()
+
+
+
+def show_dependency_index_panel(app):
+    index = app.dependency_index
+    panel = tk.Toplevel(app)
+    panel.title("Dependency Index (from lockfiles)")
+    panel.geometry("760x520")
+    try:
+        panel.transient(app)
+    except tk.TclError:
+        app._log("Could not make dependency index panel transient.", warning=True)
+
+    query_frame = ttk.Frame(panel)
+    query_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+    ttk.Label(query_frame, text="Package:").pack(side=tk.LEFT, padx=(0, 5))
+    package_var = tk.StringVar()
+    package_entry = ttk.Entry(query_frame, textvariable=package_var, width=30)
+    package_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+    package_entry.focus()
+
+    status_label = ttk.Label(panel, text="", anchor="w")
+    status_label.pack(fill=tk.X, padx=10)
+
+    tree_frame = ttk.Frame(panel)
+    tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    results_tree = ttk.Treeview(tree_frame, columns=("Item", "Versions", "Detail"), show="headings")
+    results_tree.heading("Item", text="Project / Package")
+    results_tree.heading("Versions", text="Version(s)")
+    results_tree.heading("Detail", text="Detail")
+    results_tree.column("Item", width=220, anchor=tk.W)
+    results_tree.column("Versions", width=180, anchor=tk.W)
+    results_tree.column("Detail", width=300, anchor=tk.W, stretch=tk.YES)
+    scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=results_tree.yview)
+    results_tree.configure(yscrollcommand=scrollbar.set)
+    results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def show_rows(rows, summary):
+        results_tree.delete(*results_tree.get_children())
+        for row in rows:
+            results_tree.insert("", tk.END, values=row)
+        status_label.config(text=summary)
+
+    def require_package_name():
+        package_name = package_var.get().strip()
+        if not package_name:
+            messagebox.showwarning("No Package", "Enter a package name first.", parent=panel)
+        return package_name
+
+    def query_dependents():
+        package_name = require_package_name()
+        if not package_name: return
+        dependents = index.dependents_of(package_name)
+        rows = [(name, ", ".join(versions), "direct dependency" if is_direct else "transitive") for name, versions, is_direct in dependents]
+        show_rows(rows, f"{len(rows)} project(s) depend on '{package_name}'.")
+
+    def query_versions():
+        package_name = require_package_name()
+        if not package_name: return
+        by_version = index.versions_of(package_name)
+        rows = [(package_name, version, f"{len(names)} project(s): {', '.join(names)}")
+                for version, names in sorted(by_version.items(), key=lambda kv: -len(kv[1]))]
+        show_rows(rows, f"'{package_name}' is installed in {len(rows)} version(s) across the fleet.")
+
+    def query_duplicates():
+        dupes = index.duplicates(limit=constants.DEPENDENCY_INDEX_MAX_DUPLICATE_ROWS)
+        rows = []
+        for package_name, by_version in dupes:
+            detail = "; ".join(f"{v}: {len(names)}" for v, names in sorted(by_version.items(), key=lambda kv: -len(kv[1])))
+            rows.append((package_name, f"{len(by_version)} versions", detail))
+        show_rows(rows, f"Top {len(rows)} packages installed in more than one version (version: project count).")
+
+    def on_built():
+        if panel.winfo_exists():
+            status_label.config(text=f"Indexed {len(index.projects)} project(s). Enter a package name or list duplicates.")
+
+    def rebuild():
+        status_label.config(text="Building dependency index...")
+        index.build(app.apps_data, on_done=on_built)
+
+    for text, command in (("Dependents", query_dependents), ("Versions", query_versions),
+                          ("Duplicates", query_duplicates), ("Rebuild Index", rebuild)):
+        ttk.Button(query_frame, text=text, command=command).pack(side=tk.LEFT, padx=2)
+    package_entry.bind("<Return>", lambda e: query_dependents())
+
+    ttk.Button(panel, text="Close", command=panel.destroy).pack(pady=(0, 10))
+
+    if index.is_building:
+        status_label.config(text="Building dependency index...")
+    elif not index.projects:
+        rebuild()
+    else:
+        status_label.config(text=f"Indexed {len(index.projects)} project(s). Use 'Rebuild Index' after installs.")
+
+
+
+def show_audit_summary_dialog(app):
+    summary_window = tk.Toplevel(app)
+    summary_window.title("Fleet Audit Summary (cached results)")
+    summary_window.geometry("820x500")
+    try:
+        summary_window.transient(app)
+    except tk.TclError:
+        app._log("Could not make audit summary window transient.", warning=True)
+
+    totals_label = ttk.Label(summary_window, text="Loading cached audit results...", anchor="w")
+    totals_label.pack(fill=tk.X, padx=10, pady=(10, 5))
+
+    tree_frame = ttk.Frame(summary_window)
+    tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    columns = ("Severity", "Advisory", "Packages", "Projects")
+    advisory_tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+    for col, width, stretch in (("Severity", 80, False), ("Advisory", 330, True), ("Packages", 150, False), ("Projects", 230, True)):
+        advisory_tree.heading(col, text=col)
+        advisory_tree.column(col, width=width, anchor=tk.W, stretch=stretch)
+    scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=advisory_tree.yview)
+    advisory_tree.configure(yscrollcommand=scrollbar.set)
+    advisory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    ttk.Button(summary_window, text="Close", command=summary_window.destroy).pack(pady=(0, 10))
+
+    snapshot = {path: data["name"] for path, data in app.apps_data.items()}
+
+    def show_results(cached_results):
+        if not summary_window.winfo_exists():
+            return
+        rollup = audit_cache.aggregate({snapshot[path]: result for path, result in cached_results.items()})
+        totals = ", ".join(f"{rollup['by_severity'][sev]} {sev}" for sev in audit_cache.SEVERITY_ORDER)
+        totals_label.config(text=f"{len(cached_results)} of {len(snapshot)} project(s) have up-to-date audit results. "
+                                 f"Vulnerabilities: {totals}. Run Bulk > Audit All to refresh changed lockfiles.")
+        for advisory in rollup["advisories"]:
+            title = advisory["title"] or advisory["advisory"]
+            projects = sorted(advisory["projects"], key=str.lower)
+            advisory_tree.insert("", tk.END, values=(
+                advisory["severity"], title, ", ".join(sorted(advisory["packages"])),
+                f"{len(projects)}: {', '.join(projects)}"
+            ))
+
+    def load_task():
+        cached_results = app.audit_cache.all_cached(list(snapshot))
+        app.after(0, lambda r=cached_results: show_results(r))
+
+    threading.Thread(target=load_task, daemon=True).start()
+
+
+
+def show_profile_results_dialog(app):
+    results_window = tk.Toplevel(app)
+    results_window.title("Profiling Results")
+    results_window.geometry("900x600")
+    try:
+        results_window.transient(app)
+    except tk.TclError:
+        app._log("Could not make profiling results window transient.", warning=True)
+
+    paned = ttk.PanedWindow(results_window, orient=tk.VERTICAL)
+    paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+    list_frame = ttk.Frame(paned)
+    results_tree = ttk.Treeview(list_frame, columns=("When", "Kind", "Operation", "Duration"), show="headings", height=6)
+    for col, width, stretch in (("When", 150, False), ("Kind", 80, False), ("Operation", 300, True), ("Duration", 90, False)):
+        results_tree.heading(col, text=col)
+        results_tree.column(col, width=width, anchor=tk.W, stretch=stretch)
+    results_tree.pack(fill=tk.BOTH, expand=True)
+    paned.add(list_frame, weight=1)
+
+    detail_frame = ttk.Frame(paned)
+    controls = ttk.Frame(detail_frame)
+    controls.pack(fill=tk.X, pady=(5, 5))
+    detail_label = ttk.Label(controls, text="Select a result above.", anchor="w")
+    detail_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    sort_var = tk.StringVar(value="by_cumtime")
+    sort_buttons = [ttk.Radiobutton(controls, text=text, value=value, variable=sort_var)
+                    for text, value in (("Cumulative time", "by_cumtime"), ("Own time", "by_tottime"))]
+
+    columns = ("Site", "A", "B", "C")
+    detail_tree = ttk.Treeview(detail_frame, columns=columns, show="headings")
+    scrollbar = ttk.Scrollbar(detail_frame, orient=tk.VERTICAL, command=detail_tree.yview)
+    detail_tree.configure(yscrollcommand=scrollbar.set)
+    detail_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    paned.add(detail_frame, weight=3)
+
+    results_by_item = {}
+
+    def set_columns(headings):
+        for col, (text, width, anchor) in zip(columns, headings):
+            detail_tree.heading(col, text=text)
+            detail_tree.column(col, width=width, anchor=anchor, stretch=(col == "Site"))
+
+    def show_detail(*_):
+        selection = results_tree.selection()
+        detail_tree.delete(*detail_tree.get_children())
+        if not selection:
+            return
+        summary = results_by_item[selection[0]]
+        if summary["kind"] == "cpu":
+            for button in sort_buttons:
+                button.pack(side=tk.LEFT, padx=2)
+            set_columns((("Function", 460, tk.W), ("Calls", 90, tk.E), ("Own (s)", 90, tk.E), ("Cumulative (s)", 110, tk.E)))
+            for row in summary.get(sort_var.get(), []):
+                calls = str(row["calls"]) if row["calls"] == row["primitive_calls"] else f"{row['calls']}/{row['primitive_calls']}"
+                detail_tree.insert("", tk.END, values=(row["function"], calls, f"{row['tottime']:.4f}", f"{row['cumtime']:.4f}"))
+            detail_label.config(text=f"{summary['total_calls']} calls in {summary['wall_seconds']:.3f}s. Data: {summary['data_file']}")
+        else:
+            for button in sort_buttons:
+                button.pack_forget()
+            set_columns((("Allocation site", 460, tk.W), ("Growth", 110, tk.E), ("Blocks +", 90, tk.E), ("Now", 110, tk.E)))
+            for site in summary.get("top_sites", []):
+                growth = ("+" if site["size_diff"] >= 0 else "-") + format_bytes(abs(site["size_diff"]))
+                detail_tree.insert("", tk.END, values=(site["location"], growth, f"{site['count_diff']:+d}", format_bytes(site["size"])))
+            detail_label.config(text=f"Traced now {format_bytes(summary['traced_current_bytes'])}, "
+                                     f"peak {format_bytes(summary['traced_peak_bytes'])}. Data: {summary['data_file']}")
+
+    def reload_results():
+        results_tree.delete(*results_tree.get_children())
+        results_by_item.clear()
+        for summary in profiler.list_results():
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(summary.get("started_at", 0)))
+            item = results_tree.insert("", tk.END, values=(when, summary["kind"], summary["label"], f"{summary['wall_seconds']:.3f}s"))
+            results_by_item[item] = summary
+        if results_by_item:
+            first_item = next(iter(results_by_item))
+            results_tree.selection_set(first_item)
+        else:
+            detail_label.config(text=f"No results yet. Use Diagnostics > Profile Next Operation. Results go to {profiler.get_profile_dir()}")
+
+    results_tree.bind("<<TreeviewSelect>>", show_detail)
+    sort_var.trace_add("write", lambda *_: show_detail())
+
+    button_frame = ttk.Frame(results_window)
+    button_frame.pack(pady=(0, 10))
+    ttk.Button(button_frame, text="Refresh", command=reload_results).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=results_window.destroy).pack(side=tk.LEFT, padx=5)
+    reload_results()
+
+
+def show_readiness_dialog(app, app_path):
+    app_name = app.apps_data[app_path]["name"]
+    check = readiness.get_check(app, app_path)
+
+    dialog = tk.Toplevel(app)
+    dialog.title(f"Readiness: {app_name}")
+    dialog.geometry("560x460")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make readiness window transient.", warning=True)
+
+    form = ttk.LabelFrame(dialog, text="Ready when", padding="10")
+    form.pack(fill=tk.X, padx=10, pady=(10, 5))
+    type_var = tk.StringVar(value=check["type"])
+    path_var = tk.StringVar(value=check["path"])
+    pattern_var = tk.StringVar(value=check["pattern"])
+    timeout_var = tk.StringVar(value=str(check["timeout"]))
+    for column, (value, text) in enumerate((("tcp", "Port accepts a connection"), ("http", "HTTP GET answers < 400"),
+                                             ("log", "Output line matches"))):
+        ttk.Radiobutton(form, text=text, value=value, variable=type_var).grid(row=0, column=column, sticky="w", padx=(0, 8))
+    ttk.Label(form, text="HTTP path:").grid(row=1, column=0, sticky="w", pady=(8, 2))
+    path_entry = ttk.Entry(form, textvariable=path_var)
+    path_entry.grid(row=1, column=1, columnspan=2, sticky="ew", pady=(8, 2))
+    ttk.Label(form, text="Log pattern (regex):").grid(row=2, column=0, sticky="w", pady=2)
+    pattern_entry = ttk.Entry(form, textvariable=pattern_var)
+    pattern_entry.grid(row=2, column=1, columnspan=2, sticky="ew", pady=2)
+    ttk.Label(form, text="Give up after (s):").grid(row=3, column=0, sticky="w", pady=2)
+    ttk.Spinbox(form, from_=1, to=600, textvariable=timeout_var, width=6).grid(row=3, column=1, sticky="w", pady=2)
+    form.columnconfigure(2, weight=1)
+
+    def update_fields(*_):
+        path_entry.config(state=tk.NORMAL if type_var.get() == "http" else tk.DISABLED)
+        pattern_entry.config(state=tk.NORMAL if type_var.get() == "log" else tk.DISABLED)
+
+    type_var.trace_add("write", update_fields)
+    update_fields()
+
+    history_frame = ttk.LabelFrame(dialog, text="Recent starts (time to ready)", padding="10")
+    history_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    samples = app.startup_history.samples(app_path)
+    stats = readiness.summarize(samples)
+    summary_text = (f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s over {stats['count']} start(s)." if stats
+                    else "No ready start recorded yet.")
+    ttk.Label(history_frame, text=summary_text, anchor="w").pack(fill=tk.X, pady=(0, 5))
+    history_tree = ttk.Treeview(history_frame, columns=("When", "Seconds", "Check"), show="headings", height=8)
+    for col, width, anchor in (("When", 180, tk.W), ("Seconds", 90, tk.E), ("Check", 80, tk.W)):
+        history_tree.heading(col, text=col)
+        history_tree.column(col, width=width, anchor=anchor, stretch=(col == "When"))
+    history_tree.pack(fill=tk.BOTH, expand=True)
+    for sample in reversed(samples):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample["at"]))
+        history_tree.insert("", tk.END, values=(when, f"{sample['seconds']:.2f}", sample["check"]))
+
+    def save():
+        try:
+            re.compile(pattern_var.get())
+            timeout = float(timeout_var.get())
+        except re.error as e:
+            messagebox.showerror("Readiness", f"The log pattern is not a valid regular expression:\n{e}", parent=dialog)
+            return
+        except ValueError:
+            messagebox.showerror("Readiness", "The timeout must be a number of seconds.", parent=dialog)
+            return
+        path = path_var.get().strip() or "/"
+        readiness.set_check(app, app_path, {
+            "type": type_var.get(), "path": path if path.startswith("/") else "/" + path,
+            "pattern": pattern_var.get(), "timeout": timeout,
+        })
+        app._log(f"Readiness check for '{app_name}' set to {readiness.describe_check(readiness.get_check(app, app_path))}.")
+        dialog.destroy()
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(0, 10))
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+
+def show_launch_policy_dialog(app, app_path):
+    app_name = app.apps_data[app_path]["name"]
+    policy = launch_policy.get_policy(app, app_path)
+
+    dialog = tk.Toplevel(app)
+    dialog.title(f"Launch Limits: {app_name}")
+    dialog.geometry("520x300")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make launch limits window transient.", warning=True)
+
+    form = ttk.LabelFrame(dialog, text="Applied on the next start (empty = no limit)", padding="10")
+    form.pack(fill=tk.X, padx=10, pady=(10, 5))
+    field_vars = {}
+    cpu_hint = ",".join(map(str, sorted(launch_policy.available_cpus())))
+    for row, (field, label, hint) in enumerate((
+            ("memory_mb", "Memory cap (MB):", "cgroup v2 memory.max if delegated, else RLIMIT_AS"),
+            ("cpus", "CPU cores:", f"e.g. 0-3,6 (available: {cpu_hint})"),
+            ("nice", "Nice level:", "0-19; higher yields to other processes"),
+            ("nofile", "Open-file limit:", "RLIMIT_NOFILE"))):
+        value = policy.get(field)
+        field_vars[field] = tk.StringVar(value="" if value is None else str(value))
+        ttk.Label(form, text=label).grid(row=row, column=0, sticky="w", pady=2)
+        ttk.Entry(form, textvariable=field_vars[field], width=14).grid(row=row, column=1, sticky="w", pady=2, padx=5)
+        ttk.Label(form, text=hint, foreground="gray").grid(row=row, column=2, sticky="w", pady=2)
+
+    status_label = ttk.Label(dialog, text=f"Current policy: {launch_policy.describe_policy(policy)}", anchor="w", wraplength=490)
+    status_label.pack(fill=tk.X, padx=10, pady=5)
+
+    def save():
+        new_policy = {}
+        try:
+            for field in ("memory_mb", "nice", "nofile"):
+                text = field_vars[field].get().strip()
+                new_policy[field] = int(text) if text else None
+            for field, label in (("memory_mb", "memory cap"), ("nofile", "open-file limit")):
+                if new_policy[field] is not None and new_policy[field] <= 0:
+                    raise ValueError(f"the {label} must be a positive number")
+            cpus_text = field_vars["cpus"].get().strip()
+            if cpus_text:
+                launch_policy.parse_cpu_list(cpus_text)
+            new_policy["cpus"] = cpus_text or None
+        except ValueError as e:
+            messagebox.showerror("Launch Limits", f"Invalid value: {e}", parent=dialog)
+            return
+        launch_policy.set_policy(app, app_path, new_policy)
+        warnings = launch_policy.prepare(new_policy, app_path, dry_run=True).warnings
+        app._log(f"Launch policy for '{app_name}' set to: {launch_policy.describe_policy(new_policy)}.")
+        if warnings:
+            messagebox.showwarning("Launch Limits", "Saved, but on this system:\n" + "\n".join(warnings), parent=dialog)
+        dialog.destroy()
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(5, 10))
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+
+def show_cluster_dialog(app, app_path):
+    app_name = app.apps_data[app_path]["name"]
+    settings = cluster.get_cluster(app, app_path)
+
+    dialog = tk.Toplevel(app)
+    dialog.title(f"Instances: {app_name}")
+    dialog.geometry("520x280")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make instances window transient.", warning=True)
+
+    form = ttk.LabelFrame(dialog, text="Applied on the next start", padding="10")
+    form.pack(fill=tk.X, padx=10, pady=(10, 5))
+    instances_var = tk.StringVar(value=str(settings["instances"]))
+    ttk.Label(form, text="Instances:").grid(row=0, column=0, sticky="w", pady=2)
+    ttk.Spinbox(form, from_=1, to=constants.CLUSTER_MAX_INSTANCES, textvariable=instances_var, width=6).grid(row=0, column=1, sticky="w", pady=2, padx=5)
+    ttk.Label(form, text="1 = a single process as usual", foreground="gray").grid(row=0, column=2, sticky="w", pady=2)
+    mode_var = tk.StringVar(value=settings["mode"])
+    ttk.Radiobutton(form, text="A PORT for each instance", variable=mode_var, value="ports").grid(row=1, column=0, columnspan=3, sticky="w", pady=2)
+    ttk.Radiobutton(form, text="One shared PORT (the app must listen with reusePort; Linux, Node 22.12+)",
+                    variable=mode_var, value="reuseport").grid(row=2, column=0, columnspan=3, sticky="w", pady=2)
+
+    ttk.Label(dialog, text="Each instance also gets INSTANCE_ID (0, 1, ...) and INSTANCE_COUNT. Start, stop and restart "
+                           "act on all instances at once; limits apply to each of them. With one shared PORT, a TCP or HTTP readiness "
+                           "check may be answered by another instance; a log check is per instance.",
+              anchor="w", wraplength=490).pack(fill=tk.X, padx=10, pady=5)
+
+    def save():
+        try:
+            instances = int(instances_var.get())
+            if not 1 <= instances <= constants.CLUSTER_MAX_INSTANCES:
+                raise ValueError(f"must be between 1 and {constants.CLUSTER_MAX_INSTANCES}")
+        except ValueError as e:
+            messagebox.showerror("Instances", f"Invalid number of instances: {e}", parent=dialog)
+            return
+        cluster.set_cluster(app, app_path, instances, mode_var.get())
+        app._log(f"'{app_name}' will run as {cluster.describe_cluster(cluster.get_cluster(app, app_path))} from its next start.")
+        port, source = port_registry.declared_port(app_path, app.apps_data[app_path].get("package_data"))
+        if instances > 1 and mode_var.get() == "ports" and source == "start script":
+            messagebox.showwarning("Instances", f"Saved, but the start script sets port {port}, which overrides each "
+                                   "instance's PORT, so the app will not start in this mode. Use one shared PORT or "
+                                   "take the port out of the start script.", parent=dialog)
+        dialog.destroy()
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(5, 10))
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+
+def show_proxy_routes_dialog(app):
+    dialog = tk.Toplevel(app)
+    dialog.title("Local Proxy Routes")
+    dialog.geometry("820x320")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make proxy routes window transient.", warning=True)
+
+    status_var = tk.StringVar()
+    ttk.Label(dialog, textvariable=status_var, anchor="w").pack(fill=tk.X, padx=10, pady=(10, 5))
+
+    tree_frame = ttk.Frame(dialog)
+    tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    columns = ("Route", "Ports", "Requests", "Errors", "WebSockets", "Avg", "p50", "p95", "Last")
+    routes_tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=8)
+    for col, width, stretch in (("Route", 220, True), ("Ports", 110, False), ("Requests", 70, False), ("Errors", 60, False),
+                                ("WebSockets", 80, False), ("Avg", 65, False), ("p50", 65, False), ("p95", 65, False),
+                                ("Last", 50, False)):
+        routes_tree.heading(col, text=col)
+        routes_tree.column(col, width=width, anchor=tk.W, stretch=stretch)
+    routes_tree.pack(fill=tk.BOTH, expand=True)
+    routes_tree.tag_configure("Stopped", foreground=constants.STATUS_VISUALS["Unknown"]["color"])
+
+    def format_ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+    def refresh():
+        if not dialog.winfo_exists():
+            return
+        port = app.local_proxy.port
+        status_var.set(f"Listening on port {port}: http://<route>.localhost:{port}/ or http://localhost:{port}/<route>/"
+                       if port is not None else "The local proxy is off (View > Local Proxy).")
+        rows = app.local_proxy.route_stats()
+        routes_tree.delete(*routes_tree.get_children())
+        for row in rows:
+            route_label = f"{row['route']}.localhost" if row["path"] else f"{row['route']} (not running)"
+            routes_tree.insert("", tk.END, values=(
+                route_label, ", ".join(map(str, row["ports"])) or "-", row["requests"], row["errors"], row["websockets"],
+                format_ms(row["avg"]), format_ms(row["p50"]), format_ms(row["p95"]), row["last_status"] or "-",
+            ), tags=() if row["path"] else ("Stopped",))
+        dialog.after(constants.PROXY_STATS_REFRESH_MS, refresh)
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(5, 10))
+    ttk.Button(button_frame, text="Reset Counters", command=app.local_proxy.reset_stats).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+    refresh()
+
+
+def show_dependencies_dialog(app, app_path):
+    app_name = app.apps_data[app_path]["name"]
+    others = sorted((path for path in app.apps_data if path != app_path), key=lambda p: app.apps_data[p]["name"].lower())
+    current = set(app_groups.get_dependencies(app, app_path))
+
+    dialog = tk.Toplevel(app)
+    dialog.title(f"Depends On: {app_name}")
+    dialog.geometry("420x380")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make dependencies window transient.", warning=True)
+
+    ttk.Label(dialog, text=f"Projects that must be ready before '{app_name}' is started as part of a group:",
+              anchor="w", wraplength=390).pack(fill=tk.X, padx=10, pady=(10, 5))
+    list_frame = ttk.Frame(dialog)
+    list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    dependencies_list = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, exportselection=False)
+    scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=dependencies_list.yview)
+    dependencies_list.config(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    dependencies_list.pack(fill=tk.BOTH, expand=True)
+    for index, path in enumerate(others):
+        dependencies_list.insert(tk.END, app.apps_data[path]["name"])
+        if path in current:
+            dependencies_list.selection_set(index)
+
+    def save():
+        selected = [others[index] for index in dependencies_list.curselection()]
+        app_groups.set_dependencies(app, app_path, selected)
+        try:
+            app_groups.compute_waves(app, app_groups.dependency_closure(app, [app_path]))
+        except app_groups.GroupError as e:
+            app_groups.set_dependencies(app, app_path, sorted(current))
+            messagebox.showerror("Depends On", f"These dependencies would create a {e}.", parent=dialog)
+            return
+        names = ", ".join(app.apps_data[path]["name"] for path in selected) or "nothing"
+        app._log(f"'{app_name}' now depends on {names}.")
+        dialog.destroy()
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(5, 10))
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+
+def show_task_cache_dialog(app, app_path, script_name):
+    app_name = app.apps_data[app_path]["name"]
+    settings = task_cache.get_task_settings(app, app_path, script_name)
+
+    dialog = tk.Toplevel(app)
+    dialog.title(f"Task Cache: {app_name} / {script_name}")
+    dialog.geometry("560x440")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make task cache window transient.", warning=True)
+
+    enabled_var = tk.BooleanVar(value=settings is not None)
+    ttk.Checkbutton(dialog, text=f"Reuse the result of '{script_name}' when its inputs have not changed",
+                    variable=enabled_var).pack(fill=tk.X, padx=10, pady=(10, 5))
+    form = ttk.LabelFrame(dialog, text="Globs, one per line (relative to the project; ** spans folders, !pattern excludes)", padding="10")
+    form.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    text_boxes = {}
+    for row, (field, label, defaults) in enumerate((
+            ("inputs", "Inputs:", constants.TASK_CACHE_DEFAULT_INPUTS),
+            ("outputs", "Outputs:", constants.TASK_CACHE_DEFAULT_OUTPUTS))):
+        ttk.Label(form, text=label).grid(row=row, column=0, sticky="nw", pady=2)
+        text_boxes[field] = tk.Text(form, height=5, width=50, wrap=tk.NONE)
+        text_boxes[field].grid(row=row, column=1, sticky="nsew", pady=2, padx=5)
+        text_boxes[field].insert("1.0", "\n".join(settings[field] if settings else defaults))
+        form.rowconfigure(row, weight=1)
+    form.columnconfigure(1, weight=1)
+    ttk.Label(dialog, text="The script text, the lockfile and the Node version are always part of the key. "
+                           "Long-running scripts (dev, start, serve, watch) are never cached.",
+              anchor="w", wraplength=530, foreground="gray").pack(fill=tk.X, padx=10)
+
+    stats_label = ttk.Label(dialog, anchor="w", wraplength=530)
+    stats_label.pack(fill=tk.X, padx=10, pady=5)
+
+    def refresh_stats():
+        stats = app.task_cache.stats(app_path, script_name)
+        stats_label.config(text=f"{stats['hits']} hit(s), {stats['misses']} miss(es), "
+                                f"{task_cache.format_seconds(stats['saved_seconds'])} saved; {stats['results']} result(s) "
+                                f"stored ({format_bytes(stats['bytes'])}). Whole cache: {format_bytes(app.task_cache.total_bytes())} "
+                                f"of {format_bytes(app.task_cache.max_bytes)}.")
+
+    def globs_of(field):
+        return [line.strip() for line in text_boxes[field].get("1.0", tk.END).splitlines() if line.strip()]
+
+    def save():
+        inputs, outputs = globs_of("inputs"), globs_of("outputs")
+        if enabled_var.get():
+            try:
+                if not inputs:
+                    raise task_cache.TaskCacheError("at least one input glob is needed")
+                task_cache.validate_globs(inputs + outputs)
+            except task_cache.TaskCacheError as e:
+                messagebox.showerror("Task Cache", f"Invalid globs: {e}", parent=dialog)
+                return
+            task_cache.set_task_settings(app, app_path, script_name, inputs, outputs)
+            app._log(f"Task cache on for '{app_name}' {script_name}: inputs {', '.join(inputs)}; outputs {', '.join(outputs) or 'none'}.")
+        else:
+            task_cache.set_task_settings(app, app_path, script_name, [], [])
+            app._log(f"Task cache off for '{app_name}' {script_name}.")
+        dialog.destroy()
+
+    def clear():
+        dropped = app.task_cache.clear(app_path, script_name)
+        app._log(f"Cleared {dropped} cached '{script_name}' result(s) of '{app_name}'.")
+        refresh_stats()
+
+    refresh_stats()
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(pady=(5, 10))
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Clear Results", command=clear).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+
+def show_groups_dialog(app):
+    project_paths = sorted(app.apps_data, key=lambda p: app.apps_data[p]["name"].lower())
+
+    dialog = tk.Toplevel(app)
+    dialog.title("App Groups")
+    dialog.geometry("640x420")
+    try:
+        dialog.transient(app)
+    except tk.TclError:
+        app._log("Could not make groups window transient.", warning=True)
+
+    groups_frame = ttk.LabelFrame(dialog, text="Groups", padding=5)
+    groups_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(10, 5), pady=10)
+    groups_list = tk.Listbox(groups_frame, exportselection=False, width=22)
+    groups_list.pack(fill=tk.BOTH, expand=True)
+
+    edit_frame = ttk.LabelFrame(dialog, text="Group", padding=5)
+    edit_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 10), pady=10)
+    name_row = ttk.Frame(edit_frame)
+    name_row.pack(fill=tk.X)
+    ttk.Label(name_row, text="Name:").pack(side=tk.LEFT)
+    name_var = tk.StringVar()
+    ttk.Entry(name_row, textvariable=name_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+    ttk.Label(edit_frame, text="Projects (their dependencies are started too):", anchor="w").pack(fill=tk.X, pady=(5, 0))
+    members_list = tk.Listbox(edit_frame, selectmode=tk.MULTIPLE, exportselection=False, height=10)
+    members_list.pack(fill=tk.BOTH, expand=True, pady=2)
+    for path in project_paths:
+        members_list.insert(tk.END, app.apps_data[path]["name"])
+    order_var = tk.StringVar()
+    ttk.Label(edit_frame, textvariable=order_var, anchor="w", wraplength=400).pack(fill=tk.X, pady=2)
+    state_var = tk.StringVar()
+    ttk.Label(edit_frame, textvariable=state_var, anchor="w").pack(fill=tk.X, pady=2)
+
+    def selected_group():
+        selection = groups_list.curselection()
+        return groups_list.get(selection[0]) if selection else None
+
+    def fill_groups(select=None):
+        groups_list.delete(0, tk.END)
+        for index, name in enumerate(sorted(app_groups.get_groups(app))):
+            groups_list.insert(tk.END, name)
+            if name == select:
+                groups_list.selection_set(index)
+        show_group()
+
+    def show_group(event=None):
+        name = selected_group()
+        members = set(app_groups.get_groups(app).get(name) or [])
+        name_var.set(name or "")
+        members_list.selection_clear(0, tk.END)
+        for index, path in enumerate(project_paths):
+            if path in members:
+                members_list.selection_set(index)
+        show_order()
+
+    def show_order(event=None):
+        members = [project_paths[index] for index in members_list.curselection()]
+        try:
+            waves = app_groups.compute_waves(app, app_groups.dependency_closure(app, members))
+            order_var.set(f"Start order: {app_groups.describe_waves(app, waves)}" if members else "")
+        except app_groups.GroupError as e:
+            order_var.set(f"Cannot be started: {e}.")
+
+    def refresh_state():
+        if not dialog.winfo_exists():
+            return
+        name = selected_group()
+        state_var.set(f"State: {app.group_runner.group_state(name)}" if name else "")
+        dialog.after(500, refresh_state)
+
+    def save():
+        name = name_var.get().strip()
+        members = [project_paths[index] for index in members_list.curselection()]
+        if not name or not members:
+            messagebox.showerror("App Groups", "A group needs a name and at least one project.", parent=dialog)
+            return
+        previous_name = selected_group()
+        if previous_name and previous_name != name:
+            app_groups.set_group(app, previous_name, [])
+        app_groups.set_group(app, name, members)
+        app._log(f"Group '{name}': {', '.join(app.apps_data[path]['name'] for path in members)}.")
+        fill_groups(select=name)
+        app._update_apps_list_display()
+
+    def delete():
+        name = selected_group()
+        if name and messagebox.askyesno("App Groups", f"Delete group '{name}'? Its projects are not affected.", parent=dialog):
+            app_groups.set_group(app, name, [])
+            fill_groups()
+            app._update_apps_list_display()
+
+    def new_group():
+        groups_list.selection_clear(0, tk.END)
+        show_group()
+
+    groups_list.bind("<<ListboxSelect>>", show_group)
+    members_list.bind("<<ListboxSelect>>", show_order)
+
+    button_frame = ttk.Frame(edit_frame)
+    button_frame.pack(fill=tk.X, pady=(5, 0))
+    ttk.Button(button_frame, text="New", command=new_group).pack(side=tk.LEFT, padx=2)
+    ttk.Button(button_frame, text="Save", command=save).pack(side=tk.LEFT, padx=2)
+    ttk.Button(button_frame, text="Delete", command=delete).pack(side=tk.LEFT, padx=2)
+    ttk.Button(button_frame, text="Start Group", command=lambda: selected_group() and app.group_runner.start_group(selected_group())).pack(side=tk.LEFT, padx=2)
+    ttk.Button(button_frame, text="Stop Group", command=lambda: selected_group() and app.group_runner.stop_group(selected_group())).pack(side=tk.LEFT, padx=2)
+    ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+    fill_groups()
+    refresh_state()
@@ -0,0 +1,334 @@
+# workspace_runner.py
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+
+import constants
+import metrics
+import process_engine
+from log_ingest import OutputIngestor
+
+
+class WorkspaceError(Exception):
+    pass
+
+
+_DEPENDENCY_FIELDS = ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies")
+
+
+def workspace_patterns(package_data):
+    """The root package.json's workspace globs; npm's list form or Yarn's {"packages": [...]} form."""
+    workspaces = (package_data or {}).get("workspaces")
+    if isinstance(workspaces, dict):
+        workspaces = workspaces.get("packages")
+    if not isinstance(workspaces, list):
+        return []
+    return [pattern for pattern in workspaces if isinstance(pattern, str) and pattern.strip()]
+
+
+def has_workspaces(package_data):
+    return bool(workspace_patterns(package_data))
+
+
+def find_workspace_packages(root_path, package_data):
+    """{package name: {'path', 'package_data'}} for every folder with a package.json matched by the globs.
+
+    A pattern starting with '!' excludes what it matches; node_modules is never searched.
+    """
+    root = Path(root_path).resolve()
+    included, excluded = set(), set()
+    for pattern in workspace_patterns(package_data):
+        target = excluded if pattern.startswith("!") else included
+        pattern = pattern.lstrip("!").strip().rstrip("/")
+        if pattern.startswith("./"):
+            pattern = pattern[2:]
+        if not pattern or Path(pattern).is_absolute() or ".." in Path(pattern).parts:
+            continue # Workspaces live inside the root.
+        for match in root.glob(pattern):
+            if "node_modules" in match.relative_to(root).parts:
+                continue
+            if match.is_dir() and (match / "package.json").is_file():
+                target.add(match)
+
+    packages = {}
+    for package_dir in sorted(included - excluded):
+        try:
+            with open(package_dir / "package.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise WorkspaceError(f"cannot read {package_dir / 'package.json'}: {e}")
+        if not isinstance(data, dict):
+            raise WorkspaceError(f"{package_dir / 'package.json'} is not a JSON object")
+        name = data.get("name") or package_dir.name
+        if name in packages:
+            raise WorkspaceError(f"two workspace packages are named '{name}'")
+        packages[name] = {"path": str(package_dir), "package_data": data}
+    return packages
+
+
+def package_scripts(package_data):
+    scripts = (package_data or {}).get("scripts")
+    return scripts if isinstance(scripts, dict) else {}
+
+
+def script_names(packages):
+    """Every script defined by at least one package, sorted."""
+    return sorted({name for info in packages.values() for name in package_scripts(info["package_data"])})
+
+
+def internal_dependencies(packages):
+    """{package name: set of the other workspace packages it depends on (any dependency field)}."""
+    graph = {}
+    for name, info in packages.items():
+        deps = set()
+        for field in _DEPENDENCY_FIELDS:
+            declared = info["package_data"].get(field)
+            if isinstance(declared, dict):
+                deps.update(dep for dep in declared if dep in packages and dep != name)
+        graph[name] = deps
+    return graph
+
+
+def check_acyclic(dependencies):
+    """Raises WorkspaceError naming the packages caught in a dependency cycle."""
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while remaining:
+        free = [name for name, deps in remaining.items() if not deps]
+        if not free:
+            raise WorkspaceError(f"dependency cycle between {', '.join(sorted(remaining))}")
+        for name in free:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(free)
+
+
+def transitive_dependencies(dependencies, name):
+    """Every package name depends on, directly or through others."""
+    found, pending = set(), list(dependencies[name])
+    while pending:
+        dep = pending.pop()
+        if dep not in found:
+            found.add(dep)
+            pending.extend(dependencies[dep])
+    return found
+
+
+class WorkspaceRun:
+    """One npm script run in every workspace package that defines it, dependencies first.
+
+    A package starts as soon as all the packages it depends on have succeeded, up to max_parallel at once,
+    so independent branches of the graph run side by side. The first failure stops the run: the packages
+    still running are terminated and nothing else is started. It is stored as the root project's process
+    object (pids, poll, wait, terminate, kill), so Stop works as it does for a single script.
+    """
+
+    def __init__(self, app, app_path, script_name, packages, max_parallel=None):
+        self.app = app
+        self.app_path = app_path
+        self.app_name = app.apps_data[app_path]["name"]
+        self.script_name = script_name
+        self.args = [constants.NPM_CMD, "run", script_name]
+        self.packages = packages
+        with_script = {name for name, info in packages.items() if script_name in package_scripts(info["package_data"])}
+        if not with_script:
+            raise WorkspaceError(f"no workspace package defines a '{script_name}' script")
+        # Packages without the script drop out of the graph, but the order they imply (a -> b -> c) is kept.
+        graph = internal_dependencies(packages)
+        self.dependencies = {name: (transitive_dependencies(graph, name) & with_script) - {name} for name in with_script}
+        check_acyclic(self.dependencies)
+        self.skipped = sorted(set(packages) - with_script)
+        self.max_parallel = max_parallel or constants.WORKSPACE_SCRIPT_MAX_PARALLEL or os.cpu_count() or 1
+        self.status = f"Running Script: {script_name} (workspaces)"
+        self.waiting = set(with_script)
+        self.handles = {} # Package name -> ProcessHandle, for every package started so far
+        self.finished = set()
+        self.succeeded = set()
+        self.failure = None # (package name, description) of the first failure
+        self.cancelled = False
+        self.started_at = None
+        self._package_started_at = {}
+        self._result = None
+
+    # --- Popen-like interface (any thread) ---
+    @property
+    def pids(self):
+        return [handle.pid for handle in list(self.handles.values()) if handle.pid and handle.returncode is None]
+
+    @property
+    def pid(self):
+        pids = self.pids
+        return pids[0] if pids else None
+
+    @property
+    def returncode(self):
+        if self._result is not None:
+            return self._result
+        # Once stopped, the run is over when its processes are, even before their output has been read to the end.
+        if self.cancelled and all(_has_exited(handle) for handle in list(self.handles.values())):
+            return next((handle.returncode for handle in self.handles.values() if handle.returncode), 0)
+        return None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for handle in list(self.handles.values()):
+            handle.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+        if self.returncode is None:
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def terminate(self):
+        self.cancelled = True
+        for handle in list(self.handles.values()):
+            handle.terminate()
+
+    def kill(self):
+        self.cancelled = True
+        for handle in list(self.handles.values()):
+            handle.kill()
+
+    # --- Scheduling (Tk thread) ---
+    def start(self):
+        self.started_at = time.monotonic()
+        counts = f"{len(self.waiting)} package(s), up to {self.max_parallel} at once"
+        if self.skipped:
+            counts += f"; {len(self.skipped)} without the script skipped"
+        self.app._log(f"Running '{self.script_name}' across the workspaces of '{self.app_name}' ({counts}).")
+        self.app._update_app_status(self.app_path, status=self.status, pid="-", process_obj=self)
+        self._start_ready()
+        self._report_progress()
+        self.app._update_action_buttons_state()
+
+    def _start_ready(self):
+        if self.cancelled or self.failure:
+            return
+        running = len(self.handles) - len(self.finished)
+        for name in sorted(self.waiting):
+            if running >= self.max_parallel:
+                break
+            if self.dependencies[name] <= self.succeeded:
+                self.waiting.discard(name)
+                self._spawn(name)
+                running += 1
+
+    def _spawn(self, name):
+        app = self.app
+        package_dir = self.packages[name]["path"]
+
+        def emit(stream_name, text, is_notice):
+            tag = f"{self.app_name} - {name}" + (" STDERR" if stream_name == "stderr" else "")
+            app._log(f"[{tag}] {text}", warning=(stream_name == "stderr" or is_notice))
+
+        ingestor = OutputIngestor(f"{self.app_path}#{name}", self.app_name, emit)
+
+        def on_started(handle):
+            if self.cancelled or self.failure:
+                handle.terminate() # Stopped while it was being spawned.
+            else:
+                app.after(0, lambda: self._publish_pid())
+
+        def on_lines(handle, stream_name, lines, timestamp):
+            ingestor.feed(stream_name, [line.strip() for line in lines])
+
+        def on_exit(handle, returncode):
+            ingestor.close()
+            app.after(0, lambda: self._package_exited(name, returncode, None))
+
+        def on_error(error):
+            app.after(0, lambda: self._package_exited(name, None, error))
+
+        self._package_started_at[name] = time.monotonic()
+        self.handles[name] = process_engine.get_engine().spawn(
+            self.args, package_dir, on_lines=on_lines, on_exit=on_exit, on_error=on_error, on_started=on_started,
+            metrics_kind=metrics.spawn_kind("Running script"))
+
+    def _package_exited(self, name, returncode, error):
+        self.finished.add(name)
+        seconds = time.monotonic() - self._package_started_at[name]
+        if error is None and returncode == 0:
+            self.succeeded.add(name)
+            self.app._log(f"'{self.app_name}' > {name}: '{self.script_name}' finished in {seconds:.1f}s.")
+        elif not self.cancelled and self.failure is None:
+            if isinstance(error, FileNotFoundError):
+                description = f"command '{self.args[0]}' not found"
+            elif error is not None:
+                description = f"could not start ({error})"
+            else:
+                description = f"exited with code {returncode}"
+            self.failure = (name, description)
+            self.app._log(f"'{self.app_name}' > {name}: '{self.script_name}' {description}; stopping the run.", error=True)
+            self._stop_running()
+
+        self._start_ready()
+        self._report_progress()
+        if len(self.finished) == len(self.handles) and (self.cancelled or self.failure or not self.waiting):
+            self._finish()
+        else:
+            self._publish_pid()
+
+    def _stop_running(self):
+        # npm runs the script through a shell; its children are collected first so none is left behind.
+        import psutil # Imported on first use to keep it off the startup path.
+        for name, handle in self.handles.items():
+            if name in self.finished or handle.returncode is not None:
+                continue
+            children = []
+            if handle.pid:
+                try:
+                    children = psutil.Process(handle.pid).children(recursive=True)
+                except psutil.Error:
+                    pass
+            handle.terminate()
+            for child in children:
+                try: child.terminate()
+                except psutil.Error: pass
+
+    def _publish_pid(self):
+        app_data = self.app.apps_data.get(self.app_path)
+        if app_data is not None and app_data.get("process") is self and app_data.get("status") == self.status:
+            self.app._update_app_status(self.app_path, pid=self.pid or "-")
+
+    def _report_progress(self):
+        total = len(self.dependencies)
+        running = sorted(name for name in self.handles if name not in self.finished)
+        text = f"'{self.app_name}' {self.script_name}: {len(self.succeeded)}/{total} packages done"
+        if running:
+            text += f", running {', '.join(running)}"
+        self.app.update_status_bar(text)
+
+    def _finish(self):
+        seconds = time.monotonic() - self.started_at
+        self._result = 1 if self.failure else next((h.returncode for h in self.handles.values() if h.returncode), 0)
+        app_data = self.app.apps_data.get(self.app_path)
+        if app_data is None:
+            return
+        is_current = app_data.get("process") is self
+        if self.cancelled or not is_current or app_data.get("status") == "Stopping...":
+            self.app._log(f"'{self.app_name}' workspace run of '{self.script_name}' was stopped by manager.")
+        elif self.failure:
+            name, description = self.failure
+            not_run = sorted(self.waiting)
+            self.app._log(f"'{self.app_name}' workspace run of '{self.script_name}' failed after {seconds:.1f}s: "
+                          f"{name} {description}; {len(self.succeeded)} succeeded"
+                          + (f", not run: {', '.join(not_run)}" if not_run else "") + ".", error=True)
+            self.app._update_app_status(self.app_path, status="Error (Script)")
+        else:
+            self.app._log(f"'{self.app_name}' workspace run of '{self.script_name}' completed: "
+                          f"{len(self.succeeded)} package(s) in {seconds:.1f}s.")
+            self.app._update_app_status(self.app_path, status="Installed")
+        if is_current:
+            self.app._update_app_status(self.app_path, pid="-", process_obj=None)
+        self.app.update_status_bar(f"'{self.app_name}' {self.script_name} (workspaces) finished.")
+        self.app._update_action_buttons_state()
+
+
+def _has_exited(handle):
+    try:
+        handle.wait(0)
+    except subprocess.TimeoutExpired:
+        return False
+    return True